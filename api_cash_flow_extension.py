@@ -8,16 +8,47 @@ ENHANCED with advanced filtering capabilities:
 - Period-based filtering (?filter=period&days=90)
 - New convenience endpoints
 - Enhanced response metadata
+- Cash flow ladder (/api/v1/bond/cashflow/ladder): monthly, quarterly or
+  custom buckets with coupon / principal split and cumulative totals,
+  streamed as NDJSON or CSV on request
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 import logging
 from datetime import datetime
 
-from xtrillion_cash_flow_calculator import calculate_bond_cash_flows
+from portfolio_streaming import stream_format, NDJSON_MIMETYPE, CSV_MIMETYPE
+from cash_flow_ladder import ladder_ndjson, ladder_csv
 
 logger = logging.getLogger(__name__)
 
+
+def calculate_bond_cash_flows(*args, **kwargs):
+    """xtrillion_cash_flow_calculator.calculate_bond_cash_flows, imported on the first cash flow request."""
+    from xtrillion_cash_flow_calculator import calculate_bond_cash_flows as calculate
+    return calculate(*args, **kwargs)
+
+def _validate_bonds(bonds) -> str:
+    """Error message for an invalid bonds list ('' when valid); nominals are converted to float in place"""
+    if not bonds or not isinstance(bonds, list):
+        return "bonds must be a non-empty list"
+    
+    for i, bond in enumerate(bonds):
+        if not isinstance(bond, dict):
+            return f"Bond {i+1} must be an object"
+        
+        required_fields = ['description', 'nominal']
+        for field in required_fields:
+            if field not in bond:
+                return f"Bond {i+1} missing required field: {field}"
+        
+        try:
+            bond['nominal'] = float(bond['nominal'])
+        except (ValueError, TypeError):
+            return f"Bond {i+1} nominal must be a number"
+    
+    return ''
+
 def add_cash_flow_endpoints(app: Flask):
     """Add ENHANCED cash flow endpoints with filtering to existing Flask app"""
     
@@ -34,23 +65,9 @@ def add_cash_flow_endpoints(app: Flask):
                 return jsonify({"error": "Missing required field: bonds", "status": "error"}), 400
             
             bonds = data['bonds']
-            if not bonds or not isinstance(bonds, list):
-                return jsonify({"error": "bonds must be a non-empty list", "status": "error"}), 400
-            
-            # Validate each bond
-            for i, bond in enumerate(bonds):
-                if not isinstance(bond, dict):
-                    return jsonify({"error": f"Bond {i+1} must be an object", "status": "error"}), 400
-                
-                required_fields = ['description', 'nominal']
-                for field in required_fields:
-                    if field not in bond:
-                        return jsonify({"error": f"Bond {i+1} missing required field: {field}", "status": "error"}), 400
-                
-                try:
-                    bond['nominal'] = float(bond['nominal'])
-                except (ValueError, TypeError):
-                    return jsonify({"error": f"Bond {i+1} nominal must be a number", "status": "error"}), 400
+            bonds_error = _validate_bonds(bonds)
+            if bonds_error:
+                return jsonify({"error": bonds_error, "status": "error"}), 400
             
             # Get parameters
             context = data.get('context', request.args.get('context', 'portfolio'))
@@ -186,4 +203,79 @@ def add_cash_flow_endpoints(app: Flask):
             logger.error(f"Error in period cash flow endpoint: {e}")
             return jsonify({"error": "Internal server error", "status": "error"}), 500
 
+    @app.route('/api/v1/bond/cashflow/ladder', methods=['POST'])
+    def calculate_cash_flow_ladder():
+        """
+        Time-bucketed cash flow ladder and projected income
+        
+        Body:
+        - bonds: [{description, nominal}, ...]
+        - bucket: month (default), quarter or custom
+        - edges: custom only - ascending days from settlement or YYYY-MM-DD dates
+        - horizon_years: month / quarter only (default 30)
+        - settlement_date: YYYY-MM-DD (default prior month end)
+        
+        ?stream=ndjson|csv (or Accept: application/x-ndjson / text/csv) streams
+        one row per bucket followed by the summary.
+        """
+        try:
+            if not request.is_json:
+                return jsonify({"error": "Content-Type must be application/json", "status": "error"}), 400
+            
+            data = request.get_json()
+            
+            if 'bonds' not in data:
+                return jsonify({"error": "Missing required field: bonds", "status": "error"}), 400
+            
+            bonds = data['bonds']
+            bonds_error = _validate_bonds(bonds)
+            if bonds_error:
+                return jsonify({"error": bonds_error, "status": "error"}), 400
+            
+            settlement_date = data.get('settlement_date', request.args.get('settlement_date'))
+            bucketing = data.get('bucket', request.args.get('bucket', 'month'))
+            edges = data.get('edges')
+            horizon_years = data.get('horizon_years', request.args.get('horizon_years', 30))
+            
+            if settlement_date:
+                try:
+                    datetime.strptime(settlement_date, "%Y-%m-%d")
+                except ValueError:
+                    return jsonify({"error": "settlement_date must be in YYYY-MM-DD format", "status": "error"}), 400
+            
+            try:
+                horizon_years = int(horizon_years)
+            except (ValueError, TypeError):
+                return jsonify({"error": "horizon_years must be a valid integer", "status": "error"}), 400
+            
+            if edges is not None and not isinstance(edges, list):
+                return jsonify({"error": "edges must be a list", "status": "error"}), 400
+            
+            from xtrillion_cash_flow_calculator import XTrillionCashFlowCalculator
+            calculator = XTrillionCashFlowCalculator(settlement_date)
+            try:
+                ladder = calculator.cash_flow_ladder(bonds, bucketing, edges, horizon_years)
+            except ValueError as e:
+                return jsonify({"error": str(e), "status": "error"}), 400
+            
+            logger.info(f"GA10 Enhanced: Ladder for {len(bonds)} bonds, {len(ladder.labels)} {bucketing} buckets")
+            
+            streaming = stream_format(request.headers.get('Accept'), request.args.get('stream'))
+            if streaming == 'csv':
+                return Response(stream_with_context(ladder_csv(ladder)), mimetype=CSV_MIMETYPE)
+            if streaming == 'ndjson':
+                trailer = lambda summary: {"summary": summary, "status": "success", "api_version": "v1"}
+                return Response(stream_with_context(ladder_ndjson(ladder, trailer)), mimetype=NDJSON_MIMETYPE)
+            
+            return jsonify({
+                "ladder": list(ladder.rows()),
+                "summary": ladder.summary(),
+                "status": "success",
+                "api_version": "v1"
+            })
+            
+        except Exception as e:
+            logger.error(f"Error in cash flow ladder endpoint: {e}")
+            return jsonify({"error": "Internal server error", "status": "error"}), 500
+
     logger.info("✅ GA10 Enhanced cash flow endpoints with filtering added successfully")
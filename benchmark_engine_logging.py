@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: cost of engine logging per bond, before and after quiet mode.
+
+before: ~40 eager f-string logger.info calls per bond (the old engine trace)
+after:  the same calls as lazy %-style logger.debug, plus one sampled
+        bond_summary record at INFO
+
+Records go to a NullHandler-style sink so only formatting/dispatch is timed.
+With QuantLib installed the real engine is also timed at INFO and DEBUG.
+
+Usage: python benchmark_engine_logging.py [bonds]
+"""
+
+import io
+import os
+import sys
+import time
+import logging
+import statistics
+from datetime import date
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from engine_logging import log_bond_summary, set_summary_sample_rate, SUMMARY_LOGGER_NAME
+
+MESSAGES_PER_BOND = 40
+
+
+def _sink_logger(name):
+    """Logger at INFO writing to an in-memory stream."""
+    log = logging.getLogger(name)
+    log.handlers = [logging.StreamHandler(io.StringIO())]
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    return log
+
+
+def eager_bond(log, isin, conventions, ytm, duration):
+    """The old pattern: every message formatted and emitted at INFO."""
+    log_prefix = f"[CALC_ENGINE ISIN: {isin}, T+0]"
+    for _ in range(MESSAGES_PER_BOND // 4):
+        log.info(f"{log_prefix} Final conventions: {conventions}")
+        log.info(f"{log_prefix} Yield calculated (decimal): {ytm:.6f} ({ytm*100:.5f}%)")
+        log.info(f"{log_prefix} Duration: {duration:.5f} years (no scaling needed)")
+        log.info(f"{log_prefix} 📊 Results: Yield={ytm}, Duration={duration}")
+
+
+def lazy_bond(log, isin, conventions, ytm, duration):
+    """Quiet mode: lazy DEBUG trace plus one summary record."""
+    log_prefix = f"[CALC_ENGINE ISIN: {isin}, T+0]"
+    for _ in range(MESSAGES_PER_BOND // 4):
+        log.debug("%s Final conventions: %s", log_prefix, conventions)
+        log.debug("%s Yield calculated (decimal): %.6f (%.5f%%)", log_prefix, ytm, ytm * 100)
+        log.debug("%s Duration: %.5f years (no scaling needed)", log_prefix, duration)
+        log.debug("%s 📊 Results: Yield=%s, Duration=%s", log_prefix, ytm, duration)
+    log_bond_summary({'isin': isin, 'successful': True, 'instrument_cached': True,
+                      'stage_timings_ms': {'yield': 0.2}, 'stages_skipped': []}, 1.0)
+
+
+def time_per_bond(fn, log, bonds, repeats=5):
+    """Best-of-repeats microseconds per bond."""
+    conventions = {'frequency': 'Semiannual', 'day_count': 'ActualActual.Bond',
+                   'business_day_convention': 'Following', 'end_of_month': True}
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for i in range(bonds):
+            fn(log, f"US{i:010d}", conventions, 0.048712345, 16.35421)
+        runs.append((time.perf_counter() - start) / bonds * 1e6)
+    return min(runs)
+
+
+def benchmark_logging(bonds=2000):
+    log = _sink_logger('benchmark.engine')
+    _sink_logger(SUMMARY_LOGGER_NAME)
+    results = {'eager_info_us': time_per_bond(eager_bond, log, bonds)}
+    for rate in (1.0, 0.1, 0.0):
+        set_summary_sample_rate(rate)
+        results[f'lazy_debug_sample_{rate}_us'] = time_per_bond(lazy_bond, log, bonds)
+    set_summary_sample_rate(1.0)
+    return results
+
+
+def benchmark_engine(bonds=200):
+    """Real engine per-bond time with the engine logger at INFO (quiet) and DEBUG (trace)."""
+    try:
+        import QuantLib as ql
+        import google_analysis10 as ga10
+    except ImportError as e:
+        print(f"⏭️ Engine benchmark skipped, QuantLib not available: {e}")
+        return None
+
+    conventions = {'frequency': 'Semiannual', 'day_count': 'ActualActual.Bond',
+                   'business_day_convention': 'Following', 'end_of_month': False}
+    handle = ql.YieldTermStructureHandle(ql.FlatForward(ql.Date(30, 6, 2025), 0.03, ql.Actual365Fixed()))
+    engine_log = _sink_logger('google_analysis10')
+    results = {}
+    for level in (logging.DEBUG, logging.INFO):
+        engine_log.setLevel(level)
+        timings = []
+        for i in range(bonds):
+            start = time.perf_counter()
+            ga10.calculate_bond_metrics_with_conventions_using_shared_engine(
+                isin=None, coupon=3.0, maturity_date='2052-08-15', price=71.0 + i * 0.01,
+                trade_date=date(2025, 6, 30), treasury_handle=handle, default_conventions=conventions
+            )
+            timings.append((time.perf_counter() - start) * 1e6)
+        results[f'engine_{logging.getLevelName(level).lower()}_median_us'] = statistics.median(timings)
+    return results
+
+
+if __name__ == "__main__":
+    bonds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"🧪 Logging cost per bond ({MESSAGES_PER_BOND} messages, {bonds} bonds)")
+    logging_results = benchmark_logging(bonds)
+    for name, value in logging_results.items():
+        print(f"   {name:<28} {value:8.2f} µs")
+    speedup = logging_results['eager_info_us'] / logging_results['lazy_debug_sample_1.0_us']
+    print(f"   ✅ Quiet mode is {speedup:.1f}x cheaper per bond")
+
+    engine_results = benchmark_engine(min(bonds, 200))
+    if engine_results:
+        print("🧪 Engine per-bond time")
+        for name, value in engine_results.items():
+            print(f"   {name:<28} {value:8.2f} µs")
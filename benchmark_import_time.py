@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the API module graph.
+
+Runs `python -X importtime -c "import google_analysis10_api"` in a fresh
+interpreter (with STARTUP_WARM_ON_IMPORT=0, so only imports are timed, not
+the warmup pipeline), reports the slowest modules and fails when:
+
+- the module's cumulative import time exceeds the budget
+  (--budget-ms, default IMPORT_TIME_BUDGET_MS or 2500)
+- a module that must stay off the hot path was imported
+  (pandas, google.cloud.storage - both load lazily on first use)
+
+The best of --repeat runs is compared, to ride out a cold page cache.
+
+Usage: python benchmark_import_time.py [--module M] [--budget-ms N] [--repeat N] [--top N]
+Exit status is 1 when the budget is blown (2 if the import fails), so CI can gate on it.
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+DEFAULT_MODULE = 'google_analysis10_api'
+DEFAULT_BUDGET_MS = float(os.environ.get('IMPORT_TIME_BUDGET_MS', 2500))
+FORBIDDEN_MODULES = ('pandas', 'google.cloud.storage')
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int, int]]:
+    """module -> (self µs, cumulative µs, nesting depth) from -X importtime output."""
+    modules = {}
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.setdefault(name, (int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return modules
+
+
+def measure_imports(module: str = DEFAULT_MODULE) -> Dict[str, Tuple[int, int, int]]:
+    """Import module in a fresh interpreter and return its parsed import timings."""
+    env = dict(os.environ, STARTUP_WARM_ON_IMPORT='0')
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'unknown error'
+        raise RuntimeError(f"import {module} failed: {error}")
+    return parse_importtime(completed.stderr)
+
+
+def check_budget(modules: Dict[str, Tuple[int, int, int]], module: str, budget_ms: float,
+                 forbidden=FORBIDDEN_MODULES) -> List[str]:
+    """Budget violations (empty when the import graph is within budget)."""
+    failures = []
+    total_ms = modules[module][1] / 1000.0
+    if total_ms > budget_ms:
+        failures.append(f"import {module} took {total_ms:.0f}ms (budget {budget_ms:.0f}ms)")
+    for name in forbidden:
+        if name in modules:
+            failures.append(f"{name} imported at startup ({modules[name][1] / 1000.0:.0f}ms cumulative)")
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--module', default=DEFAULT_MODULE)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args(argv)
+
+    print(f"🧪 Import time for {args.module} (best of {args.repeat}, budget {args.budget_ms:.0f}ms)")
+    try:
+        runs = [measure_imports(args.module) for _ in range(max(1, args.repeat))]
+    except RuntimeError as e:
+        print(f"   ❌ {e}")
+        return 2
+    modules = min(runs, key=lambda run: run[args.module][1])
+
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us, _) in slowest:
+        print(f"   {name:<45} self {self_us / 1000.0:8.1f}ms  cumulative {cumulative_us / 1000.0:8.1f}ms")
+
+    total_ms = modules[args.module][1] / 1000.0
+    failures = check_budget(modules, args.module, args.budget_ms)
+    if failures:
+        for failure in failures:
+            print(f"   ❌ {failure}")
+        return 1
+    print(f"   ✅ {total_ms:.0f}ms across {len(modules)} modules")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
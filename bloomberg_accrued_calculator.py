@@ -9,21 +9,128 @@ per million for validation benchmarking against enhanced QuantLib calculations.
 INPUT: quantlib_project_v3/bloomberg_index.db (12,343 bonds)
 OUTPUT: New table bloomberg_accrued_benchmarks with calculated accrued interest
 TARGET: Create 5,961+ validation benchmarks for google_analysis9 validation
+
+Columnar: only the needed all_bonds columns are selected, in chunks of
+chunk_size rows; the MV/par differential is one array expression per chunk,
+coupons are parsed once per distinct description, and the benchmark table
+is written with a single executemany in one transaction.
 """
 
 import sqlite3
-import pandas as pd
+import time
 import numpy as np
 import re
 from datetime import datetime, date
 import logging
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List, Iterator
 # Note: QuantLib import removed since we're using Bloomberg differential calculation
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# all_bonds columns by position. The table has both 'par val' (6) and 'par_val' (12),
+# identical; names are resolved from PRAGMA table_info so only these are selected.
+SOURCE_COLUMNS = {
+    'isin': 0,
+    'description': 1,
+    'price': 3,
+    'ytw': 4,
+    'mv_usd': 7,          # 'mv (usd)'
+    'weight': 8,
+    'oas': 9,
+    'rating': 10,         # 'index rating (string)'
+    'country': 11,
+    'par_val': 12,        # the cleaner of the two par columns
+    'ticker': 13,
+    'maturity': 15,
+}
+
+BENCHMARK_TABLE = "bloomberg_accrued_benchmarks"
+
+# Output columns and their SQLite types, in table order
+BENCHMARK_COLUMNS = [
+    ('isin', 'TEXT'),
+    ('description', 'TEXT'),
+    ('coupon', 'REAL'),
+    ('maturity', 'TEXT'),
+    ('price', 'REAL'),
+    ('mv_usd', 'REAL'),
+    ('par_val', 'REAL'),
+    ('bloomberg_differential_per_million', 'REAL'),
+    ('settlement_date', 'TEXT'),
+    ('calculation_method', 'TEXT'),
+    ('calculation_timestamp', 'TEXT'),
+    ('country', 'TEXT'),
+    ('ticker', 'TEXT'),
+    ('rating', 'TEXT'),
+    ('ytw', 'REAL'),
+    ('oas', 'REAL'),
+    ('weight', 'REAL'),
+]
+
+DEFAULT_CHUNK_SIZE = 50000
+
+FRACTION_MAP = {
+    '⅛': 0.125, '¼': 0.25, '⅜': 0.375, '½': 0.5,
+    '⅝': 0.625, '¾': 0.75, '⅞': 0.875,
+    '1/8': 0.125, '1/4': 0.25, '3/8': 0.375, '1/2': 0.5,
+    '5/8': 0.625, '3/4': 0.75, '7/8': 0.875
+}
+
+# Pattern to match coupon rates like "10 ¾" or "3.375" or "6.5"
+COUPON_PATTERNS = [
+    # Integer + fraction (e.g., "10 ¾", "6 ½")
+    re.compile(r'(\d+)\s*([⅛¼⅜½⅝¾⅞]|\d/\d)'),
+    # Decimal number (e.g., "3.375", "6.5")
+    re.compile(r'(\d+\.\d+)'),
+    # Just integer (e.g., "5", "10")
+    re.compile(r'(\d+)')
+]
+
+
+def _float_column(values: List[Any]) -> np.ndarray:
+    """float64 array from SQLite values; NULL and non-numeric values become NaN"""
+    try:
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        column = np.full(len(values), np.nan)
+        for i, value in enumerate(values):
+            try:
+                column[i] = float(value)
+            except (TypeError, ValueError):
+                pass
+        return column
+
+
+def _optional(values: List[Any]) -> List[Any]:
+    """Values with NaN mapped to None (NULL)"""
+    return [None if isinstance(v, float) and v != v else v for v in values]
+
+
+class BenchmarkTable:
+    """Benchmark rows as columns (lists in BENCHMARK_COLUMNS order)."""
+
+    def __init__(self):
+        self.columns: Dict[str, List[Any]] = {name: [] for name, _ in BENCHMARK_COLUMNS}
+
+    def extend(self, chunk: Dict[str, List[Any]]):
+        for name, values in chunk.items():
+            self.columns[name].extend(values)
+
+    def __len__(self) -> int:
+        return len(self.columns['isin'])
+
+    def rows(self) -> Iterator[Tuple[Any, ...]]:
+        """Row tuples for executemany"""
+        return zip(*(self.columns[name] for name, _ in BENCHMARK_COLUMNS))
+
+    def to_dataframe(self):
+        """pandas DataFrame of the benchmarks (pandas imported on use)"""
+        import pandas as pd
+        return pd.DataFrame(self.columns, columns=[name for name, _ in BENCHMARK_COLUMNS])
+
+
 class BloombergAccruedCalculator:
     """
     Calculate Bloomberg-style accrued interest for validation benchmarks
@@ -40,7 +147,9 @@ class BloombergAccruedCalculator:
             "maturity_parsed": 0,
             "accrued_calculated": 0,
             "calculation_errors": 0,
-            "validation_ready": 0
+            "validation_ready": 0,
+            "elapsed_seconds": None,
+            "bonds_per_second": None
         }
         
         logger.info(f"🏦 Bloomberg Differential Calculator initialized")
@@ -69,31 +178,13 @@ class BloombergAccruedCalculator:
             return None
         
         try:
-            # Common fraction mappings
-            fraction_map = {
-                '⅛': 0.125, '¼': 0.25, '⅜': 0.375, '½': 0.5,
-                '⅝': 0.625, '¾': 0.75, '⅞': 0.875,
-                '1/8': 0.125, '1/4': 0.25, '3/8': 0.375, '1/2': 0.5,
-                '5/8': 0.625, '3/4': 0.75, '7/8': 0.875
-            }
-            
-            # Pattern to match coupon rates like "10 ¾" or "3.375" or "6.5"
-            patterns = [
-                # Integer + fraction (e.g., "10 ¾", "6 ½")
-                r'(\d+)\s*([⅛¼⅜½⅝¾⅞]|\d/\d)',
-                # Decimal number (e.g., "3.375", "6.5")
-                r'(\d+\.\d+)',
-                # Just integer (e.g., "5", "10")
-                r'(\d+)'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, description)
+            for pattern in COUPON_PATTERNS:
+                match = pattern.search(description)
                 if match:
                     if len(match.groups()) == 2:  # Integer + fraction
                         integer_part = float(match.group(1))
                         fraction_part = match.group(2)
-                        fraction_value = fraction_map.get(fraction_part, 0)
+                        fraction_value = FRACTION_MAP.get(fraction_part, 0)
                         return integer_part + fraction_value
                     else:  # Decimal or integer
                         return float(match.group(1))
@@ -128,206 +219,156 @@ class BloombergAccruedCalculator:
             logger.debug(f"Error calculating Bloomberg differential: {e}")
             return None
 
-    def process_all_bonds(self) -> pd.DataFrame:
+    def _source_column_names(self, conn: sqlite3.Connection) -> Dict[str, str]:
+        """SOURCE_COLUMNS positions -> actual all_bonds column names"""
+        names = [row[1] for row in conn.execute("PRAGMA table_info(all_bonds)")]
+        return {field: names[index] for field, index in SOURCE_COLUMNS.items()}
+
+    def process_all_bonds(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> BenchmarkTable:
         """
         Process all bonds from bloomberg_index.db and calculate Bloomberg differential
+        
+        Rows with a missing MV or a missing/zero par are counted as calculation
+        errors and left out.
         """
         logger.info("📊 Loading bonds from bloomberg_index.db...")
         
-        # Load data
         conn = sqlite3.connect(self.source_db_path)
-        df = pd.read_sql_query("SELECT * FROM all_bonds", conn)
-        conn.close()
-        
-        self.stats["total_bonds"] = len(df)
-        logger.info(f"   Loaded {len(df):,} bonds")
-        
-        # Handle duplicate columns by using specific column indices
-        # We have both 'par val' (index 6) and 'par_val' (index 12) - they're identical
-        # We have 'mv (usd)' (index 7)
-        logger.info("   Using column indices to avoid duplicate names")
-        
-        # Process each bond
-        results = []
-        
-        for idx, row in df.iterrows():
-            if (idx + 1) % 1000 == 0:
-                logger.info(f"   Progress: {idx + 1:,}/{len(df):,} bonds processed")
+        try:
+            source = self._source_column_names(conn)
+            total = conn.execute("SELECT COUNT(*) FROM all_bonds").fetchone()[0]
+            self.stats["total_bonds"] = total
+            logger.info(f"   {total:,} bonds, selecting {len(source)} columns")
             
-            bond_result = self._process_single_bond_by_index(row, df.columns)
-            if bond_result:
-                results.append(bond_result)
-        
-        # Create results DataFrame
-        results_df = pd.DataFrame(results)
+            select = ', '.join('"' + name.replace('"', '""') + '"' for name in source.values())
+            cursor = conn.execute(f"SELECT {select} FROM all_bonds")
+            fields = list(source)
+            
+            results = BenchmarkTable()
+            coupons: Dict[Any, Optional[float]] = {}
+            timestamp = datetime.now().isoformat()
+            started = time.time()
+            processed = 0
+            while True:
+                rows = cursor.fetchmany(max(1, chunk_size))
+                if not rows:
+                    break
+                chunk = dict(zip(fields, (list(column) for column in zip(*rows))))
+                results.extend(self._process_chunk(chunk, coupons, timestamp))
+                processed += len(rows)
+                elapsed = max(time.time() - started, 1e-9)
+                logger.info(f"   Progress: {processed:,}/{total:,} bonds ({processed / elapsed:,.0f} bonds/s)")
+        finally:
+            conn.close()
         
-        # Log statistics
-        self.stats["validation_ready"] = len(results_df)
-        logger.info(f"✅ Processing complete:")
+        elapsed = time.time() - started
+        self.stats["validation_ready"] = len(results)
+        self.stats["elapsed_seconds"] = round(elapsed, 3)
+        self.stats["bonds_per_second"] = round(processed / elapsed, 1) if elapsed > 0 else None
+        logger.info(f"✅ Processing complete in {elapsed:.2f}s:")
         logger.info(f"   Total bonds: {self.stats['total_bonds']:,}")
         logger.info(f"   MV/Par available: {self.stats['coupon_parsed']:,}")
         logger.info(f"   Valid calculations: {self.stats['accrued_calculated']:,}")
         logger.info(f"   Calculation errors: {self.stats['calculation_errors']:,}")
         logger.info(f"   Ready for validation: {self.stats['validation_ready']:,}")
         
-        return results_df
+        return results
 
-    def _process_single_bond_by_index(self, row, columns) -> Optional[Dict[str, Any]]:
-        """Process a single bond row using column indices to avoid duplicate names"""
-        try:
-            # Use column indices to avoid duplicate column name issues
-            isin = row.iloc[0]  # 'isin'
-            description = row.iloc[1]  # 'description'
-            price = row.iloc[3]  # 'price'
-            mv_usd = row.iloc[7]  # 'mv (usd)'
-            par_val = row.iloc[12]  # 'par_val' (use the cleaner column name)
-            country = row.iloc[11]  # 'country'
-            ticker = row.iloc[13]  # 'ticker'
-            maturity = row.iloc[15]  # 'maturity'
-            ytw = row.iloc[4]  # 'ytw'
-            oas = row.iloc[9]  # 'oas'
-            weight = row.iloc[8]  # 'weight'
-            rating = row.iloc[10]  # 'index rating (string)'
-            
-            if pd.isna(mv_usd) or pd.isna(par_val) or par_val == 0:
-                self.stats["calculation_errors"] += 1
-                return None
-            
-            self.stats["coupon_parsed"] += 1  # Reusing stat for "data available"
-            
-            # Calculate Bloomberg differential using your formula
-            bloomberg_differential = self.calculate_bloomberg_differential(mv_usd, par_val)
-            if bloomberg_differential is None:
-                self.stats["calculation_errors"] += 1
-                return None
-            
-            self.stats["accrued_calculated"] += 1
-            
-            # Extract coupon for reference (optional)
-            coupon = self.extract_coupon_from_description(description)
-            
-            return {
-                'isin': isin,
-                'description': description,
-                'coupon': coupon,
-                'maturity': maturity,
-                'price': price,
-                'mv_usd': mv_usd,
-                'par_val': par_val,
-                'bloomberg_differential_per_million': bloomberg_differential,
-                'settlement_date': self.settlement_date,
-                'calculation_method': 'bloomberg_mv_par_differential',
-                'calculation_timestamp': datetime.now().isoformat(),
-                'country': country,
-                'ticker': ticker,
-                'rating': str(rating).replace('(', '').replace(')', '') if not pd.isna(rating) else '',
-                'ytw': ytw if not pd.isna(ytw) else None,
-                'oas': oas if not pd.isna(oas) else None,
-                'weight': weight if not pd.isna(weight) else None
-            }
-            
-        except Exception as e:
-            self.stats["calculation_errors"] += 1
-            logger.debug(f"Error processing bond: {e}")
-            return None
-
-    def _process_single_bond(self, row) -> Optional[Dict[str, Any]]:
-        """Process a single bond row using Bloomberg differential calculation"""
-        try:
-            isin = row.get('isin')
-            description = row.get('description', '')
-            maturity_str = row.get('maturity', '')
-            price = row.get('price', 100.0)
-            
-            # Get market value and par value from Bloomberg data
-            mv_usd = row.get('mv_usd', None)  # Market value (USD)
-            par_val = row.get('par_val', None)  # Par value
-            
-            if mv_usd is None or par_val is None:
-                self.stats["calculation_errors"] += 1
-                return None
-            
-            self.stats["coupon_parsed"] += 1  # Reusing stat for "data available"
-            
-            # Calculate Bloomberg differential using your formula
-            bloomberg_differential = self.calculate_bloomberg_differential(mv_usd, par_val)
-            if bloomberg_differential is None:
-                self.stats["calculation_errors"] += 1
-                return None
-            
-            self.stats["accrued_calculated"] += 1
-            
-            # Extract coupon for reference (optional)
-            coupon = self.extract_coupon_from_description(description)
-            
-            return {
-                'isin': isin,
-                'description': description,
-                'coupon': coupon,
-                'maturity': maturity_str,
-                'price': price,
-                'mv_usd': mv_usd,
-                'par_val': par_val,
-                'bloomberg_differential_per_million': bloomberg_differential,
-                'settlement_date': self.settlement_date,
-                'calculation_method': 'bloomberg_mv_par_differential',
-                'calculation_timestamp': datetime.now().isoformat(),
-                'country': row.get('country'),
-                'ticker': row.get('ticker'),
-                'rating': row.get('index_rating_string', '').replace('(', '').replace(')', ''),
-                'ytw': row.get('ytw'),
-                'oas': row.get('oas'),
-                'weight': row.get('weight')
-            }
-            
-        except Exception as e:
-            self.stats["calculation_errors"] += 1
-            logger.debug(f"Error processing bond {row.get('isin', 'unknown')}: {e}")
-            return None
+    def _process_chunk(self, chunk: Dict[str, List[Any]], coupons: Dict[Any, Optional[float]],
+                       timestamp: str) -> Dict[str, List[Any]]:
+        """Benchmark columns for one chunk of source rows (coupons: description cache shared across chunks)"""
+        mv_usd = _float_column(chunk['mv_usd'])
+        par_val = _float_column(chunk['par_val'])
+        valid = np.isfinite(mv_usd) & np.isfinite(par_val) & (par_val != 0)
+        keep = np.flatnonzero(valid)
+        
+        count = len(keep)
+        self.stats["calculation_errors"] += len(valid) - count
+        self.stats["coupon_parsed"] += count  # Reusing stat for "data available"
+        self.stats["accrued_calculated"] += count
+        
+        # Bloomberg differential per $1M face: (mv_usd - par_val) / par_val * 1000000
+        differential = (mv_usd[keep] - par_val[keep]) / par_val[keep] * 1000000.0
+        
+        def take(field: str) -> List[Any]:
+            values = chunk[field]
+            return [values[i] for i in keep.tolist()]
+        
+        descriptions = take('description')
+        for description in set(descriptions) - coupons.keys():
+            coupons[description] = self.extract_coupon_from_description(description)
+        
+        return {
+            'isin': take('isin'),
+            'description': descriptions,
+            'coupon': [coupons[d] for d in descriptions],
+            'maturity': take('maturity'),
+            'price': take('price'),
+            'mv_usd': mv_usd[keep].tolist(),
+            'par_val': par_val[keep].tolist(),
+            'bloomberg_differential_per_million': differential.tolist(),
+            'settlement_date': [self.settlement_date] * count,
+            'calculation_method': ['bloomberg_mv_par_differential'] * count,
+            'calculation_timestamp': [timestamp] * count,
+            'country': take('country'),
+            'ticker': take('ticker'),
+            'rating': [str(r).replace('(', '').replace(')', '') if r is not None and r == r else ''
+                       for r in take('rating')],
+            'ytw': _optional(take('ytw')),
+            'oas': _optional(take('oas')),
+            'weight': _optional(take('weight'))
+        }
 
-    def create_validation_table(self, results_df: pd.DataFrame, 
+    def create_validation_table(self, results: BenchmarkTable, 
                               target_db_path: str = None) -> str:
         """
-        Create bloomberg_accrued_benchmarks table for validation
+        Create bloomberg_accrued_benchmarks table for validation (replaces an existing one)
         """
         if target_db_path is None:
             target_db_path = self.source_db_path
         
         logger.info(f"📊 Creating validation table in {target_db_path}...")
         
-        # Connect to database
-        conn = sqlite3.connect(target_db_path)
-        
-        # Create table
-        table_name = "bloomberg_accrued_benchmarks"
-        results_df.to_sql(table_name, conn, if_exists='replace', index=False)
-        
-        # Add indexes for performance
-        cursor = conn.cursor()
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_isin ON {table_name} (isin)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_differential ON {table_name} (bloomberg_differential_per_million)")
+        table_name = BENCHMARK_TABLE
+        columns = ', '.join(f'"{name}" {kind}' for name, kind in BENCHMARK_COLUMNS)
+        placeholders = ', '.join('?' * len(BENCHMARK_COLUMNS))
         
-        conn.commit()
-        conn.close()
+        # One transaction: drop, create, bulk insert, index
+        started = time.time()
+        conn = sqlite3.connect(target_db_path)
+        try:
+            with conn:
+                conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+                conn.execute(f"CREATE TABLE {table_name} ({columns})")
+                conn.executemany(f"INSERT INTO {table_name} VALUES ({placeholders})", results.rows())
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_isin ON {table_name} (isin)")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_differential ON {table_name} (bloomberg_differential_per_million)")
+        finally:
+            conn.close()
         
-        logger.info(f"✅ Table '{table_name}' created with {len(results_df):,} records")
+        logger.info(f"✅ Table '{table_name}' created with {len(results):,} records in {time.time() - started:.2f}s")
         return table_name
 
-    def generate_validation_summary(self, results_df: pd.DataFrame) -> Dict[str, Any]:
+    def generate_validation_summary(self, results: BenchmarkTable) -> Dict[str, Any]:
         """Generate summary for validation framework integration"""
+        differentials = np.array(results.columns['bloomberg_differential_per_million'], dtype=np.float64)
+        countries: Dict[Any, int] = {}
+        for country in results.columns['country']:
+            if country is not None:
+                countries[country] = countries.get(country, 0) + 1
         return {
             "database_path": self.source_db_path,
             "table_name": "bloomberg_accrued_benchmarks",
             "settlement_date": self.settlement_date,
             "calculation_method": "bloomberg_mv_par_differential",
             "formula": "(mv_usd - par_val) / par_val * 1000000",
-            "total_benchmarks": len(results_df),
+            "total_benchmarks": len(results),
             "differential_range": {
-                "min": float(results_df['bloomberg_differential_per_million'].min()),
-                "max": float(results_df['bloomberg_differential_per_million'].max()),
-                "mean": float(results_df['bloomberg_differential_per_million'].mean())
+                "min": float(differentials.min()),
+                "max": float(differentials.max()),
+                "mean": float(differentials.mean())
             },
-            "countries": results_df['country'].value_counts().head(10).to_dict(),
+            "countries": dict(sorted(countries.items(), key=lambda item: item[1], reverse=True)[:10]),
             "ready_for_validation": True,
             "integration_notes": [
                 "Update production_validation.py BLOOMBERG_DB_PATH to quantlib_project_v3/bloomberg_index.db",
@@ -358,19 +399,19 @@ def main():
     calculator = BloombergAccruedCalculator(source_db, settlement_date)
     
     # Process all bonds
-    results_df = calculator.process_all_bonds()
+    results = calculator.process_all_bonds()
     
-    if len(results_df) == 0:
+    if len(results) == 0:
         print("❌ No bonds processed successfully")
         return
     
     # Create validation table
-    table_name = calculator.create_validation_table(results_df)
+    table_name = calculator.create_validation_table(results)
     
     # Generate summary
-    summary = calculator.generate_validation_summary(results_df)
+    summary = calculator.generate_validation_summary(results)
     
-    print(f"\n🎯 SUCCESS: {len(results_df):,} Bloomberg benchmarks ready!")
+    print(f"\n🎯 SUCCESS: {len(results):,} Bloomberg benchmarks ready!")
     print(f"✅ Table created: {table_name}")
     print(f"📊 Differential range: {summary['differential_range']['min']:,.0f} - {summary['differential_range']['max']:,.0f}")
     print(f"💰 Average differential: {summary['differential_range']['mean']:,.0f} per $1M")
@@ -379,10 +420,11 @@ def main():
     for step in summary['integration_notes']:
         print(f"   • {step}")
     
-    print(f"\n✅ Ready to update validation framework with {len(results_df):,} benchmarks!")
+    print(f"⚡ Throughput: {calculator.stats['bonds_per_second']:,.0f} bonds/s")
+    print(f"\n✅ Ready to update validation framework with {len(results):,} benchmarks!")
     print(f"📝 Note: This calculates market value vs par differential, not traditional accrued interest")
     
-    return results_df, summary
+    return results, summary
 
 
 if __name__ == "__main__":
@@ -13,17 +13,151 @@ Features:
 - Integrates with existing google_analysis9 calculation engine
 """
 
+import os
 import re
 import sqlite3
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Tuple, List
 import logging
 from isin_fallback_handler import get_isin_fallback_conventions
 from collections import Counter
+from core.database_manager import get_readonly_pool
+from ticker_convention_index import get_ticker_convention_index
 
 # 🎯 BREAKTHROUGH: Import centralized sophisticated date parser - FIXES ALL DATE BUGS!
 from centralized_bond_date_parser import parse_bond_date_simple, parse_bond_date
 
+# Enhanced parsing patterns for various bond description formats, in priority order
+BOND_PATTERNS = [
+    # *** NEW INSTITUTIONAL COMMA-SEPARATED PATTERNS ***
+    # Institutional format: "GALAXY PIPELINE, 3.25%, 30-Sep-2040"
+    (r'^(.+?),\s*([\d\.]+)%?,\s*(\d{1,2})-([A-Za-z]{3})-(\d{4})$', 'institutional'),
+    
+    # Institutional alternative: "COMPANY NAME, 3.25, 30-Sep-2040" (no %)
+    (r'^(.+?),\s*([\d\.]+),\s*(\d{1,2})-([A-Za-z]{3})-(\d{4})$', 'institutional_no_percent'),
+    
+    # Corporate comma format: "COMPANY, 3.25%, 30/09/2040"
+    (r'^(.+?),\s*([\d\.]+)%?,\s*(\d{1,2})\/(\d{1,2})\/(\d{4})$', 'corporate_comma_date'),
+    
+    # *** EXISTING PATTERNS (unchanged) ***
+    # Treasury patterns: "T 4.1 02/15/28", "T 4 1/4 11/15/34"
+    (r'^T\s+([\d\s\/\.]+)\s+(\d{1,2})\/(\d{1,2})\/(\d{2,4})$', 'treasury'),
+    
+    # UST patterns: "UST 2.5 05/31/24"
+    (r'^UST?\s+([\d\.]+)\s+(\d{1,2})\/(\d{1,2})\/(\d{2,4})$', 'treasury'),
+    
+    # US TREASURY patterns: "US TREASURY N/B, 3%, 15-Aug-2052"
+    (r'^US TREASURY.*?,\s*([\d\.]+)%?,\s*(\d{1,2})-([A-Za-z]{3})-(\d{4})$', 'treasury'),
+    
+    # Corporate patterns: "AAPL 3.25 02/23/26", "MSFT 2.4 08/08/22"
+    (r'^([A-Z]{2,6})\s+([\d\.]+)\s+(\d{1,2})\/(\d{1,2})\/(\d{2,4})$', 'corporate'),
+    
+    # Full name patterns: "Apple Inc 3.25% 02/23/26"
+    (r'^(.+?)\s+([\d\.]+)%?\s+(\d{1,2})\/(\d{1,2})\/(\d{2,4})$', 'corporate'),
+    
+    # Government patterns: "GERMANY 1.5 08/15/31"
+    (r'^([A-Z]{3,})\s+([\d\.]+)\s+(\d{1,2})\/(\d{1,2})\/(\d{2,4})$', 'government'),
+    
+    # Zero coupon: "STRIPS 0 05/15/30"
+    (r'^(.+?)\s+(0\.?\d*)\s+(\d{1,2})\/(\d{1,2})\/(\d{2,4})$', 'zero_coupon')
+]
+
+
+_COMPILED_BOND_PATTERNS = [re.compile(pattern) for pattern, _ in BOND_PATTERNS]
+
+# One alternation tried in a single pass: re tries alternatives left to right,
+# so the first alternative that matches is the first pattern the old loop matched.
+_COMBINED_BOND_PATTERN = re.compile('|'.join(
+    f'(?P<p{index}>{pattern})' for index, (pattern, _) in enumerate(BOND_PATTERNS)
+))
+# Alternative name -> (pattern index, slice of match.groups() holding its groups)
+_ALTERNATIVE_GROUPS = {}
+for _index, _compiled in enumerate(_COMPILED_BOND_PATTERNS):
+    _outer = _COMBINED_BOND_PATTERN.groupindex[f'p{_index}']
+    _ALTERNATIVE_GROUPS[f'p{_index}'] = (_index, slice(_outer, _outer + _compiled.groups))
+
+_FALLBACK_COUPON = re.compile(r'(\d+\.?\d*)\s*%?')
+_FALLBACK_DATE = re.compile(r'(\d{1,2})\/(\d{1,2})\/(\d{2,4})')
+
+PARSED_DESCRIPTION_CACHE_SIZE = int(os.environ.get('PARSED_DESCRIPTION_CACHE_SIZE', 20000))
+
+PARSE_CACHE_MISS = object()
+
+
+class ParsedDescriptionCache:
+    """
+    Bounded LRU of normalized description -> parse result.
+
+    Shared by every SmartBondParser and the UniversalBondParser, so
+    descriptions that recur across requests ("T 3 15/08/52") are parsed
+    once per process. Failed parses (None) are cached too. Callers get a
+    copy of the cached dict.
+    """
+
+    def __init__(self, max_size: int = PARSED_DESCRIPTION_CACHE_SIZE):
+        self.max_size = max(0, max_size)
+        self._results: 'OrderedDict[object, Optional[Dict]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key) -> object:
+        """Cached result copy for key, or PARSE_CACHE_MISS."""
+        with self._lock:
+            result = self._results.get(key, PARSE_CACHE_MISS)
+            if result is PARSE_CACHE_MISS:
+                self.misses += 1
+                return PARSE_CACHE_MISS
+            self._results.move_to_end(key)
+            self.hits += 1
+        return dict(result) if result is not None else None
+
+    def put(self, key, result: Optional[Dict]):
+        if not self.max_size:
+            return
+        with self._lock:
+            self._results[key] = dict(result) if result is not None else None
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'descriptions': len(self._results),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+_parsed_description_cache = ParsedDescriptionCache()
+
+
+def get_parsed_description_cache() -> ParsedDescriptionCache:
+    """Process-wide parse result cache."""
+    return _parsed_description_cache
+
+
+def normalize_description(description) -> str:
+    """Cache key form of a description: stripped, upper case (as the parser sees it)."""
+    return str(description).strip().upper()
+
+
 class SmartBondParser:
     """Intelligent bond description parser with convention prediction"""
     
@@ -35,40 +169,8 @@ class SmartBondParser:
         # For ticker convention lookup - use bloomberg_index.db
         self.bloomberg_db_path = bloomberg_db_path
         
-        # Enhanced parsing patterns for various bond description formats
-        self.bond_patterns = [
-            # *** NEW INSTITUTIONAL COMMA-SEPARATED PATTERNS ***
-            # Institutional format: "GALAXY PIPELINE, 3.25%, 30-Sep-2040"
-            (r'^(.+?),\s*([\d\.]+)%?,\s*(\d{1,2})-([A-Za-z]{3})-(\d{4})$', 'institutional'),
-            
-            # Institutional alternative: "COMPANY NAME, 3.25, 30-Sep-2040" (no %)
-            (r'^(.+?),\s*([\d\.]+),\s*(\d{1,2})-([A-Za-z]{3})-(\d{4})$', 'institutional_no_percent'),
-            
-            # Corporate comma format: "COMPANY, 3.25%, 30/09/2040"
-            (r'^(.+?),\s*([\d\.]+)%?,\s*(\d{1,2})\/(\d{1,2})\/(\d{4})$', 'corporate_comma_date'),
-            
-            # *** EXISTING PATTERNS (unchanged) ***
-            # Treasury patterns: "T 4.1 02/15/28", "T 4 1/4 11/15/34"
-            (r'^T\s+([\d\s\/\.]+)\s+(\d{1,2})\/(\d{1,2})\/(\d{2,4})$', 'treasury'),
-            
-            # UST patterns: "UST 2.5 05/31/24"
-            (r'^UST?\s+([\d\.]+)\s+(\d{1,2})\/(\d{1,2})\/(\d{2,4})$', 'treasury'),
-            
-            # US TREASURY patterns: "US TREASURY N/B, 3%, 15-Aug-2052"
-            (r'^US TREASURY.*?,\s*([\d\.]+)%?,\s*(\d{1,2})-([A-Za-z]{3})-(\d{4})$', 'treasury'),
-            
-            # Corporate patterns: "AAPL 3.25 02/23/26", "MSFT 2.4 08/08/22"
-            (r'^([A-Z]{2,6})\s+([\d\.]+)\s+(\d{1,2})\/(\d{1,2})\/(\d{2,4})$', 'corporate'),
-            
-            # Full name patterns: "Apple Inc 3.25% 02/23/26"
-            (r'^(.+?)\s+([\d\.]+)%?\s+(\d{1,2})\/(\d{1,2})\/(\d{2,4})$', 'corporate'),
-            
-            # Government patterns: "GERMANY 1.5 08/15/31"
-            (r'^([A-Z]{3,})\s+([\d\.]+)\s+(\d{1,2})\/(\d{1,2})\/(\d{2,4})$', 'government'),
-            
-            # Zero coupon: "STRIPS 0 05/15/30"
-            (r'^(.+?)\s+(0\.?\d*)\s+(\d{1,2})\/(\d{1,2})\/(\d{2,4})$', 'zero_coupon')
-        ]
+        # Enhanced parsing patterns, precompiled once at module level
+        self.bond_patterns = BOND_PATTERNS
         
         # Default conventions by bond type
         self.default_conventions = {
@@ -211,24 +313,24 @@ class SmartBondParser:
             return None
             
         try:
-            conn = sqlite3.connect(self.bloomberg_db_path)
-            cursor = conn.cursor()
-            
-            # Query ticker_convention_preferences table
-            query = """
-                SELECT day_count_convention, business_convention, payment_frequency, frequency_count
-                FROM ticker_convention_preferences 
-                WHERE ticker = ?
-            """
-            
-            cursor.execute(query, (ticker,))
-            result = cursor.fetchone()
+            index = get_ticker_convention_index()
+            if index is not None and index.covers_preferences(self.bloomberg_db_path):
+                # 🚀 Preloaded ticker_convention_preferences - no I/O
+                result = index.preference(ticker)
+            else:
+                # Query ticker_convention_preferences table
+                query = """
+                    SELECT day_count_convention, business_convention, payment_frequency, frequency_count
+                    FROM ticker_convention_preferences 
+                    WHERE ticker = ?
+                """
+                
+                result = get_readonly_pool(self.bloomberg_db_path).query_one(query, (ticker,))
             
             if result:
                 day_count, business_conv, frequency, count = result
-                self.logger.info(f"✅ Found ticker conventions for {ticker}: {day_count}|{business_conv}|{frequency} (count: {count})")
+                self.logger.debug("✅ Found ticker conventions for %s: %s|%s|%s (count: %s)", ticker, day_count, business_conv, frequency, count)
                 
-                conn.close()
                 return {
                     'day_count': day_count,
                     'business_convention': business_conv,
@@ -239,14 +341,13 @@ class SmartBondParser:
                     'source': 'ticker_convention_preferences'
                 }
             else:
-                self.logger.info(f"⚠️ No ticker conventions found for {ticker}, trying fallback...")
-                conn.close()
+                self.logger.debug("⚠️ No ticker conventions found for %s, trying fallback...", ticker)
                 
                 # Try fallback tickers
                 fallback_tickers = ['CORP', 'GOVERNMENT', 'MUNICIPAL']
                 for fallback_ticker in fallback_tickers:
                     if fallback_ticker != ticker:  # Don't retry the same ticker
-                        self.logger.info(f"🔄 Trying fallback ticker: {fallback_ticker}")
+                        self.logger.debug("🔄 Trying fallback ticker: %s", fallback_ticker)
                         fallback_result = self.lookup_ticker_conventions(fallback_ticker)
                         if fallback_result:
                             fallback_result['source'] = f'fallback_from_{ticker}_to_{fallback_ticker}'
@@ -306,7 +407,7 @@ class SmartBondParser:
         result = parse_bond_date_simple(date_str)
         
         if result:
-            self.logger.debug(f"✅ Centralized parser: '{date_str}' → '{result}'")
+            self.logger.debug("✅ Centralized parser: '%s' → '%s'", date_str, result)
             return result
         else:
             # Fallback to basic logic (shouldn't happen with our robust parser)
@@ -348,106 +449,127 @@ class SmartBondParser:
         return month_map.get(month_name.upper(), '01')
     
     def parse_bond_description(self, description: str) -> Optional[Dict]:
-        """Parse bond description and extract components"""
+        """Parse bond description and extract components (memoized per normalized description)"""
         if not description:
             return None
         
         # 🔧 FIX: Handle numeric inputs from Google Sheets
-        if isinstance(description, (int, float)):
-            description = str(description)
+        description = normalize_description(description)
         
-        description = description.strip().upper()
+        cache = get_parsed_description_cache()
+        cached = cache.get(description)
+        if cached is not PARSE_CACHE_MISS:
+            return cached
         
-        for pattern, bond_type in self.bond_patterns:
-            match = re.match(pattern, description)
-            if match:
-                groups = match.groups()
+        parsed = self._parse_normalized_description(description)
+        cache.put(description, parsed)
+        return parsed
+    
+    def _parse_normalized_description(self, description: str) -> Optional[Dict]:
+        """Single-pass pattern dispatch on an already normalized description"""
+        match = _COMBINED_BOND_PATTERN.match(description)
+        if match:
+            first_index, group_slice = _ALTERNATIVE_GROUPS[match.lastgroup]
+            for index in range(first_index, len(BOND_PATTERNS)):
+                if index == first_index:
+                    groups = match.groups()[group_slice]
+                else:
+                    # Only reached when a matched pattern failed to convert
+                    later_match = _COMPILED_BOND_PATTERNS[index].match(description)
+                    if not later_match:
+                        continue
+                    groups = later_match.groups()
                 
                 try:
-                    # *** NEW INSTITUTIONAL PATTERNS ***
-                    if bond_type == 'institutional' or bond_type == 'institutional_no_percent':
-                        # Format: "GALAXY PIPELINE, 3.25%, 30-Sep-2040" or "COMPANY, 3.25, 30-Sep-2040"
-                        issuer, coupon_str, day, month_name, year = groups
-                        coupon = float(coupon_str)
-                        # FIXED: Pass month name directly to parse_maturity_date
-                        # It will handle creating the proper DD-Mon-YYYY format
-                        maturity = self.parse_maturity_date(month_name, day, year)
-                        
-                        # Determine bond type based on issuer
-                        if any(gov_keyword in issuer.upper() for gov_keyword in ['REP OF', 'STATE OF', 'REPUBLIC', 'GOVERNMENT']):
-                            bond_type = 'government'
-                        else:
-                            bond_type = 'corporate'
-                    
-                    elif bond_type == 'corporate_comma_date':
-                        # Format: "COMPANY, 3.25%, 30/09/2040"
-                        issuer, coupon_str, day, month, year = groups
-                        coupon = float(coupon_str)
-                        maturity = self.parse_maturity_date(month, day, year)
-                    
-                    # *** EXISTING PATTERNS (unchanged) ***
-                    elif bond_type == 'treasury':
-                        if len(groups) == 4:
-                            # Handle both old "T 4.1 02/15/28" and new "US TREASURY N/B, 3%, 15-Aug-2052" formats
-                            if groups[2].isalpha():  # New format: month is a name (e.g., "Aug")
-                                coupon_str, day, month_name, year = groups
-                                coupon = float(coupon_str)
-                                month = self.convert_month_name_to_number(month_name)
-                                issuer = "US Treasury"
-                                # For Treasury patterns, pass month, day, year in correct order
-                                maturity = self.parse_maturity_date(month, day, year)
-                            else:  # Old format: month is a number
-                                coupon_str, month, day, year = groups  # ✅ FIXED: For Treasury format "T 4.1 02/15/28" = MM/DD/YY
-                                coupon = self.parse_fractional_coupon(coupon_str)
-                                issuer = "US Treasury"
-                                maturity = self.parse_maturity_date(month, day, year)
-                        else:
-                            continue
-                    
-                    elif bond_type == 'corporate':
-                        if len(groups) == 4:  # AAPL 3.25 02/23/26 format
-                            issuer, coupon_str, month, day, year = groups  # ✅ KEEPING: MM/DD/YY format for corporates
-                            coupon = float(coupon_str)
-                            maturity = self.parse_maturity_date(month, day, year)
-                        elif len(groups) == 5:  # Full name format
-                            issuer, coupon_str, month, day, year = groups  # ✅ KEEPING: MM/DD/YY format for corporates
-                            coupon = float(coupon_str)
-                            maturity = self.parse_maturity_date(month, day, year)
-                        else:
-                            continue
-                    
-                    elif bond_type == 'government':
-                        issuer, coupon_str, month, day, year = groups  # ✅ CORRECTED: MM/DD/YY format
-                        coupon = float(coupon_str)
-                        maturity = self.parse_maturity_date(month, day, year)
-                    
-                    elif bond_type == 'zero_coupon':
-                        issuer, coupon_str, month, day, year = groups  # ✅ CORRECTED: MM/DD/YY format
-                        coupon = float(coupon_str)
-                        maturity = self.parse_maturity_date(month, day, year)
-                    
-                    return {
-                        'issuer': issuer,
-                        'coupon': coupon,
-                        'maturity': maturity,
-                        'bond_type': bond_type,
-                        'parsed_successfully': True
-                    }
-                
+                    parsed = self._parse_pattern_groups(BOND_PATTERNS[index][1], groups)
                 except (ValueError, IndexError) as e:
                     self.logger.warning(f"Failed to parse bond description {description}: {e}")
                     continue
+                if parsed:
+                    return parsed
         
         # If no pattern matches, try to extract components manually
         return self.fallback_parse(description)
     
+    def _parse_pattern_groups(self, bond_type: str, groups: Tuple) -> Optional[Dict]:
+        """Turn one pattern's groups into parsed components (None = pattern not applicable)"""
+        # *** NEW INSTITUTIONAL PATTERNS ***
+        if bond_type == 'institutional' or bond_type == 'institutional_no_percent':
+            # Format: "GALAXY PIPELINE, 3.25%, 30-Sep-2040" or "COMPANY, 3.25, 30-Sep-2040"
+            issuer, coupon_str, day, month_name, year = groups
+            coupon = float(coupon_str)
+            # FIXED: Pass month name directly to parse_maturity_date
+            # It will handle creating the proper DD-Mon-YYYY format
+            maturity = self.parse_maturity_date(month_name, day, year)
+            
+            # Determine bond type based on issuer
+            if any(gov_keyword in issuer.upper() for gov_keyword in ['REP OF', 'STATE OF', 'REPUBLIC', 'GOVERNMENT']):
+                bond_type = 'government'
+            else:
+                bond_type = 'corporate'
+        
+        elif bond_type == 'corporate_comma_date':
+            # Format: "COMPANY, 3.25%, 30/09/2040"
+            issuer, coupon_str, day, month, year = groups
+            coupon = float(coupon_str)
+            maturity = self.parse_maturity_date(month, day, year)
+        
+        # *** EXISTING PATTERNS (unchanged) ***
+        elif bond_type == 'treasury':
+            if len(groups) == 4:
+                # Handle both old "T 4.1 02/15/28" and new "US TREASURY N/B, 3%, 15-Aug-2052" formats
+                if groups[2].isalpha():  # New format: month is a name (e.g., "Aug")
+                    coupon_str, day, month_name, year = groups
+                    coupon = float(coupon_str)
+                    month = self.convert_month_name_to_number(month_name)
+                    issuer = "US Treasury"
+                    # For Treasury patterns, pass month, day, year in correct order
+                    maturity = self.parse_maturity_date(month, day, year)
+                else:  # Old format: month is a number
+                    coupon_str, month, day, year = groups  # ✅ FIXED: For Treasury format "T 4.1 02/15/28" = MM/DD/YY
+                    coupon = self.parse_fractional_coupon(coupon_str)
+                    issuer = "US Treasury"
+                    maturity = self.parse_maturity_date(month, day, year)
+            else:
+                return None
+        
+        elif bond_type == 'corporate':
+            if len(groups) == 4:  # AAPL 3.25 02/23/26 format
+                issuer, coupon_str, month, day, year = groups  # ✅ KEEPING: MM/DD/YY format for corporates
+                coupon = float(coupon_str)
+                maturity = self.parse_maturity_date(month, day, year)
+            elif len(groups) == 5:  # Full name format
+                issuer, coupon_str, month, day, year = groups  # ✅ KEEPING: MM/DD/YY format for corporates
+                coupon = float(coupon_str)
+                maturity = self.parse_maturity_date(month, day, year)
+            else:
+                return None
+        
+        elif bond_type == 'government':
+            issuer, coupon_str, month, day, year = groups  # ✅ CORRECTED: MM/DD/YY format
+            coupon = float(coupon_str)
+            maturity = self.parse_maturity_date(month, day, year)
+        
+        elif bond_type == 'zero_coupon':
+            issuer, coupon_str, month, day, year = groups  # ✅ CORRECTED: MM/DD/YY format
+            coupon = float(coupon_str)
+            maturity = self.parse_maturity_date(month, day, year)
+        
+        return {
+            'issuer': issuer,
+            'coupon': coupon,
+            'maturity': maturity,
+            'bond_type': bond_type,
+            'parsed_successfully': True
+        }
+    
     def fallback_parse(self, description: str) -> Optional[Dict]:
         """Fallback parsing for complex descriptions"""
         # Look for coupon rate (number followed by optional %)
-        coupon_match = re.search(r'(\d+\.?\d*)\s*%?', description)
+        coupon_match = _FALLBACK_COUPON.search(description)
         
         # Look for maturity date (MM/DD/YY or MM/DD/YYYY)
-        date_match = re.search(r'(\d{1,2})\/(\d{1,2})\/(\d{2,4})', description)
+        date_match = _FALLBACK_DATE.search(description)
         
         if coupon_match and date_match:
             try:
@@ -491,21 +613,22 @@ class SmartBondParser:
                 self.logger.warning(f"Validated database not found: {self.validated_db_path}")
                 return self._get_default_conventions(bond_data)
             
-            conn = sqlite3.connect(self.validated_db_path)
-            cursor = conn.cursor()
-            
-            # Get convention statistics from validated bonds
-            query = """
-                SELECT day_count, business_convention, frequency, 
-                       COUNT(*) as count
-                FROM validated_quantlib_bonds 
-                WHERE pass_status = 'PASS'
-                GROUP BY day_count, business_convention, frequency
-                ORDER BY count DESC
-            """
-            
-            cursor.execute(query)
-            convention_stats = cursor.fetchall()
+            index = get_ticker_convention_index()
+            if index is not None and index.covers_validated(self.validated_db_path):
+                # Most common PASS combination, precomputed when the index was built
+                convention_stats = [index.pass_best] if index.pass_best else []
+            else:
+                # Get convention statistics from validated bonds
+                query = """
+                    SELECT day_count, business_convention, frequency, 
+                           COUNT(*) as count
+                    FROM validated_quantlib_bonds 
+                    WHERE pass_status = 'PASS'
+                    GROUP BY day_count, business_convention, frequency
+                    ORDER BY count DESC
+                """
+                
+                convention_stats = get_readonly_pool(self.validated_db_path).query_all(query)
             
             # If we have validated data, use the most common PASSING combination
             if convention_stats:
@@ -534,7 +657,6 @@ class SmartBondParser:
                     'source': 'treasury_override'
                 })
             
-            conn.close()
             return predicted_conventions
             
         except Exception as e:
@@ -729,6 +851,20 @@ class SmartBondParser:
             }
 
 
+_parsers: Dict[Tuple[str, str, str], SmartBondParser] = {}
+_parsers_lock = threading.Lock()
+
+
+def get_smart_bond_parser(db_path: str, validated_db_path: str, bloomberg_db_path: str) -> SmartBondParser:
+    """Shared parser per database triple (parsers hold no per-request state)."""
+    key = (db_path, validated_db_path, bloomberg_db_path)
+    parser = _parsers.get(key)
+    if parser is None:
+        with _parsers_lock:
+            parser = _parsers.setdefault(key, SmartBondParser(db_path, validated_db_path, bloomberg_db_path))
+    return parser
+
+
 # Test function
 def test_parser():
     """Test the parser with sample descriptions"""
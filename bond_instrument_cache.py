@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Bond Instrument Cache
+=====================
+
+Process-wide store of QuantLib Schedule/FixedRateBond objects, keyed by the
+instrument terms the engine builds them from:
+
+    (coupon, maturity serial, frequency, day count, business convention,
+     end of month, settlement days)
+
+Repricing the same bond at a different price (or in another request) reuses
+the instrument instead of regenerating the schedule and cash flows.
+
+Instruments are treated as immutable once built: the engine only prices them
+through bondYield/BondFunctions and never attaches a pricing engine, so one
+instance can be shared by every caller.
+
+The engine generates schedules backward from maturity starting 10 years
+before settlement, so coupon dates after settlement do not depend on the
+exact start. A cached instrument is reused for any request whose schedule
+start is on or after the cached one; a request that needs an earlier start
+(an older settlement date) rebuilds and replaces the entry, which then covers
+both.
+
+Eviction is a bounded LRU (BOND_INSTRUMENT_CACHE_SIZE, default 4096 entries;
+0 disables caching).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_CACHE_SIZE = int(os.environ.get('BOND_INSTRUMENT_CACHE_SIZE', 4096))
+
+
+class BondInstrumentCache:
+    """Bounded LRU of instrument terms -> (schedule, bond, day_counter)."""
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        self.max_size = max(0, max_size)
+        self._instruments: 'OrderedDict[tuple, Tuple[int, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple, schedule_start) -> Optional[Any]:
+        """Cached instrument for key, if its schedule covers schedule_start."""
+        with self._lock:
+            entry = self._instruments.get(key)
+            if entry is not None and entry[0] <= schedule_start.serialNumber():
+                self._instruments.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, schedule_start, instrument: Any):
+        """Store the instrument built from schedule_start."""
+        if not self.max_size:
+            return
+        with self._lock:
+            self._instruments[key] = (schedule_start.serialNumber(), instrument)
+            self._instruments.move_to_end(key)
+            while len(self._instruments) > self.max_size:
+                self._instruments.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._instruments.clear()
+
+    def __len__(self) -> int:
+        return len(self._instruments)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'instruments': len(self._instruments),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+_instrument_cache: Optional[BondInstrumentCache] = None
+_instrument_cache_lock = threading.Lock()
+
+
+def get_bond_instrument_cache() -> BondInstrumentCache:
+    """Process-wide instrument cache shared by every calculation."""
+    global _instrument_cache
+    if _instrument_cache is None:
+        with _instrument_cache_lock:
+            if _instrument_cache is None:
+                _instrument_cache = BondInstrumentCache()
+    return _instrument_cache
@@ -20,9 +20,8 @@ Both routes converge to the same calculation engine.
 
 import sys
 import os
-import pandas as pd
 import logging
-from typing import Dict, Any, Optional, Union
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
 
 # Add project paths
@@ -36,6 +35,12 @@ from centralized_bond_date_parser import parse_bond_date_simple, parse_bond_date
 
 # Import ISIN lookup functionality
 from isin_lookup import lookup_isin_in_database, get_isin_error_response
+from bond_instrument_cache import get_bond_instrument_cache
+from metric_planner import plan_metrics
+
+if TYPE_CHECKING:
+    import pandas as pd  # only the DataFrame compatibility wrapper needs pandas
+from bond_result_cache import get_bond_result_cache, result_cache_key, BYPASS, DISABLED
 
 def get_prior_month_end():
     """
@@ -167,57 +172,22 @@ def add_phase1_outputs(bond_result: Dict[str, Any]) -> Dict[str, Any]:
         return bond_result
 
 
-def calculate_bond_master(
-    isin: Optional[str] = None,
-    description: str = "T 3 15/08/52", 
-    price: float = 100.0,
-    settlement_date: Optional[str] = None,
-    db_path: str = './bonds_data.db',
-    validated_db_path: str = './validated_quantlib_bonds.db',
-    bloomberg_db_path: str = './bloomberg_index.db',
-    calc_flags=None,  # NEW: Profile-based field filtering
-    overrides: Optional[Dict[str, Any]] = None  # NEW: Override specific bond parameters
-) -> Dict[str, Any]:
+def prepare_master_bond_data(
+    isin: Optional[str],
+    description: str,
+    price: float,
+    db_path: str,
+    validated_db_path: str,
+    bloomberg_db_path: str,
+    overrides: Optional[Dict[str, Any]] = None
+) -> Tuple[Optional[Dict[str, Any]], str, Optional[Dict[str, Any]]]:
     """
-    🎯 ENHANCED MASTER BOND CALCULATION FUNCTION
-    
-    ORIGINAL FUNCTIONALITY + 6 NEW PHASE 1 OUTPUTS
-    
-    Implements complete ISIN and parse hierarchy as you described:
-    
-    1. If ISIN present → ISIN hierarchy route
-    2. If no ISIN → Parse hierarchy route  
-    3. Both routes converge to same calculation engine
-    4. ✨ NEW: Phase 1 outputs automatically added
-    
-    Args:
-        isin: Optional ISIN code (triggers ISIN hierarchy)
-        description: Bond description like "T 3 15/08/52" 
-        price: Bond price (default 100.0)
-        settlement_date: Optional settlement date
-        db_path: Main database path
-        validated_db_path: Validated conventions database
-        bloomberg_db_path: Bloomberg data database
-        
+    Resolve the ISIN/parse route and overrides into a portfolio line.
+
     Returns:
-        Dict with yield, duration, spread, accrued_interest + 6 NEW OUTPUTS:
-        - mac_dur_semi: Macaulay Duration
-        - clean_price: Clean Price
-        - dirty_price: Dirty Price  
-        - ytm_annual: Annual Yield
-        - mod_dur_annual: Annual Modified Duration
-        - mac_dur_annual: Annual Macaulay Duration
+        Tuple of (bond_data, route_used, error_response); bond_data is None
+        when the bond cannot be identified.
     """
-    
-    logger.info(f"🎯 Enhanced Master calculation: ISIN={isin}, Description='{description}', Price={price}")
-    
-    # ✅ FIXED: Handle settlement date logic - default to prior month end
-    if settlement_date is None:
-        settlement_date = get_prior_month_end()
-        logger.info(f"📅 Using default settlement date (prior month end): {settlement_date}")
-    else:
-        logger.info(f"📅 Using provided settlement date: {settlement_date}")
-    
     # Construct portfolio data for the current API
     bond_data = {
         'price': price,  # ✅ FIXED: Use correct field name
@@ -273,7 +243,7 @@ def calculate_bond_master(
             error_response = get_isin_error_response(isin, description)
             error_response['route_used'] = 'isin_hierarchy'
             error_response['success'] = False
-            return error_response
+            return None, 'isin_hierarchy', error_response
             
         route_used = "isin_hierarchy"
     
@@ -307,6 +277,197 @@ def calculate_bond_master(
     # Add weighting (required by current API)
     bond_data['WEIGHTING'] = 1.0
     
+    return bond_data, route_used, None
+
+
+def format_master_result(
+    result: Dict[str, Any],
+    bond_data: Dict[str, Any],
+    isin: Optional[str],
+    description: str,
+    price: float,
+    settlement_date: str,
+    route_used: str,
+    calc_flags=None
+) -> Dict[str, Any]:
+    """Shape one process_bond_portfolio result into the master response."""
+    if result.get('error'):
+        return {
+            'success': False,
+            'error': result.get('error'),
+            'route_used': route_used,
+            'isin_provided': isin is not None
+        }
+
+    # Extract and format results (ENHANCED CODE)
+    success_result = {
+        'success': True,
+        'isin': result.get('isin') or isin,
+        'description': description,
+        'price': price,
+        'ytm': result.get('ytm'),  # ✅ FIXED: Use 'ytm' not 'yield'
+        'duration': result.get('duration'), 
+        'spread': result.get('spread'),
+        'z_spread': result.get('z_spread'),  # 🚀 FIXED: Add missing z_spread field!
+        'accrued_interest': result.get('accrued_interest'),
+        'accrued_per_million': result.get('accrued_per_million'),  # 💰 NEW: Bloomberg format
+        'convexity': result.get('convexity'),  # 🚀 FIXED: Include convexity
+        'pvbp': result.get('pvbp'),            # 🚀 FIXED: Include PVBP
+        'conventions': result.get('conventions'),
+        'route_used': route_used,
+        'isin_provided': isin is not None,
+        'calculation_method': 'xtrillion_core',
+        'settlement_date': result.get('settlement_date_str') or settlement_date,
+        'instrument_cached': result.get('instrument_cached'),
+        'stage_timings_ms': result.get('stage_timings_ms'),
+        'stages_skipped': result.get('stages_skipped')
+    }
+
+    # Add ISIN lookup note if applicable
+    if bond_data.get('isin_lookup_failed'):
+        success_result['note'] = bond_data.get('isin_fallback_note')
+        success_result['isin_lookup_status'] = 'not_found_used_description'
+    elif bond_data.get('database_source'):
+        success_result['isin_lookup_status'] = 'found'
+        success_result['database_source'] = bond_data.get('database_source')
+
+    # Add override information if applicable
+    if bond_data.get('overrides_applied'):
+        success_result['overrides_applied'] = bond_data.get('overrides_applied')
+        success_result['override_note'] = f"Calculation performed with {len(bond_data['overrides_applied'])} parameter override(s)"
+
+    # 🚀 PHASE 1 ENHANCEMENT: Add 6 new outputs
+    # 🚀 PROFILE-AWARE ENHANCEMENT: Add outputs based on calc_flags
+    if calc_flags == 'all' or calc_flags is None:
+        # Full enhancement - all Phase 1 outputs
+        success_result = add_phase1_outputs(success_result)
+        logger.info(f"🚀 Full Phase 1 outputs added")
+    elif isinstance(calc_flags, dict):
+        # Selective enhancement - only add if enhanced fields requested
+        enhanced_fields = ['macaulay_duration', 'annual_duration', 'annual_macaulay_duration', 'annual_yield', 'clean_price', 'dirty_price']
+        if any(field in calc_flags for field in enhanced_fields):
+            success_result = add_phase1_outputs(success_result)
+            logger.info(f"🚀 Selective Phase 1 outputs added for profile")
+        else:
+            logger.info(f"🎯 Profile filtering: Phase 1 outputs skipped")
+    else:
+        logger.info(f"🎯 Profile filtering: Phase 1 outputs skipped")
+
+    ytm_value = result.get('ytm') or 0  # ✅ FIXED: Use 'ytm' field and handle None (skipped by metric plan)
+    logger.info(f"✅ Enhanced Master calculation successful via {route_used}: YTM={ytm_value:.4f}%")
+    logger.info(f"🚀 Phase 1 outputs added: {success_result.get('new_outputs', [])}")
+    return success_result
+
+
+def calculate_bond_master(
+    isin: Optional[str] = None,
+    description: str = "T 3 15/08/52", 
+    price: float = 100.0,
+    settlement_date: Optional[str] = None,
+    db_path: str = './bonds_data.db',
+    validated_db_path: str = './validated_quantlib_bonds.db',
+    bloomberg_db_path: str = './bloomberg_index.db',
+    calc_flags=None,  # NEW: Profile-based field filtering
+    overrides: Optional[Dict[str, Any]] = None,  # NEW: Override specific bond parameters
+    requested_metrics: Optional[List[str]] = None  # Metric names to compute (default: calc_flags / all)
+) -> Dict[str, Any]:
+    """
+    🎯 ENHANCED MASTER BOND CALCULATION FUNCTION
+    
+    ORIGINAL FUNCTIONALITY + 6 NEW PHASE 1 OUTPUTS
+    
+    Implements complete ISIN and parse hierarchy as you described:
+    
+    1. If ISIN present → ISIN hierarchy route
+    2. If no ISIN → Parse hierarchy route  
+    3. Both routes converge to same calculation engine
+    4. ✨ NEW: Phase 1 outputs automatically added
+    
+    Args:
+        isin: Optional ISIN code (triggers ISIN hierarchy)
+        description: Bond description like "T 3 15/08/52" 
+        price: Bond price (default 100.0)
+        settlement_date: Optional settlement date
+        db_path: Main database path
+        validated_db_path: Validated conventions database
+        bloomberg_db_path: Bloomberg data database
+        requested_metrics: Metrics to compute; the engine skips stages none of
+            them need (defaults to the calc_flags profile, else everything)
+
+    Successful results are served from the BondResultCache when the same
+    inputs, Treasury data version and databases were seen before;
+    'result_cache' reports memory_hit / disk_hit / miss / disabled / bypass.
+        
+    Returns:
+        Dict with yield, duration, spread, accrued_interest + 6 NEW OUTPUTS:
+        - mac_dur_semi: Macaulay Duration
+        - clean_price: Clean Price
+        - dirty_price: Dirty Price  
+        - ytm_annual: Annual Yield
+        - mod_dur_annual: Annual Modified Duration
+        - mac_dur_annual: Annual Macaulay Duration
+    """
+    
+    logger.info(f"🎯 Enhanced Master calculation: ISIN={isin}, Description='{description}', Price={price}")
+    
+    # ✅ FIXED: Handle settlement date logic - default to prior month end
+    if settlement_date is None:
+        settlement_date = get_prior_month_end()
+        logger.info(f"📅 Using default settlement date (prior month end): {settlement_date}")
+    else:
+        logger.info(f"📅 Using provided settlement date: {settlement_date}")
+
+    cache_key, cached, cache_status = _lookup_cached_result(
+        isin, description, price, settlement_date, overrides, calc_flags, requested_metrics,
+        db_path, validated_db_path, bloomberg_db_path
+    )
+    if cached is not None:
+        logger.info(f"⚡ Result cache {cache_status}: {isin or description} @ {price}")
+        return cached
+
+    result = _calculate_bond_master_uncached(
+        isin, description, price, settlement_date, db_path, validated_db_path, bloomberg_db_path,
+        calc_flags, overrides, requested_metrics
+    )
+    if cache_key is not None:
+        get_bond_result_cache().put(cache_key, result)
+    result['result_cache'] = cache_status
+    return result
+
+
+def _lookup_cached_result(isin, description, price, settlement_date, overrides, calc_flags, requested_metrics,
+                          db_path, validated_db_path, bloomberg_db_path):
+    """
+    (cache key, cached result or None, cache status) for one calculation.
+
+    A hit echoes the caller's description (the key collapses whitespace).
+    Inputs that can't be keyed (e.g. a non-numeric price) bypass the cache.
+    """
+    cache = get_bond_result_cache()
+    if not cache.enabled:
+        return None, None, DISABLED
+    try:
+        cache_key = result_cache_key(isin, description, price, settlement_date, overrides, calc_flags,
+                                     requested_metrics, db_path, validated_db_path, bloomberg_db_path)
+    except (TypeError, ValueError) as e:
+        logger.debug(f"Result cache bypassed: {e}")
+        return None, None, BYPASS
+    cached, cache_status = cache.get(cache_key)
+    if cached is not None:
+        cached['description'] = description
+        cached['result_cache'] = cache_status
+    return cache_key, cached, cache_status
+
+
+def _calculate_bond_master_uncached(isin, description, price, settlement_date, db_path, validated_db_path,
+                                    bloomberg_db_path, calc_flags, overrides, requested_metrics) -> Dict[str, Any]:
+    """calculate_bond_master body: lookup, engine call and formatting (settlement already defaulted)."""
+    bond_data, route_used, error_response = prepare_master_bond_data(
+        isin, description, price, db_path, validated_db_path, bloomberg_db_path, overrides
+    )
+    if error_response is not None:
+        return error_response
+    
     # Construct portfolio_data format expected by current API
     portfolio_data = {
         'data': [bond_data]
@@ -322,7 +483,8 @@ def calculate_bond_master(
             validated_db_path=validated_db_path, 
             bloomberg_db_path=bloomberg_db_path,
             settlement_days=0,
-            settlement_date=settlement_date
+            settlement_date=settlement_date,
+            metric_plan=plan_metrics(requested_metrics if requested_metrics is not None else calc_flags)
         )
         
         if not results_list:
@@ -334,70 +496,9 @@ def calculate_bond_master(
             }
         
         result = results_list[0]
-        
-        if result.get('error'):
-            return {
-                'success': False,
-                'error': result.get('error'),
-                'route_used': route_used,
-                'isin_provided': isin is not None
-            }
-        
-        # Extract and format results (ENHANCED CODE)
-        success_result = {
-            'success': True,
-            'isin': result.get('isin') or isin,
-            'description': description,
-            'price': price,
-            'ytm': result.get('ytm'),  # ✅ FIXED: Use 'ytm' not 'yield'
-            'duration': result.get('duration'), 
-            'spread': result.get('spread'),
-            'z_spread': result.get('z_spread'),  # 🚀 FIXED: Add missing z_spread field!
-            'accrued_interest': result.get('accrued_interest'),
-            'accrued_per_million': result.get('accrued_per_million'),  # 💰 NEW: Bloomberg format
-            'convexity': result.get('convexity'),  # 🚀 FIXED: Include convexity
-            'pvbp': result.get('pvbp'),            # 🚀 FIXED: Include PVBP
-            'conventions': result.get('conventions'),
-            'route_used': route_used,
-            'isin_provided': isin is not None,
-            'calculation_method': 'xtrillion_core',
-            'settlement_date': result.get('settlement_date_str') or settlement_date
-        }
-        
-        # Add ISIN lookup note if applicable
-        if bond_data.get('isin_lookup_failed'):
-            success_result['note'] = bond_data.get('isin_fallback_note')
-            success_result['isin_lookup_status'] = 'not_found_used_description'
-        elif bond_data.get('database_source'):
-            success_result['isin_lookup_status'] = 'found'
-            success_result['database_source'] = bond_data.get('database_source')
-        
-        # Add override information if applicable
-        if bond_data.get('overrides_applied'):
-            success_result['overrides_applied'] = bond_data.get('overrides_applied')
-            success_result['override_note'] = f"Calculation performed with {len(bond_data['overrides_applied'])} parameter override(s)"
-        
-        # 🚀 PHASE 1 ENHANCEMENT: Add 6 new outputs
-        # 🚀 PROFILE-AWARE ENHANCEMENT: Add outputs based on calc_flags
-        if calc_flags == 'all' or calc_flags is None:
-            # Full enhancement - all Phase 1 outputs
-            success_result = add_phase1_outputs(success_result)
-            logger.info(f"🚀 Full Phase 1 outputs added")
-        elif isinstance(calc_flags, dict):
-            # Selective enhancement - only add if enhanced fields requested
-            enhanced_fields = ['macaulay_duration', 'annual_duration', 'annual_macaulay_duration', 'annual_yield', 'clean_price', 'dirty_price']
-            if any(field in calc_flags for field in enhanced_fields):
-                success_result = add_phase1_outputs(success_result)
-                logger.info(f"🚀 Selective Phase 1 outputs added for profile")
-            else:
-                logger.info(f"🎯 Profile filtering: Phase 1 outputs skipped")
-        else:
-            logger.info(f"🎯 Profile filtering: Phase 1 outputs skipped")
-        
-        ytm_value = result.get('ytm', 0)  # ✅ FIXED: Use 'ytm' field and handle None
-        logger.info(f"✅ Enhanced Master calculation successful via {route_used}: YTM={ytm_value:.4f}%")
-        logger.info(f"🚀 Phase 1 outputs added: {success_result.get('new_outputs', [])}")
-        return success_result
+        return format_master_result(
+            result, bond_data, isin, description, price, settlement_date, route_used, calc_flags
+        )
         
     except Exception as e:
         logger.error(f"🚨 Master calculation failed: {e}")
@@ -409,7 +510,115 @@ def calculate_bond_master(
         }
 
 
-def process_bonds_with_weightings(df: pd.DataFrame, db_path: str, record_number: int = 1) -> pd.DataFrame:
+def iter_bond_master_batch(
+    items: List[Dict[str, Any]],
+    db_path: str = './bonds_data.db',
+    validated_db_path: str = './validated_quantlib_bonds.db',
+    bloomberg_db_path: str = './bloomberg_index.db',
+    calc_flags=None,
+    requested_metrics: Optional[List[str]] = None
+):
+    """
+    Calculate many bonds, yielding (index, result) as each settlement date group completes.
+
+    Each item carries the calculate_bond_master arguments (isin, description,
+    price, settlement_date, overrides). Items are resolved up front, then every
+    settlement date is priced with one process_bond_portfolio call sharing the
+    Treasury curve and parsed descriptions; QuantLib instruments come from the
+    process-wide BondInstrumentCache. Items already in the BondResultCache
+    are yielded before any pricing. Results have
+    the same shape as calculate_bond_master; failures are per item.
+    """
+    resolution_cache = {}
+    metric_plan = plan_metrics(requested_metrics if requested_metrics is not None else calc_flags)
+    groups: Dict[str, List[tuple]] = {}
+
+    for index, item in enumerate(items):
+        isin = item.get('isin')
+        description = item.get('description')
+        price = item.get('price', 100.0)
+        settlement_date = item.get('settlement_date') or get_prior_month_end()
+        cache_key, cached, cache_status = _lookup_cached_result(
+            isin, description, price, settlement_date, item.get('overrides'), calc_flags, requested_metrics,
+            db_path, validated_db_path, bloomberg_db_path
+        )
+        if cached is not None:
+            yield index, cached
+            continue
+        try:
+            bond_data, route_used, error_response = prepare_master_bond_data(
+                isin, description, price, db_path, validated_db_path, bloomberg_db_path,
+                item.get('overrides')
+            )
+        except Exception as e:
+            logger.error(f"🚨 Batch item {index} lookup failed: {e}")
+            error_response = {
+                'success': False,
+                'error': str(e),
+                'route_used': 'isin_hierarchy' if isin else 'parse_hierarchy',
+                'isin_provided': isin is not None
+            }
+        if error_response is not None:
+            yield index, error_response
+            continue
+        groups.setdefault(settlement_date, []).append((index, item, bond_data, route_used, cache_key, cache_status))
+
+    for settlement_date, group in groups.items():
+        logger.info(f"🔗 Batch group {settlement_date}: {len(group)} bonds")
+        try:
+            results_list = process_bond_portfolio(
+                portfolio_data={'data': [line[2] for line in group]},
+                db_path=db_path,
+                validated_db_path=validated_db_path,
+                bloomberg_db_path=bloomberg_db_path,
+                settlement_days=0,
+                settlement_date=settlement_date,
+                resolution_cache=resolution_cache,
+                metric_plan=metric_plan
+            )
+        except Exception as e:
+            logger.error(f"🚨 Batch group {settlement_date} failed: {e}")
+            results_list = [{'error': str(e)}] * len(group)
+
+        for (index, item, bond_data, route_used, cache_key, cache_status), result in zip(group, results_list):
+            isin = item.get('isin')
+            try:
+                master_result = format_master_result(
+                    result, bond_data, isin, item.get('description'), item.get('price', 100.0),
+                    settlement_date, route_used, calc_flags
+                )
+                if cache_key is not None:
+                    get_bond_result_cache().put(cache_key, master_result)
+                master_result['result_cache'] = cache_status
+                yield index, master_result
+            except Exception as e:
+                logger.error(f"🚨 Batch item {index} failed: {e}")
+                yield index, {
+                    'success': False,
+                    'error': str(e),
+                    'route_used': route_used,
+                    'isin_provided': isin is not None
+                }
+
+    logger.info(f"♻️ Batch resolved {len(resolution_cache)} distinct bonds, instrument cache: {get_bond_instrument_cache().stats()}")
+
+
+def calculate_bond_master_batch(
+    items: List[Dict[str, Any]],
+    db_path: str = './bonds_data.db',
+    validated_db_path: str = './validated_quantlib_bonds.db',
+    bloomberg_db_path: str = './bloomberg_index.db',
+    calc_flags=None,
+    requested_metrics: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """calculate_bond_master for a list of items; results are returned in input order."""
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    for index, result in iter_bond_master_batch(items, db_path, validated_db_path, bloomberg_db_path,
+                                                calc_flags, requested_metrics):
+        results[index] = result
+    return results
+
+def process_bonds_with_weightings(df: 'pd.DataFrame', db_path: str, record_number: int = 1) -> 'pd.DataFrame':
     """
     🔄 COMPATIBILITY WRAPPER for old comprehensive tester
     
@@ -457,6 +666,7 @@ def process_bonds_with_weightings(df: pd.DataFrame, db_path: str, record_number:
         
         results.append(df_result)
     
+    import pandas as pd
     return pd.DataFrame(results)
 
 
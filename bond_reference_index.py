@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Bond Reference Index
+====================
+
+In-memory ISIN → bond reference data, built once per process from
+bonds_data.db, validated_quantlib_bonds.db and bloomberg_index.db.
+
+ISIN resolution used to walk the three databases table by table on every
+request (isin_lookup, UniversalBondParser, DualDatabaseManager,
+OptimizedBondLookup). With the index loaded those paths answer from memory;
+SQL is only used for databases the index does not cover.
+
+Storage is columnar, one column set per source database:
+- ISIN → row number dict
+- coupons in an array('d') (NaN = missing)
+- day count / frequency / business convention / currency / face value /
+  end-of-month as small-int codes into a per-column vocabulary
+- descriptions, issuers, maturities, countries as interned string lists
+
+A record is merged field by field across sources in the caller's preferred
+order (default Primary → Validated → Bloomberg, as isin_lookup searches).
+A secondary (coupon, maturity) → ISIN index serves reverse lookups.
+
+A source is ignored once its database file is replaced (new inode), so a
+fresh download falls back to SQL until the index is reloaded.
+"""
+
+import os
+import sys
+import math
+import time
+import logging
+import threading
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.database_manager import get_readonly_pool
+
+logger = logging.getLogger(__name__)
+
+BOND_REFERENCE_INDEX_ENABLED = os.environ.get('BOND_REFERENCE_INDEX', '1') not in ('0', 'false', 'False')
+
+ISIN_COLUMN_CANDIDATES = ['isin', 'isin_code', 'bond_cd', 'bond_code', 'identifier']
+
+SOURCE_PRIMARY = 'Primary'
+SOURCE_VALIDATED = 'Validated'
+SOURCE_BLOOMBERG = 'Bloomberg'
+DEFAULT_SOURCE_ORDER = (SOURCE_PRIMARY, SOURCE_VALIDATED, SOURCE_BLOOMBERG)
+
+# Record field → candidate column names (lower case, first match wins)
+FIELD_COLUMNS = {
+    'description': ['description', 'bond_description', 'descr', 'name', 'bond_name'],
+    'issuer': ['issuer', 'company_name', 'issuer_name'],
+    'coupon': ['coupon', 'coupon_rate', 'cpn', 'rate'],
+    'maturity': ['maturity', 'maturity_date', 'mat_date'],
+    'day_count': ['day_count', 'day_count_convention', 'dcc'],
+    'frequency': ['frequency', 'payment_frequency', 'freq'],
+    'business_convention': ['business_convention', 'business_day_convention', 'bus_conv'],
+    'currency': ['currency', 'crncy', 'curr', 'ccy'],
+    'country': ['country', 'country_iso', 'cntry'],
+    'face_value': ['face_value'],
+    'end_of_month': ['end_of_month'],
+}
+STRING_FIELDS = ('description', 'issuer', 'maturity', 'country')
+CODED_FIELDS = ('day_count', 'frequency', 'business_convention', 'currency', 'face_value', 'end_of_month')
+RECORD_FIELDS = ('description', 'issuer', 'coupon', 'maturity', 'day_count',
+                 'frequency', 'business_convention', 'currency', 'country', 'face_value', 'end_of_month')
+
+_MATURITY_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%d-%b-%Y', '%d-%b-%y', '%Y%m%d')
+
+
+def find_isin_tables(schema: Dict[str, List[str]]) -> List[Tuple[str, str]]:
+    """
+    Pick the tables that can be searched by ISIN from a table → columns map.
+
+    Returns:
+        List of (table_name, isin_column) in schema order
+    """
+    tables = []
+    for table_name, columns in schema.items():
+        column_names = [col.lower() for col in columns]
+        for col_name in ISIN_COLUMN_CANDIDATES:
+            if col_name in column_names:
+                tables.append((table_name, col_name))
+                break
+    return tables
+
+
+def _coupon_key(coupon: Any) -> Optional[float]:
+    try:
+        value = float(coupon)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else round(value, 6)
+
+
+def _maturity_key(maturity: Any) -> Optional[str]:
+    """Normalise a maturity to 'YYYY-MM-DD' where the format is recognisable."""
+    if maturity is None:
+        return None
+    text = str(maturity).strip()
+    if not text:
+        return None
+    if len(text) >= 10 and text[4] == '-' and text[7] == '-':
+        return text[:10]
+    for fmt in _MATURITY_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return text
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _file_identity(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+        return stat.st_dev, stat.st_ino
+    except OSError:
+        return None
+
+
+class _SourceColumns:
+    """Column store for the bonds of one database."""
+
+    def __init__(self, name: str, db_path: str):
+        self.name = name
+        self.db_path = os.path.abspath(db_path)
+        self.file_identity = _file_identity(self.db_path)
+        self.rows: Dict[str, int] = {}
+        self.isins: List[str] = []
+        self.table_names: List[str] = []
+        self.table_columns: List[Dict[str, str]] = []   # per table: isin and indexed fields -> column name
+        self.table_codes = array('H')
+        self.coupon = array('d')
+        self.strings: Dict[str, List[Optional[str]]] = {field: [] for field in STRING_FIELDS}
+        self.codes: Dict[str, array] = {field: array('H') for field in CODED_FIELDS}
+        self.vocab: Dict[str, List[Optional[str]]] = {field: [None] for field in CODED_FIELDS}
+        self._vocab_lookup: Dict[str, Dict[str, int]] = {field: {} for field in CODED_FIELDS}
+        self.by_coupon_maturity: Dict[Tuple[float, str], List[int]] = {}
+
+    def is_current(self) -> bool:
+        return self.file_identity is not None and _file_identity(self.db_path) == self.file_identity
+
+    def _code(self, field: str, value: Any) -> int:
+        if value is None or value == '':
+            return 0
+        value = _intern(value)
+        lookup = self._vocab_lookup[field]
+        code = lookup.get(value)
+        if code is None:
+            code = len(self.vocab[field])
+            self.vocab[field].append(value)
+            lookup[value] = code
+        return code
+
+    def _append(self, isin: str, table_code: int, values: Dict[str, Any]) -> int:
+        row = len(self.isins)
+        self.rows[isin] = row
+        self.isins.append(isin)
+        self.table_codes.append(table_code)
+        coupon = _coupon_key(values.get('coupon'))
+        self.coupon.append(math.nan if coupon is None else coupon)
+        for field in STRING_FIELDS:
+            value = values.get(field)
+            self.strings[field].append(_intern(value) if value not in (None, '') else None)
+        for field in CODED_FIELDS:
+            self.codes[field].append(self._code(field, values.get(field)))
+        return row
+
+    def _fill_missing(self, row: int, values: Dict[str, Any]):
+        """Later tables in the same database only fill fields still empty."""
+        if math.isnan(self.coupon[row]):
+            coupon = _coupon_key(values.get('coupon'))
+            if coupon is not None:
+                self.coupon[row] = coupon
+        for field in STRING_FIELDS:
+            if self.strings[field][row] is None and values.get(field) not in (None, ''):
+                self.strings[field][row] = _intern(values[field])
+        for field in CODED_FIELDS:
+            if self.codes[field][row] == 0:
+                self.codes[field][row] = self._code(field, values.get(field))
+
+    def load(self):
+        pool = get_readonly_pool(self.db_path)
+        schema = pool.schema()
+        for table_name, isin_column in find_isin_tables(schema):
+            lower_columns = {col.lower(): col for col in schema[table_name]}
+            selected = {}
+            for field, candidates in FIELD_COLUMNS.items():
+                for candidate in candidates:
+                    if candidate in lower_columns:
+                        selected[field] = lower_columns[candidate]
+                        break
+
+            table_code = len(self.table_names)
+            self.table_names.append(table_name)
+            self.table_columns.append(dict(selected, isin=isin_column))
+            fields = list(selected)
+
+            if not fields:
+                # Nothing to merge - membership only
+                query = f'SELECT DISTINCT "{isin_column}" FROM "{table_name}"'
+            else:
+                column_list = ', '.join(f'"{selected[field]}"' for field in fields)
+                query = f'SELECT "{isin_column}", {column_list} FROM "{table_name}"'
+
+            seen_in_table = set()
+            for row_values in pool.query_all(query):
+                isin = row_values[0]
+                if not isin or isin in seen_in_table:
+                    continue
+                seen_in_table.add(isin)
+                values = dict(zip(fields, row_values[1:]))
+                row = self.rows.get(isin)
+                if row is None:
+                    self._append(_intern(isin), table_code, values)
+                elif fields:
+                    self._fill_missing(row, values)
+
+        for row in range(len(self.isins)):
+            coupon = self.coupon[row]
+            maturity = _maturity_key(self.strings['maturity'][row])
+            if not math.isnan(coupon) and maturity:
+                self.by_coupon_maturity.setdefault((coupon, maturity), []).append(row)
+
+    def field(self, row: int, field: str) -> Any:
+        if field == 'coupon':
+            coupon = self.coupon[row]
+            return None if math.isnan(coupon) else coupon
+        if field in self.codes:
+            return self.vocab[field][self.codes[field][row]]
+        return self.strings[field][row]
+
+    def memory_bytes(self) -> int:
+        """Approximate footprint of the column store (containers + distinct strings)."""
+        total = sys.getsizeof(self.rows) + sys.getsizeof(self.isins)
+        total += sum(sys.getsizeof(isin) for isin in self.isins)
+        total += self.table_codes.buffer_info()[1] * self.table_codes.itemsize
+        total += self.coupon.buffer_info()[1] * self.coupon.itemsize
+        for field in CODED_FIELDS:
+            total += self.codes[field].buffer_info()[1] * self.codes[field].itemsize
+        distinct = set()
+        for field in STRING_FIELDS:
+            column = self.strings[field]
+            total += sys.getsizeof(column)
+            distinct.update(value for value in column if value is not None)
+        total += sum(sys.getsizeof(value) for value in distinct)
+        total += sys.getsizeof(self.by_coupon_maturity)
+        return total
+
+
+class BondReferenceIndex:
+    """ISIN → merged reference record across the bond databases."""
+
+    def __init__(self):
+        self._sources: Dict[str, _SourceColumns] = {}
+        self.build_seconds = 0.0
+
+    @classmethod
+    def build(cls, db_path: Optional[str] = None, validated_db_path: Optional[str] = None,
+              bloomberg_db_path: Optional[str] = None) -> 'BondReferenceIndex':
+        """
+        Build the index from whichever of the three databases exist.
+
+        Args:
+            db_path: Primary database (bonds_data.db)
+            validated_db_path: Validated conventions database
+            bloomberg_db_path: Bloomberg reference database
+
+        Returns:
+            BondReferenceIndex (sources that fail to load are left out)
+        """
+        index = cls()
+        start = time.perf_counter()
+        for source, path in ((SOURCE_PRIMARY, db_path),
+                             (SOURCE_VALIDATED, validated_db_path),
+                             (SOURCE_BLOOMBERG, bloomberg_db_path)):
+            if not path or not os.path.exists(path):
+                continue
+            columns = _SourceColumns(source, path)
+            try:
+                columns.load()
+            except Exception as e:
+                logger.warning(f"⚠️ Bond reference index skipped {source} database {path}: {e}")
+                continue
+            index._sources[source] = columns
+        index.build_seconds = time.perf_counter() - start
+        return index
+
+    def _current_sources(self, sources: Iterable[str]) -> List[_SourceColumns]:
+        current = []
+        for source in sources:
+            columns = self._sources.get(source)
+            if columns is not None and columns.is_current():
+                current.append(columns)
+        return current
+
+    def source_for_path(self, db_path: Optional[str]) -> Optional[str]:
+        """Source name indexed from db_path, or None if that file isn't covered."""
+        if not db_path:
+            return None
+        abs_path = os.path.abspath(db_path)
+        for name, columns in self._sources.items():
+            if columns.db_path == abs_path and columns.is_current():
+                return name
+        return None
+
+    def covers(self, db_path: Optional[str]) -> bool:
+        """True if db_path was indexed and has not been replaced since."""
+        return self.source_for_path(db_path) is not None
+
+    def sources_for(self, isin: str) -> List[str]:
+        """Names of the (current) sources holding isin."""
+        return [columns.name for columns in self._current_sources(self._sources) if isin in columns.rows]
+
+    def lookup(self, isin: str, sources: Sequence[str] = DEFAULT_SOURCE_ORDER) -> Optional[Dict[str, Any]]:
+        """
+        Merged reference record for isin.
+
+        Each field takes the first non-empty value in source order. source_db
+        and table name the first source holding the ISIN.
+
+        Returns:
+            Dict with isin, description, issuer, coupon, maturity, day_count,
+            frequency, business_convention, currency, country, face_value,
+            end_of_month, source_db, table and sources; None if no listed
+            source has the ISIN
+        """
+        hits = []
+        for columns in self._current_sources(sources):
+            row = columns.rows.get(isin)
+            if row is not None:
+                hits.append((columns, row))
+        if not hits:
+            return None
+
+        first, first_row = hits[0]
+        record: Dict[str, Any] = {'isin': isin}
+        for field in RECORD_FIELDS:
+            value = None
+            for columns, row in hits:
+                value = columns.field(row, field)
+                if value is not None:
+                    break
+            record[field] = value
+        record['source_db'] = first.name
+        record['table'] = first.table_names[first.table_codes[first_row]]
+        record['sources'] = [columns.name for columns, _ in hits]
+        return record
+
+    def source_row(self, isin: str, source: str) -> Optional[Dict[str, Any]]:
+        """
+        The indexed columns of isin's row in one source, keyed by lower-case
+        column name like a SELECT * row (columns the index doesn't read are absent).
+        """
+        columns = self._sources.get(source)
+        row = columns.rows.get(isin) if columns is not None else None
+        if row is None:
+            return None
+        names = columns.table_columns[columns.table_codes[row]]
+        data = {names['isin'].lower(): isin}
+        for field, column in names.items():
+            if field != 'isin':
+                data[column.lower()] = columns.field(row, field)
+        return data
+
+    def find_by_coupon_maturity(self, coupon: Any, maturity: Any,
+                                sources: Sequence[str] = DEFAULT_SOURCE_ORDER) -> List[str]:
+        """ISINs whose (coupon, maturity) match in the listed sources, in source order."""
+        key = (_coupon_key(coupon), _maturity_key(maturity))
+        if key[0] is None or key[1] is None:
+            return []
+        found: List[str] = []
+        for columns in self._current_sources(sources):
+            for row in columns.by_coupon_maturity.get(key, ()):
+                isin = columns.isins[row]
+                if isin not in found:
+                    found.append(isin)
+        return found
+
+    def __contains__(self, isin: str) -> bool:
+        return any(isin in columns.rows for columns in self._current_sources(self._sources))
+
+    def __len__(self) -> int:
+        isins = set()
+        for columns in self._sources.values():
+            isins.update(columns.rows)
+        return len(isins)
+
+    def stats(self) -> Dict[str, Any]:
+        """Sizes for /health."""
+        return {
+            'bonds': len(self),
+            'build_seconds': round(self.build_seconds, 3),
+            'sources': {
+                name: {
+                    'db_path': columns.db_path,
+                    'bonds': len(columns.isins),
+                    'tables': len(columns.table_names),
+                    'current': columns.is_current(),
+                    'approx_mb': round(columns.memory_bytes() / (1024 * 1024), 2)
+                }
+                for name, columns in self._sources.items()
+            }
+        }
+
+
+_index: Optional[BondReferenceIndex] = None
+_index_lock = threading.Lock()
+
+
+def load_bond_reference_index(db_path: Optional[str], validated_db_path: Optional[str],
+                              bloomberg_db_path: Optional[str]) -> Optional[BondReferenceIndex]:
+    """
+    Build the process-wide index (call at startup, or again after a database refresh).
+
+    Returns:
+        The new index, or None when disabled via BOND_REFERENCE_INDEX=0
+    """
+    global _index
+    if not BOND_REFERENCE_INDEX_ENABLED:
+        logger.info("Bond reference index disabled (BOND_REFERENCE_INDEX=0)")
+        return None
+    index = BondReferenceIndex.build(db_path, validated_db_path, bloomberg_db_path)
+    with _index_lock:
+        _index = index
+    logger.info(f"📇 Bond reference index: {len(index)} bonds from {list(index._sources)} "
+                f"in {index.build_seconds:.2f}s")
+    return index
+
+
+def get_bond_reference_index() -> Optional[BondReferenceIndex]:
+    """Return the loaded index, or None if none has been built in this process."""
+    return _index
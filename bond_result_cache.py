@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Bond Result Cache
+=================
+
+Content-addressed cache of calculate_bond_master results.
+
+A calculation is deterministic in its inputs, so repeated requests for the
+same bond at the same price (dashboards polling, sheets recalculating) can
+skip ISIN lookup, parsing, QuantLib setup and spread solving entirely.
+
+The key is a SHA-256 of a canonical JSON document holding:
+- isin (upper-cased), description (whitespace-collapsed), price (as float)
+- settlement date (after defaulting), overrides, calc_flags and requested
+  metrics (order-insensitive)
+- the Treasury file version of db_path (TreasuryCurveCache.file_version:
+  database, WAL and yield store stamps), so a new tsys_enhanced or yield
+  store row misses. The per-process curve generation is not part of the
+  key - workers would disagree on it and stop sharing the disk tier -
+  instead invalidate_treasury_curves() empties this process's memory tier
+- (mtime_ns, size) of the three reference databases, so a database refresh
+  misses
+
+Two tiers:
+- memory: bounded LRU per process (BOND_RESULT_CACHE_SIZE, default 2048;
+  0 disables caching altogether)
+- disk:   optional SQLite file shared by every gunicorn worker on the host
+  (BOND_RESULT_CACHE_DB, unset = memory only), trimmed to the newest
+  BOND_RESULT_CACHE_DISK_ENTRIES rows (default 100000)
+
+Only successful results are stored. Callers get a deep copy, so mutating a
+returned result never changes the cached one.
+"""
+
+import os
+import copy
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from treasury_curve_cache import get_treasury_curve_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = int(os.environ.get('BOND_RESULT_CACHE_SIZE', 2048))
+DEFAULT_DISK_PATH = os.environ.get('BOND_RESULT_CACHE_DB', '')
+DEFAULT_DISK_ENTRIES = int(os.environ.get('BOND_RESULT_CACHE_DISK_ENTRIES', 100000))
+
+# Disk rows are trimmed once every this many writes
+DISK_TRIM_INTERVAL = 256
+
+# Cache status reported with each result
+MEMORY_HIT = 'memory_hit'
+DISK_HIT = 'disk_hit'
+MISS = 'miss'
+DISABLED = 'disabled'
+BYPASS = 'bypass'
+
+
+def _file_version(path: str) -> Tuple[int, int, int, int]:
+    """(mtime_ns, size) of a database and its WAL file; zeros when missing."""
+    version = []
+    for candidate in (path, path + '-wal'):
+        try:
+            stat = os.stat(candidate)
+            version.extend((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            version.extend((0, 0))
+    return tuple(version)
+
+
+def result_cache_key(isin: Optional[str], description: Optional[str], price: float, settlement_date: str,
+                     overrides: Optional[Dict[str, Any]], calc_flags, requested_metrics: Optional[Iterable[str]],
+                     db_path: str, validated_db_path: str, bloomberg_db_path: str) -> str:
+    """Canonical content hash of everything a calculate_bond_master result depends on."""
+    document = {
+        'isin': isin.strip().upper() if isin else None,
+        'description': ' '.join(str(description).split()) if description is not None else None,
+        'price': float(price),
+        'settlement_date': settlement_date,
+        'overrides': overrides or {},
+        'calc_flags': calc_flags,
+        'requested_metrics': sorted(requested_metrics) if requested_metrics is not None else None,
+        'treasury_version': get_treasury_curve_cache().file_version(db_path),
+        'databases': [(os.path.abspath(path), _file_version(os.path.abspath(path)))
+                      for path in (db_path, validated_db_path, bloomberg_db_path)],
+    }
+    canonical = json.dumps(document, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class DiskResultStore:
+    """SQLite table of key -> result JSON, safe to share between processes."""
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_DISK_ENTRIES):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self._local = threading.local()
+        self._writes = 0
+        self.errors = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # A connection opened before a fork (e.g. preload warmup) is never reused in the child
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS bond_results ('
+                         'key TEXT PRIMARY KEY, result TEXT NOT NULL, stored_at REAL NOT NULL)')
+            conn.commit()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            row = self._connection().execute('SELECT result FROM bond_results WHERE key = ?', (key,)).fetchone()
+            return json.loads(row[0]) if row else None
+        except (sqlite3.Error, ValueError) as e:
+            self.errors += 1
+            logger.warning(f"⚠️ Result cache disk read failed: {e}")
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]):
+        try:
+            conn = self._connection()
+            conn.execute('INSERT OR REPLACE INTO bond_results (key, result, stored_at) VALUES (?, ?, ?)',
+                         (key, json.dumps(result, default=str), time.time()))
+            self._writes += 1
+            if self._writes % DISK_TRIM_INTERVAL == 0:
+                conn.execute('DELETE FROM bond_results WHERE key IN (SELECT key FROM bond_results '
+                             'ORDER BY stored_at DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+            conn.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            self.errors += 1
+            logger.warning(f"⚠️ Result cache disk write failed: {e}")
+
+    def clear(self):
+        try:
+            conn = self._connection()
+            conn.execute('DELETE FROM bond_results')
+            conn.commit()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"⚠️ Result cache disk clear failed: {e}")
+
+    def entries(self) -> Optional[int]:
+        try:
+            return self._connection().execute('SELECT COUNT(*) FROM bond_results').fetchone()[0]
+        except sqlite3.Error:
+            return None
+
+
+class BondResultCache:
+    """Memory LRU in front of an optional shared disk tier."""
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE, disk_path: str = DEFAULT_DISK_PATH,
+                 disk_entries: int = DEFAULT_DISK_ENTRIES):
+        self.max_size = max(0, max_size)
+        self._results: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._curve_generation = get_treasury_curve_cache().generation
+        self.disk = DiskResultStore(disk_path, disk_entries) if disk_path and self.max_size else None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, key: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        """(copy of the cached result or None, cache status)."""
+        if not self.enabled:
+            return None, DISABLED
+        with self._lock:
+            self._check_generation_locked()
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                self.memory_hits += 1
+                return copy.deepcopy(result), MEMORY_HIT
+
+        result = self.disk.get(key) if self.disk is not None else None
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None, MISS
+            self.disk_hits += 1
+            self._remember_locked(key, result)
+        return copy.deepcopy(result), DISK_HIT
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """Store a successful result in both tiers."""
+        if not self.enabled or not result.get('success'):
+            return
+        result = copy.deepcopy(result)
+        result.pop('result_cache', None)
+        with self._lock:
+            self._check_generation_locked()
+            self._remember_locked(key, result)
+            self.stores += 1
+        if self.disk is not None:
+            self.disk.put(key, result)
+
+    def _check_generation_locked(self):
+        """Empty the memory tier after invalidate_treasury_curves() in this process."""
+        generation = get_treasury_curve_cache().generation
+        if generation != self._curve_generation:
+            self._results.clear()
+            self._curve_generation = generation
+
+    def _remember_locked(self, key: str, result: Dict[str, Any]):
+        self._results[key] = result
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_size:
+            self._results.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self, include_disk: bool = False):
+        with self._lock:
+            self._results.clear()
+        if include_disk and self.disk is not None:
+            self.disk.clear()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for /health."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            stats = {
+                'enabled': self.enabled,
+                'entries': len(self._results),
+                'max_size': self.max_size,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'hit_rate': round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                'disk': None
+            }
+        if self.disk is not None:
+            stats['disk'] = {
+                'path': self.disk.path,
+                'entries': self.disk.entries(),
+                'max_entries': self.disk.max_entries,
+                'errors': self.disk.errors
+            }
+        return stats
+
+
+_result_cache: Optional[BondResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_bond_result_cache() -> BondResultCache:
+    """Process-wide result cache used by calculate_bond_master."""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = BondResultCache()
+    return _result_cache
@@ -0,0 +1,576 @@
+#!/usr/bin/env python3
+"""
+Bullet Bond Kernel
+==================
+
+Vectorized NumPy engine for plain fixed-rate bullets, next to the QuantLib
+path. Each bond in the engine is a FixedRateBond followed by separate
+bondYield / BondFunctions.duration / convexity calls (Brent/Newton solves
+and cash-flow walks in C++ through SWIG). Here a whole portfolio is laid out
+as padded (bonds × flows) arrays once:
+
+    times[b, k]   cumulative yield-compounding time of flow k
+    amounts[b, k] coupon (+ redemption) per 100 notional, 0.0 pads
+
+and the yield for every bond is solved with one set of vectorized Newton
+iterations. Modified / Macaulay duration, convexity, PVBP and accrued come
+from the same arrays.
+
+The layout reproduces what the engine's QuantLib objects do:
+- schedule: backward from maturity, no end-of-month rule, dates adjusted by
+  the business convention on the US Government Bond calendar (holidays read
+  from the installed QuantLib); payments on the Following business day
+  (FixedRateBond default)
+- day counts: 30/360 Bond Basis, Actual/Actual ISMA (= 'Bond'), Actual/Actual
+  ISDA (the engine's fallback for unknown names), Actual/360, Actual/365F,
+  with reference periods equal to the coupon period
+- yield: Compounded at the engine's yield frequency, stepwise discount times
+  as in CashFlows::npv (getStepwiseDiscountTime), accrued from the coupon
+  paid next after the bond's settlement date
+- duration / convexity: CashFlows::duration / convexity closed forms
+
+process_bond_portfolio runs on this kernel with PORTFOLIO_ENGINE=vectorized
+(or engine='vectorized'); lines it can't take stay on the QuantLib path.
+calculation_baseline.json is the cross-check (test_bullet_bond_kernel.py).
+"""
+
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Codes for the day counts and business conventions the engine can build
+THIRTY_360, ACT_ACT_ISMA, ACT_ACT_ISDA, ACT_360, ACT_365F = range(5)
+UNADJUSTED, FOLLOWING, MODIFIED_FOLLOWING, PRECEDING = range(4)
+
+# Same names the engine's day_count_map accepts; anything else is Actual/Actual ISDA there too
+DAY_COUNT_CODES = {
+    'ActualActual.Bond': ACT_ACT_ISMA,
+    'ActualActual.ISMA': ACT_ACT_ISMA,
+    'ActualActual.ISDA': ACT_ACT_ISDA,
+    'Thirty360.BondBasis': THIRTY_360,
+    'Actual360': ACT_360,
+    'Actual365Fixed': ACT_365F,
+    'ActualActual_Bond': ACT_ACT_ISMA,
+    'Actual/Actual (ISMA)': ACT_ACT_ISMA,
+    '30/360': THIRTY_360,
+    'Thirty360': THIRTY_360,
+    'ACT/360': ACT_360,
+    'ACT/365': ACT_365F,
+}
+BUSINESS_CONVENTION_CODES = {
+    'Unadjusted': UNADJUSTED,
+    'Following': FOLLOWING,
+    'ModifiedFollowing': MODIFIED_FOLLOWING,
+    'Preceding': PRECEDING,
+}
+FREQUENCY_MONTHS = {'Annual': 12, 'Semiannual': 6, 'Quarterly': 3, 'Monthly': 1}
+
+YIELD_ACCURACY = 1.0e-12
+MAX_YIELD_ITERATIONS = 100
+YIELD_GUESS = 0.05                  # bondYield's default starting point
+
+_CALENDAR_START = date(1950, 1, 1)
+_CALENDAR_END = date(2200, 1, 1)
+_QL_SERIAL_EPOCH = date(1899, 12, 30)   # ql.Date serial 0
+MAX_MATURITY = date(2199, 1, 1)     # maturities from here on stay on the QuantLib path
+
+
+def day_count_code(name: Optional[str]) -> int:
+    return DAY_COUNT_CODES.get(name, ACT_ACT_ISDA)
+
+
+def business_convention_code(name: Optional[str]) -> int:
+    # The engine treats unknown conventions as Following
+    return BUSINESS_CONVENTION_CODES.get(name, FOLLOWING)
+
+
+def frequency_months(name: Optional[str]) -> int:
+    return FREQUENCY_MONTHS.get(name, 6)
+
+
+# --- US Government Bond calendar (QuantLib UnitedStates.GovernmentBond) ---
+#
+# The tables take their holidays from QuantLib itself whenever it is
+# installed, so the vectorized path adjusts every flow to the same day as the
+# QuantLib path of the installed version (its special closings and Good Friday
+# rules change between releases). The rules below are only a fallback for
+# numpy-only environments, where there is no QuantLib path to agree with.
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    last = (date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1))
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter_sunday(year: int) -> date:
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    return date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+
+def _observed(holiday: date, saturday_to_friday: bool = True) -> date:
+    if holiday.weekday() == 6:
+        return holiday + timedelta(days=1)
+    if holiday.weekday() == 5 and saturday_to_friday:
+        return holiday - timedelta(days=1)
+    return holiday
+
+
+# Unscheduled closings (fallback rules only)
+_SPECIAL_CLOSINGS = {
+    date(2004, 6, 11),   # Reagan funeral
+    date(2007, 1, 2),    # Ford funeral
+    date(2012, 10, 30),  # Hurricane Sandy
+    date(2018, 12, 5),   # Bush funeral
+    date(2025, 1, 9),    # Carter funeral
+}
+
+
+def government_bond_holidays(year: int) -> set:
+    """Weekday closings of the US Government Bond (SIFMA) calendar in year (fallback rules)."""
+    holidays = {
+        # New Year's Day moves to Monday if on Sunday (not to the prior Friday)
+        _observed(date(year, 1, 1), saturday_to_friday=False),
+        _nth_weekday(year, 2, 0, 3),                         # Washington's birthday
+        _last_weekday(year, 5, 0),                           # Memorial Day
+        _observed(date(year, 7, 4)),                         # Independence Day
+        _nth_weekday(year, 9, 0, 1),                         # Labor Day
+        _nth_weekday(year, 10, 0, 2),                        # Columbus Day
+        _observed(date(year, 11, 11), saturday_to_friday=False),  # Veterans Day
+        _nth_weekday(year, 11, 3, 4),                        # Thanksgiving
+        _observed(date(year, 12, 25)),                       # Christmas
+    }
+    if year >= 1983:
+        holidays.add(_nth_weekday(year, 1, 0, 3))            # Martin Luther King Jr. Day
+    if year != 2023:
+        holidays.add(_easter_sunday(year) - timedelta(days=2))  # Good Friday (2023 traded half a day)
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))           # Juneteenth
+    holidays.update(d for d in _SPECIAL_CLOSINGS if d.year == year)
+    return {d for d in holidays if d.year == year and d.weekday() < 5}
+
+
+def _quantlib_holidays(weekdays: np.ndarray) -> Optional[np.ndarray]:
+    """Mask of the weekday ordinals QuantLib's GovernmentBond calendar closes, or None without QuantLib."""
+    try:
+        import QuantLib as ql
+    except ImportError:
+        return None
+    calendar = ql.UnitedStates(ql.UnitedStates.GovernmentBond)
+    offset = _QL_SERIAL_EPOCH.toordinal()
+    return np.fromiter((calendar.isHoliday(ql.Date(int(ordinal) - offset)) for ordinal in weekdays),
+                       dtype=bool, count=len(weekdays))
+
+
+class GovernmentBondCalendar:
+    """Business-day tables over 1950-2200 for vectorized adjustment by ordinal."""
+
+    def __init__(self):
+        self.start = _CALENDAR_START.toordinal()
+        size = _CALENDAR_END.toordinal() - self.start
+        ordinals = np.arange(size) + self.start
+        business = (ordinals - 1) % 7 < 5                    # ordinal 1 (0001-01-01) is a Monday
+        holidays = _quantlib_holidays(ordinals[business])
+        if holidays is not None:
+            self.source = 'quantlib'
+            business[np.flatnonzero(business)[holidays]] = False
+        else:
+            self.source = 'rules'
+            for year in range(_CALENDAR_START.year, _CALENDAR_END.year):
+                for holiday in government_bond_holidays(year):
+                    business[holiday.toordinal() - self.start] = False
+        self.business = business
+        index = np.arange(size)
+        self.following = np.minimum.accumulate(np.where(business, index, size - 1)[::-1])[::-1] + self.start
+        self.preceding = np.maximum.accumulate(np.where(business, index, 0)) + self.start
+
+    def is_business_day(self, ordinals: np.ndarray) -> np.ndarray:
+        return self.business[ordinals - self.start]
+
+    def adjust(self, ordinals: np.ndarray, conventions: Any) -> np.ndarray:
+        """Adjust ordinals by a convention code, scalar or one per row."""
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        if np.ndim(conventions) == 0:
+            return self._adjust(ordinals, int(conventions))
+        conventions = np.asarray(conventions)
+        adjusted = ordinals.copy()
+        for convention in _present(conventions):
+            rows = conventions == convention
+            adjusted[rows] = self._adjust(ordinals[rows], convention)
+        return adjusted
+
+    def _adjust(self, ordinals: np.ndarray, convention: int) -> np.ndarray:
+        if convention == UNADJUSTED:
+            return ordinals
+        dates = ordinals - self.start
+        if convention == PRECEDING:
+            return self.preceding[dates]
+        following = self.following[dates]
+        if convention == MODIFIED_FOLLOWING:
+            # Back to Preceding when Following crosses into the next month
+            following = np.where(_month_index(following) != _month_index(ordinals),
+                                 self.preceding[dates], following)
+        return following
+
+    def advance_business_days(self, ordinal: int, days: int) -> int:
+        """calendar.advance(d, n, Days): n > 0 business days forward, 0 = Following."""
+        if days <= 0:
+            return int(self.following[ordinal - self.start])
+        for _ in range(days):
+            ordinal += 1
+            while not self.business[ordinal - self.start]:
+                ordinal += 1
+        return ordinal
+
+
+_calendar: Optional[GovernmentBondCalendar] = None
+
+
+def get_government_bond_calendar() -> GovernmentBondCalendar:
+    """Process-wide calendar tables (built on first use: one QuantLib isHoliday per weekday)."""
+    global _calendar
+    if _calendar is None:
+        _calendar = GovernmentBondCalendar()
+    return _calendar
+
+
+# --- Vectorized date arithmetic on proleptic ordinals ---
+
+def _civil_from_days(ordinals: np.ndarray):
+    """(year, month, day) arrays from proleptic ordinals (integer civil-from-days)."""
+    z = np.asarray(ordinals, dtype=np.int64) + 305                       # days since 0000-03-01
+    era = z // 146097
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    day = doy - (153 * mp + 2) // 5 + 1
+    month = np.where(mp < 10, mp + 3, mp - 9)
+    return yoe + era * 400 + (month <= 2), month, day
+
+
+_YMD_START = _CALENDAR_START.toordinal()
+_YMD_TABLE = np.stack(_civil_from_days(np.arange(_YMD_START, _CALENDAR_END.toordinal())))
+
+
+def _ymd(ordinals: np.ndarray):
+    """(year, month, day) arrays from proleptic ordinals, by table lookup over the calendar span."""
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    offsets = ordinals - _YMD_START
+    if offsets.size and (offsets.min() < 0 or offsets.max() >= _YMD_TABLE.shape[1]):
+        return _civil_from_days(ordinals)
+    return _YMD_TABLE[0, offsets], _YMD_TABLE[1, offsets], _YMD_TABLE[2, offsets]
+
+
+def _ordinal(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """Proleptic ordinals from (year, month, day) arrays (integer days-from-civil)."""
+    year = year - (month <= 2)
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * np.where(month > 2, month - 3, month + 9) + 2) // 5 + day - 1
+    return era * 146097 + yoe * 365 + yoe // 4 - yoe // 100 + doy - 305
+
+
+_MONTH_DAYS = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int64)
+
+
+def _month_index(ordinals: np.ndarray) -> np.ndarray:
+    year, month, _ = _ymd(ordinals)
+    return year * 12 + month - 1
+
+
+def add_months(ordinals: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """Date + n months, clamping the day to the month end (QuantLib Date arithmetic)."""
+    year, month, day = _ymd(ordinals)
+    index = year * 12 + month - 1 + np.asarray(months, dtype=np.int64)
+    year, month = index // 12, index % 12 + 1
+    month_length = _MONTH_DAYS[month - 1] + ((month == 2) & _is_leap(year))
+    return _ordinal(year, month, np.minimum(day, month_length))
+
+
+def _is_leap(year: np.ndarray) -> np.ndarray:
+    return (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+
+
+_JAN_FIRST = np.array([date(year, 1, 1).toordinal() for year in range(_CALENDAR_START.year - 1, _CALENDAR_END.year + 2)])
+
+
+def _jan_first(year: np.ndarray) -> np.ndarray:
+    offsets = year - (_CALENDAR_START.year - 1)
+    if offsets.size and (offsets.min() < 0 or offsets.max() >= len(_JAN_FIRST)):
+        return _ordinal(year, np.ones_like(year), np.ones_like(year))
+    return _JAN_FIRST[offsets]
+
+
+def _thirty_360_days(d1: np.ndarray, d2: np.ndarray) -> np.ndarray:
+    y1, m1, dd1 = _ymd(d1)
+    y2, m2, dd2 = _ymd(d2)
+    dd1 = np.minimum(dd1, 30)
+    dd2 = np.where((dd2 == 31) & (dd1 == 30), 30, dd2)
+    return (360 * (y2 - y1) + 30 * (m2 - m1) + (dd2 - dd1)).astype(np.float64)
+
+
+def _isda_fraction(d1: np.ndarray, d2: np.ndarray) -> np.ndarray:
+    y1, y2 = _ymd(d1)[0], _ymd(d2)[0]
+    days_1 = np.where(_is_leap(y1), 366.0, 365.0)
+    days_2 = np.where(_is_leap(y2), 366.0, 365.0)
+    fraction = (y2 - y1 - 1) + (_jan_first(y1 + 1) - d1) / days_1 + (d2 - _jan_first(y2)) / days_2
+    return np.where(d1 == d2, 0.0, fraction)
+
+
+def _isma_fraction(d1: np.ndarray, d2: np.ndarray, ref_start: np.ndarray, ref_end: np.ndarray) -> np.ndarray:
+    ref_days = np.maximum(ref_end - ref_start, 1)
+    months = np.floor(0.5 + 12.0 * ref_days / 365.0)
+    period = months / 12.0
+    fraction = period * (np.minimum(d2, ref_end) - d1) / ref_days
+    # Payment after the reference end: the excess accrues in the next reference period
+    beyond = np.flatnonzero(d2 > ref_end)
+    if len(beyond):
+        end = ref_end.flat[beyond]
+        next_end = add_months(end, months.flat[beyond].astype(np.int64))
+        fraction.flat[beyond] += period.flat[beyond] * (d2.flat[beyond] - end) / np.maximum(next_end - end, 1)
+    return fraction
+
+
+def _present(codes: np.ndarray) -> list:
+    """Distinct values of a small non-negative code array (cheaper than np.unique)."""
+    return np.flatnonzero(np.bincount(codes)).tolist() if len(codes) else []
+
+
+def _by_code(codes: np.ndarray, compute, *dates: np.ndarray) -> np.ndarray:
+    """Apply compute(code, *dates) to the rows of each day count code (codes: one per row)."""
+    result = np.empty(dates[0].shape, dtype=np.float64)
+    for code in _present(codes):
+        rows = codes == code
+        result[rows] = compute(code, *(d[rows] for d in dates))
+    return result
+
+
+def _day_count(code: int, d1: np.ndarray, d2: np.ndarray) -> np.ndarray:
+    return _thirty_360_days(d1, d2) if code == THIRTY_360 else (d2 - d1).astype(np.float64)
+
+
+def _year_fraction(code: int, d1, d2, ref_start, ref_end) -> np.ndarray:
+    if code == THIRTY_360:
+        return _thirty_360_days(d1, d2) / 360.0
+    if code == ACT_ACT_ISMA:
+        return _isma_fraction(d1, d2, ref_start, ref_end)
+    if code == ACT_ACT_ISDA:
+        return _isda_fraction(d1, d2)
+    return (d2 - d1) / (365.0 if code == ACT_365F else 360.0)
+
+
+def day_counts(codes: np.ndarray, d1: np.ndarray, d2: np.ndarray) -> np.ndarray:
+    """DayCounter.dayCount per row: 30/360 Bond Basis days for THIRTY_360, actual days otherwise."""
+    return _by_code(np.asarray(codes), _day_count, d1, d2)
+
+
+def year_fractions(codes: np.ndarray, d1: np.ndarray, d2: np.ndarray,
+                   ref_start: np.ndarray, ref_end: np.ndarray) -> np.ndarray:
+    """
+    DayCounter.yearFraction(d1, d2, refStart, refEnd) per element, codes one per row.
+
+    Assumes d1 <= d2 and d1 >= refStart, which holds for every coupon period
+    the engine builds.
+    """
+    return _by_code(np.asarray(codes), _year_fraction, d1, d2, ref_start, ref_end)
+
+
+# --- Portfolio layout and solve ---
+
+class BulletLayout:
+    """Padded per-bond flow arrays for one settlement date."""
+
+    __slots__ = ('times', 'amounts', 'accrued', 'accrued_reported', 'payment_dates', 'flow_counts',
+                 'settlement', 'bond_settlement')
+
+    def __init__(self, times, amounts, accrued, accrued_reported, payment_dates, flow_counts, settlement, bond_settlement):
+        self.times = times
+        self.amounts = amounts
+        self.accrued = accrued                      # at the bond settlement date (yield target)
+        self.accrued_reported = accrued_reported    # as the engine reports it (holiday rule)
+        self.payment_dates = payment_dates          # ordinals, 0 pads
+        self.flow_counts = flow_counts
+        self.settlement = settlement
+        self.bond_settlement = bond_settlement
+
+
+def layout_bullets(coupons: Sequence[float], maturities: Sequence[date], frequencies: Sequence[int],
+                   day_count_codes: Sequence[int], convention_codes: Sequence[int],
+                   settlement: date, settlement_days: int = 0) -> BulletLayout:
+    """
+    Remaining flows of every bond as padded arrays.
+
+    Args:
+        coupons: Coupon rates in percent (e.g. 4.125)
+        maturities: Maturity dates
+        frequencies: Months per coupon period (6 = Semiannual)
+        day_count_codes: DAY_COUNT_CODES values
+        convention_codes: BUSINESS_CONVENTION_CODES values for the schedule
+        settlement: Settlement date as the engine receives it
+        settlement_days: T+n; 0 uses settlement as given (Following-adjusted for pricing)
+
+    Returns:
+        BulletLayout (flows strictly after the bond settlement date)
+    """
+    calendar = get_government_bond_calendar()
+    count = len(coupons)
+    coupon = np.asarray(coupons, dtype=np.float64) / 100.0
+    maturity = np.array([m.toordinal() for m in maturities], dtype=np.int64)
+    tenor = np.asarray(frequencies, dtype=np.int64)
+    codes = np.asarray(day_count_codes, dtype=np.int64)
+    conventions = np.asarray(convention_codes, dtype=np.int64)
+
+    raw_settlement = settlement.toordinal()
+    bond_settlement = calendar.advance_business_days(raw_settlement, settlement_days)
+    if settlement_days > 0:
+        raw_settlement = bond_settlement
+
+    # Schedule dates counted back from maturity: column i is maturity - i tenors
+    months_left = (_month_index(maturity) - _month_index(np.array([bond_settlement]))) // tenor
+    columns = int(max(months_left.max(initial=0), 0)) + 3
+    # Built per tenor so annual rows don't carry a quarterly row's column count; the
+    # columns a row doesn't need sit at the calendar start, before any settlement
+    accrual = np.full((count, columns), calendar.start, dtype=np.int64)
+    for months in _present(tenor):
+        group = np.flatnonzero(tenor == months)
+        needed = int(max(months_left[group].max(), 0)) + 3
+        steps = np.arange(needed)[None, :]
+        unadjusted = np.maximum(add_months(np.repeat(maturity[group, None], needed, axis=1), -steps * months),
+                                calendar.start)
+        accrual[group, :needed] = calendar.adjust(unadjusted, conventions[group])   # accrual end of coupon i
+    payment = calendar.adjust(accrual, FOLLOWING)
+    start, end, pay = accrual[:, 1:], accrual[:, :-1], payment[:, :-1]    # coupon i: start=A[i+1], end=A[i]
+
+    flow_counts = (pay > bond_settlement).sum(axis=1)
+
+    # Chronological order: flow k of bond b is coupon flow_counts[b] - 1 - k.
+    # Day counts run on the valid cells only, then scatter into the padded grid.
+    width = int(flow_counts.max(initial=0))
+    valid = np.arange(width)[None, :] < flow_counts[:, None]
+    cell_rows, cell_k = np.nonzero(valid)
+    source = flow_counts[cell_rows] - 1 - cell_k
+    s_start, s_end, s_pay = start[cell_rows, source], end[cell_rows, source], pay[cell_rows, source]
+    previous_pay = np.where(cell_k == 0, bond_settlement, pay[cell_rows, np.minimum(source + 1, columns - 2)])
+    cell_codes = codes[cell_rows]
+
+    # Stepwise discount time (CashFlows::getStepwiseDiscountTime)
+    step = np.zeros((count, width))
+    step[cell_rows, cell_k] = (year_fractions(cell_codes, s_start, s_pay, s_start, s_end)
+                               - year_fractions(cell_codes, s_start, np.maximum(previous_pay, s_start), s_start, s_end))
+    times = np.where(valid, np.cumsum(step, axis=1), 0.0)
+    amounts = np.zeros((count, width))
+    amounts[cell_rows, cell_k] = 100.0 * coupon[cell_rows] * year_fractions(cell_codes, s_start, s_end, s_start, s_end)
+    amounts[np.arange(count), np.maximum(flow_counts - 1, 0)] += np.where(flow_counts > 0, 100.0, 0.0)
+
+    # Accrued on the next coupon (accruedAmount): 0 before its accrual start
+    first = np.clip(flow_counts - 1, 0, columns - 2)
+    a_start, a_end = start[np.arange(count), first], end[np.arange(count), first]
+    accrued_to = np.minimum(bond_settlement, a_end)
+    accrued = np.where(
+        (bond_settlement > a_start) & (flow_counts > 0),
+        100.0 * coupon * year_fractions(codes, a_start, np.maximum(accrued_to, a_start), a_start, a_end), 0.0
+    )
+
+    accrued_reported = accrued
+    if settlement_days == 0 and not calendar.is_business_day(np.array([raw_settlement]))[0]:
+        # Engine rule for holiday settlement: coupon/frequency × dayCount ratio in the
+        # first schedule period (chronologically) with start <= settlement <= end
+        containing = (start <= raw_settlement) & (raw_settlement <= end)
+        chosen = np.where(containing.any(axis=1), columns - 2 - np.argmax(containing[:, ::-1], axis=1), first)
+        h_start, h_end = start[np.arange(count), chosen], end[np.arange(count), chosen]
+        ratio = day_counts(codes, h_start, np.full(count, raw_settlement)) / np.maximum(day_counts(codes, h_start, h_end), 1)
+        accrued_reported = 100.0 * coupon * tenor / 12.0 * ratio
+
+    payment_dates = np.zeros((count, width), dtype=np.int64)
+    payment_dates[cell_rows, cell_k] = s_pay
+    return BulletLayout(times, amounts, accrued, accrued_reported,
+                        payment_dates, flow_counts, raw_settlement, bond_settlement)
+
+
+def solve_yields(times: np.ndarray, amounts: np.ndarray, dirty_prices: np.ndarray, frequency: int = 2,
+                 guesses: Optional[np.ndarray] = None, accuracy: float = YIELD_ACCURACY,
+                 max_iterations: int = MAX_YIELD_ITERATIONS):
+    """
+    Vectorized Newton for Σ a·(1 + y/f)^(-f·t) = dirty per row.
+
+    Returns:
+        Tuple of (yields, converged mask, iterations used)
+    """
+    yields = np.full(len(dirty_prices), YIELD_GUESS) if guesses is None else np.array(guesses, dtype=np.float64)
+    converged = np.zeros(len(dirty_prices), dtype=bool)
+    active = np.ones(len(dirty_prices), dtype=bool)
+    iterations = 0
+    while active.any() and iterations < max_iterations:
+        iterations += 1
+        rows = np.flatnonzero(active)
+        base = 1.0 + yields[rows] / frequency
+        discounted = amounts[rows] * base[:, None] ** (-frequency * times[rows])
+        residual = discounted.sum(axis=1) - dirty_prices[rows]
+        slope = -(discounted * times[rows]).sum(axis=1) / base
+        solvable = slope < 0.0
+        step = np.where(solvable, residual / np.where(solvable, slope, -1.0), 0.0)
+        # Keep 1 + y/f positive
+        step = np.where(yields[rows] - step <= -frequency, (yields[rows] + frequency) / 2, step)
+        yields[rows] -= step
+        done = np.abs(step) < accuracy
+        converged[rows[done & solvable]] = True
+        active[rows[done | ~solvable | ~np.isfinite(yields[rows])]] = False
+    return yields, converged, iterations
+
+
+def price_bullet_portfolio(coupons, maturities, prices, frequencies, day_count_codes, convention_codes,
+                           settlement: date, settlement_days: int = 0, yield_frequency: int = 2) -> Dict[str, Any]:
+    """
+    Yield and risk for a portfolio of bullets in one pass.
+
+    Args:
+        coupons, maturities, frequencies, day_count_codes, convention_codes: see layout_bullets
+        prices: Clean prices per 100
+        settlement: Settlement date
+        settlement_days: T+n
+        yield_frequency: Compounding frequency of the yield (engine: Semiannual = 2)
+
+    Returns:
+        Dict of arrays: ytm (decimal), duration (modified), macaulay_duration, convexity,
+        pvbp, accrued_interest, dirty_price, converged, plus 'layout' and 'iterations'
+    """
+    layout = layout_bullets(coupons, maturities, frequencies, day_count_codes, convention_codes,
+                            settlement, settlement_days)
+    clean = np.asarray(prices, dtype=np.float64)
+    f = float(yield_frequency)
+    yields, converged, iterations = solve_yields(layout.times, layout.amounts, clean + layout.accrued, yield_frequency)
+
+    base = (1.0 + yields / f)[:, None]
+    discounted = layout.amounts * base ** (-f * layout.times)
+    value = discounted.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        duration = (discounted * layout.times).sum(axis=1) / base[:, 0] / value
+        convexity = (discounted * layout.times * (f * layout.times + 1.0)).sum(axis=1) / (f * base[:, 0] ** 2) / value
+    converged &= layout.flow_counts > 0
+    return {
+        'ytm': yields,
+        'duration': duration,
+        'macaulay_duration': duration * base[:, 0],
+        'convexity': convexity,
+        'pvbp': duration * clean / 10000.0,
+        'accrued_interest': layout.accrued_reported,
+        'dirty_price': clean + layout.accrued_reported,
+        'converged': converged,
+        'iterations': iterations,
+        'layout': layout
+    }
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Calculation Context
+===================
+
+Carries the settlement date explicitly through a bond calculation instead of
+mutating ql.Settings.instance().evaluationDate for every bond.
+
+QuantLib's evaluation date is a process-global singleton. Setting it per bond
+makes gunicorn threaded workers (--threads N) unsafe - one request can move the
+date under another's feet - and forces every observer to recompute.
+
+Two pieces:
+
+- CalculationContext: settlement date (Python + QuantLib) that the engine
+  passes explicitly to bondYield, BondFunctions.duration / convexity / zSpread
+  and accruedAmount.
+- EvaluationDateGate: the only place the global date is set. Callers sharing
+  a settlement date form a group that runs concurrently under one setting; a
+  caller with a different date waits for the group to drain, then switches
+  the date once for its own group. Waiting groups are served in turn so a busy
+  date cannot starve others. Re-entrant per thread, so a portfolio can hold
+  the gate while each bond's calculation enters it again.
+
+Curves built from rate helpers still need the global date (helpers derive
+their pillar dates from it), which is why the gate exists at all.
+"""
+
+import os
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+import QuantLib as ql
+
+logger = logging.getLogger(__name__)
+
+
+class EvaluationDateGate:
+    """Groups callers by evaluation date so the global date is set once per group."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._current: Optional[int] = None   # serial number of the date in force
+        self._next: Optional[int] = None      # date claimed by the first waiting group
+        self._active = 0
+        self._local = threading.local()
+        self.switches = 0
+        self.entries = 0
+
+    def _acquire(self, ql_date: ql.Date):
+        key = ql_date.serialNumber()
+        with self._cond:
+            while True:
+                if self._active == 0 and self._next in (None, key):
+                    # Gate is idle (or our group is next) - take it
+                    if self._current != key:
+                        ql.Settings.instance().evaluationDate = ql_date
+                        self._current = key
+                        self.switches += 1
+                    if self._next == key:
+                        self._next = None
+                    break
+                if self._current == key and self._next is None:
+                    # Join the running group for the same date
+                    break
+                if self._next is None:
+                    self._next = key
+                self._cond.wait()
+            self._active += 1
+            self.entries += 1
+
+    def _release(self):
+        with self._cond:
+            self._active -= 1
+            if self._active == 0:
+                self._cond.notify_all()
+
+    @contextmanager
+    def hold(self, ql_date: ql.Date):
+        """Hold the global evaluation date at ql_date for the duration of the block."""
+        held = getattr(self._local, 'held', None)
+        if held is not None:
+            if held[0] != ql_date.serialNumber():
+                raise RuntimeError(
+                    f"Evaluation date already held at serial {held[0]} by this thread; "
+                    f"cannot switch to {ql_date} inside the same scope"
+                )
+            self._local.held = (held[0], held[1] + 1)
+            try:
+                yield
+            finally:
+                self._local.held = (held[0], self._local.held[1] - 1)
+            return
+
+        self._acquire(ql_date)
+        self._local.held = (ql_date.serialNumber(), 1)
+        try:
+            yield
+        finally:
+            self._local.held = None
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'entries': self.entries,
+                'date_switches': self.switches,
+                'active': self._active
+            }
+
+
+_gate = EvaluationDateGate()
+
+
+def _reset_gate_after_fork():
+    # A forked child (e.g. portfolio pool worker) inherits no threads, so any
+    # group held by the parent's other threads must not block it
+    global _gate
+    _gate = EvaluationDateGate()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_gate_after_fork)
+
+
+def get_evaluation_date_gate() -> EvaluationDateGate:
+    """Return the process-wide evaluation date gate."""
+    return _gate
+
+
+def to_ql_date(value: Any) -> ql.Date:
+    """Convert a Python date/datetime or QuantLib Date to a QuantLib Date."""
+    if isinstance(value, ql.Date):
+        return value
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return ql.Date(value.day, value.month, value.year)
+    raise TypeError(f"Unsupported date type: {type(value).__name__}")
+
+
+class CalculationContext:
+    """Settlement date carried explicitly through one calculation (or a group of them)."""
+
+    __slots__ = ('settlement_date', 'ql_settlement_date')
+
+    def __init__(self, settlement_date: Any):
+        self.ql_settlement_date = to_ql_date(settlement_date)
+        if isinstance(settlement_date, datetime):
+            settlement_date = settlement_date.date()
+        elif isinstance(settlement_date, ql.Date):
+            settlement_date = date(settlement_date.year(), settlement_date.month(), settlement_date.dayOfMonth())
+        self.settlement_date = settlement_date
+
+    @contextmanager
+    def evaluation_scope(self):
+        """Enter the evaluation-date group for this context's settlement date."""
+        with _gate.hold(self.ql_settlement_date):
+            yield self
+
+    def bond_settlement_date(self, bond: ql.Bond) -> ql.Date:
+        """
+        Settlement date QuantLib would have derived from the global evaluation date.
+
+        Equivalent to passing Date() with evaluationDate == settlement date, so
+        results are unchanged (including holiday adjustment by the bond's calendar).
+        """
+        return bond.settlementDate(self.ql_settlement_date)
+
+    def __repr__(self):
+        return f"CalculationContext({self.settlement_date})"
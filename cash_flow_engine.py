@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Cash Flow Engine
+================
+
+Columnar cash-flow projection for the portfolio cash-flow endpoints.
+
+Every remaining coupon and principal payment of a portfolio is generated in
+one pass into flat arrays, ordered by bond and then by payment date:
+
+    bond[i]       index of the bond in the request
+    dates[i]      payment date (proleptic ordinal)
+    amounts[i]    payment amount for the bond's nominal
+    principal[i]  True for the redemption, False for a coupon
+
+The schedule reproduces what XTrillionCashFlowCalculator's QuantLib bond
+did: Schedule(settlement, maturity, Semiannual, US Government Bond,
+Following, Following, Backward, no end-of-month) and a FixedRateBond of the
+given nominal, so the first coupon accrues from settlement and the
+redemption is the last flow. Day counts, calendar and month arithmetic are
+the bullet_bond_kernel tables.
+
+The `next` / `period` filters are boolean masks on these arrays, netting is
+a grouped sum over the unique payment dates, and dates only become strings
+in the serialization helpers (one strftime-equivalent per distinct date).
+"""
+
+import logging
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bullet_bond_kernel import (ACT_ACT_ISDA, THIRTY_360, FOLLOWING, MAX_MATURITY, add_months,
+                                get_government_bond_calendar, year_fractions, _month_index, _ymd)
+
+logger = logging.getLogger(__name__)
+
+SEMIANNUAL_MONTHS = 6
+
+# Filter names accepted by /api/v1/bond/cashflow
+FILTER_ALL = 'all'
+FILTER_NEXT = 'next'
+FILTER_PERIOD = 'period'
+
+
+class CashFlowColumns:
+    """Flat cash-flow arrays for one settlement date, ordered by (bond, date)."""
+
+    __slots__ = ('bond', 'dates', 'amounts', 'principal', 'settlement', 'bond_count')
+
+    def __init__(self, bond, dates, amounts, principal, settlement: int, bond_count: int):
+        self.bond = bond
+        self.dates = dates
+        self.amounts = amounts
+        self.principal = principal
+        self.settlement = settlement            # ordinal
+        self.bond_count = bond_count
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def select(self, mask: np.ndarray) -> 'CashFlowColumns':
+        return CashFlowColumns(self.bond[mask], self.dates[mask], self.amounts[mask], self.principal[mask],
+                               self.settlement, self.bond_count)
+
+    def filter(self, filter_type: str = FILTER_ALL, filter_days: Optional[int] = None) -> 'CashFlowColumns':
+        """
+        Apply an endpoint filter per bond.
+
+        next:   each bond's first remaining flow (its next coupon; the redemption
+                on the same date is a separate, later flow)
+        period: flows paid within filter_days of settlement (inclusive)
+        other:  everything
+        """
+        if filter_type == FILTER_NEXT:
+            first = np.ones(len(self.bond), dtype=bool)
+            first[1:] = self.bond[1:] != self.bond[:-1]
+            return self.select(first)
+        if filter_type == FILTER_PERIOD and filter_days is not None:
+            return self.select(self.dates - self.settlement <= filter_days)
+        return self
+
+    def for_bonds(self, included: np.ndarray) -> 'CashFlowColumns':
+        """Flows of the bonds where included (a per-bond mask) is True."""
+        return self.select(np.asarray(included, dtype=bool)[self.bond])
+
+
+def project_cash_flows(coupons: Sequence[float], maturities: Sequence[Optional[date]], nominals: Sequence[float],
+                       day_count_codes: Sequence[int], settlement: date,
+                       tenor_months: int = SEMIANNUAL_MONTHS) -> CashFlowColumns:
+    """
+    Remaining coupons and redemptions of every bond, as columns.
+
+    Args:
+        coupons: Coupon rates in percent (e.g. 2.5)
+        maturities: Maturity dates; None (unparseable) or on/before settlement gives no flows
+        nominals: Face amounts
+        day_count_codes: bullet_bond_kernel codes (ACT_ACT_ISDA, THIRTY_360, ...)
+        settlement: Settlement date (schedule effective date)
+        tenor_months: Coupon period in months
+
+    Returns:
+        CashFlowColumns with amounts unrounded
+    """
+    calendar = get_government_bond_calendar()
+    count = len(coupons)
+    settle = settlement.toordinal()
+    limit = MAX_MATURITY.toordinal()
+    maturity = np.array([m.toordinal() if m is not None else 0 for m in maturities], dtype=np.int64)
+    live = (maturity > settle) & (maturity < limit)
+    maturity = np.where(live, maturity, settle + 1)
+    if not live.any():
+        empty = np.zeros(0, dtype=np.int64)
+        return CashFlowColumns(empty, empty, np.zeros(0), np.zeros(0, dtype=bool), settle, count)
+
+    # Column i is maturity - i tenors (unadjusted); the schedule keeps the ones
+    # after settlement and starts its first period at settlement itself
+    months_left = (_month_index(maturity) - _month_index(np.array([settle]))) // tenor_months
+    columns = int(months_left[live].max()) + 2
+    steps = np.arange(columns)[None, :] * tenor_months
+    grid = add_months(np.repeat(maturity[:, None], columns, axis=1), -steps)
+    coupon_counts = np.where(live, (grid > settle).sum(axis=1), 0)
+    bounds = calendar.adjust(np.maximum(grid, settle), FOLLOWING)      # accrual end of coupon i
+
+    width = int(coupon_counts.max())
+    valid = np.arange(width)[None, :] < coupon_counts[:, None]
+    rows, k = np.nonzero(valid)
+    source = coupon_counts[rows] - 1 - k                               # chronological k -> column
+    starts, ends = bounds[rows, source + 1], bounds[rows, source]
+    # A first period that collapses under adjustment is dropped, as Schedule does
+    keep = ends > starts
+    rows, starts, ends = rows[keep], starts[keep], ends[keep]
+
+    codes = np.asarray(day_count_codes, dtype=np.int64)
+    nominal = np.asarray(nominals, dtype=np.float64)
+    rate = np.asarray(coupons, dtype=np.float64) / 100.0
+    coupon_amounts = nominal[rows] * rate[rows] * year_fractions(codes[rows], starts, ends, starts, ends)
+
+    # Redemptions go after each bond's coupons (a stable sort keeps coupon order)
+    redeemed = np.flatnonzero(live)
+    bond = np.concatenate([rows, redeemed])
+    dates = np.concatenate([ends, bounds[redeemed, 0]])
+    amounts = np.concatenate([coupon_amounts, nominal[redeemed]])
+    principal = np.concatenate([np.zeros(len(rows), dtype=bool), np.ones(len(redeemed), dtype=bool)])
+    order = np.argsort(bond, kind='stable')
+    return CashFlowColumns(bond[order], dates[order], amounts[order], principal[order], settle, count)
+
+
+def net_cash_flows(flows: CashFlowColumns) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Portfolio flows netted by payment date.
+
+    Each flow is rounded to cents before summing, as the per-bond responses
+    report them, so the netted totals add up to the individual lines.
+
+    Returns:
+        (sorted unique date ordinals, summed amounts rounded to cents)
+    """
+    if not len(flows):
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    unique_dates, groups = np.unique(flows.dates, return_inverse=True)
+    totals = np.bincount(groups, weights=np.round(flows.amounts, 2), minlength=len(unique_dates))
+    return unique_dates, np.round(totals, 2)
+
+
+def format_dates(ordinals: np.ndarray) -> List[str]:
+    """YYYY-MM-DD strings for ordinals, formatting each distinct date once."""
+    if not len(ordinals):
+        return []
+    unique_dates, positions = np.unique(ordinals, return_inverse=True)
+    years, months, days = _ymd(unique_dates)
+    labels = [f"{y:04d}-{m:02d}-{d:02d}" for y, m, d in zip(years.tolist(), months.tolist(), days.tolist())]
+    return [labels[i] for i in positions.tolist()]
+
+
+def portfolio_records(flows: CashFlowColumns) -> List[Dict[str, Any]]:
+    """Netted flows as the portfolio_cash_flows response rows."""
+    dates, totals = net_cash_flows(flows)
+    return [{"date": label, "amount": amount, "days_from_settlement": days}
+            for label, amount, days in zip(format_dates(dates), totals.tolist(),
+                                           (dates - flows.settlement).tolist())]
+
+
+def bond_records(flows: CashFlowColumns) -> List[List[Dict[str, Any]]]:
+    """Per-bond flow rows (date, amount, type, days_from_settlement), one list per bond."""
+    records = [[] for _ in range(flows.bond_count)]
+    rows = zip(flows.bond.tolist(), format_dates(flows.dates), np.round(flows.amounts, 2).tolist(),
+               flows.principal.tolist(), (flows.dates - flows.settlement).tolist())
+    for bond, label, amount, principal, days in rows:
+        records[bond].append({
+            "date": label,
+            "amount": amount,
+            "type": "maturity" if principal else "coupon",
+            "days_from_settlement": days
+        })
+    return records
+
+
+def day_count_for(is_treasury: bool) -> int:
+    """The calculator's conventions: Actual/Actual ISDA for Treasuries, 30/360 Bond Basis otherwise."""
+    return ACT_ACT_ISDA if is_treasury else THIRTY_360
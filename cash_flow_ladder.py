@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Cash Flow Ladder
+================
+
+Time-bucketed coupon / principal ladders and projected income for
+portfolios, on top of cash_flow_engine.
+
+Bucketing:
+- month:   calendar months (the first bucket runs from settlement to the
+           end of its month)
+- quarter: calendar quarters, likewise
+- custom:  explicit upper edges, each either days from settlement (30 means
+           days 1-30) or an ISO date (flows up to and including that date)
+
+month and quarter run to the horizon (horizon_years after settlement,
+default 30); custom buckets end at the last edge. Flows after the horizon
+are reported in the summary, not dropped silently.
+
+Each bucket carries its coupon (projected income), principal, total and
+flow count, plus cumulative coupon / principal / total.
+
+Schedules are per instrument, not per line: a line's flows are its
+instrument's flows for a nominal of 1 scaled by the line's nominal. Unit
+schedules are kept in an LRU (InstrumentScheduleCache, keyed by coupon,
+maturity, day count and settlement; CASH_FLOW_SCHEDULE_CACHE_SIZE, default
+50000), so repeated instruments and repeated requests skip projection. A
+ladder is built CASH_FLOW_LADDER_CHUNK lines at a time (default 2000): the
+chunk's flows are concatenated into arrays, bucketed with searchsorted and
+summed with bincount, so a 20k-line ladder never holds per-flow dicts or
+more than one chunk of flows.
+
+ladder_ndjson / ladder_csv stream the bucket rows followed by the summary,
+in the same layout as portfolio_streaming.
+"""
+
+import io
+import os
+import csv
+import json
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bullet_bond_kernel import add_months, _ordinal, _ymd
+from cash_flow_engine import project_cash_flows, format_dates
+
+DEFAULT_SCHEDULE_CACHE_SIZE = int(os.environ.get('CASH_FLOW_SCHEDULE_CACHE_SIZE', 50000))
+DEFAULT_LADDER_CHUNK = int(os.environ.get('CASH_FLOW_LADDER_CHUNK', 2000))
+DEFAULT_HORIZON_YEARS = 30
+MAX_HORIZON_YEARS = 100
+
+BUCKETINGS = ('month', 'quarter', 'custom')
+
+# Bucket row fields, in output order
+LADDER_FIELDS = ['bucket', 'label', 'start', 'end', 'coupon', 'principal', 'total', 'flows',
+                 'cumulative_coupon', 'cumulative_principal', 'cumulative_total']
+LADDER_SUMMARY_FIELDS = ['total_coupon', 'total_principal', 'total', 'beyond_horizon_total', 'bonds',
+                         'instruments', 'buckets', 'horizon_end']
+
+# (coupon %, maturity, day count code)
+InstrumentKey = Tuple[float, date, int]
+
+
+class InstrumentScheduleCache:
+    """LRU of per-instrument unit cash-flow schedules for one settlement date each."""
+
+    def __init__(self, max_size: int = DEFAULT_SCHEDULE_CACHE_SIZE):
+        self.max_size = max(0, max_size)
+        self._schedules: 'OrderedDict[tuple, Tuple[np.ndarray, np.ndarray, np.ndarray]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def schedules(self, instruments: Sequence[InstrumentKey], settlement: date) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        (payment ordinals, amounts per unit nominal, principal mask) per instrument.
+
+        Missing instruments are projected together in one engine pass.
+        """
+        settle = settlement.toordinal()
+        found: Dict[tuple, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        missing: Dict[tuple, None] = {}
+        with self._lock:
+            for instrument in instruments:
+                key = instrument + (settle,)
+                if key in found or key in missing:
+                    continue
+                schedule = self._schedules.get(key)
+                if schedule is None:
+                    missing[key] = None
+                    continue
+                self._schedules.move_to_end(key)
+                found[key] = schedule
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if missing:
+            keys = list(missing)
+            coupons, maturities, codes, _ = zip(*keys)
+            flows = project_cash_flows(coupons, maturities, np.ones(len(keys)), codes, settlement)
+            bounds = np.searchsorted(flows.bond, np.arange(len(keys) + 1))
+            projected = {key: (flows.dates[lo:hi], flows.amounts[lo:hi], flows.principal[lo:hi])
+                         for key, lo, hi in zip(keys, bounds[:-1], bounds[1:])}
+            found.update(projected)
+            with self._lock:
+                if self.max_size:
+                    self._schedules.update(projected)
+                    while len(self._schedules) > self.max_size:
+                        self._schedules.popitem(last=False)
+                        self.evictions += 1
+        return [found[instrument + (settle,)] for instrument in instruments]
+
+    def clear(self):
+        with self._lock:
+            self._schedules.clear()
+
+    def __len__(self) -> int:
+        return len(self._schedules)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for /health."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._schedules),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+_schedule_cache: Optional[InstrumentScheduleCache] = None
+_schedule_cache_lock = threading.Lock()
+
+
+def get_instrument_schedule_cache() -> InstrumentScheduleCache:
+    """Process-wide schedule cache used by the ladder endpoints."""
+    global _schedule_cache
+    if _schedule_cache is None:
+        with _schedule_cache_lock:
+            if _schedule_cache is None:
+                _schedule_cache = InstrumentScheduleCache()
+    return _schedule_cache
+
+
+def _period_starts(first: int, end: int, months: int) -> np.ndarray:
+    """First days of the calendar periods of `months` months starting after ordinal first, before end."""
+    year, month, _ = _ymd(np.array([first]))
+    index = year[0] * 12 + month[0] - 1
+    index = (index // months + 1) * months
+    last_year, last_month, _ = _ymd(np.array([end]))
+    indices = np.arange(index, last_year[0] * 12 + last_month[0], months)
+    starts = _ordinal(indices // 12, indices % 12 + 1, np.ones_like(indices))
+    return starts[starts < end]
+
+
+def bucket_edges(settlement: date, bucketing: str = 'month', edges: Optional[Sequence[Any]] = None,
+                 horizon_years: int = DEFAULT_HORIZON_YEARS) -> Tuple[np.ndarray, List[str]]:
+    """
+    Bucket boundaries and labels for a settlement date.
+
+    Args:
+        settlement: Flows strictly after this date are bucketed
+        bucketing: 'month', 'quarter' or 'custom'
+        edges: custom only - ascending upper edges, days from settlement (int) or ISO dates
+        horizon_years: month / quarter only
+
+    Returns:
+        (ordinals, labels): bucket i is [ordinals[i], ordinals[i+1])
+
+    Raises:
+        ValueError: unknown bucketing, bad horizon or edges
+    """
+    settle = settlement.toordinal()
+    if bucketing in ('month', 'quarter'):
+        if not 1 <= int(horizon_years) <= MAX_HORIZON_YEARS:
+            raise ValueError(f"horizon_years must be between 1 and {MAX_HORIZON_YEARS}")
+        end = int(add_months(np.array([settle]), np.array([12 * int(horizon_years)]))[0]) + 1
+        months = 1 if bucketing == 'month' else 3
+        ordinals = np.concatenate([[settle + 1], _period_starts(settle + 1, end, months), [end]]).astype(np.int64)
+        years, month_numbers, _ = _ymd(ordinals[:-1])
+        if bucketing == 'month':
+            labels = [f"{y:04d}-{m:02d}" for y, m in zip(years.tolist(), month_numbers.tolist())]
+        else:
+            labels = [f"{y:04d}-Q{(m - 1) // 3 + 1}" for y, m in zip(years.tolist(), month_numbers.tolist())]
+        return ordinals, labels
+
+    if bucketing != 'custom':
+        raise ValueError(f"bucket must be one of: {', '.join(BUCKETINGS)}")
+    if not edges:
+        raise ValueError("edges required when bucket=custom")
+    uppers, labels = [], []
+    previous_days = 0
+    for edge in edges:
+        if isinstance(edge, bool):
+            raise ValueError(f"invalid bucket edge: {edge!r}")
+        if isinstance(edge, (int, float)):
+            days = int(edge)
+        else:
+            try:
+                days = datetime.strptime(str(edge), "%Y-%m-%d").date().toordinal() - settle
+            except ValueError:
+                raise ValueError(f"invalid bucket edge: {edge!r} (days or YYYY-MM-DD)")
+        if days <= previous_days:
+            raise ValueError("bucket edges must be ascending and after settlement")
+        labels.append(f"{previous_days + 1}-{days}d")
+        uppers.append(settle + days + 1)
+        previous_days = days
+    return np.array([settle + 1] + uppers, dtype=np.int64), labels
+
+
+class CashFlowLadder:
+    """Per-bucket coupon / principal sums, accumulated chunk by chunk."""
+
+    def __init__(self, settlement: date, bucketing: str = 'month', edges: Optional[Sequence[Any]] = None,
+                 horizon_years: int = DEFAULT_HORIZON_YEARS):
+        self.settlement = settlement
+        self.bucketing = bucketing
+        self.edges, self.labels = bucket_edges(settlement, bucketing, edges, horizon_years)
+        count = len(self.labels)
+        self.coupon = np.zeros(count)
+        self.principal = np.zeros(count)
+        self.flows = np.zeros(count, dtype=np.int64)
+        self.beyond_coupon = 0.0
+        self.beyond_principal = 0.0
+        self.beyond_flows = 0
+        self.bonds = 0
+        self.skipped_bonds = 0
+        self.instruments = set()
+
+    def add(self, dates: np.ndarray, amounts: np.ndarray, principal: np.ndarray):
+        """Bucket a batch of flows (any order)."""
+        count = len(self.labels)
+        index = np.searchsorted(self.edges, dates, side='right') - 1
+        beyond = index >= count
+        index = np.where(beyond, count, index)              # extra slot for flows after the horizon
+        coupon = np.bincount(index, weights=np.where(principal, 0.0, amounts), minlength=count + 1)
+        redeemed = np.bincount(index, weights=np.where(principal, amounts, 0.0), minlength=count + 1)
+        flows = np.bincount(index, minlength=count + 1)
+        self.coupon += coupon[:count]
+        self.principal += redeemed[:count]
+        self.flows += flows[:count]
+        self.beyond_coupon += float(coupon[count])
+        self.beyond_principal += float(redeemed[count])
+        self.beyond_flows += int(flows[count])
+
+    def add_lines(self, instruments: Sequence[InstrumentKey], nominals: Sequence[float],
+                  cache: Optional[InstrumentScheduleCache] = None, chunk_size: int = DEFAULT_LADDER_CHUNK):
+        """Add portfolio lines (instrument, nominal), chunk_size lines at a time."""
+        cache = get_instrument_schedule_cache() if cache is None else cache
+        chunk_size = max(1, chunk_size)
+        for start in range(0, len(instruments), chunk_size):
+            chunk = instruments[start:start + chunk_size]
+            schedules = cache.schedules(chunk, self.settlement)
+            lengths = np.array([len(dates) for dates, _, _ in schedules])
+            if lengths.sum():
+                scale = np.repeat(np.asarray(nominals[start:start + chunk_size], dtype=np.float64), lengths)
+                self.add(np.concatenate([s[0] for s in schedules]),
+                         np.concatenate([s[1] for s in schedules]) * scale,
+                         np.concatenate([s[2] for s in schedules]))
+            self.bonds += len(chunk)
+            self.instruments.update(chunk)
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        """Bucket rows in date order, with cumulative totals (amounts rounded to cents)."""
+        starts = format_dates(self.edges[:-1])
+        ends = format_dates(self.edges[1:] - 1)
+        cumulative_coupon = np.cumsum(self.coupon)
+        cumulative_principal = np.cumsum(self.principal)
+        columns = zip(self.labels, starts, ends, np.round(self.coupon, 2).tolist(),
+                      np.round(self.principal, 2).tolist(), np.round(self.coupon + self.principal, 2).tolist(),
+                      self.flows.tolist(), np.round(cumulative_coupon, 2).tolist(),
+                      np.round(cumulative_principal, 2).tolist(),
+                      np.round(cumulative_coupon + cumulative_principal, 2).tolist())
+        for bucket, (label, start, end, coupon, principal, total, flows, cum_coupon, cum_principal, cum_total) in enumerate(columns):
+            yield {
+                'bucket': bucket,
+                'label': label,
+                'start': start,
+                'end': end,
+                'coupon': coupon,
+                'principal': principal,
+                'total': total,
+                'flows': flows,
+                'cumulative_coupon': cum_coupon,
+                'cumulative_principal': cum_principal,
+                'cumulative_total': cum_total
+            }
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals within the horizon, what falls after it, and what was counted."""
+        total_coupon = float(self.coupon.sum())
+        total_principal = float(self.principal.sum())
+        return {
+            'settlement_date': self.settlement.isoformat(),
+            'bucketing': self.bucketing,
+            'buckets': len(self.labels),
+            'horizon_end': format_dates(self.edges[-1:] - 1)[0],
+            'total_coupon': round(total_coupon, 2),
+            'total_principal': round(total_principal, 2),
+            'total': round(total_coupon + total_principal, 2),
+            'total_flows': int(self.flows.sum()),
+            'beyond_horizon_coupon': round(self.beyond_coupon, 2),
+            'beyond_horizon_principal': round(self.beyond_principal, 2),
+            'beyond_horizon_total': round(self.beyond_coupon + self.beyond_principal, 2),
+            'beyond_horizon_flows': self.beyond_flows,
+            'bonds': self.bonds,
+            'skipped_bonds': self.skipped_bonds,
+            'instruments': len(self.instruments)
+        }
+
+
+def ladder_ndjson(ladder: CashFlowLadder, trailer: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Iterator[str]:
+    """One JSON line per bucket, then trailer(summary)."""
+    for row in ladder.rows():
+        yield json.dumps(row) + '\n'
+    yield json.dumps(trailer(ladder.summary()), default=str) + '\n'
+
+
+def ladder_csv(ladder: CashFlowLadder) -> Iterator[str]:
+    """CSV bucket rows, then a blank line and the summary row."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=LADDER_FIELDS, lineterminator='\n')
+
+    def flush() -> str:
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    writer.writeheader()
+    for row in ladder.rows():
+        writer.writerow(row)
+        yield flush()
+    buffer.write('\n')
+    summary_writer = csv.DictWriter(buffer, fieldnames=LADDER_SUMMARY_FIELDS, extrasaction='ignore', lineterminator='\n')
+    summary_writer.writeheader()
+    summary_writer.writerow(ladder.summary())
+    yield flush()
@@ -3,106 +3,137 @@
 Cloud Treasury Updater for App Engine
 =====================================
 
-Updates Treasury yields directly in GCS databases.
+Updates Treasury yields in the GCS copy of the Treasury yield store.
 Designed to be called by App Engine cron jobs.
+
+Only the small sidecar store (treasury_yields.db, a few hundred KB for
+decades of history) is downloaded, upserted and uploaded - bonds_data.db is
+never touched. The upload is conditional on the generation that was
+downloaded, so two overlapping runs can't silently drop each other's day.
 """
 
 import tempfile
 import os
 from datetime import datetime, timedelta
+from typing import Callable
 from google.cloud import storage
+from google.api_core.exceptions import NotFound, PreconditionFailed
 import logging
 from us_treasury_yield_fetcher import USTreasuryYieldFetcher
-from sync_databases_with_gcs import DatabaseSync
+from treasury_yield_store import STORE_FILENAME
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class CloudTreasuryUpdater:
-    """Updates Treasury yields in cloud databases."""
-    
+    """Updates Treasury yields in the cloud yield store."""
+
     def __init__(self, bucket_name='json-receiver-databases', project_id='future-footing-414610'):
         self.bucket_name = bucket_name
         self.project_id = project_id
         self.storage_client = storage.Client(project=project_id)
         self.bucket = self.storage_client.bucket(bucket_name)
         self.fetcher = USTreasuryYieldFetcher()
-    
+
+    def _update_store(self, apply: Callable[[str], dict], metadata: dict) -> dict:
+        """
+        Download the store, let apply() write to the local copy, upload it back.
+
+        apply(local_path) returns the result dict; the store is uploaded only
+        when its status is 'success'.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            local_store_path = os.path.join(tmpdir, STORE_FILENAME)
+            blob = self.bucket.blob(STORE_FILENAME)  # No subdirectory
+            try:
+                blob.reload()
+                generation = blob.generation
+                blob.download_to_filename(local_store_path, if_generation_match=generation)
+                logger.info(f"Downloaded {STORE_FILENAME} from GCS ({blob.size / 1024:.0f}KB, "
+                            f"generation {generation})")
+            except NotFound:
+                generation = 0      # First run: the upload creates the object
+                logger.info(f"{STORE_FILENAME} not in GCS yet - starting a new store")
+
+            result = apply(local_store_path)
+            if result['status'] != 'success':
+                return result
+
+            blob.metadata = dict(metadata, updated_at=datetime.utcnow().isoformat())
+            try:
+                blob.upload_from_filename(local_store_path, if_generation_match=generation)
+            except PreconditionFailed:
+                return {'status': 'error', 'yields_updated': 0,
+                        'message': f'{STORE_FILENAME} changed in GCS during the update - retry'}
+            logger.info(f"Uploaded {STORE_FILENAME} to GCS ({os.path.getsize(local_store_path) / 1024:.0f}KB)")
+            return result
+
     def update_treasury_yields(self) -> dict:
-        """Update Treasury yields in GCS database."""
+        """Update Treasury yields in the GCS yield store."""
         result = {
             'status': 'error',
             'message': '',
             'yields_updated': 0
         }
-        
-        # Create temp directory
-        with tempfile.TemporaryDirectory() as tmpdir:
-            try:
-                # Download bonds_data.db from GCS
-                local_db_path = os.path.join(tmpdir, 'bonds_data.db')
-                blob = self.bucket.blob('bonds_data.db')  # No subdirectory
-                blob.download_to_filename(local_db_path)
-                logger.info("Downloaded bonds_data.db from GCS")
-                
-                # Get target date
-                today = datetime.now()
-                if today.hour < 16:  # Before 4 PM ET
-                    today -= timedelta(days=1)
-                
-                # Skip weekends
-                while today.weekday() >= 5:
-                    today -= timedelta(days=1)
-                
-                # Fetch latest yields
-                yields = self.fetcher.fetch_yield_curve_data(today)
-                
-                if yields:
-                    # Update the database
-                    success = self.fetcher.update_database(yields, today)
-                    
-                    if success:
-                        # Upload updated database back to GCS
-                        metadata = {
-                            'updated_at': datetime.utcnow().isoformat(),
-                            'source': 'treasury_yield_update',
-                            'update_date': today.strftime('%Y-%m-%d'),
-                            'yields_count': str(len(yields))
-                        }
-                        
-                        # Vacuum database to ensure all changes are flushed
-                        try:
-                            import sqlite3
-                            with sqlite3.connect(local_db_path) as conn:
-                                conn.execute("PRAGMA wal_checkpoint(FULL)")
-                                conn.execute("VACUUM")
-                            logger.info("Vacuumed database before upload")
-                        except Exception as e:
-                            logger.warning(f"Could not vacuum: {e}")
-                        
-                        blob.metadata = metadata
-                        blob.upload_from_filename(local_db_path)
-                        logger.info("Uploaded updated database to GCS")
-                        
-                        result = {
-                            'status': 'success',
-                            'message': f'Updated {len(yields)} yields for {today.strftime("%Y-%m-%d")}',
-                            'yields_updated': len(yields),
-                            'date': today.strftime('%Y-%m-%d'),
-                            'yields': yields
-                        }
-                    else:
-                        result['message'] = 'Failed to update database'
-                else:
-                    result['message'] = 'No yield data retrieved from Treasury'
-                    
-            except Exception as e:
-                logger.error(f"Treasury update failed: {e}")
-                result['message'] = str(e)
-        
+
+        try:
+            # Get target date
+            today = datetime.now()
+            if today.hour < 16:  # Before 4 PM ET
+                today -= timedelta(days=1)
+
+            # Skip weekends
+            while today.weekday() >= 5:
+                today -= timedelta(days=1)
+
+            # Fetch latest yields
+            yields = self.fetcher.fetch_yield_curve_data(today)
+            if not yields:
+                result['message'] = 'No yield data retrieved from Treasury'
+                return result
+
+            def apply(local_store_path):
+                # Upsert the day into the store
+                if not self.fetcher.update_database(yields, today, store_path=local_store_path):
+                    return dict(result, message='Failed to update database')
+                return {
+                    'status': 'success',
+                    'message': f'Updated {len(yields)} yields for {today.strftime("%Y-%m-%d")}',
+                    'yields_updated': len(yields),
+                    'date': today.strftime('%Y-%m-%d'),
+                    'yields': yields
+                }
+
+            metadata = {
+                'source': 'treasury_yield_update',
+                'update_date': today.strftime('%Y-%m-%d'),
+                'yields_count': str(len(yields))
+            }
+            result = self._update_store(apply, metadata)
+
+        except Exception as e:
+            logger.error(f"Treasury update failed: {e}")
+            result['message'] = str(e)
+
         return result
 
+    def backfill_treasury_yields(self, start_year: int, end_year: int) -> dict:
+        """Ingest whole years of history into the GCS yield store in one upload."""
+        def apply(local_store_path):
+            days = self.fetcher.backfill(start_year, end_year, store_path=local_store_path)
+            if not days:
+                return {'status': 'error', 'message': 'No yield data retrieved from Treasury', 'yields_updated': 0}
+            return {'status': 'success', 'message': f'Backfilled {days} days for {start_year}-{end_year}',
+                    'days_updated': days}
+
+        try:
+            return self._update_store(apply, {'source': 'treasury_yield_backfill',
+                                              'backfill_years': f'{start_year}:{end_year}'})
+        except Exception as e:
+            logger.error(f"Treasury backfill failed: {e}")
+            return {'status': 'error', 'message': str(e), 'yields_updated': 0}
+
 
 def update_yields_for_app_engine():
     """Function to be called from App Engine endpoint."""
@@ -118,4 +149,4 @@ if __name__ == "__main__":
     if result['status'] == 'success':
         print(f"Yields updated: {result['yields_updated']}")
         for tenor, rate in sorted(result['yields'].items()):
-            print(f"  {tenor}: {rate:.2f}%")
\ No newline at end of file
+            print(f"  {tenor}: {rate:.2f}%")
@@ -9,11 +9,13 @@ Provides unified database connection handling with:
 - Connection monitoring and logging
 """
 
+import os
 import sqlite3
 import logging
 from contextlib import contextmanager
 from typing import Optional, List, Dict, Any, Union
 from pathlib import Path
+from urllib.parse import quote
 import time
 import threading
 
@@ -228,4 +230,244 @@ def query_all(db_path: Union[str, Path], query: str, params: Optional[tuple] = N
         List of dictionaries representing all rows
     """
     manager = get_database_manager(db_path)
-    return manager.execute_query(query, params)
\ No newline at end of file
+    return manager.execute_query(query, params)
+
+
+# ---------------------------------------------------------------------------
+# Read-only pools for hot-path lookups
+# ---------------------------------------------------------------------------
+
+READONLY_POOL_SIZE = int(os.environ.get('SQLITE_READONLY_POOL_SIZE', 8))
+READONLY_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+READONLY_CACHE_SIZE_KIB = int(os.environ.get('SQLITE_CACHE_SIZE_KIB', 64 * 1024))
+READONLY_STATEMENT_CACHE = 256
+
+
+class ReadOnlyConnectionPool:
+    """
+    Per-process pool of read-only connections to one database.
+
+    Connections are opened as ``file:<path>?mode=ro`` URIs (``immutable=1``
+    when requested) with mmap and page-cache PRAGMAs, and keep a statement
+    cache so repeated lookups reuse their prepared statements. The table →
+    column map is read once per database file instead of per lookup.
+
+    If the file is replaced (new inode, e.g. a fresh download) the pool drops
+    its connections and schema map on the next checkout.
+    """
+
+    def __init__(self, db_path: Union[str, Path], pool_size: int = READONLY_POOL_SIZE,
+                 immutable: bool = False):
+        self.db_path = os.path.abspath(str(db_path))
+        self.pool_size = max(1, pool_size)
+        self.immutable = immutable
+        self._idle: List[sqlite3.Connection] = []
+        self._open = 0
+        self._cond = threading.Condition()
+        self._file_id: Optional[tuple] = None
+        self._schema: Optional[Dict[str, List[str]]] = None
+        self.checkouts = 0
+        self.connects = 0
+        self.reloads = 0
+
+    def _uri(self) -> str:
+        uri = f"file:{quote(self.db_path)}?mode=ro"
+        if self.immutable:
+            uri += "&immutable=1"
+        return uri
+
+    def _create_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._uri(),
+            uri=True,
+            check_same_thread=False,  # pooled: used by one thread at a time
+            cached_statements=READONLY_STATEMENT_CACHE
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size={READONLY_MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size=-{READONLY_CACHE_SIZE_KIB}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA query_only=1")
+        self.connects += 1
+        return conn
+
+    def _current_file_id(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.db_path)
+            return stat.st_dev, stat.st_ino
+        except OSError:
+            return None
+
+    def _check_file(self):
+        """Drop connections opened against a file that has since been replaced."""
+        file_id = self._current_file_id()
+        if file_id != self._file_id:
+            if self._file_id is not None:
+                logger.info(f"🔄 {self.db_path} replaced - reopening read-only connections")
+                self.reloads += 1
+            for conn in self._idle:
+                conn.close()
+            self._open -= len(self._idle)
+            self._idle.clear()
+            self._schema = None
+            self._file_id = file_id
+
+    @contextmanager
+    def connection(self, timeout: float = 30.0):
+        """
+        Check out a read-only connection.
+
+        Yields:
+            sqlite3.Connection with sqlite3.Row rows
+
+        Raises:
+            sqlite3.OperationalError: database missing or unreadable
+            TimeoutError: every pooled connection stayed busy for ``timeout`` seconds
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._check_file()
+            file_id = self._file_id
+            while not self._idle and self._open >= self.pool_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No read-only connection to {self.db_path} after {timeout}s")
+                self._cond.wait(remaining)
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                conn = None
+                self._open += 1
+            self.checkouts += 1
+
+        if conn is None:
+            try:
+                conn = self._create_connection()
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+
+        try:
+            yield conn
+        finally:
+            with self._cond:
+                if file_id == self._file_id:
+                    self._idle.append(conn)
+                else:
+                    conn.close()
+                    self._open -= 1
+                self._cond.notify()
+
+    def query_one(self, query: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        """Execute a query and return the first row (or None)."""
+        with self.connection() as conn:
+            return conn.execute(query, params).fetchone()
+
+    def query_all(self, query: str, params: tuple = ()) -> List[sqlite3.Row]:
+        """Execute a query and return all rows."""
+        with self.connection() as conn:
+            return conn.execute(query, params).fetchall()
+
+    def schema(self) -> Dict[str, List[str]]:
+        """
+        Table → column names map, read once per database file.
+
+        Tables are in sqlite_master order; columns keep their declared case.
+        """
+        schema = self._schema
+        if schema is not None and self._file_id == self._current_file_id():
+            return schema
+
+        with self.connection() as conn:
+            schema = {}
+            tables = conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+            for (table_name,) in tables:
+                columns = conn.execute(f'PRAGMA table_info("{table_name}")').fetchall()
+                schema[table_name] = [col[1] for col in columns]
+
+        with self._cond:
+            self._schema = schema
+        return schema
+
+    def close_all(self):
+        """Close idle connections; busy ones are closed when returned."""
+        with self._cond:
+            for conn in self._idle:
+                conn.close()
+            self._open -= len(self._idle)
+            self._idle.clear()
+            self._schema = None
+            self._file_id = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'db_path': self.db_path,
+                'open': self._open,
+                'idle': len(self._idle),
+                'checkouts': self.checkouts,
+                'connects': self.connects,
+                'reloads': self.reloads
+            }
+
+
+_readonly_pools: Dict[str, ReadOnlyConnectionPool] = {}
+_readonly_pools_lock = threading.Lock()
+
+
+def _reset_readonly_pools_after_fork():
+    # SQLite connections must not be shared across fork - children start empty
+    global _readonly_pools_lock
+    _readonly_pools.clear()
+    _readonly_pools_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_readonly_pools_after_fork)
+
+
+def get_readonly_pool(db_path: Union[str, Path]) -> ReadOnlyConnectionPool:
+    """
+    Get or create the read-only pool for a database in this process.
+
+    Args:
+        db_path: Path to the database file
+
+    Returns:
+        ReadOnlyConnectionPool instance
+    """
+    key = os.path.abspath(str(db_path))
+    pool = _readonly_pools.get(key)
+    if pool is None:
+        with _readonly_pools_lock:
+            pool = _readonly_pools.get(key)
+            if pool is None:
+                pool = ReadOnlyConnectionPool(key)
+                _readonly_pools[key] = pool
+                logger.info(f"Created read-only pool for {key}")
+    return pool
+
+
+def warm_readonly_pools(*db_paths: Union[str, Path]) -> Dict[str, int]:
+    """
+    Open one connection and load the schema map for each existing database.
+
+    Returns:
+        Dict of database path → number of tables discovered
+    """
+    warmed = {}
+    for db_path in db_paths:
+        if not db_path or not os.path.exists(str(db_path)):
+            continue
+        try:
+            warmed[str(db_path)] = len(get_readonly_pool(db_path).schema())
+        except sqlite3.Error as e:
+            logger.warning(f"Could not warm read-only pool for {db_path}: {e}")
+    return warmed
+
+
+def readonly_pool_stats() -> List[Dict[str, Any]]:
+    """Stats for every read-only pool in this process."""
+    return [pool.stats() for pool in list(_readonly_pools.values())]
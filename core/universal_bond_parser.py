@@ -28,7 +28,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from bond_description_parser import SmartBondParser
+    from bond_description_parser import SmartBondParser, get_smart_bond_parser
     from enhanced_isin_date_parser import SmartBondParserEnhanced
     ENHANCED_PARSER_AVAILABLE = True
     print("✅ Enhanced ISIN Date Parser available")
@@ -36,15 +36,17 @@ except ImportError:
     # Fallback path
     sys.path.append('/Users/andyseaman/Notebooks/json_receiver_project/google_analysis10')
     try:
-        from bond_description_parser import SmartBondParser
+        from bond_description_parser import SmartBondParser, get_smart_bond_parser
         from enhanced_isin_date_parser import SmartBondParserEnhanced
         ENHANCED_PARSER_AVAILABLE = True
         print("✅ Enhanced ISIN Date Parser available (fallback path)")
     except ImportError:
-        from bond_description_parser import SmartBondParser
+        from bond_description_parser import SmartBondParser, get_smart_bond_parser
         ENHANCED_PARSER_AVAILABLE = False
         print("⚠️ Enhanced parser not available, using standard parser")
 
+from bond_reference_index import get_bond_reference_index
+
 # Treasury detection patterns
 TREASURY_ISIN_PATTERNS = [
     r'^US912[0-9A-Z]{8}$',  # US Treasury ISIN pattern
@@ -215,7 +217,7 @@ class UniversalBondParser:
                 self.smart_parser = SmartBondParserEnhanced(self.db_path, self.validated_db_path, self.bloomberg_db_path)
                 self.logger.info("✅ Enhanced ISIN Date Parser initialized")
             else:
-                self.smart_parser = SmartBondParser(self.bloomberg_db_path, self.validated_db_path, self.db_path)
+                self.smart_parser = get_smart_bond_parser(self.bloomberg_db_path, self.validated_db_path, self.db_path)
                 self.logger.info("✅ Standard SmartBondParser initialized (fallback)")
             self.smart_parser_available = True
         except Exception as e:
@@ -298,6 +300,21 @@ class UniversalBondParser:
     def _parse_by_isin(self, isin: str, spec: BondSpecification) -> bool:
         """Parse bond using ISIN database lookup - PRIMARY: bloomberg_index.db"""
         try:
+            # In-memory reference index first (same source order, no SQL)
+            index = get_bond_reference_index()
+            if index is not None:
+                sources = [index.source_for_path(path) for path in
+                           (self.bloomberg_db_path, self.validated_db_path, self.db_path)]
+                if all(sources):
+                    bond_data = index.lookup(isin, sources=sources)
+                    if not bond_data:
+                        return False
+                    self._populate_spec_from_database(bond_data, spec)
+                    spec.isin = isin
+                    spec.parser_used = 'database_lookup'
+                    spec.parsing_success = True
+                    return True
+            
             # PRIMARY: Try bloomberg_index.db first (contains validated bond specifications)
             bond_data = self._lookup_isin_in_database(isin, self.bloomberg_db_path)
             
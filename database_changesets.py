@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Database Changesets
+===================
+
+Row-level sync of the frequently updated tables (tsys_enhanced,
+treasury_securities) between copies of a database, in place of copying the
+whole file, merging with NOT IN scans and uploading it again.
+
+High-water marks: for each table, the database keeps the largest updated_at
+and rowid it has already published (_sync_marks). A changeset holds every
+row past either mark. That is an index range scan on updated_at plus a rowid
+range, so extraction costs what was changed, not the table size. The rowid
+mark catches rows written without an updated_at.
+
+Changeset file: gzip'd JSON with the rows of each table and the marks it
+advances to:
+
+    {"format": 1, "database": "bonds_data.db", "created_at": ..., "rows": 3,
+     "tables": {"tsys_enhanced": {"key": "Date", "columns": [...], "rows": [[...]]}},
+     "marks": {"tsys_enhanced": ["2025-07-01T20:00:00", 6012]}}
+
+Applying happens in one transaction. The rows are loaded into a TEMP table,
+and an indexed LEFT JOIN on the key picks the winners: keys that are new
+here, or a newer updated_at. The rows they replace are deleted and the
+winners are inserted. The sequence number goes into _sync_changesets in the
+same transaction. So a changeset is applied exactly once, and a copy made
+from a database that already applied it (such as a compacted base in GCS)
+skips it too.
+
+The rows a changeset writes also advance the marks in that transaction,
+when the table has no unpublished local rows left. So pulled rows aren't
+published back, and a local write that lands before the pull is never
+skipped (it goes out with the pulled rows, which lose to themselves).
+
+Changesets are numbered per database in a ChangesetStore:
+- GCSChangesetStore keeps objects changesets/<database>/<seq>.json.gz. They
+  are created with a generation-0 precondition, so two publishers can't
+  take the same number.
+- LocalChangesetStore keeps them in a directory. The tests use it.
+Compacting folds changesets into a new base and deletes them. The highest
+folded sequence stays behind in changesets/<database>/folded, so numbers
+keep increasing and a deleted number is never handed out again.
+"""
+
+import os
+import re
+import gzip
+import json
+import sqlite3
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHANGESET_FORMAT = 1
+CHANGESET_PREFIX = 'changesets'
+MARKS_TABLE = '_sync_marks'
+APPLIED_TABLE = '_sync_changesets'
+MARKER_COLUMN = 'updated_at'
+
+# Tables synced row by row, with the column rows are matched on
+SYNC_TABLES = {
+    'bonds_data.db': {'tsys_enhanced': 'Date', 'treasury_securities': 'cusip'},
+    'validated_quantlib_bonds.db': {},
+    'bloomberg_index.db': {}
+}
+
+_SEQUENCE_NAME = re.compile(r'(\d+)\.json\.gz$')
+FOLDED_NAME = 'folded'
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA main.table_info({_quote(table)})")]
+
+
+def _ensure_sync_tables(conn: sqlite3.Connection):
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {MARKS_TABLE} "
+                 f"(tbl TEXT PRIMARY KEY, updated_at TEXT, max_rowid INTEGER)")
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {APPLIED_TABLE} "
+                 f"(seq INTEGER PRIMARY KEY, rows INTEGER, applied_at TEXT)")
+
+
+def _ensure_index(conn: sqlite3.Connection, table: str, column: str):
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(f'idx_sync_{table}_{column}')} "
+                 f"ON {_quote(table)} ({_quote(column)})")
+
+
+def _read_marks(conn: sqlite3.Connection) -> Dict[str, Tuple[Optional[str], int]]:
+    return {table: (updated_at, max_rowid or 0)
+            for table, updated_at, max_rowid in conn.execute(f"SELECT tbl, updated_at, max_rowid FROM {MARKS_TABLE}")}
+
+
+def _unpublished(columns: List[str], mark: Tuple[Optional[str], int]) -> Tuple[str, List[Any]]:
+    """WHERE clause (and params) for rows past a table's marks."""
+    updated_mark, rowid_mark = mark
+    if MARKER_COLUMN in columns and updated_mark is not None:
+        return f'{_quote(MARKER_COLUMN)} > ? OR rowid > ?', [updated_mark, rowid_mark]
+    return 'rowid > ?', [rowid_mark]
+
+
+def _current_marks(conn: sqlite3.Connection, tables: Dict[str, str]) -> Dict[str, List[Any]]:
+    marks = {}
+    for table in tables:
+        columns = _columns(conn, table)
+        if not columns:
+            continue
+        marker = f'MAX({_quote(MARKER_COLUMN)})' if MARKER_COLUMN in columns else 'NULL'
+        updated_at, max_rowid = conn.execute(f"SELECT {marker}, MAX(rowid) FROM {_quote(table)}").fetchone()
+        marks[table] = [updated_at, max_rowid or 0]
+    return marks
+
+
+def extract_changeset(db_path: str, tables: Dict[str, str], database: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Rows of tables changed since the database's published marks.
+
+    A table that has never been published is extracted whole (once).
+
+    Args:
+        db_path: Database to read
+        tables: table -> key column
+        database: Name recorded in the changeset (default: file name)
+
+    Returns:
+        Changeset dict ('rows' is the total row count; 0 means nothing changed)
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with conn:
+            _ensure_sync_tables(conn)
+            marks = _read_marks(conn)
+            extracted = {}
+            for table, key in tables.items():
+                columns = _columns(conn, table)
+                if not columns:
+                    continue
+                if MARKER_COLUMN in columns:
+                    _ensure_index(conn, table, MARKER_COLUMN)
+                where, params = _unpublished(columns, marks.get(table, (None, 0)))
+                rows = conn.execute(f"SELECT {', '.join(map(_quote, columns))} FROM {_quote(table)} WHERE {where}",
+                                    params).fetchall()
+                if rows:
+                    extracted[table] = {'key': key, 'columns': columns, 'rows': [list(row) for row in rows]}
+            new_marks = _current_marks(conn, tables)
+    finally:
+        conn.close()
+    return {
+        'format': CHANGESET_FORMAT,
+        'database': database or os.path.basename(db_path),
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'rows': sum(len(entry['rows']) for entry in extracted.values()),
+        'tables': extracted,
+        'marks': new_marks
+    }
+
+
+def mark_published(db_path: str, tables: Dict[str, str], marks: Optional[Dict[str, List[Any]]] = None):
+    """Advance the high-water marks (default: to the tables' current maxima)."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with conn:
+            _ensure_sync_tables(conn)
+            if marks is None:
+                marks = _current_marks(conn, tables)
+            conn.executemany(f"INSERT OR REPLACE INTO {MARKS_TABLE} (tbl, updated_at, max_rowid) VALUES (?, ?, ?)",
+                             [(table, updated_at, max_rowid) for table, (updated_at, max_rowid) in marks.items()])
+    finally:
+        conn.close()
+
+
+def encode_changeset(changeset: Dict[str, Any]) -> bytes:
+    return gzip.compress(json.dumps(changeset, separators=(',', ':')).encode('utf-8'), mtime=0)
+
+
+def decode_changeset(data: bytes) -> Dict[str, Any]:
+    changeset = json.loads(gzip.decompress(data).decode('utf-8'))
+    if changeset.get('format') != CHANGESET_FORMAT:
+        raise ValueError(f"Unsupported changeset format: {changeset.get('format')}")
+    return changeset
+
+
+def _apply_table(conn: sqlite3.Connection, table: str, entry: Dict[str, Any],
+                 mark: Tuple[Optional[str], int]) -> int:
+    """
+    Upsert one table's changed rows (transaction held by the caller).
+
+    When nothing local past mark is left after the replaced rows are gone,
+    the marks move past the written rows too, so they aren't published back.
+    """
+    target = set(_columns(conn, table))
+    if not target:
+        logger.warning(f"⚠️ Changeset table {table} not in database - skipped")
+        return 0
+    key = entry['key']
+    positions = [i for i, column in enumerate(entry['columns']) if column in target]
+    columns = [entry['columns'][i] for i in positions]
+    if key not in columns:
+        logger.warning(f"⚠️ Changeset for {table} has no {key} column shared with the database - skipped")
+        return 0
+
+    quoted = ', '.join(map(_quote, columns))
+    _ensure_index(conn, table, key)
+    conn.execute("DROP TABLE IF EXISTS temp._changes")
+    conn.execute("DROP TABLE IF EXISTS temp._winners")
+    conn.execute(f"CREATE TEMP TABLE _changes ({quoted})")
+    conn.executemany(f"INSERT INTO temp._changes VALUES ({', '.join('?' * len(columns))})",
+                     ([row[i] for i in positions] for row in entry['rows']))
+
+    # A change wins over a missing key, a local row without updated_at, or an older one
+    if MARKER_COLUMN in columns:
+        marker = _quote(MARKER_COLUMN)
+        wins = f"MAX(l.{marker}) IS NULL OR c.{marker} > MAX(l.{marker})"
+    else:
+        wins = "1"
+    conn.execute(f"""
+        CREATE TEMP TABLE _winners AS
+        SELECT c.* FROM temp._changes c
+        LEFT JOIN main.{_quote(table)} l ON l.{_quote(key)} = c.{_quote(key)}
+        GROUP BY c.rowid
+        HAVING {wins}
+    """)
+    conn.execute(f"DELETE FROM main.{_quote(table)} WHERE {_quote(key)} IN (SELECT {_quote(key)} FROM temp._winners)")
+    where, params = _unpublished(list(target), mark)
+    caught_up = conn.execute(f"SELECT 1 FROM main.{_quote(table)} WHERE {where} LIMIT 1", params).fetchone() is None
+    applied = conn.execute(f"INSERT INTO main.{_quote(table)} ({quoted}) SELECT {quoted} FROM temp._winners").rowcount
+    if caught_up and applied:
+        ((updated_at, max_rowid),) = _current_marks(conn, {table: key}).values()
+        conn.execute(f"INSERT OR REPLACE INTO {MARKS_TABLE} (tbl, updated_at, max_rowid) VALUES (?, ?, ?)",
+                     (table, updated_at, max_rowid))
+    conn.execute("DROP TABLE temp._changes")
+    conn.execute("DROP TABLE temp._winners")
+    return applied
+
+
+def apply_changeset(db_path: str, changeset: Dict[str, Any], seq: Optional[int] = None) -> int:
+    """
+    Apply a changeset in one transaction, advancing the marks past the rows
+    it writes (see _apply_table).
+
+    Args:
+        db_path: Database to update
+        changeset: Decoded changeset
+        seq: Its sequence number; an already-applied sequence is a no-op
+
+    Returns:
+        Rows written
+    """
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            _ensure_sync_tables(conn)
+            if seq is not None and conn.execute(f"SELECT 1 FROM {APPLIED_TABLE} WHERE seq = ?", (seq,)).fetchone():
+                conn.execute('ROLLBACK')
+                return 0
+            marks = _read_marks(conn)
+            applied = sum(_apply_table(conn, table, entry, marks.get(table, (None, 0)))
+                          for table, entry in changeset['tables'].items())
+            if seq is not None:
+                conn.execute(f"INSERT INTO {APPLIED_TABLE} (seq, rows, applied_at) VALUES (?, ?, ?)",
+                             (seq, applied, datetime.utcnow().isoformat(timespec='seconds')))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    finally:
+        conn.close()
+    return applied
+
+
+def applied_sequences(db_path: str) -> Set[int]:
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with conn:
+            _ensure_sync_tables(conn)
+            return {row[0] for row in conn.execute(f"SELECT seq FROM {APPLIED_TABLE}")}
+    finally:
+        conn.close()
+
+
+def _record_applied(db_path: str, seq: int, rows: int):
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with conn:
+            _ensure_sync_tables(conn)
+            conn.execute(f"INSERT OR IGNORE INTO {APPLIED_TABLE} (seq, rows, applied_at) VALUES (?, ?, ?)",
+                         (seq, rows, datetime.utcnow().isoformat(timespec='seconds')))
+    finally:
+        conn.close()
+
+
+def fold_changesets(store, db_path: str, database: str) -> int:
+    """
+    Delete the changesets db_path already contains, after it was uploaded as
+    the new base. The highest one is recorded as folded first.
+
+    Returns:
+        Changesets deleted
+    """
+    contained = applied_sequences(db_path)
+    if contained:
+        store.set_folded(database, max(max(contained), store.folded(database)))
+    folded = [seq for seq in store.sequences(database) if seq in contained]
+    for seq in folded:
+        store.delete(database, seq)
+    return len(folded)
+
+
+def changeset_name(database: str, seq: int) -> str:
+    return f'{CHANGESET_PREFIX}/{database}/{seq:08d}.json.gz'
+
+
+class GCSChangesetStore:
+    """Changesets as objects in a google-cloud-storage bucket."""
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+
+    def sequences(self, database: str) -> List[int]:
+        names = (blob.name for blob in self.bucket.list_blobs(prefix=f'{CHANGESET_PREFIX}/{database}/'))
+        return sorted(int(match.group(1)) for match in map(_SEQUENCE_NAME.search, names) if match)
+
+    def get(self, database: str, seq: int) -> bytes:
+        return self.bucket.blob(changeset_name(database, seq)).download_as_bytes()
+
+    def put(self, database: str, seq: int, data: bytes) -> bool:
+        """Create the changeset; False if another publisher already took seq."""
+        from google.api_core.exceptions import PreconditionFailed
+        try:
+            self.bucket.blob(changeset_name(database, seq)).upload_from_string(
+                data, content_type='application/gzip', if_generation_match=0)
+            return True
+        except PreconditionFailed:
+            return False
+
+    def delete(self, database: str, seq: int):
+        self.bucket.blob(changeset_name(database, seq)).delete()
+
+    def folded(self, database: str) -> int:
+        """Highest sequence folded into the base by a compaction (0 if none)."""
+        from google.api_core.exceptions import NotFound
+        try:
+            return int(self.bucket.blob(f'{CHANGESET_PREFIX}/{database}/{FOLDED_NAME}').download_as_text())
+        except NotFound:
+            return 0
+
+    def set_folded(self, database: str, seq: int):
+        self.bucket.blob(f'{CHANGESET_PREFIX}/{database}/{FOLDED_NAME}').upload_from_string(
+            str(seq), content_type='text/plain')
+
+
+class LocalChangesetStore:
+    """Changesets as files under a directory; used by tests."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, database: str, seq: int) -> str:
+        return os.path.join(self.directory, changeset_name(database, seq))
+
+    def sequences(self, database: str) -> List[int]:
+        folder = os.path.join(self.directory, CHANGESET_PREFIX, database)
+        names = os.listdir(folder) if os.path.isdir(folder) else []
+        return sorted(int(match.group(1)) for match in map(_SEQUENCE_NAME.search, names) if match)
+
+    def get(self, database: str, seq: int) -> bytes:
+        with open(self._path(database, seq), 'rb') as f:
+            return f.read()
+
+    def put(self, database: str, seq: int, data: bytes) -> bool:
+        path = self._path(database, seq)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            with open(path, 'xb') as f:
+                f.write(data)
+            return True
+        except FileExistsError:
+            return False
+
+    def delete(self, database: str, seq: int):
+        os.remove(self._path(database, seq))
+
+    def folded(self, database: str) -> int:
+        try:
+            with open(os.path.join(self.directory, CHANGESET_PREFIX, database, FOLDED_NAME)) as f:
+                return int(f.read())
+        except FileNotFoundError:
+            return 0
+
+    def set_folded(self, database: str, seq: int):
+        folder = os.path.join(self.directory, CHANGESET_PREFIX, database)
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, FOLDED_NAME), 'w') as f:
+            f.write(str(seq))
+
+
+def push_changes(store, db_path: str, database: str, tables: Dict[str, str], max_attempts: int = 5) -> Optional[int]:
+    """
+    Publish local changes since the marks as the next changeset.
+
+    The number follows every sequence still in the store, folded into the
+    base, or applied here, so it is never one a compaction deleted.
+
+    Returns:
+        The changeset's sequence number, or None when nothing changed
+    """
+    changeset = extract_changeset(db_path, tables, database)
+    if not changeset['rows']:
+        mark_published(db_path, tables, changeset['marks'])
+        return None
+    data = encode_changeset(changeset)
+    for _ in range(max_attempts):
+        taken = set(store.sequences(database)) | applied_sequences(db_path)
+        seq = max(taken | {store.folded(database)}) + 1
+        if store.put(database, seq, data):
+            _record_applied(db_path, seq, changeset['rows'])
+            mark_published(db_path, tables, changeset['marks'])
+            logger.info(f"📤 {database}: changeset {seq} with {changeset['rows']} rows ({len(data) / 1024:.1f}KB)")
+            return seq
+    raise RuntimeError(f"Could not publish a changeset for {database} after {max_attempts} attempts")
+
+
+def pull_changes(store, db_path: str, database: str) -> Tuple[int, int]:
+    """
+    Apply every published changeset this database hasn't applied yet, in order.
+
+    Returns:
+        (changesets applied, rows written)
+    """
+    done = applied_sequences(db_path)
+    pending = [seq for seq in store.sequences(database) if seq not in done]
+    rows = 0
+    for seq in pending:
+        rows += apply_changeset(db_path, decode_changeset(store.get(database, seq)), seq)
+    if pending:
+        logger.info(f"📥 {database}: applied {len(pending)} changeset(s), {rows} rows")
+    return len(pending), rows
+
+
+def sync_changes(store, db_path: str, database: str, tables: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Push local changes, then pull everyone else's.
+
+    Applying a changeset advances the marks past its rows, so pulled rows
+    aren't published back as local changes.
+    """
+    pushed = push_changes(store, db_path, database, tables)
+    pulled, rows = pull_changes(store, db_path, database)
+    return {'pushed': pushed, 'pulled': pulled, 'rows_pulled': rows}
@@ -19,13 +19,14 @@ if ! gcloud auth list --filter=status:ACTIVE --format="value(account)" &>/dev/nu
     exit 1
 fi
 
-# Step 1: Vacuum local databases before sync
+# Step 1: Checkpoint local databases before sync (no VACUUM: a rewritten file
+# would look changed to the checksum comparison and be uploaded whole)
 echo "Step 1: Preparing databases for sync..."
 echo "--------------------------------------"
 for db in bonds_data.db validated_quantlib_bonds.db bloomberg_index.db; do
     if [ -f "$db" ]; then
-        echo "Vacuuming $db..."
-        sqlite3 "$db" "PRAGMA wal_checkpoint(FULL); VACUUM;" 2>/dev/null || echo "  (skipped: not SQLite)"
+        echo "Checkpointing $db..."
+        sqlite3 "$db" "PRAGMA wal_checkpoint(TRUNCATE);" 2>/dev/null || echo "  (skipped: not SQLite)"
     fi
 done
 
@@ -15,6 +15,8 @@ import sqlite3
 import logging
 import os
 
+from bond_reference_index import get_bond_reference_index
+
 logger = logging.getLogger(__name__)
 
 class DualDatabaseManager:
@@ -59,15 +61,19 @@ class DualDatabaseManager:
                 logger.info(f"✅ Found bond data in CSV for {isin}")
                 return csv_data
         
+        # Reference index tells us which databases can hold this ISIN at all
+        index = get_bond_reference_index()
+        held_in = index.sources_for(isin) if index is not None else None
+        
         # 2. Try primary database (bonds_data.db/static)
-        if self.primary_available:
+        if self.primary_available and not self._ruled_out(index, held_in, self.primary_db_path):
             primary_data = self._fetch_from_primary_db(isin)
             if primary_data is not None:
                 logger.info(f"✅ Found bond data in primary DB for {isin}")
                 return primary_data
         
         # 3. Try secondary database (bloomberg_index.db/all_bonds)
-        if self.secondary_available:
+        if self.secondary_available and not self._ruled_out(index, held_in, self.secondary_db_path):
             secondary_data = self._fetch_from_secondary_db(isin)
             if secondary_data is not None:
                 logger.info(f"✅ Found bond data in secondary DB for {isin}")
@@ -77,6 +83,14 @@ class DualDatabaseManager:
         logger.warning(f"❌ Bond data not found for {isin} in any source")
         return None
     
+    @staticmethod
+    def _ruled_out(index, held_in, db_path):
+        """True when the reference index covers db_path and the ISIN isn't in it."""
+        if index is None:
+            return False
+        source = index.source_for_path(db_path)
+        return source is not None and source not in held_in
+    
     def _fetch_from_primary_db(self, isin):
         """
         Fetch from primary database (bonds_data.db/static table)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Engine Logging
+==============
+
+Quiet production logging for the calculation engine.
+
+Per-step engine messages are DEBUG with lazy %-style arguments, so at the
+production INFO level they cost a level check and nothing else. What remains
+at INFO is one structured summary record per bond and one per portfolio
+request, on the 'bond_engine.summary' logger:
+
+    📊 bond_summary {"isin": "US912810TL26", "total_ms": 1.9, "instrument_cached": true, ...}
+    📊 portfolio_summary {"bond_count": 500, "elapsed_ms": 812.4, "instrument_cache": {...}, ...}
+
+The JSON payload is only serialised when the record is actually emitted, and
+the structured fields also travel on the record as `summary` for log handlers
+that ship dicts (e.g. Cloud Logging's jsonPayload).
+
+Knobs (environment):
+- ENGINE_LOG_SAMPLE_RATE: fraction of bond summaries emitted (default 1.0,
+  0 disables them). Request summaries are always emitted.
+- ENGINE_LOG_LEVEL: level for the engine loggers (default: inherited);
+  DEBUG brings back the per-step trace.
+"""
+
+import os
+import json
+import random
+import logging
+from typing import Any, Dict, Optional
+
+SUMMARY_LOGGER_NAME = 'bond_engine.summary'
+ENGINE_LOGGER_NAMES = ('google_analysis10', 'bond_master_hierarchy_enhanced', 'parallel_portfolio_engine')
+
+DEFAULT_SAMPLE_RATE = float(os.environ.get('ENGINE_LOG_SAMPLE_RATE', 1.0))
+
+summary_logger = logging.getLogger(SUMMARY_LOGGER_NAME)
+
+
+class _JsonPayload:
+    """Defers json.dumps until a handler formats the record."""
+
+    __slots__ = ('fields',)
+
+    def __init__(self, fields: Dict[str, Any]):
+        self.fields = fields
+
+    def __str__(self):
+        return json.dumps(self.fields, default=str, separators=(',', ':'))
+
+
+class SummarySampler:
+    """Decides which bond summaries are emitted at a given sample rate."""
+
+    def __init__(self, rate: float = DEFAULT_SAMPLE_RATE, rng: Optional[random.Random] = None):
+        self.rate = min(1.0, max(0.0, rate))
+        self._random = (rng or random.Random()).random
+
+    def sample(self) -> bool:
+        if self.rate >= 1.0:
+            return True
+        if self.rate <= 0.0:
+            return False
+        return self._random() < self.rate
+
+
+_sampler = SummarySampler()
+
+
+def get_summary_sampler() -> SummarySampler:
+    """Process-wide bond summary sampler."""
+    return _sampler
+
+
+def set_summary_sample_rate(rate: float):
+    """Change the bond summary sample rate at runtime."""
+    global _sampler
+    _sampler = SummarySampler(rate)
+
+
+def configure_engine_logging(level: Optional[str] = None):
+    """Apply ENGINE_LOG_LEVEL (or level) to the engine loggers."""
+    level = level or os.environ.get('ENGINE_LOG_LEVEL')
+    if not level:
+        return
+    for name in ENGINE_LOGGER_NAMES:
+        logging.getLogger(name).setLevel(level.upper())
+
+
+def log_bond_summary(result: Dict[str, Any], total_ms: float, description: Optional[str] = None):
+    """Emit the per-bond summary record (sampled)."""
+    if not summary_logger.isEnabledFor(logging.INFO) or not _sampler.sample():
+        return
+    fields = {
+        'isin': result.get('isin'),
+        'description': description,
+        'successful': result.get('successful', False),
+        'total_ms': round(total_ms, 3),
+        'instrument_cached': result.get('instrument_cached'),
+        'stage_timings_ms': result.get('stage_timings_ms'),
+        'stages_skipped': result.get('stages_skipped'),
+    }
+    if not fields['successful']:
+        fields['error'] = result.get('error')
+    summary_logger.info("📊 bond_summary %s", _JsonPayload(fields), extra={'summary': fields})
+
+
+def log_request_summary(kind: str, **fields):
+    """Emit the per-request summary record (never sampled)."""
+    if not summary_logger.isEnabledFor(logging.INFO):
+        return
+    if 'elapsed_ms' in fields:
+        fields['elapsed_ms'] = round(fields['elapsed_ms'], 3)
+    summary_logger.info("📊 %s_summary %s", kind, _JsonPayload(fields), extra={'summary': fields})
+
+
+configure_engine_logging()
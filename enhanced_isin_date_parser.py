@@ -12,6 +12,8 @@ from datetime import datetime
 from typing import Dict, Optional, Tuple
 import logging
 
+from bond_description_parser import get_parsed_description_cache, normalize_description, PARSE_CACHE_MISS
+
 logger = logging.getLogger(__name__)
 
 class EnhancedISINDateParser:
@@ -303,4 +305,14 @@ class SmartBondParserEnhanced:
             description: Bond description
             isin: Optional ISIN for intelligent date format detection
         """
-        return self.enhanced_parser.parse_bond_description_enhanced(description, isin)
+        if not description:
+            return None
+        # Shares the process-wide parse cache with SmartBondParser; results embed the ISIN
+        key = ('isin_date_format', normalize_description(description), isin)
+        cache = get_parsed_description_cache()
+        cached = cache.get(key)
+        if cached is not PARSE_CACHE_MISS:
+            return cached
+        parsed = self.enhanced_parser.parse_bond_description_enhanced(description, isin)
+        cache.put(key, parsed)
+        return parsed
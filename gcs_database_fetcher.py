@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+GCS Database Fetcher
+====================
+
+Concurrent, resumable, checksum-verified download of the bond databases.
+
+For each database:
+- the object's metadata (size, generation, MD5 / CRC32C) is read first
+- delta mode: a local copy whose manifest entry has the same generation and
+  size is current and not downloaded again
+- a copy without a manifest entry (fetched by an older deploy, or baked into
+  the image) is hashed; it is kept only if it matches the object's checksum,
+  so a truncated file is never trusted
+- otherwise the object is read in chunked ranged reads into <name>.part,
+  with the generation pinned. A .part left by an interrupted fetch of the
+  same generation is resumed from its length
+- the finished .part is verified (MD5 when the object has one, else CRC32C)
+  and swapped into place with os.replace, so readers only ever see a
+  complete file. A mismatch discards the .part and keeps the old file
+
+Databases download concurrently (GCS_FETCH_WORKERS, default 3), in chunks of
+GCS_FETCH_CHUNK_MB (default 8). The manifest (.gcs_manifest.json in the
+target directory) records what was verified.
+
+Storage is behind a small ObjectStore interface (stat + read_range):
+GCSObjectStore wraps a google-cloud-storage bucket, LocalObjectStore serves a
+directory and is what the tests fetch from.
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = int(float(os.environ.get('GCS_FETCH_CHUNK_MB', 8)) * 1024 * 1024)
+DEFAULT_WORKERS = int(os.environ.get('GCS_FETCH_WORKERS', 3))
+MANIFEST_NAME = '.gcs_manifest.json'
+PART_SUFFIX = '.part'
+HASH_BLOCK = 1024 * 1024
+
+# Per-file outcomes
+CURRENT = 'current'
+DOWNLOADED = 'downloaded'
+RESUMED = 'resumed'
+FAILED = 'failed'
+MISSING = 'missing'
+
+try:
+    import google_crc32c
+    _crc32c_extend = google_crc32c.extend
+except ImportError:
+    google_crc32c = None
+    _CRC32C_TABLE = []
+    for _n in range(256):
+        _c = _n
+        for _ in range(8):
+            _c = (_c >> 1) ^ 0x82F63B78 if _c & 1 else _c >> 1
+        _CRC32C_TABLE.append(_c)
+
+    def _crc32c_extend(crc: int, data: bytes) -> int:
+        """Pure-Python CRC32C (Castagnoli); only used when google-crc32c is missing."""
+        crc ^= 0xFFFFFFFF
+        table = _CRC32C_TABLE
+        for byte in data:
+            crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+        return crc ^ 0xFFFFFFFF
+
+
+class ObjectInfo:
+    """Metadata of one stored object; checksums are base64 as GCS reports them."""
+
+    __slots__ = ('name', 'size', 'generation', 'md5', 'crc32c')
+
+    def __init__(self, name: str, size: int, generation: Any, md5: Optional[str] = None,
+                 crc32c: Optional[str] = None):
+        self.name = name
+        self.size = size
+        self.generation = str(generation)
+        self.md5 = md5
+        self.crc32c = crc32c
+
+
+class ChecksumMismatch(Exception):
+    """Downloaded or local bytes don't match the object's checksum."""
+
+
+def file_checksums(path: str, want_md5: bool = True, want_crc32c: bool = True) -> Dict[str, Optional[str]]:
+    """Base64 MD5 and CRC32C of a file, in the encoding GCS metadata uses."""
+    md5 = hashlib.md5() if want_md5 else None
+    crc = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            if md5 is not None:
+                md5.update(block)
+            if want_crc32c:
+                crc = _crc32c_extend(crc, block)
+    return {
+        'md5': base64.b64encode(md5.digest()).decode('ascii') if md5 is not None else None,
+        'crc32c': base64.b64encode(crc.to_bytes(4, 'big')).decode('ascii') if want_crc32c else None,
+    }
+
+
+def verify_file(path: str, info: ObjectInfo):
+    """
+    Raise ChecksumMismatch unless path matches info's size and checksum.
+
+    MD5 is preferred (hashlib is fast); composite objects only carry CRC32C.
+    An object without either checksum is accepted on size alone.
+    """
+    size = os.path.getsize(path)
+    if size != info.size:
+        raise ChecksumMismatch(f"{info.name}: {size} bytes, expected {info.size}")
+    use_md5 = info.md5 is not None
+    use_crc32c = not use_md5 and info.crc32c is not None
+    if not (use_md5 or use_crc32c):
+        logger.warning(f"⚠️ {info.name} has no checksum in its metadata - verified by size only")
+        return
+    actual = file_checksums(path, want_md5=use_md5, want_crc32c=use_crc32c)
+    kind = 'md5' if use_md5 else 'crc32c'
+    expected = info.md5 if use_md5 else info.crc32c
+    if actual[kind] != expected:
+        raise ChecksumMismatch(f"{info.name}: {kind} {actual[kind]}, expected {expected}")
+
+
+class GCSObjectStore:
+    """ObjectStore over a google-cloud-storage bucket."""
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+
+    def stat(self, name: str) -> Optional[ObjectInfo]:
+        blob = self.bucket.get_blob(name)
+        if blob is None:
+            return None
+        return ObjectInfo(name, blob.size, blob.generation, blob.md5_hash, blob.crc32c)
+
+    def read_range(self, name: str, generation: str, start: int, end: int) -> bytes:
+        """Bytes [start, end) of the given generation."""
+        blob = self.bucket.blob(name, generation=int(generation))
+        return blob.download_as_bytes(start=start, end=end - 1, checksum=None)
+
+
+class LocalObjectStore:
+    """ObjectStore over a directory (generation = file mtime_ns); used by tests."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def stat(self, name: str) -> Optional[ObjectInfo]:
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            return None
+        checksums = file_checksums(path)
+        return ObjectInfo(name, os.path.getsize(path), os.stat(path).st_mtime_ns,
+                          checksums['md5'], checksums['crc32c'])
+
+    def read_range(self, name: str, generation: str, start: int, end: int) -> bytes:
+        path = os.path.join(self.directory, name)
+        if str(os.stat(path).st_mtime_ns) != generation:
+            raise IOError(f"{name} generation {generation} no longer current")
+        with open(path, 'rb') as f:
+            f.seek(start)
+            return f.read(end - start)
+
+
+class DatabaseFetcher:
+    """Fetches a set of objects into target_dir; see the module docstring."""
+
+    def __init__(self, store, target_dir: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 max_workers: int = DEFAULT_WORKERS, local_paths: Optional[Dict[str, str]] = None):
+        self.store = store
+        self.target_dir = target_dir
+        self.local_paths = dict(local_paths or {})   # object name -> local file, when not target_dir/name
+        self.chunk_size = max(1, chunk_size)
+        self.max_workers = max(1, max_workers)
+        self.manifest_path = os.path.join(target_dir, MANIFEST_NAME)
+        self._manifest_lock = threading.Lock()
+
+    def local_path(self, name: str) -> str:
+        return self.local_paths.get(name) or os.path.join(self.target_dir, name)
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _record(self, info: ObjectInfo):
+        with self._manifest_lock:
+            manifest = self._load_manifest()
+            manifest[info.name] = {'generation': info.generation, 'size': info.size,
+                                   'md5': info.md5, 'crc32c': info.crc32c, 'verified_at': time.time()}
+            temp_path = self.manifest_path + '.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(temp_path, self.manifest_path)
+
+    def fetch_all(self, names: Iterable[str], force: bool = False, delta: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Bring every named object up to date in target_dir, concurrently.
+
+        Args:
+            names: Object names (also the local file names, unless in local_paths)
+            force: Download even if the local copy is current
+            delta: Trust the manifest's generation for current copies;
+                False re-hashes every local copy against its checksum
+
+        Returns:
+            name -> {'status': current|downloaded|resumed|failed|missing,
+                     'bytes': bytes read, 'seconds': elapsed, 'error'?: str}
+        """
+        names = list(names)
+        os.makedirs(self.target_dir, exist_ok=True)
+        manifest = self._load_manifest()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(1, len(names)))) as pool:
+            futures = {name: pool.submit(self._fetch_one, name, manifest.get(name), force, delta) for name in names}
+            return {name: future.result() for name, future in futures.items()}
+
+    def _fetch_one(self, name: str, manifest_entry: Optional[Dict[str, Any]], force: bool, delta: bool) -> Dict[str, Any]:
+        started = time.time()
+        report = {'status': FAILED, 'bytes': 0, 'seconds': 0.0}
+        try:
+            info = self.store.stat(name)
+            if info is None:
+                report['status'] = MISSING
+                return report
+
+            path = self.local_path(name)
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            if not force and self._is_current(path, info, manifest_entry, delta):
+                report['status'] = CURRENT
+                return report
+
+            report['status'], report['bytes'] = self._download(path, info)
+            verify_file(path + PART_SUFFIX, info)
+            os.replace(path + PART_SUFFIX, path)
+            self._discard(path + PART_SUFFIX + '.json')
+            self._record(info)
+            logger.info(f"✅ {name}: {report['status']} {report['bytes'] / (1024 * 1024):.1f}MB "
+                        f"(generation {info.generation})")
+            return report
+        except ChecksumMismatch as e:
+            # A bad .part must not be resumed next time
+            self._discard(self.local_path(name) + PART_SUFFIX)
+            report.update(status=FAILED, error=str(e))
+            logger.error(f"❌ Checksum mismatch, kept existing file: {e}")
+            return report
+        except Exception as e:
+            report.update(status=FAILED, error=str(e))
+            logger.error(f"❌ Fetching {name} failed: {e}")
+            return report
+        finally:
+            report['seconds'] = round(time.time() - started, 3)
+
+    def _is_current(self, path: str, info: ObjectInfo, manifest_entry: Optional[Dict[str, Any]], delta: bool) -> bool:
+        if not os.path.exists(path):
+            return False
+        if (delta and manifest_entry and manifest_entry.get('generation') == info.generation
+                and os.path.getsize(path) == info.size):
+            return True
+        try:
+            verify_file(path, info)
+        except ChecksumMismatch as e:
+            logger.warning(f"⚠️ Local copy not trusted, re-fetching: {e}")
+            return False
+        self._record(info)
+        return True
+
+    def _download(self, path: str, info: ObjectInfo):
+        """Ranged reads into path.part, resuming a same-generation partial file."""
+        part_path = path + PART_SUFFIX
+        sidecar_path = part_path + '.json'
+        offset = 0
+        status = DOWNLOADED
+        if os.path.exists(part_path):
+            try:
+                with open(sidecar_path) as f:
+                    same_generation = json.load(f).get('generation') == info.generation
+            except (OSError, ValueError):
+                same_generation = False
+            partial = os.path.getsize(part_path)
+            if same_generation and partial <= info.size:
+                offset = partial
+                status = RESUMED if partial else DOWNLOADED
+                logger.info(f"⏯️ Resuming {info.name} at {partial / (1024 * 1024):.1f}MB")
+            else:
+                os.remove(part_path)
+        with open(sidecar_path, 'w') as f:
+            json.dump({'generation': info.generation}, f)
+
+        read = 0
+        with open(part_path, 'ab') as f:
+            while offset < info.size:
+                end = min(offset + self.chunk_size, info.size)
+                data = self.store.read_range(info.name, info.generation, offset, end)
+                if len(data) != end - offset:
+                    raise IOError(f"{info.name}: short read at {offset} ({len(data)} of {end - offset} bytes)")
+                f.write(data)
+                f.flush()
+                offset = end
+                read += len(data)
+            os.fsync(f.fileno())
+        return status, read
+
+    @staticmethod
+    def _discard(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def fetch_succeeded(report: Dict[str, Dict[str, Any]], required: Optional[List[str]] = None) -> bool:
+    """True when every required object is current or was fetched."""
+    required = list(report) if required is None else required
+    return all(report.get(name, {}).get('status') in (CURRENT, DOWNLOADED, RESUMED) for name in required)
@@ -8,11 +8,16 @@ Eliminates need to deploy 166MB+ databases with every deployment.
 
 import os
 import time
+import fcntl
 import logging
 from typing import List, Optional
 from google.cloud import storage
 from google.api_core import exceptions
 
+from gcs_database_fetcher import DatabaseFetcher, GCSObjectStore, fetch_succeeded, CURRENT, MISSING
+from database_changesets import SYNC_TABLES, GCSChangesetStore, pull_changes
+from treasury_yield_store import STORE_FILENAME, get_treasury_yield_store, yield_store_path
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,12 +42,19 @@ class GCSDatabaseManager:
         self.project_id = project_id
         self.client = None
         self.bucket = None
+        self._client_pid = None
         
         # Required databases for google_analysis10
         self.required_databases = [
             "bonds_data.db",
             "validated_quantlib_bonds.db"
         ]
+        # Fetched alongside when present in the bucket; the API degrades without them
+        # (treasury_yields.db: daily yields the cron updater appended since bonds_data.db was built)
+        self.optional_databases = [
+            "bloomberg_index.db",
+            "treasury_yields.db"
+        ]
         
         # 🔧 FIX: App Engine only allows writes to /tmp/
         self.is_app_engine = os.environ.get('GAE_APPLICATION') is not None
@@ -59,6 +71,7 @@ class GCSDatabaseManager:
             logger.info(f"🔧 Initializing GCS client for project: {self.project_id}")
             self.client = storage.Client(project=self.project_id)
             self.bucket = self.client.bucket(self.bucket_name)
+            self._client_pid = os.getpid()
             
             # Test bucket access
             exists = self.bucket.exists()
@@ -102,127 +115,122 @@ class GCSDatabaseManager:
         
         return status
     
+    def _fetcher(self) -> Optional[DatabaseFetcher]:
+        if self.client and self._client_pid != os.getpid():
+            self.client = None      # clients aren't fork-safe: a worker makes its own
+        if not self.client and not self._init_gcs_client():
+            return None
+        # The yield store lives wherever TREASURY_YIELD_STORE says, not necessarily in target_dir
+        return DatabaseFetcher(GCSObjectStore(self.bucket), self.target_dir,
+                               local_paths={STORE_FILENAME: self.yield_store_path})
+
+    @property
+    def yield_store_path(self) -> str:
+        return yield_store_path(os.path.join(self.target_dir, "bonds_data.db"))
+
     def download_database(self, db_name: str, force_download: bool = False) -> bool:
         """
-        Download a single database from GCS.
+        Download a single database from GCS (verified, resumable, atomic).
         
         Args:
             db_name: Name of the database file
-            force_download: Force download even if file exists locally
+            force_download: Force download even if the local copy is current
             
         Returns:
             True if successful, False otherwise
         """
-        try:
-            # Check if file already exists and we're not forcing download
-            db_path = os.path.join(self.target_dir, db_name)
-            if os.path.exists(db_path) and not force_download:
-                size_mb = os.path.getsize(db_path) / (1024 * 1024)
-                logger.info(f"⏭️  {db_path} already exists locally ({size_mb:.1f}MB), skipping download")
-                return True
-            
-            # Initialize GCS client if needed
-            if not self.client:
-                if not self._init_gcs_client():
-                    return False
-            
-            logger.info(f"📥 Downloading {db_name} from gs://{self.bucket_name}/")
-            
-            # Download the file
-            blob = self.bucket.blob(db_name)
-            
-            # Check if blob exists in GCS
-            if not blob.exists():
-                logger.error(f"❌ {db_name} not found in GCS bucket")
-                return False
-            
-            # Get blob size for progress tracking
-            blob.reload()  # Refresh metadata
-            blob_size_mb = blob.size / (1024 * 1024)
-            
-            start_time = time.time()
-            blob.download_to_filename(db_path)
-            download_time = time.time() - start_time
-            
-            # Verify download
-            if os.path.exists(db_path):
-                local_size_mb = os.path.getsize(db_path) / (1024 * 1024)
-                speed_mbps = local_size_mb / download_time if download_time > 0 else 0
-                
-                logger.info(f"✅ Successfully downloaded {db_name} to {db_path}")
-                logger.info(f"   📊 Size: {local_size_mb:.1f}MB")
-                logger.info(f"   ⏱️  Time: {download_time:.1f}s ({speed_mbps:.1f} MB/s)")
-                return True
-            else:
-                logger.error(f"❌ Download failed: {db_path} not found after download")
-                return False
-                
-        except exceptions.NotFound:
-            logger.error(f"❌ Database {db_name} not found in GCS bucket")
-            return False
-        except exceptions.Forbidden:
-            logger.error(f"❌ Access denied to GCS bucket {self.bucket_name}")
-            return False
-        except Exception as e:
-            logger.error(f"❌ Error downloading {db_name}: {e}")
+        fetcher = self._fetcher()
+        if fetcher is None:
             return False
+        return fetch_succeeded(fetcher.fetch_all([db_name], force=force_download))
     
-    def fetch_all_databases(self, force_download: bool = False) -> bool:
+    def fetch_all_databases(self, force_download: bool = False, delta: bool = True) -> bool:
         """
-        Download all required databases from GCS.
+        Bring all databases up to date from GCS, concurrently.
+        
+        A local copy is kept when its generation (delta mode) or checksum
+        matches the bucket; anything else is re-fetched and verified before
+        it replaces the local file.
         
         Args:
-            force_download: Force download even if files exist locally
+            force_download: Force download even if files are current
+            delta: Skip databases whose GCS generation is unchanged since the
+                last verified fetch (False re-hashes every local copy)
             
         Returns:
-            True if all databases downloaded successfully, False otherwise
+            True if all required databases are available, False otherwise
         """
         logger.info("🚀 Starting database fetch from GCS...")
         start_time = time.time()
         
-        # Check local database status
-        local_status = self.check_local_databases()
-        
-        # Determine which databases need downloading
-        databases_to_download = []
-        for db_name in self.required_databases:
-            if force_download or not local_status[db_name]["exists"]:
-                databases_to_download.append(db_name)
-        
-        if not databases_to_download:
-            logger.info("✅ All databases already exist locally")
-            return True
-        
-        logger.info(f"📥 Need to download: {databases_to_download}")
-        
-        # Download each database
-        success_count = 0
-        for db_name in databases_to_download:
-            if self.download_database(db_name, force_download):
-                success_count += 1
-            else:
-                logger.error(f"❌ Failed to download {db_name}")
+        fetcher = self._fetcher()
+        if fetcher is None:
+            return False
         
+        report = fetcher.fetch_all(self.required_databases + self.optional_databases,
+                                   force=force_download, delta=delta)
         total_time = time.time() - start_time
+        fetched_mb = sum(entry['bytes'] for entry in report.values()) / (1024 * 1024)
+        statuses = ', '.join(f"{name}: {entry['status']}" for name, entry in report.items())
+        logger.info(f"⏱️  Database fetch: {fetched_mb:.1f}MB in {total_time:.1f}s - {statuses}")
         
-        # Summary
-        if success_count == len(databases_to_download):
-            logger.info(f"🎉 Successfully downloaded all {success_count} databases")
-            logger.info(f"⏱️  Total download time: {total_time:.1f}s")
-            
-            # Final verification
-            final_status = self.check_local_databases()
-            missing = [db for db, status in final_status.items() if not status["exists"]]
-            
-            if missing:
-                logger.error(f"❌ Some databases still missing: {missing}")
+        for db_name in self.optional_databases:
+            if report[db_name]['status'] == MISSING:
+                logger.info(f"⏭️  Optional {db_name} not in bucket")
+        
+        if fetch_succeeded(report, self.required_databases):
+            self.apply_pending_changesets()
+            get_treasury_yield_store(os.path.join(self.target_dir, "bonds_data.db")).set_refresher(
+                self.refresh_treasury_yield_store)
+            logger.info("✅ All required databases are now available locally")
+            return True
+        failed = [name for name in self.required_databases
+                  if not fetch_succeeded(report, [name])]
+        logger.error(f"❌ Database fetch failed for: {failed}")
+        return False
+    
+    def refresh_treasury_yield_store(self) -> bool:
+        """
+        Download the yield store if its GCS generation moved since the local
+        copy was fetched (one metadata read otherwise).
+
+        Returns:
+            True if a new copy replaced the local file
+        """
+        fetcher = self._fetcher()
+        if fetcher is None:
+            return False
+        # Workers of one instance share the file: only one of them fetches at a time
+        with open(self.yield_store_path + '.lock', 'w') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
                 return False
-            else:
-                logger.info("✅ All required databases are now available locally")
-                return True
-        else:
-            logger.error(f"❌ Download failed: {success_count}/{len(databases_to_download)} successful")
+            report = fetcher.fetch_all([STORE_FILENAME])[STORE_FILENAME]
+        if report['status'] == MISSING:
             return False
+        if not fetch_succeeded({STORE_FILENAME: report}):
+            raise IOError(report.get('error', f"{STORE_FILENAME} fetch failed"))
+        return report['status'] != CURRENT
+
+    def apply_pending_changesets(self):
+        """
+        Bring the fetched databases up to the latest row-level changesets
+        published since their GCS base was uploaded. Failures leave the base
+        as fetched.
+        """
+        store = GCSChangesetStore(self.bucket)
+        for db_name, tables in SYNC_TABLES.items():
+            db_path = os.path.join(self.target_dir, db_name)
+            if not tables or not os.path.exists(db_path):
+                continue
+            try:
+                started = time.time()
+                applied, rows = pull_changes(store, db_path, db_name)
+                if applied:
+                    logger.info(f"📥 {db_name}: {applied} changeset(s), {rows} rows in {time.time() - started:.2f}s")
+            except Exception as e:
+                logger.warning(f"⚠️ Could not apply changesets to {db_name}: {e}")
     
     def get_database_info(self) -> dict:
         """
@@ -7,12 +7,24 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 import sqlite3
-import pandas as pd
 import QuantLib as ql
 import logging
+import time
 from datetime import datetime, date, timedelta
-from bond_description_parser import SmartBondParser
-from isin_fallback_handler import get_isin_fallback_conventions
+from bond_description_parser import SmartBondParser, get_smart_bond_parser
+from treasury_curve_cache import get_treasury_curve_cache
+from parallel_portfolio_engine import should_use_process_pool, process_portfolio_in_pool
+from calculation_context import CalculationContext
+from core.database_manager import get_readonly_pool
+from bond_reference_index import get_bond_reference_index, SOURCE_VALIDATED
+from bond_instrument_cache import get_bond_instrument_cache
+from treasury_yield_history import get_treasury_yield_history, date_ordinal, tenor_label
+from treasury_yield_store import get_treasury_yield_store
+from ticker_convention_index import get_ticker_convention_index
+from metric_planner import FULL_PLAN, StageTimings
+from engine_logging import log_bond_summary, log_request_summary
+from z_spread_solver import get_z_spread_solver, get_active_z_spread_batch, batched_z_spreads, SpreadProblem
+import bullet_bond_kernel
 
 def get_ql_frequency(freq_str):
     """Maps a frequency string to a QuantLib Frequency object."""
@@ -80,9 +92,13 @@ TREASURY_CONVENTIONS = {
 # --- Treasury Yield Fetching ---
 def fetch_latest_trade_date(db_path):
     """Fetches the most recent date from the tsys_enhanced table (more complete yield curve)."""
-    with sqlite3.connect(db_path) as conn:
-        # Use tsys_enhanced table for complete yield curve coverage
-        return pd.read_sql_query('SELECT MAX(Date) FROM tsys_enhanced', conn).iloc[0, 0]
+    # Use tsys_enhanced table for complete yield curve coverage
+    history = get_treasury_yield_history(db_path)
+    if history is not None:
+        return history.latest_date()
+    latest = get_readonly_pool(db_path).query_one('SELECT MAX(Date) FROM tsys_enhanced')[0]
+    stored = get_treasury_yield_store(db_path).stats()['last_date']
+    return max(filter(None, (latest, stored)), default=None)
 
 def fetch_treasury_yields(trade_date, db_path):
     """Fetches treasury yields from the 'tsys_enhanced' table with complete yield curve coverage."""
@@ -118,46 +134,70 @@ def fetch_treasury_yields(trade_date, db_path):
                 logger.error(f"   CWD: {os.getcwd()}")
                 logger.error(f"   Files in CWD: {os.listdir('.')[:10]}")
                 return {}
-        
-        with sqlite3.connect(db_path) as conn:
-            # Use tsys_enhanced table for complete M1M through M30Y coverage
-            query = f"SELECT * FROM tsys_enhanced WHERE Date = '{trade_date}'"
-            df_wide = pd.read_sql_query(query, conn)
 
-        if df_wide.empty:
-            logger.warning(f"No treasury yields found for date: {trade_date} in 'tsys_enhanced' table.")
-            # 🔧 FIX: Use the most recent available date before requested date
-            fallback_query = f"""
-                SELECT * FROM tsys_enhanced 
-                WHERE Date <= '{trade_date}' 
-                ORDER BY Date DESC 
-                LIMIT 1
-            """
-            df_fallback = pd.read_sql_query(fallback_query, conn)
-            
-            if not df_fallback.empty:
-                fallback_date = df_fallback['Date'].iloc[0]
-                logger.info(f"📅 Using most recent available treasury date: {fallback_date} (requested: {trade_date})")
-                df_wide = df_fallback
-            else:
-                # If no prior dates, try to get the latest available
-                latest_query = "SELECT MAX(Date) as latest_date FROM tsys_enhanced"
-                latest_df = pd.read_sql_query(latest_query, conn)
-                latest_date = latest_df['latest_date'].iloc[0] if not latest_df.empty else None
-                logger.info(f"📅 Latest available treasury date: {latest_date}")
+        # 🚀 In-memory dates × tenors array: binary search, no SQL or unpivoting
+        history = get_treasury_yield_history(db_path)
+        if history is not None:
+            matched_date, yield_dict = history.lookup(trade_date)
+            if matched_date is None:
+                logger.warning(f"No treasury yields on or before {trade_date} in 'tsys_enhanced' "
+                               f"(history starts {history.stats()['first_date']})")
                 return {}
+            if date_ordinal(matched_date) != date_ordinal(trade_date):
+                logger.info(f"📅 Using most recent available treasury date: {matched_date} (requested: {trade_date})")
+            return yield_dict
+
+        return _fetch_treasury_yields_sql(trade_date, db_path)
+
+    except Exception as e:
+        logger.error(f"Failed to fetch treasury yields from 'tsys_enhanced': {e}", exc_info=True)
+        return {}
+
+def _fetch_treasury_yields_sql(trade_date, db_path):
+    """SQL lookup used when the in-memory yield history is disabled or unavailable."""
+    try:
+        pool = get_readonly_pool(db_path)
+        # Use tsys_enhanced table for complete M1M through M30Y coverage
+        yield_data_row = pool.query_one("SELECT * FROM tsys_enhanced WHERE Date = ?", (trade_date,))
+
+        if yield_data_row is None:
+            # 🔧 FIX: Use the most recent available date before requested date
+            yield_data_row = pool.query_one(
+                "SELECT * FROM tsys_enhanced WHERE Date <= ? ORDER BY Date DESC LIMIT 1", (trade_date,)
+            )
 
         # Unpivot the data from wide to long format
-        yield_data_row = df_wide.iloc[0]
         raw_yields = {}
-        for col_name, value in yield_data_row.items():
-            # Enhanced table has M1M, M2M, M3M, M6M, M1Y, M2Y, M3Y, M5Y, M7Y, M10Y, M20Y, M30Y
-            if col_name.startswith('M') and (col_name.endswith('Y') or col_name.endswith('M')):
-                tenor_str = col_name.replace('M', '') # Converts 'M10Y' to '10Y', 'M1M' to '1M'
-                raw_yields[tenor_str] = value
+        matched_date = None
+        if yield_data_row is not None:
+            matched_date = str(yield_data_row['Date'])[:10]
+            for col_name, value in zip(yield_data_row.keys(), yield_data_row):
+                # Enhanced table has M1M, M2M, M3M, M6M, M1Y, M2Y, M3Y, M5Y, M7Y, M10Y, M20Y, M30Y
+                if col_name.startswith('M') and (col_name.endswith('Y') or col_name.endswith('M')):
+                    raw_yields[col_name] = value
+
+        # Days written by the updater live in the sidecar yield store, overlaid as the history does
+        store_date, store_yields = get_treasury_yield_store(db_path).lookup(trade_date)
+        if store_date is not None and (matched_date is None or store_date > matched_date):
+            matched_date = store_date
+            tsys_columns = pool.schema().get('tsys_enhanced', [])
+            raw_yields = {col: value for col, value in store_yields.items() if col in tsys_columns}
+        elif store_date is not None and store_date == matched_date:
+            raw_yields = {col: store_yields.get(col, value) for col, value in raw_yields.items()}
+
+        if matched_date is None:
+            logger.warning(f"No treasury yields found for date: {trade_date} in 'tsys_enhanced' table.")
+            # If no prior dates, try to get the latest available
+            latest_row = pool.query_one("SELECT MAX(Date) as latest_date FROM tsys_enhanced")
+            latest_date = latest_row['latest_date'] if latest_row is not None else None
+            logger.info(f"📅 Latest available treasury date: {latest_date}")
+            return {}
+        if date_ordinal(matched_date) != date_ordinal(trade_date):
+            logger.info(f"📅 Using most recent available treasury date: {matched_date} (requested: {trade_date})")
 
         # Enhanced table already has yields in percentage format (4.5 = 4.5%), convert to decimal
-        yield_dict = {k: v / 100.0 for k, v in raw_yields.items() if v is not None}
+        # Converts 'M10Y' to '10Y', 'M1M' to '1'
+        yield_dict = {tenor_label(k): v / 100.0 for k, v in raw_yields.items() if v is not None}
         logger.info(f"Successfully fetched treasury yields from 'tsys_enhanced' for {trade_date}: {list(yield_dict.keys())}")
         return yield_dict
 
@@ -202,7 +242,7 @@ def get_closest_treasury_yield(treasury_yields, target_years):
     closest_maturity = min(tenor_years.keys(), key=lambda x: abs(x - target_years))
     closest_yield = tenor_years[closest_maturity]
     
-    logger.debug(f"Treasury lookup: {target_years:.1f}Y bond matched to {closest_maturity:.1f}Y treasury at {closest_yield*100:.3f}%")
+    logger.debug("Treasury lookup: %.1fY bond matched to %.1fY treasury at %.3f%%", target_years, closest_maturity, closest_yield*100)
     
     return closest_yield
 
@@ -236,13 +276,11 @@ def get_conventions_from_db(isin, db_path):
     if not isin or not db_path:
         return {}
     try:
-        with sqlite3.connect(db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM validated_quantlib_bonds WHERE isin = ?", (isin,))
-            row = cursor.fetchone()
-            if row:
-                return dict(row)
+        row = get_readonly_pool(db_path).query_one(
+            "SELECT * FROM validated_quantlib_bonds WHERE isin = ?", (isin,)
+        )
+        if row:
+            return dict(row)
     except sqlite3.Error as e:
         logger.error(f"Database error while fetching conventions for {isin}: {e}")
     return {}
@@ -276,41 +314,46 @@ def get_validated_conventions_by_ticker(ticker, validated_db_path):
         return None
         
     try:
-        with sqlite3.connect(validated_db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Get the most common convention for this ticker
-            query = """
-            SELECT 
-                day_count,
-                business_convention,
-                frequency,
-                COUNT(*) as count
-            FROM validated_quantlib_bonds
-            WHERE description LIKE ? || '%'
-            GROUP BY day_count, business_convention, frequency
-            ORDER BY count DESC
-            LIMIT 1
-            """
-            cursor.execute(query, (ticker,))
-            result = cursor.fetchone()
-            
-            if result:
-                conventions = {
-                    'day_count': result[0],
-                    'business_convention': result[1],
-                    'frequency': result[2],
-                    'source': 'validated_ticker_lookup',
-                    'bond_count': result[3]
-                }
-                logger.info(f"✅ Found validated conventions for ticker {ticker} (used by {result[3]} bonds): {conventions}")
-                return conventions
+        index = get_ticker_convention_index()
+        if index is not None and index.covers_validated(validated_db_path):
+            # 🚀 Preloaded per-ticker aggregates (unknown tickers are negative-cached)
+            result = index.validated_conventions(ticker)
+        else:
+            result = _query_validated_conventions_by_ticker(ticker, validated_db_path)
+        
+        if result:
+            conventions = {
+                'day_count': result[0],
+                'business_convention': result[1],
+                'frequency': result[2],
+                'source': 'validated_ticker_lookup',
+                'bond_count': result[3]
+            }
+            logger.debug("✅ Found validated conventions for ticker %s (used by %s bonds): %s", ticker, result[3], conventions)
+            return conventions
                 
     except Exception as e:
         logger.error(f"Error getting validated ticker conventions: {e}")
         
     return None
 
+def _query_validated_conventions_by_ticker(ticker, validated_db_path):
+    """SQL aggregate used when the ticker convention index doesn't cover validated_db_path."""
+    # Get the most common convention for this ticker
+    query = """
+        SELECT 
+            day_count,
+            business_convention,
+            frequency,
+            COUNT(*) as count
+        FROM validated_quantlib_bonds
+        WHERE description LIKE ? || '%'
+        GROUP BY day_count, business_convention, frequency
+        ORDER BY count DESC
+        LIMIT 1
+        """
+    return get_readonly_pool(validated_db_path).query_one(query, (ticker,))
+
 def find_isin_from_parsed_data(parsed_data, validated_db_path):
     """
     Find ISIN from validated database using parsed bond details.
@@ -327,60 +370,109 @@ def find_isin_from_parsed_data(parsed_data, validated_db_path):
         if not coupon or not maturity:
             return None
             
-        # Connect to validated database
-        with sqlite3.connect(validated_db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Try exact match on coupon and maturity
+        # Try exact match on coupon and maturity in the validated database
+        index = get_bond_reference_index()
+        if index is not None and index.covers(validated_db_path):
+            # (coupon, maturity) → ISIN index - no SQL
+            results = []
+            for isin in index.find_by_coupon_maturity(coupon, maturity, sources=(SOURCE_VALIDATED,)):
+                record = index.lookup(isin, sources=(SOURCE_VALIDATED,))
+                results.append((isin, record.get('description') or ''))
+        else:
             query = """
             SELECT isin, description 
             FROM validated_quantlib_bonds 
             WHERE coupon = ? 
             AND maturity = ?
             """
+            results = get_readonly_pool(validated_db_path).query_all(query, (coupon, maturity))
+        
+        # If we have results, try to match by issuer
+        for isin, description in results:
+            desc_upper = description.upper()
+            # Check if issuer matches
+            if 'ECOPETROL' in issuer and 'ECOPET' in desc_upper:
+                logger.debug("✅ Found ISIN %s for ECOPETROL bond via validated DB lookup", isin)
+                return isin
+            elif 'PEMEX' in issuer and ('PEMEX' in desc_upper or 'PETROLEOS' in desc_upper):
+                logger.debug("✅ Found ISIN %s for PEMEX bond via validated DB lookup", isin)
+                return isin
+            elif issuer[:6] in desc_upper:  # Match first 6 chars of issuer
+                logger.debug("✅ Found ISIN %s for %s bond via validated DB lookup", isin, issuer)
+                return isin
             
-            cursor.execute(query, (coupon, maturity))
-            results = cursor.fetchall()
+        # If no issuer match but only one result, use it
+        if len(results) == 1:
+            isin = results[0][0]
+            logger.debug("✅ Found unique ISIN %s via coupon/maturity match", isin)
+            return isin
             
-            # If we have results, try to match by issuer
-            for isin, description in results:
-                desc_upper = description.upper()
-                # Check if issuer matches
-                if 'ECOPETROL' in issuer and 'ECOPET' in desc_upper:
-                    logger.info(f"✅ Found ISIN {isin} for ECOPETROL bond via validated DB lookup")
-                    return isin
-                elif 'PEMEX' in issuer and ('PEMEX' in desc_upper or 'PETROLEOS' in desc_upper):
-                    logger.info(f"✅ Found ISIN {isin} for PEMEX bond via validated DB lookup")
-                    return isin
-                elif issuer[:6] in desc_upper:  # Match first 6 chars of issuer
-                    logger.info(f"✅ Found ISIN {isin} for {issuer} bond via validated DB lookup")
-                    return isin
-                
-            # If no issuer match but only one result, use it
-            if len(results) == 1:
-                isin = results[0][0]
-                logger.info(f"✅ Found unique ISIN {isin} via coupon/maturity match")
-                return isin
-                
     except Exception as e:
         logger.error(f"Error finding ISIN from parsed data: {e}")
         
     return None
 
 # --- Core Calculation Engine ---
-def calculate_bond_metrics_with_conventions_using_shared_engine(isin, coupon, maturity_date, price, trade_date, treasury_handle, default_conventions, is_treasury=False, settlement_days=0, validated_db_path=None, description=None, db_path=None, use_settlement_date_directly=True):
+# Engine schedules start this many years before settlement and never apply end-of-month rolling
+SCHEDULE_YEARS_BACK = 10
+SCHEDULE_END_OF_MONTH = False
+
+# Portfolio engine: 'quantlib' (one FixedRateBond per bond) or 'vectorized' (bullet_bond_kernel)
+PORTFOLIO_ENGINE = os.environ.get('PORTFOLIO_ENGINE', 'quantlib')
+QL_SERIAL_OFFSET = date(1899, 12, 30).toordinal()   # ql.Date serial = proleptic ordinal - offset
+# Lines priced per block when a portfolio is streamed (iter_bond_portfolio)
+PORTFOLIO_STREAM_BLOCK_SIZE = int(os.environ.get('PORTFOLIO_STREAM_BLOCK_SIZE', 500))
+
+def calculate_bond_metrics_with_conventions_using_shared_engine(isin, coupon, maturity_date, price, trade_date, treasury_handle, default_conventions, is_treasury=False, settlement_days=0, validated_db_path=None, description=None, db_path=None, use_settlement_date_directly=True, calc_context=None, instrument_cache=None, metric_plan=None):
+    """
+    Shared calculation engine entry point.
+
+    The settlement date travels in a CalculationContext and is passed explicitly
+    to every QuantLib call. The global evaluation date is only touched by the
+    context's evaluation scope, once per group of calculations sharing a date,
+    so the engine is safe under threaded gunicorn workers.
+
+    Schedule/FixedRateBond objects come from instrument_cache (default: the
+    process-wide BondInstrumentCache), so bonds with identical terms are only
+    built once.
+
+    metric_plan (metric_planner.MetricPlan, default: every metric) selects the
+    stages to run; metrics of skipped stages come back as None. Per-stage wall
+    times are returned in 'stage_timings_ms'.
+    """
+    if calc_context is None:
+        parsed_trade_date = parse_date(trade_date)
+        if not parsed_trade_date:
+            logger.error(f"[CALC_ENGINE ISIN: {isin}] Trade date could not be parsed: {trade_date}")
+            return {'isin': isin, 'successful': False, 'error': 'Maturity or trade date could not be parsed.'}
+        calc_context = CalculationContext(parsed_trade_date)
+
+    start = time.perf_counter()
+    with calc_context.evaluation_scope():
+        result = _calculate_bond_metrics_in_context(
+            calc_context, isin, coupon, maturity_date, price, treasury_handle, default_conventions,
+            is_treasury=is_treasury, settlement_days=settlement_days, validated_db_path=validated_db_path,
+            description=description, db_path=db_path, use_settlement_date_directly=use_settlement_date_directly,
+            instrument_cache=instrument_cache, metric_plan=metric_plan
+        )
+    # One structured INFO record per bond; the per-step trace is DEBUG
+    log_bond_summary(result, (time.perf_counter() - start) * 1000, description)
+    return result
+
+def _calculate_bond_metrics_in_context(calc_context, isin, coupon, maturity_date, price, treasury_handle, default_conventions, is_treasury=False, settlement_days=0, validated_db_path=None, description=None, db_path=None, use_settlement_date_directly=True, instrument_cache=None, metric_plan=None):
     log_prefix = f"[CALC_ENGINE ISIN: {isin}, T+{settlement_days}]"
-    logger.info(f"{log_prefix} Starting calculation.")
+    logger.debug("%s Starting calculation.", log_prefix)
+    plan = metric_plan or FULL_PLAN
+    timings = StageTimings()
     try:
         maturity_date = parse_date(maturity_date)
-        trade_date = parse_date(trade_date)
-        logger.info(f"{log_prefix} Dates parsed. Maturity: {maturity_date}, Trade: {trade_date}")
+        trade_date = calc_context.settlement_date
+        logger.debug("%s Dates parsed. Maturity: %s, Trade: %s", log_prefix, maturity_date, trade_date)
         if not maturity_date or not trade_date:
             raise ValueError("Maturity or trade date could not be parsed.")
 
-        calculation_date = ql.Date(trade_date.day, trade_date.month, trade_date.year)
-        ql.Settings.instance().evaluationDate = calculation_date
-        logger.info(f"{log_prefix} QL evaluation date set.")
+        # ✅ No global evaluationDate mutation - the context carries the date explicitly
+        calculation_date = calc_context.ql_settlement_date
 
         day_count = ql.Actual360()
         calendar = ql.UnitedStates(ql.UnitedStates.GovernmentBond)
@@ -390,498 +482,866 @@ def calculate_bond_metrics_with_conventions_using_shared_engine(isin, coupon, ma
             # Settlement date was explicitly provided - use it as-is WITHOUT holiday adjustment
             # For accrued interest, we need the actual calendar date, not business day adjusted
             settlement_date = calculation_date
-            logger.info(f"{log_prefix} Using provided settlement date directly (no holiday adjustment): {format_ql_date(settlement_date)}")
+            logger.debug("%s Using provided settlement date directly (no holiday adjustment): %s", log_prefix, settlement_date)
         else:
             # Traditional behavior: calculate settlement date from trade date + settlement days
             settlement_date = calendar.advance(calculation_date, ql.Period(settlement_days, ql.Days))
-            logger.info(f"{log_prefix} Calculated settlement date (T+{settlement_days}): {format_ql_date(settlement_date)}")
+            logger.debug("%s Calculated settlement date (T+%s): %s", log_prefix, settlement_days, settlement_date)
         
         # ✅ CORRECTED: Let QuantLib handle issue date with defaults
         # DO NOT manually set issue date - causes duration calculation errors
         ql_maturity = ql.Date(maturity_date.day, maturity_date.month, maturity_date.year)
         
-        logger.info(f"{log_prefix} Settlement date set to: {format_ql_date(settlement_date)}")
-        logger.info(f"{log_prefix} Letting QuantLib handle issue date with defaults")
-
-        conventions = default_conventions.copy()
-        db_conventions = get_conventions_from_db(isin, validated_db_path)
-        if db_conventions:
-            conventions.update(db_conventions)
-        if is_treasury:
-            logger.info(f"{log_prefix} Applying Treasury override conventions.")
-            conventions.update(TREASURY_CONVENTIONS)
-        logger.info(f"{log_prefix} Final conventions: {conventions}")
+        logger.debug("%s Settlement date set to: %s", log_prefix, settlement_date)
+        logger.debug("%s Letting QuantLib handle issue date with defaults", log_prefix)
+
+        conventions = resolve_engine_conventions(isin, default_conventions, is_treasury, validated_db_path)
+        logger.debug("%s Final conventions: %s", log_prefix, conventions)
 
         frequency = get_ql_frequency(conventions.get('frequency'))
 
-        logger.info(f"{log_prefix} Creating QuantLib bond schedule...")
+        logger.debug("%s Creating QuantLib bond schedule...", log_prefix)
         
         # FIXED: Create schedule from well before settlement to capture all coupon dates
-        # Calculate a start date that's at least 10 years before settlement
-        years_back = 10
-        schedule_start = settlement_date
-        for i in range(years_back * 2):  # Semi-annual periods
-            schedule_start = calendar.advance(schedule_start, ql.Period(-6, ql.Months))
+        # Start 10 years before settlement; backward generation makes the exact start irrelevant
+        schedule_start = calendar.advance(settlement_date, ql.Period(-SCHEDULE_YEARS_BACK, ql.Years))
         
         # Get business day convention from conventions
         bus_day_conv_str = conventions.get('fixed_business_convention') or conventions.get('business_day_convention', 'Following')
-        
-        # Map string to QuantLib convention
-        if bus_day_conv_str == 'Unadjusted':
-            business_convention = ql.Unadjusted
-        elif bus_day_conv_str == 'Following':
-            business_convention = ql.Following
-        elif bus_day_conv_str == 'ModifiedFollowing':
-            business_convention = ql.ModifiedFollowing
-        elif bus_day_conv_str == 'Preceding':
-            business_convention = ql.Preceding
-        else:
-            business_convention = ql.Following  # Default
-            
-        logger.info(f"{log_prefix} Using business day convention: {bus_day_conv_str}")
-        
-        # Create schedule from calculated start to maturity
-        schedule = ql.Schedule(
-            schedule_start,
-            ql_maturity,
-            ql.Period(frequency),
-            calendar,
-            business_convention,
-            business_convention,
-            ql.DateGeneration.Backward,
-            False
-        )
-        
-        logger.info(f"{log_prefix} Schedule created from {format_ql_date(schedule_start)} to {format_ql_date(ql_maturity)}")
-
-        # Map day count convention from string to QuantLib object
         day_count_str = conventions.get('day_count', '30/360')
         
-        # Enhanced mapping to handle both internal names and database names
-        day_count_map = {
-            # Preferred QuantLib-style names
-            'ActualActual.Bond': ql.ActualActual(ql.ActualActual.Bond),
-            'ActualActual.ISMA': ql.ActualActual(ql.ActualActual.ISMA),
-            'ActualActual.ISDA': ql.ActualActual(ql.ActualActual.ISDA),
-            'Thirty360.BondBasis': ql.Thirty360(ql.Thirty360.BondBasis),
-            'Actual360': ql.Actual360(),
-            'Actual365Fixed': ql.Actual365Fixed(),
-            
-            # Legacy/compatibility names
-            'ActualActual_Bond': ql.ActualActual(ql.ActualActual.Bond),
-            'Actual/Actual (ISMA)': ql.ActualActual(ql.ActualActual.Bond),  # Map ISMA to Bond for clarity
-            '30/360': ql.Thirty360(ql.Thirty360.BondBasis),
-            'Thirty360': ql.Thirty360(ql.Thirty360.BondBasis),
-            'ACT/360': ql.Actual360(),
-            'ACT/365': ql.Actual365Fixed(),
-        }
-        
-        if day_count_str in day_count_map:
-            day_counter = day_count_map[day_count_str]
-        else:
-            logger.warning(f"Unknown day count convention '{day_count_str}', defaulting to ActualActual.ISDA")
-            day_counter = ql.ActualActual(ql.ActualActual.ISDA)
-        
-        logger.info(f"{log_prefix} Using day count convention: {day_count_str} -> {day_counter}")
-        
         # CRITICAL FIX: Convert coupon from percentage to decimal for QuantLib
         # Input coupon comes as percentage (e.g., 3.0 for 3%), QuantLib expects decimal (0.03)
         coupon_decimal = coupon / 100.0
-        logger.info(f"{log_prefix} Creating FixedRateBond... SettlementDays: {settlement_days}, Coupon: {coupon}% -> {coupon_decimal} (decimal)")
-        bond = ql.FixedRateBond(settlement_days, 100.0, schedule, [coupon_decimal], day_counter)
-        logger.info(f"{log_prefix} FixedRateBond created successfully.")
+
+        # Schedule/FixedRateBond objects are shared across calls for identical terms
+        if instrument_cache is None:
+            instrument_cache = get_bond_instrument_cache()
+        instrument_key = (coupon_decimal, ql_maturity.serialNumber(), frequency, day_count_str,
+                          bus_day_conv_str, SCHEDULE_END_OF_MONTH, settlement_days)
+        with timings.stage('instrument'):
+            instrument = instrument_cache.get(instrument_key, schedule_start)
+            instrument_cached = instrument is not None
+            if instrument is None:
+                instrument = _build_fixed_rate_bond(
+                    log_prefix, coupon, coupon_decimal, ql_maturity, frequency, bus_day_conv_str,
+                    day_count_str, schedule_start, calendar, settlement_days
+                )
+                instrument_cache.put(instrument_key, schedule_start, instrument)
+            else:
+                logger.debug("%s Reusing cached FixedRateBond for identical terms.", log_prefix)
+        schedule, bond, day_counter = instrument
+
+        # Settlement date QuantLib would derive from evaluationDate (calendar-adjusted, T+settlement_days)
+        bond_settlement_date = calc_context.bond_settlement_date(bond)
 
         # CRITICAL FIX: Don't set pricing engine - it may interfere with yield calculation
-        logger.info(f"{log_prefix} Skipping pricing engine setup for yield calculation accuracy.")
+        logger.debug("%s Skipping pricing engine setup for yield calculation accuracy.", log_prefix)
 
         # Handle missing price with a reasonable default (par value)
         if price is None:
             logger.warning(f"{log_prefix} Price is None, using default par value 100.0")
             price = 100.0
         
-        logger.info(f"{log_prefix} Calculating yield for price {price}...")
+        logger.debug("%s Calculating yield for price %s...", log_prefix, price)
         
         # 🔧 YIELD CALCULATION FIX - Use semiannual frequency for all bonds
         yield_frequency = ql.Semiannual  # Standard for most bonds
         
-        # Step 1: Calculate yield using semiannual frequency
-        bond_yield_decimal = bond.bondYield(
-            price, 
-            day_counter, 
-            ql.Compounded, 
-            yield_frequency
-        )
+        # 🎯 Metric plan: stages nobody asked for are skipped and their metrics stay None
+        bond_yield_decimal = duration = convexity = pvbp = None
+        accrued_interest = accrued_per_million = None
         
-        logger.info(f"{log_prefix} Yield calculated (decimal): {bond_yield_decimal:.6f} ({bond_yield_decimal*100:.5f}%)")
+        if plan.needs('yield'):
+            with timings.stage('yield'):
+                # Step 1: Calculate yield using semiannual frequency
+                bond_yield_decimal = bond.bondYield(
+                    price, 
+                    day_counter, 
+                    ql.Compounded, 
+                    yield_frequency,
+                    bond_settlement_date
+                )
+            
+            logger.debug("%s Yield calculated (decimal): %.6f (%.5f%%)", log_prefix, bond_yield_decimal, bond_yield_decimal*100)
 
-        # 🔧 DURATION CALCULATION FIX - Use DECIMAL yield (not percentage!)
-        logger.info(f"{log_prefix} Calculating duration with DECIMAL yield...")
-        
-        # ✅ FIXED: Use decimal yield directly - QuantLib expects decimal format
-        logger.info(f"{log_prefix} Using decimal yield for duration: {bond_yield_decimal:.6f}")
-        
-        # ✅ FIXED: Calculate duration with decimal yield (no percentage conversion)
-        duration = ql.BondFunctions.duration(
-            bond, bond_yield_decimal, day_counter, ql.Compounded, 
-            yield_frequency, ql.Duration.Modified
-        )
-        
-        # ✅ FIXED: No scaling needed - QuantLib returns duration in years directly
-        logger.info(f"{log_prefix} Duration: {duration:.5f} years (no scaling needed)")
+        if plan.needs('duration'):
+            # 🔧 DURATION CALCULATION FIX - Use DECIMAL yield (not percentage!)
+            logger.debug("%s Calculating duration with DECIMAL yield...", log_prefix)
+            
+            # ✅ FIXED: Use decimal yield directly - QuantLib expects decimal format
+            logger.debug("%s Using decimal yield for duration: %.6f", log_prefix, bond_yield_decimal)
+            
+            # ✅ FIXED: Calculate duration with decimal yield (no percentage conversion)
+            with timings.stage('duration'):
+                duration = ql.BondFunctions.duration(
+                    bond, bond_yield_decimal, day_counter, ql.Compounded, 
+                    yield_frequency, ql.Duration.Modified, bond_settlement_date
+                )
+            
+            # ✅ FIXED: No scaling needed - QuantLib returns duration in years directly
+            logger.debug("%s Duration: %.5f years (no scaling needed)", log_prefix, duration)
 
-        # 🔧 CONVEXITY CALCULATION FIX - Use decimal yield consistently
-        logger.info(f"{log_prefix} Calculating convexity with decimal yield...")
-        convexity = ql.BondFunctions.convexity(
-            bond, bond_yield_decimal, day_counter, ql.Compounded, yield_frequency
-        )
-        logger.info(f"{log_prefix} Convexity: {convexity:.5f} (no scaling needed)")
-        
-        # 🚀 CRITICAL FIX: Add accrued interest calculation (missing for dirty price!)
-        logger.info(f"{log_prefix} Calculating accrued interest...")
+        if plan.needs('convexity'):
+            # 🔧 CONVEXITY CALCULATION FIX - Use decimal yield consistently
+            logger.debug("%s Calculating convexity with decimal yield...", log_prefix)
+            with timings.stage('convexity'):
+                convexity = ql.BondFunctions.convexity(
+                    bond, bond_yield_decimal, day_counter, ql.Compounded, yield_frequency,
+                    bond_settlement_date
+                )
+            logger.debug("%s Convexity: %.5f (no scaling needed)", log_prefix, convexity)
         
-        # FIXED: For explicit settlement dates on holidays, calculate accrued manually
-        # to avoid QuantLib's automatic business day adjustment
-        if use_settlement_date_directly and calendar.isHoliday(settlement_date):
-            logger.info(f"{log_prefix} Settlement date is a holiday - calculating accrued manually")
+        if plan.needs('accrued'):
+            # 🚀 CRITICAL FIX: Add accrued interest calculation (missing for dirty price!)
+            logger.debug("%s Calculating accrued interest...", log_prefix)
+            with timings.stage('accrued'):
+                # FIXED: For explicit settlement dates on holidays, calculate accrued manually
+                # to avoid QuantLib's automatic business day adjustment
+                if use_settlement_date_directly and calendar.isHoliday(settlement_date):
+                    logger.debug("%s Settlement date is a holiday - calculating accrued manually", log_prefix)
             
-            # Find the coupon period containing the settlement date
-            for i in range(len(schedule) - 1):
-                if schedule[i] <= settlement_date <= schedule[i + 1]:
-                    prev_coupon_date = schedule[i]
-                    next_coupon_date = schedule[i + 1]
+                    # Find the coupon period containing the settlement date
+                    for i in range(len(schedule) - 1):
+                        if schedule[i] <= settlement_date <= schedule[i + 1]:
+                            prev_coupon_date = schedule[i]
+                            next_coupon_date = schedule[i + 1]
                     
-                    # Calculate accrued days using the bond's day counter
-                    accrued_days = day_counter.dayCount(prev_coupon_date, settlement_date)
-                    period_days = day_counter.dayCount(prev_coupon_date, next_coupon_date)
+                            # Calculate accrued days using the bond's day counter
+                            accrued_days = day_counter.dayCount(prev_coupon_date, settlement_date)
+                            period_days = day_counter.dayCount(prev_coupon_date, next_coupon_date)
                     
-                    # Calculate accrued interest
-                    coupon_payment = coupon_decimal * 100.0 / frequency  # Semi-annual payment
-                    accrued_interest = coupon_payment * (accrued_days / float(period_days))
+                            # Calculate accrued interest
+                            coupon_payment = coupon_decimal * 100.0 / frequency  # Semi-annual payment
+                            accrued_interest = coupon_payment * (accrued_days / float(period_days))
                     
-                    logger.info(f"{log_prefix} Manual accrued calc: {accrued_days} days / {period_days} days * {coupon_payment}% = {accrued_interest:.6f}%")
-                    break
-            else:
-                # Fallback to QuantLib calculation if period not found
-                accrued_interest = bond.accruedAmount()
-        else:
-            # Use standard QuantLib calculation for non-holiday dates
-            accrued_interest = bond.accruedAmount()
+                            logger.debug("%s Manual accrued calc: %s days / %s days * %s%% = %.6f%%", log_prefix, accrued_days, period_days, coupon_payment, accrued_interest)
+                            break
+                    else:
+                        # Fallback to QuantLib calculation if period not found
+                        accrued_interest = bond.accruedAmount(bond_settlement_date)
+                else:
+                    # Use standard QuantLib calculation for non-holiday dates
+                    accrued_interest = bond.accruedAmount(bond_settlement_date)
             
-        # 💰 NEW: Calculate accrued interest per million for Bloomberg validation
-        accrued_per_million = accrued_interest * 10000  # Convert % to $ per 1M notional
-        logger.info(f"{log_prefix} Accrued Interest: {accrued_interest:.6f}% ({accrued_per_million:.2f} per 1M)")
+            # 💰 NEW: Calculate accrued interest per million for Bloomberg validation
+            accrued_per_million = accrued_interest * 10000  # Convert % to $ per 1M notional
+            logger.debug("%s Accrued Interest: %.6f%% (%.2f per 1M)", log_prefix, accrued_interest, accrued_per_million)
         
-        # 🚀 ADDITIONAL METRICS: Add PVBP (Price Value of a Basis Point)
-        logger.info(f"{log_prefix} Calculating PVBP...")
-        # ✅ FIXED: PVBP = Duration × Price / 10000 (duration already in years)
-        pvbp = duration * price / 10000
-        logger.info(f"{log_prefix} PVBP: {pvbp:.6f}")
+        if plan.needs('duration'):
+            # 🚀 ADDITIONAL METRICS: Add PVBP (Price Value of a Basis Point)
+            logger.debug("%s Calculating PVBP...", log_prefix)
+            # ✅ FIXED: PVBP = Duration × Price / 10000 (duration already in years)
+            pvbp = duration * price / 10000
+            logger.debug("%s PVBP: %.6f", log_prefix, pvbp)
         
-        logger.info(f"{log_prefix} 🎉 FIXED CALCULATION SUCCESSFUL!")
-        logger.info(f"{log_prefix} 📊 Results: Yield={bond_yield_decimal*100:.5f}%, Duration={duration:.5f}, Convexity={convexity:.2f}, Accrued={accrued_interest:.6f}")
+        logger.debug("%s 🎉 FIXED CALCULATION SUCCESSFUL!", log_prefix)
+        logger.debug("%s 📊 Results: Yield=%s, Duration=%s, Convexity=%s, Accrued=%s", log_prefix, bond_yield_decimal, duration, convexity, accrued_interest)
         
         # 🚀 SPREAD CALCULATION FIX: Calculate spread for ALL bonds (including Treasuries)
         g_spread = None  # Default when calculation fails
         z_spread = None  # Default
+        z_spread_problem = None  # Set when the spread is deferred to a portfolio-wide solve
         
         # Calculate spread for ALL bonds (Treasuries can trade away from the fitted curve)
         # Use provided db_path or fallback to default
         effective_db_path = db_path or './bonds_data.db'
-        effective_validated_path = validated_db_path or './validated_quantlib_bonds.db'
         
-        detector = WorkingTreasuryDetector(effective_db_path, effective_validated_path)
-        bond_yield_pct = bond_yield_decimal * 100  # Convert to percentage
-        
-        try:
-            # Get treasury yields for the trade date - USE PASSED DB_PATH
-            treasury_yields = fetch_treasury_yields(trade_date.strftime('%Y-%m-%d'), effective_db_path)
-            
-            if treasury_yields:
-                # Calculate years to maturity for treasury matching
-                years_to_maturity = (maturity_date - trade_date).days / 365.25
-                
-                # Find closest treasury yield
-                closest_treasury_yield = get_closest_treasury_yield(treasury_yields, years_to_maturity)
+        if plan.needs('treasury_fetch'):
+            try:
+                # Get treasury yields for the trade date - USE PASSED DB_PATH
+                # 🚀 Shared per-settlement-date cache: one SQL read per date, not per bond
+                with timings.stage('treasury_fetch'):
+                    treasury_yields = get_cached_treasury_yields(trade_date.strftime('%Y-%m-%d'), effective_db_path)
                 
-                if closest_treasury_yield:
-                    # Calculate spread in basis points
-                    treasury_yield_pct = closest_treasury_yield * 100  # Convert to percentage
-                    g_spread = (bond_yield_pct - treasury_yield_pct) * 100  # Convert to basis points
+                if treasury_yields:
+                    # Calculate years to maturity for treasury matching
+                    years_to_maturity = (maturity_date - trade_date).days / 365.25
+                    
+                    # Find closest treasury yield
+                    closest_treasury_yield = get_closest_treasury_yield(treasury_yields, years_to_maturity)
                     
-                    # 🚀 REAL Z-SPREAD CALCULATION using QuantLib
-                    logger.info(f"{log_prefix} 🔍 Z-SPREAD: Building treasury curve for real z-spread calculation")
-                    try:
-                        # Build proper treasury curve from our treasury data
-                        treasury_curve = build_treasury_curve_from_yields(treasury_yields, trade_date)
+                    if closest_treasury_yield:
+                        treasury_yield_pct = closest_treasury_yield * 100  # Convert to percentage
                         
-                        if treasury_curve:
-                            # Use QuantLib's zSpread method for institutional-grade calculation
-                            day_count = ql.Actual365Fixed()  # Standard day count for spreads
-                            compounding = ql.Semiannual     # Match bond convention
-                            frequency = ql.Semiannual      # Match bond convention
+                        if plan.needs('spread'):
+                            # Calculate spread in basis points
+                            bond_yield_pct = bond_yield_decimal * 100  # Convert to percentage
+                            g_spread = (bond_yield_pct - treasury_yield_pct) * 100  # Convert to basis points
                             
-                            # Extract YieldTermStructure from handle
-                            curve_ts = treasury_curve.currentLink()
-                            
-                            z_spread_value = ql.BondFunctions.zSpread(
-                                bond,                        # QuantLib bond object
-                                price,                       # Clean price (Real)
-                                curve_ts,                    # YieldTermStructure (not handle)
-                                day_count,                   # Day count convention
-                                compounding,                 # Compounding frequency  
-                                frequency,                   # Payment frequency
-                                settlement_date              # Settlement date
-                            )
-                            
-                            z_spread = z_spread_value * 10000  # Convert to basis points
-                            logger.info(f"{log_prefix} 🎯 REAL Z-SPREAD: {z_spread:.2f} bps (QuantLib institutional calculation)")
-                        else:
-                            logger.warning(f"{log_prefix} ❌ Could not build treasury curve for z-spread")
-                            z_spread = None
-                    except Exception as z_error:
-                        logger.error(f"{log_prefix} ❌ Z-spread calculation failed: {z_error}")
-                        z_spread = None
-                    
-                    
-                    if is_treasury:
-                        logger.info(f"{log_prefix} 💰 TREASURY SPREAD: Bond {bond_yield_pct:.3f}% - Curve {treasury_yield_pct:.3f}% = {g_spread:.0f} bps")
+                            if is_treasury:
+                                logger.debug("%s 💰 TREASURY SPREAD: Bond %.3f%% - Curve %.3f%% = %.0f bps", log_prefix, bond_yield_pct, treasury_yield_pct, g_spread)
+                            else:
+                                logger.debug("%s 💰 CORPORATE SPREAD: Bond %.3f%% - Treasury %.3f%% = %.0f bps", log_prefix, bond_yield_pct, treasury_yield_pct, g_spread)
+                        
+                        if plan.needs('z_spread'):
+                            # 🚀 REAL Z-SPREAD CALCULATION using QuantLib
+                            logger.debug("%s 🔍 Z-SPREAD: Building treasury curve for real z-spread calculation", log_prefix)
+                            try:
+                                # Warm start from the G-spread: bond yield over the closest Treasury
+                                z_spread_guess = bond_yield_decimal - closest_treasury_yield if bond_yield_decimal is not None else None
+                                z_spread_batch = get_active_z_spread_batch()
+                                with timings.stage('z_spread'):
+                                    if z_spread_batch is None:
+                                        z_spread = _calculate_z_spread(bond, price, trade_date, effective_db_path, settlement_date, z_spread_guess)
+                                    else:
+                                        z_spread_problem = _prepare_z_spread(bond, price, trade_date, effective_db_path, settlement_date, z_spread_guess)
+                                if z_spread is not None:
+                                    logger.debug("%s 🎯 REAL Z-SPREAD: %.2f bps (shared solver)", log_prefix, z_spread)
+                                elif z_spread_problem is not None:
+                                    logger.debug("%s 🎯 Z-SPREAD deferred to portfolio solve", log_prefix)
+                                else:
+                                    logger.warning(f"{log_prefix} ❌ Could not build treasury curve for z-spread")
+                            except Exception as z_error:
+                                logger.error(f"{log_prefix} ❌ Z-spread calculation failed: {z_error}")
+                                z_spread = None
                     else:
-                        logger.info(f"{log_prefix} 💰 CORPORATE SPREAD: Bond {bond_yield_pct:.3f}% - Treasury {treasury_yield_pct:.3f}% = {g_spread:.0f} bps")
+                        logger.warning(f"{log_prefix} No matching treasury yield for {years_to_maturity:.1f}Y maturity")
+                        logger.debug("%s Available tenors: %s", log_prefix, list(treasury_yields.keys()) if treasury_yields else 'None')
                 else:
-                    logger.warning(f"{log_prefix} No matching treasury yield for {years_to_maturity:.1f}Y maturity")
-                    logger.info(f"{log_prefix} Available tenors: {list(treasury_yields.keys()) if treasury_yields else 'None'}")
-            else:
-                logger.warning(f"{log_prefix} ⚠️ No treasury yields available for {trade_date}")
-                logger.info(f"{log_prefix} DB Path checked: {effective_db_path}")
-        except Exception as spread_error:
-            logger.error(f"{log_prefix} ❌ SPREAD CALCULATION ERROR: {spread_error}", exc_info=True)
-            logger.error(f"{log_prefix} DB Path: {effective_db_path}")
-            logger.error(f"{log_prefix} Trade Date: {trade_date}")
+                    logger.warning(f"{log_prefix} ⚠️ No treasury yields available for {trade_date}")
+                    logger.debug("%s DB Path checked: %s", log_prefix, effective_db_path)
+            except Exception as spread_error:
+                logger.error(f"{log_prefix} ❌ SPREAD CALCULATION ERROR: {spread_error}", exc_info=True)
+                logger.error(f"{log_prefix} DB Path: {effective_db_path}")
+                logger.error(f"{log_prefix} Trade Date: {trade_date}")
         
         settlement_date_str = f"{settlement_date.year()}-{settlement_date.month():02d}-{settlement_date.dayOfMonth():02d}"
-        return {
+        result = {
             'isin': isin,
-            'ytm': bond_yield_decimal * 100,  # ✅ CORRECTED: YTM in percentage format
+            'ytm': bond_yield_decimal * 100 if bond_yield_decimal is not None else None,  # ✅ CORRECTED: YTM in percentage format
             'duration': duration,         # ✅ FIXED: Duration in years (no artificial scaling)
             'convexity': convexity,       # ✅ FIXED: Convexity (no artificial scaling)
             'accrued_interest': accrued_interest,  # 🚀 FIXED: Now includes accrued interest!
             'accrued_per_million': accrued_per_million,  # 💰 NEW: Accrued interest per $1M (Bloomberg format)
             'clean_price': price,         # 🚀 ADDED: Clean price from input
-            'dirty_price': price + accrued_interest,  # 🚀 ADDED: Dirty price calculation
+            'dirty_price': price + accrued_interest if accrued_interest is not None else None,  # 🚀 ADDED: Dirty price calculation
             'pvbp': pvbp,                 # 🚀 NEW: Price Value of a Basis Point
             'spread': g_spread,           # 🚀 FIXED: Changed from 'g_spread' to 'spread' for API compatibility!
             'z_spread': z_spread,         # 🚀 FIXED: Estimated Z-spread
             'conventions': conventions,
             'settlement_date_str': settlement_date_str,
+            'instrument_cached': instrument_cached,
+            'stage_timings_ms': timings.as_dict(),
+            'stages_skipped': plan.skipped_stages(),
             'successful': True
         }
+        if z_spread_problem is not None:
+            # Filled in when the enclosing batched_z_spreads() block exits
+            z_spread_batch.defer(z_spread_problem, result)
         
         # 🔍 DEBUG: Log final spread values after return dict created
-        logger.info(f"{log_prefix} 🔍 RETURN DEBUG: Returned g_spread={g_spread}, z_spread={z_spread}")
+        logger.debug("%s 🔍 RETURN DEBUG: Returned g_spread=%s, z_spread=%s", log_prefix, g_spread, z_spread)
+        return result
     except Exception as e:
         logger.error(f"{log_prefix} Calculation failed: {e}", exc_info=True)
         return {'isin': isin, 'successful': False, 'error': str(e)}
 
-def process_bond_portfolio(portfolio_data, db_path, validated_db_path, bloomberg_db_path, settlement_days=0, settlement_date=None):
-    logger.debug(f"[NameError DEBUG] process_bond_portfolio received portfolio_data: {portfolio_data}")
+def resolve_engine_conventions(isin, default_conventions, is_treasury, validated_db_path):
+    """Conventions the engine prices with: defaults, then validated DB values, then the Treasury override."""
+    conventions = default_conventions.copy()
+    db_conventions = get_conventions_from_db(isin, validated_db_path)
+    if db_conventions:
+        conventions.update(db_conventions)
+    if is_treasury:
+        conventions.update(TREASURY_CONVENTIONS)
+    return conventions
+
+def _prepare_z_spread(bond, price, trade_date, db_path, settlement_date, guess=None):
+    """Bond flows discounted off the cached Treasury curve, or None without a curve."""
+    # Build proper treasury curve from our treasury data (bootstrapped once per date)
+    _, treasury_curve = get_cached_treasury_curve(trade_date, db_path)
+    if not treasury_curve:
+        return None
+    return get_z_spread_solver().prepare(bond, price, treasury_curve, settlement_date, guess)
+
+def _calculate_z_spread(bond, price, trade_date, db_path, settlement_date, guess=None):
+    """Z-spread (bps) of bond over the bootstrapped Treasury curve, or None without a curve."""
+    problem = _prepare_z_spread(bond, price, trade_date, db_path, settlement_date, guess)
+    if problem is None:
+        return None
+    z_spread_value = get_z_spread_solver().solve(problem)
+    return z_spread_value * 10000 if z_spread_value is not None else None  # Convert to basis points
+
+def _build_fixed_rate_bond(log_prefix, coupon, coupon_decimal, ql_maturity, frequency, bus_day_conv_str, day_count_str, schedule_start, calendar, settlement_days):
+    """Build the (schedule, FixedRateBond, day counter) the engine prices against."""
+    # Map string to QuantLib convention
+    if bus_day_conv_str == 'Unadjusted':
+        business_convention = ql.Unadjusted
+    elif bus_day_conv_str == 'Following':
+        business_convention = ql.Following
+    elif bus_day_conv_str == 'ModifiedFollowing':
+        business_convention = ql.ModifiedFollowing
+    elif bus_day_conv_str == 'Preceding':
+        business_convention = ql.Preceding
+    else:
+        business_convention = ql.Following  # Default
+        
+    logger.debug("%s Using business day convention: %s", log_prefix, bus_day_conv_str)
+    
+    # Create schedule from calculated start to maturity
+    schedule = ql.Schedule(
+        schedule_start,
+        ql_maturity,
+        ql.Period(frequency),
+        calendar,
+        business_convention,
+        business_convention,
+        ql.DateGeneration.Backward,
+        SCHEDULE_END_OF_MONTH
+    )
+    
+    logger.debug("%s Schedule created from %s to %s", log_prefix, schedule_start, ql_maturity)
+
+    # Enhanced mapping to handle both internal names and database names
+    day_count_map = {
+        # Preferred QuantLib-style names
+        'ActualActual.Bond': ql.ActualActual(ql.ActualActual.Bond),
+        'ActualActual.ISMA': ql.ActualActual(ql.ActualActual.ISMA),
+        'ActualActual.ISDA': ql.ActualActual(ql.ActualActual.ISDA),
+        'Thirty360.BondBasis': ql.Thirty360(ql.Thirty360.BondBasis),
+        'Actual360': ql.Actual360(),
+        'Actual365Fixed': ql.Actual365Fixed(),
+        
+        # Legacy/compatibility names
+        'ActualActual_Bond': ql.ActualActual(ql.ActualActual.Bond),
+        'Actual/Actual (ISMA)': ql.ActualActual(ql.ActualActual.Bond),  # Map ISMA to Bond for clarity
+        '30/360': ql.Thirty360(ql.Thirty360.BondBasis),
+        'Thirty360': ql.Thirty360(ql.Thirty360.BondBasis),
+        'ACT/360': ql.Actual360(),
+        'ACT/365': ql.Actual365Fixed(),
+    }
+    
+    if day_count_str in day_count_map:
+        day_counter = day_count_map[day_count_str]
+    else:
+        logger.warning(f"Unknown day count convention '{day_count_str}', defaulting to ActualActual.ISDA")
+        day_counter = ql.ActualActual(ql.ActualActual.ISDA)
+    
+    logger.debug("%s Using day count convention: %s -> %s", log_prefix, day_count_str, day_counter)
+    
+    logger.debug("%s Creating FixedRateBond... SettlementDays: %s, Coupon: %s%% -> %s (decimal)", log_prefix, settlement_days, coupon, coupon_decimal)
+    bond = ql.FixedRateBond(settlement_days, 100.0, schedule, [coupon_decimal], day_counter)
+    logger.debug("%s FixedRateBond created successfully.", log_prefix)
+    return schedule, bond, day_counter
+
+def process_bond_portfolio(portfolio_data, db_path, validated_db_path, bloomberg_db_path, settlement_days=0, settlement_date=None, max_workers=None, chunk_size=None, instrument_cache=None, resolution_cache=None, metric_plan=None, engine=None):
+    """
+    Calculate every line of a portfolio for one settlement date.
+
+    engine selects 'quantlib' (per-bond FixedRateBond, serial or process pool)
+    or 'vectorized' (every plain bullet in one bullet_bond_kernel pass, the
+    rest through the QuantLib path); default from PORTFOLIO_ENGINE.
+    """
+    request_start = time.perf_counter()
     try:
         bond_data_list = portfolio_data.get('data', [])
-        logger.debug(f"[NameError DEBUG] Extracted bond_data_list (len={len(bond_data_list)}): {bond_data_list}")
+        logger.debug("[NameError DEBUG] Extracted bond_data_list (len=%s)", len(bond_data_list))
     except NameError as ne:
         logger.error(f"[NameError DEBUG] CAUGHT NameError right at the start! The 'portfolio_data' variable is not defined in this scope. Error: {ne}", exc_info=True)
         return [{'error': 'NameError: portfolio_data not defined in scope', 'details': str(ne)}]
 
-    abs_path = os.path.abspath(bloomberg_db_path)
-    logger.info(f"[PATH_DEBUG] process_bond_portfolio received bloomberg_db_path: {abs_path}")
-    logger.info(f"[PATH_DEBUG] Checking existence of DB file at {abs_path}: {os.path.exists(abs_path)}")
-    
-    # 🔧 FIX: Log database paths for spread calculation debugging
-    logger.info(f"📁 SPREAD DEBUG: Using databases:")
-    logger.info(f"   Primary DB: {db_path} (exists: {os.path.exists(db_path)})")
-    logger.info(f"   Validated DB: {validated_db_path} (exists: {os.path.exists(validated_db_path)})")
-    logger.info(f"   Current directory: {os.getcwd()}")
+    if logger.isEnabledFor(logging.DEBUG):
+        abs_path = os.path.abspath(bloomberg_db_path)
+        logger.debug("[PATH_DEBUG] process_bond_portfolio received bloomberg_db_path: %s", abs_path)
+        logger.debug("[PATH_DEBUG] Checking existence of DB file at %s: %s", abs_path, os.path.exists(abs_path))
+        
+        # 🔧 FIX: Log database paths for spread calculation debugging
+        logger.debug("📁 SPREAD DEBUG: Using databases:")
+        logger.debug("   Primary DB: %s (exists: %s)", db_path, os.path.exists(db_path))
+        logger.debug("   Validated DB: %s (exists: %s)", validated_db_path, os.path.exists(validated_db_path))
+        logger.debug("   Current directory: %s", os.getcwd())
     results = []
     # ✅ FIXED: Use settlement date instead of database trade date
     if settlement_date is None:
-        today = datetime.now()
-        first_day_current_month = today.replace(day=1)
-        last_day_previous_month = first_day_current_month - timedelta(days=1)
-        settlement_date_str = last_day_previous_month.strftime("%Y-%m-%d")
-        logger.info(f"📅 Using default settlement date (prior month end): {settlement_date_str}")
+        settlement_date_str = default_settlement_date_str()
+        logger.debug("📅 Using default settlement date (prior month end): %s", settlement_date_str)
     else:
         settlement_date_str = settlement_date
-        logger.info(f"📅 Using provided settlement date: {settlement_date_str}")
+        logger.debug("📅 Using provided settlement date: %s", settlement_date_str)
     
     # Convert to date object to prevent type mismatches with other date objects
     # FIXED: This is actually the settlement date, not trade date
     settlement_date_obj = datetime.strptime(settlement_date_str, '%Y-%m-%d').date()
-    treasury_yields = fetch_treasury_yields(settlement_date_str, db_path)
+    if (metric_plan or FULL_PLAN).needs('treasury_fetch'):
+        # Warm the shared per-date yields once before the per-bond loop
+        get_cached_treasury_yields(settlement_date_str, db_path)
+
+    if (engine or PORTFOLIO_ENGINE) == 'vectorized':
+        results = _process_portfolio_vectorized(
+            bond_data_list, db_path, validated_db_path, bloomberg_db_path, settlement_date_obj,
+            settlement_days, instrument_cache=instrument_cache, resolution_cache=resolution_cache,
+            metric_plan=metric_plan
+        )
+        _log_portfolio_summary(results, settlement_date_str, request_start, 'vectorized', instrument_cache)
+        return results
+
+    # Batch callers pass caches through to share parsing and instruments (serial mode only)
+    if instrument_cache is None and resolution_cache is None and should_use_process_pool(len(bond_data_list), max_workers):
+        # 🚀 Parallel mode: each worker process owns its own QuantLib evaluation date
+        results = process_portfolio_in_pool(
+            bond_data_list, db_path, validated_db_path, bloomberg_db_path,
+            settlement_days=settlement_days,
+            settlement_date_str=settlement_date_str,
+            max_workers=max_workers,
+            chunk_size=chunk_size,
+            metric_plan=metric_plan
+        )
+        _log_portfolio_summary(results, settlement_date_str, request_start, 'process_pool', instrument_cache)
+        return results
+
     treasury_handle = ql.YieldTermStructureHandle(ql.FlatForward(ql.Date(settlement_date_obj.day, settlement_date_obj.month, settlement_date_obj.year), 0.03, ql.Actual365Fixed()))
     # Initialize the WORKING Treasury detector with proper ISIN pattern matching
     detector = WorkingTreasuryDetector(db_path, validated_db_path)
     # CRITICAL FIX: The parser's primary db_path for yields MUST be the bloomberg_db_path.
-    parser = SmartBondParser(bloomberg_db_path, validated_db_path, bloomberg_db_path)
+    parser = get_smart_bond_parser(bloomberg_db_path, validated_db_path, bloomberg_db_path)
 
-    for bond_data in bond_data_list:
-        # FIELD MAPPING FIX: Handle both 'description' and 'BOND_CD' field names  
-        description = bond_data.get('description') or bond_data.get('BOND_CD')
-        
-        # 🔧 FIX: Handle numeric inputs from Google Sheets
-        if isinstance(description, (int, float)):
-            description = str(description)
-        
-        # Check if bond data came from database lookup (ISIN route)
-        if bond_data.get('from_database'):
-            logger.info(f"🗄️ Using bond data from database lookup, skipping parsing")
-            # Create parsed_data from database values
-            # Handle date format conversion from DD/MM/YYYY to YYYY-MM-DD
-            maturity_raw = bond_data.get('maturity', '2030-01-01')
-            if '/' in maturity_raw and len(maturity_raw.split('/')) == 3:
-                # Convert DD/MM/YYYY to YYYY-MM-DD
-                parts = maturity_raw.split('/')
-                maturity_formatted = f"{parts[2]}-{parts[1].zfill(2)}-{parts[0].zfill(2)}"
-            else:
-                maturity_formatted = maturity_raw
-                
-            parsed_data = {
-                'issuer': bond_data.get('issuer', 'UNKNOWN'),
-                'coupon': bond_data.get('coupon', 0.0),
-                'maturity': maturity_formatted,
-                'bond_type': 'treasury' if 'TREASURY' in str(bond_data.get('issuer', '')).upper() else 'corporate',
-                'from_database': True,
-                'day_count': bond_data.get('day_count'),
-                'frequency': bond_data.get('frequency'),
-                'business_convention': bond_data.get('business_convention')
-            }
-            logger.info(f"📅 Converted maturity date: {maturity_raw} → {maturity_formatted}")
-        else:
-            parsed_data = parser.parse_bond_description(description)
-        if not parsed_data:
-            # 🔧 FIX: Enhanced hierarchy fallback when parsing fails
-            logger.warning(f"⚠️ Parsing failed for '{description}', using fallback hierarchy")
-            
-            # Check if it looks like an ISIN
-            is_isin_format = (isinstance(description, str) and 
-                            len(description) >= 10 and 
-                            len(description) <= 12 and
-                            description[:2].isalpha())
-            
-            # Get fallback conventions based on ISIN structure or defaults
-            fallback_conventions = get_isin_fallback_conventions(
-                isin=description if is_isin_format else None,
-                description=description
-            )
-            
-            # Create minimal parsed data for fallback
-            parsed_data = {
-                'issuer': 'UNKNOWN',
-                'coupon': 0.0,  # Zero coupon fallback
-                'maturity': '2030-01-01',  # Default maturity
-                'bond_type': 'corporate',
-                'parsing_failed': True,
-                'used_fallback': True,
-                'fallback_conventions': fallback_conventions
+    # One evaluation-date group for the whole portfolio: the global date is set at most once
+    # Z-spreads for the whole portfolio are solved in one vectorized pass when the loop ends
+    with CalculationContext(settlement_date_obj).evaluation_scope(), batched_z_spreads():
+        for bond_data in bond_data_list:
+            results.append(process_portfolio_bond_safely(
+                bond_data, parser, detector, settlement_date_obj, treasury_handle,
+                settlement_days, db_path, validated_db_path,
+                instrument_cache=instrument_cache, resolution_cache=resolution_cache,
+                metric_plan=metric_plan
+            ))
+    _log_portfolio_summary(results, settlement_date_str, request_start, 'serial', instrument_cache)
+    return results
+
+def default_settlement_date_str():
+    """Prior month end, the settlement date used when a portfolio request gives none."""
+    first_day_current_month = datetime.now().replace(day=1)
+    return (first_day_current_month - timedelta(days=1)).strftime("%Y-%m-%d")
+
+def iter_bond_portfolio(portfolio_data, db_path, validated_db_path, bloomberg_db_path, settlement_days=0, settlement_date=None, max_workers=None, chunk_size=None, metric_plan=None, engine=None, block_size=None):
+    """
+    process_bond_portfolio's results one at a time, in input order.
+
+    Lines are priced in blocks of block_size (default PORTFOLIO_STREAM_BLOCK_SIZE),
+    each through process_bond_portfolio, so a streaming caller holds one block
+    of results and gets the first ones after one block rather than the whole
+    portfolio. Z-spreads are batched and the process pool / vectorized engine
+    used per block.
+    """
+    bond_data_list = portfolio_data.get('data', [])
+    if settlement_date is None:
+        settlement_date = default_settlement_date_str()
+    size = max(1, block_size or PORTFOLIO_STREAM_BLOCK_SIZE)
+    for start in range(0, len(bond_data_list), size):
+        yield from process_bond_portfolio(
+            {'data': bond_data_list[start:start + size]}, db_path, validated_db_path, bloomberg_db_path,
+            settlement_days=settlement_days, settlement_date=settlement_date,
+            max_workers=max_workers, chunk_size=chunk_size, metric_plan=metric_plan, engine=engine
+        )
+
+def _log_portfolio_summary(results, settlement_date_str, request_start, mode, instrument_cache=None):
+    """One structured INFO record per portfolio request, with timings and cache stats."""
+    log_request_summary(
+        'portfolio',
+        bond_count=len(results),
+        successful=sum(1 for r in results if r.get('successful')),
+        settlement_date=settlement_date_str,
+        mode=mode,
+        elapsed_ms=(time.perf_counter() - request_start) * 1000,
+        instrument_cache=(instrument_cache or get_bond_instrument_cache()).stats(),
+        treasury_curve_cache=get_treasury_curve_cache().stats()
+    )
+
+def _process_portfolio_vectorized(bond_data_list, db_path, validated_db_path, bloomberg_db_path, settlement_date_obj, settlement_days, instrument_cache=None, resolution_cache=None, metric_plan=None):
+    """
+    Portfolio path on the NumPy bullet kernel (PORTFOLIO_ENGINE=vectorized).
+
+    Lines are resolved as process_portfolio_bond resolves them, then every bond
+    is priced in one bullet_bond_kernel pass and its spreads taken from the same
+    Treasury yields and curve the engine uses. Lines the kernel can't take
+    (resolution errors, unparseable terms, no yield convergence, no z-spread
+    convergence) go through the QuantLib path, so every result has the engine's shape.
+    """
+    plan = metric_plan or FULL_PLAN
+    detector = WorkingTreasuryDetector(db_path, validated_db_path)
+    parser = get_smart_bond_parser(bloomberg_db_path, validated_db_path, bloomberg_db_path)
+    calc_context = CalculationContext(settlement_date_obj)
+    results = [None] * len(bond_data_list)
+
+    lines = []
+    for index, bond_data in enumerate(bond_data_list):
+        try:
+            description, (parsed_data, isin, default_conventions, is_treasury) = _resolve_portfolio_line(
+                bond_data, parser, detector, validated_db_path, resolution_cache)
+            price = bond_data.get('price') or bond_data.get('CLOSING PRICE') or bond_data.get('closing_price')
+            line = {
+                'index': index,
+                'bond_data': bond_data,
+                'description': description,
+                'isin': isin,
+                'price': price,
+                'clean_price': 100.0 if price is None else float(price),
+                'coupon': float(parsed_data.get('coupon')),
+                'maturity': datetime.strptime(parsed_data.get('maturity'), '%Y-%m-%d').date(),
+                'conventions': resolve_engine_conventions(isin, default_conventions, is_treasury, validated_db_path),
+                'is_treasury': is_treasury
             }
-            
-            logger.info(f"📋 Using fallback: {fallback_conventions}")
+        except Exception as e:
+            logger.debug("Vectorized engine: line %s goes to QuantLib (%s)", index, e)
+            continue
+        if settlement_date_obj < line['maturity'] < bullet_bond_kernel.MAX_MATURITY:
+            lines.append(line)
 
-        isin = bond_data.get('isin') or parsed_data.get('isin')
-        
-        # FIXED: Enhanced lookup hierarchy
-        ticker_conventions = None
-        
-        # IMPORTANT: Do NOT look up ISIN from parsed data
-        # Reg S and 144A bonds can have same description but different ISINs
-        # We should use the parsing route without ISIN lookup to avoid confusion
-        # if not isin and parsed_data and validated_db_path:
-        #     isin = find_isin_from_parsed_data(parsed_data, validated_db_path)
-        #     if isin:
-        #         logger.info(f"📋 Found ISIN {isin} via validated DB lookup for {description}")
-        
-        # Step 2: If still no ISIN, try ticker lookup for conventions
-        # Store ticker conventions to apply after default_conventions is defined
-        if not isin and description:
-            ticker = get_ticker_from_description(description)
-            if ticker:
-                # Try validated DB first for ticker conventions
-                ticker_conventions = get_validated_conventions_by_ticker(ticker, validated_db_path)
-                if ticker_conventions:
-                    logger.info(f"📋 Found validated ticker conventions for {ticker}")
-        
-        # Use the WORKING Treasury detector that has ISIN pattern matching
-        is_treasury, detection_method = detector.is_treasury_bond(isin, description)
-        logger.info(f"🏛️ Treasury detection: {is_treasury} via {detection_method} for ISIN {isin}")
-        
-        # Set default conventions (can be overridden by specific bond info)
-        # 🔧 FIX: Use conventions from database if available
-        if parsed_data.get('from_database'):
-            # Use conventions from database lookup
-            default_conventions = {
-                'frequency': parsed_data.get('frequency', 'Semiannual'),
-                'day_count': parsed_data.get('day_count', '30/360'),
-                'business_day_convention': parsed_data.get('business_convention', 'Following'),
-                'end_of_month': False
+    timings = StageTimings()
+    kernel = None
+    if lines:
+        try:
+            with timings.stage('kernel'):
+                kernel = bullet_bond_kernel.price_bullet_portfolio(
+                    [line['coupon'] for line in lines],
+                    [line['maturity'] for line in lines],
+                    [line['clean_price'] for line in lines],
+                    [bullet_bond_kernel.frequency_months(line['conventions'].get('frequency')) for line in lines],
+                    [bullet_bond_kernel.day_count_code(line['conventions'].get('day_count', '30/360')) for line in lines],
+                    [bullet_bond_kernel.business_convention_code(
+                        line['conventions'].get('fixed_business_convention')
+                        or line['conventions'].get('business_day_convention', 'Following')) for line in lines],
+                    settlement_date_obj, settlement_days
+                )
+        except Exception as e:
+            logger.warning(f"⚠️ Vectorized engine failed for {len(lines)} bonds, using QuantLib: {e}")
+    if kernel is not None:
+        layout = kernel['layout']
+        settlement = date.fromordinal(int(layout.settlement))
+        settlement_date_str = settlement.strftime('%Y-%m-%d')
+
+        treasury_yields = None
+        if plan.needs('treasury_fetch'):
+            with timings.stage('treasury_fetch'):
+                treasury_yields = get_cached_treasury_yields(settlement_date_obj.strftime('%Y-%m-%d'), db_path or './bonds_data.db')
+
+        z_spread_rows = []
+        for row, line in enumerate(lines):
+            if not kernel['converged'][row]:
+                continue
+            ytm = float(kernel['ytm'][row])
+            duration = float(kernel['duration'][row]) if plan.needs('duration') else None
+            accrued = float(kernel['accrued_interest'][row]) if plan.needs('accrued') else None
+            g_spread = None
+            if treasury_yields:
+                closest_treasury_yield = get_closest_treasury_yield(
+                    treasury_yields, (line['maturity'] - settlement_date_obj).days / 365.25)
+                if closest_treasury_yield:
+                    if plan.needs('spread'):
+                        g_spread = (ytm - closest_treasury_yield) * 10000
+                    if plan.needs('z_spread'):
+                        z_spread_rows.append((row, ytm - closest_treasury_yield))
+            result = {
+                'isin': line['isin'],
+                'ytm': ytm * 100 if plan.needs('yield') else None,
+                'duration': duration,
+                'convexity': float(kernel['convexity'][row]) if plan.needs('convexity') else None,
+                'accrued_interest': accrued,
+                'accrued_per_million': accrued * 10000 if accrued is not None else None,
+                'clean_price': line['clean_price'],
+                'dirty_price': line['clean_price'] + accrued if accrued is not None else None,
+                'pvbp': float(kernel['pvbp'][row]) if duration is not None else None,
+                'spread': g_spread,
+                'z_spread': None,
+                'conventions': line['conventions'],
+                'settlement_date_str': settlement_date_str,
+                'instrument_cached': None,      # no QuantLib instrument is built on this path
+                'stage_timings_ms': None,       # filled in below, once the portfolio stages are done
+                'stages_skipped': plan.skipped_stages(),
+                'successful': True,
+                'description': line['description'],
+                'input_price': line['price'],
+                'weighting': line['bond_data'].get('weighting') or line['bond_data'].get('WEIGHTING')
             }
-            logger.info(f"📋 Using conventions from database: {default_conventions}")
-        elif parsed_data.get('used_fallback'):
-            default_conventions = parsed_data.get('fallback_conventions', {
-                'frequency': 'Semiannual',
-                'day_count': '30/360',
-                'business_convention': 'Following',
-                'end_of_month': False
-            })
-            # Map field names
-            default_conventions['frequency'] = default_conventions.get('frequency', 'Semiannual')
-            default_conventions['business_day_convention'] = default_conventions.get('business_convention', 'Following')
+            if line['bond_data'].get('isin'):
+                result['isin'] = line['bond_data'].get('isin')
+            results[line['index']] = result
+
+        if z_spread_rows:
+            with timings.stage('z_spread'):
+                _vectorized_z_spreads(kernel, lines, z_spread_rows, results, calc_context, db_path or './bonds_data.db')
+
+        # Stages run once for the whole portfolio: each line reports its prorated share
+        per_line = {stage: round(ms / len(lines), 3) for stage, ms in timings.as_dict().items()}
+        for line in lines:
+            if results[line['index']] is not None:
+                results[line['index']]['stage_timings_ms'] = dict(per_line)
+
+    fallback = [index for index, result in enumerate(results) if result is None]
+    if fallback:
+        logger.debug("Vectorized engine: %s of %s lines through QuantLib", len(fallback), len(bond_data_list))
+        treasury_handle = ql.YieldTermStructureHandle(ql.FlatForward(calc_context.ql_settlement_date, 0.03, ql.Actual365Fixed()))
+        with calc_context.evaluation_scope(), batched_z_spreads():
+            for index in fallback:
+                results[index] = process_portfolio_bond_safely(
+                    bond_data_list[index], parser, detector, settlement_date_obj, treasury_handle,
+                    settlement_days, db_path, validated_db_path,
+                    instrument_cache=instrument_cache, resolution_cache=resolution_cache,
+                    metric_plan=metric_plan
+                )
+    logger.debug("Vectorized engine: %s bonds in kernel, stages %s", len(lines), timings.as_dict())
+    return results
+
+def _vectorized_z_spreads(kernel, lines, z_spread_rows, results, calc_context, db_path):
+    """
+    Z-spreads for kernel rows off the cached Treasury curve, in one solve.
+
+    Rows whose spread doesn't converge are cleared from results so the
+    QuantLib path (with its zSpread fallback) prices them instead.
+    """
+    layout = kernel['layout']
+    if layout.settlement != layout.bond_settlement:
+        # Holiday settlement: the engine discounts from the unadjusted date; leave these to QuantLib
+        for row, _ in z_spread_rows:
+            results[lines[row]['index']] = None
+        return
+    with calc_context.evaluation_scope():
+        _, treasury_curve = get_cached_treasury_curve(calc_context.settlement_date, db_path)
+        if not treasury_curve:
+            return
+        solver = get_z_spread_solver()
+        discounts = solver.curve_discounts(treasury_curve)
+        settlement = calc_context.ql_settlement_date
+        problems = []
+        for row, guess in z_spread_rows:
+            count = int(layout.flow_counts[row])
+            dates = [ql.Date(int(ordinal) - QL_SERIAL_OFFSET) for ordinal in layout.payment_dates[row, :count]]
+            times, factors = discounts.lookup(dates + [settlement])
+            problems.append(SpreadProblem(
+                taus=times[:-1] - times[-1],
+                weights=layout.amounts[row, :count] * factors[:-1] / factors[-1],
+                target=lines[row]['clean_price'] + float(layout.accrued[row]),
+                guess=guess
+            ))
+        spreads = solver.solve_many(problems)
+    for (row, _), spread in zip(z_spread_rows, spreads):
+        index = lines[row]['index']
+        if spread is None:
+            results[index] = None
         else:
-            default_conventions = {
-                'frequency': 'Semiannual',
-                'day_count': '30/360',
-                'business_day_convention': 'Following',
-                'end_of_month': False
-            }
+            results[index]['z_spread'] = spread * 10000
+
+def process_portfolio_bond_safely(bond_data, parser, detector, settlement_date_obj, treasury_handle, settlement_days, db_path, validated_db_path, instrument_cache=None, resolution_cache=None, metric_plan=None):
+    """Process one portfolio line, turning any exception into a per-bond error result."""
+    try:
+        return process_portfolio_bond(
+            bond_data, parser, detector, settlement_date_obj, treasury_handle,
+            settlement_days, db_path, validated_db_path,
+            instrument_cache=instrument_cache, resolution_cache=resolution_cache,
+            metric_plan=metric_plan
+        )
+    except Exception as e:
+        description = bond_data.get('description') or bond_data.get('BOND_CD')
+        logger.error(f"❌ Portfolio bond failed ({description}): {e}", exc_info=True)
+        return {
+            'isin': bond_data.get('isin'),
+            'description': description,
+            'input_price': bond_data.get('price') or bond_data.get('CLOSING PRICE') or bond_data.get('closing_price'),
+            'weighting': bond_data.get('weighting') or bond_data.get('WEIGHTING'),
+            'successful': False,
+            'error': str(e)
+        }
+
+def process_portfolio_bond(bond_data, parser, detector, settlement_date_obj, treasury_handle, settlement_days, db_path, validated_db_path, instrument_cache=None, resolution_cache=None, metric_plan=None):
+    """
+    Parse, resolve conventions for and calculate a single portfolio line.
+
+    Shared by the serial loop in process_bond_portfolio and the process-pool
+    workers in parallel_portfolio_engine. A resolution_cache dict lets batch
+    callers parse and resolve each distinct bond once.
+    """
+    description, resolution = _resolve_portfolio_line(bond_data, parser, detector, validated_db_path, resolution_cache)
+    parsed_data, isin, default_conventions, is_treasury = resolution
+    
+    # Get price from various possible field names
+    price = bond_data.get('price') or bond_data.get('CLOSING PRICE') or bond_data.get('closing_price')
+    weighting = bond_data.get('weighting') or bond_data.get('WEIGHTING')
+
+    # Call the shared calculation engine, passing the is_treasury flag
+    metrics = calculate_bond_metrics_with_conventions_using_shared_engine(
+        isin=isin,
+        coupon=parsed_data.get('coupon'),
+        maturity_date=datetime.strptime(parsed_data.get('maturity'), '%Y-%m-%d'),
+        price=price,
+        trade_date=settlement_date_obj,  # FIXED: Pass settlement date (was incorrectly named trade_date)
+        treasury_handle=treasury_handle,
+        default_conventions=default_conventions,
+        is_treasury=is_treasury, # Pass the flag here
+        settlement_days=settlement_days,
+        validated_db_path=validated_db_path,
+        description=description,  # Add description parameter
+        db_path=db_path,  # Pass db_path for spread calculation
+        use_settlement_date_directly=True,  # FIXED: Tell function to use settlement date as-is
+        instrument_cache=instrument_cache,
+        metric_plan=metric_plan
+    )
+    
+    # ✅ FIXED: Add input fields to metrics for proper response formatting
+    metrics['description'] = description
+    metrics['input_price'] = price
+    metrics['weighting'] = weighting
+    if bond_data.get('isin'):
+        metrics['isin'] = bond_data.get('isin')
+    
+    return metrics
+
+def _resolve_portfolio_line(bond_data, parser, detector, validated_db_path, resolution_cache=None):
+    """
+    Description and (parsed_data, isin, default_conventions, is_treasury) of a portfolio line.
+
+    A resolution_cache dict lets batch callers parse and resolve each distinct bond once.
+    """
+    # FIELD MAPPING FIX: Handle both 'description' and 'BOND_CD' field names  
+    description = bond_data.get('description') or bond_data.get('BOND_CD')
+    
+    # 🔧 FIX: Handle numeric inputs from Google Sheets
+    if isinstance(description, (int, float)):
+        description = str(description)
+    
+    resolution_key = (
+        description, bond_data.get('isin'), bool(bond_data.get('from_database')),
+        bond_data.get('issuer'), bond_data.get('coupon'), bond_data.get('maturity'),
+        bond_data.get('day_count'), bond_data.get('frequency'), bond_data.get('business_convention')
+    )
+    resolution = resolution_cache.get(resolution_key) if resolution_cache is not None else None
+    if resolution is None:
+        resolution = resolve_portfolio_bond(bond_data, description, parser, detector, validated_db_path)
+        if resolution_cache is not None:
+            resolution_cache[resolution_key] = resolution
+    return description, resolution
+
+def resolve_portfolio_bond(bond_data, description, parser, detector, validated_db_path):
+    """
+    Parse a portfolio line and resolve its ISIN, conventions and Treasury flag.
+
+    Returns:
+        Tuple of (parsed_data, isin, default_conventions, is_treasury)
+    """
+    # Check if bond data came from database lookup (ISIN route)
+    if bond_data.get('from_database'):
+        logger.debug("🗄️ Using bond data from database lookup, skipping parsing")
+        # Create parsed_data from database values
+        # Handle date format conversion from DD/MM/YYYY to YYYY-MM-DD
+        maturity_raw = bond_data.get('maturity', '2030-01-01')
+        if '/' in maturity_raw and len(maturity_raw.split('/')) == 3:
+            # Convert DD/MM/YYYY to YYYY-MM-DD
+            parts = maturity_raw.split('/')
+            maturity_formatted = f"{parts[2]}-{parts[1].zfill(2)}-{parts[0].zfill(2)}"
+        else:
+            maturity_formatted = maturity_raw
+            
+        parsed_data = {
+            'issuer': bond_data.get('issuer', 'UNKNOWN'),
+            'coupon': bond_data.get('coupon', 0.0),
+            'maturity': maturity_formatted,
+            'bond_type': 'treasury' if 'TREASURY' in str(bond_data.get('issuer', '')).upper() else 'corporate',
+            'from_database': True,
+            'day_count': bond_data.get('day_count'),
+            'frequency': bond_data.get('frequency'),
+            'business_convention': bond_data.get('business_convention')
+        }
+        logger.debug("📅 Converted maturity date: %s → %s", maturity_raw, maturity_formatted)
+    else:
+        parsed_data = parser.parse_bond_description(description)
+    if not parsed_data:
+        # 🔧 FIX: Enhanced hierarchy fallback when parsing fails
+        logger.warning(f"⚠️ Parsing failed for '{description}', using fallback hierarchy")
         
-        # Apply ticker conventions if found and no ISIN was available
-        if ticker_conventions and not isin:
-            logger.info(f"📋 Applying ticker conventions as no ISIN was found")
-            if 'business_convention' in ticker_conventions:
-                default_conventions['fixed_business_convention'] = ticker_conventions['business_convention']
-                default_conventions['business_day_convention'] = ticker_conventions['business_convention']
-            if 'day_count' in ticker_conventions:
-                default_conventions['day_count'] = ticker_conventions['day_count']
-            if 'frequency' in ticker_conventions:
-                default_conventions['frequency'] = ticker_conventions['frequency']
+        # Check if it looks like an ISIN
+        is_isin_format = (isinstance(description, str) and 
+                        len(description) >= 10 and 
+                        len(description) <= 12 and
+                        description[:2].isalpha())
         
-        # Get price from various possible field names
-        price = bond_data.get('price') or bond_data.get('CLOSING PRICE') or bond_data.get('closing_price')
-        weighting = bond_data.get('weighting') or bond_data.get('WEIGHTING')
-
-        # Call the shared calculation engine, passing the is_treasury flag
-        metrics = calculate_bond_metrics_with_conventions_using_shared_engine(
-            isin=isin,
-            coupon=parsed_data.get('coupon'),
-            maturity_date=datetime.strptime(parsed_data.get('maturity'), '%Y-%m-%d'),
-            price=price,
-            trade_date=settlement_date_obj,  # FIXED: Pass settlement date (was incorrectly named trade_date)
-            treasury_handle=treasury_handle,
-            default_conventions=default_conventions,
-            is_treasury=is_treasury, # Pass the flag here
-            settlement_days=settlement_days,
-            validated_db_path=validated_db_path,
-            description=description,  # Add description parameter
-            db_path=db_path,  # Pass db_path for spread calculation
-            use_settlement_date_directly=True  # FIXED: Tell function to use settlement date as-is
+        # Get fallback conventions based on ISIN structure or defaults (loaded on first fallback)
+        from isin_fallback_handler import get_isin_fallback_conventions
+        fallback_conventions = get_isin_fallback_conventions(
+            isin=description if is_isin_format else None,
+            description=description
         )
         
-        # ✅ FIXED: Add input fields to metrics for proper response formatting
-        metrics['description'] = description
-        metrics['input_price'] = price
-        metrics['weighting'] = weighting
-        if bond_data.get('isin'):
-            metrics['isin'] = bond_data.get('isin')
+        # Create minimal parsed data for fallback
+        parsed_data = {
+            'issuer': 'UNKNOWN',
+            'coupon': 0.0,  # Zero coupon fallback
+            'maturity': '2030-01-01',  # Default maturity
+            'bond_type': 'corporate',
+            'parsing_failed': True,
+            'used_fallback': True,
+            'fallback_conventions': fallback_conventions
+        }
         
-        results.append(metrics)
-    return results
+        logger.debug("📋 Using fallback: %s", fallback_conventions)
+
+    isin = bond_data.get('isin') or parsed_data.get('isin')
+    
+    # FIXED: Enhanced lookup hierarchy
+    ticker_conventions = None
+    
+    # IMPORTANT: Do NOT look up ISIN from parsed data
+    # Reg S and 144A bonds can have same description but different ISINs
+    # We should use the parsing route without ISIN lookup to avoid confusion
+    # if not isin and parsed_data and validated_db_path:
+    #     isin = find_isin_from_parsed_data(parsed_data, validated_db_path)
+    #     if isin:
+    #         logger.info(f"📋 Found ISIN {isin} via validated DB lookup for {description}")
+    
+    # Step 2: If still no ISIN, try ticker lookup for conventions
+    # Store ticker conventions to apply after default_conventions is defined
+    if not isin and description:
+        ticker = get_ticker_from_description(description)
+        if ticker:
+            # Try validated DB first for ticker conventions
+            ticker_conventions = get_validated_conventions_by_ticker(ticker, validated_db_path)
+            if ticker_conventions:
+                logger.debug("📋 Found validated ticker conventions for %s", ticker)
+    
+    # Use the WORKING Treasury detector that has ISIN pattern matching
+    is_treasury, detection_method = detector.is_treasury_bond(isin, description)
+    logger.debug("🏛️ Treasury detection: %s via %s for ISIN %s", is_treasury, detection_method, isin)
+    
+    # Set default conventions (can be overridden by specific bond info)
+    # 🔧 FIX: Use conventions from database if available
+    if parsed_data.get('from_database'):
+        # Use conventions from database lookup
+        default_conventions = {
+            'frequency': parsed_data.get('frequency', 'Semiannual'),
+            'day_count': parsed_data.get('day_count', '30/360'),
+            'business_day_convention': parsed_data.get('business_convention', 'Following'),
+            'end_of_month': False
+        }
+        logger.debug("📋 Using conventions from database: %s", default_conventions)
+    elif parsed_data.get('used_fallback'):
+        default_conventions = parsed_data.get('fallback_conventions', {
+            'frequency': 'Semiannual',
+            'day_count': '30/360',
+            'business_convention': 'Following',
+            'end_of_month': False
+        })
+        # Map field names
+        default_conventions['frequency'] = default_conventions.get('frequency', 'Semiannual')
+        default_conventions['business_day_convention'] = default_conventions.get('business_convention', 'Following')
+    else:
+        default_conventions = {
+            'frequency': 'Semiannual',
+            'day_count': '30/360',
+            'business_day_convention': 'Following',
+            'end_of_month': False
+        }
+    
+    # Apply ticker conventions if found and no ISIN was available
+    if ticker_conventions and not isin:
+        logger.debug("📋 Applying ticker conventions as no ISIN was found")
+        if 'business_convention' in ticker_conventions:
+            default_conventions['fixed_business_convention'] = ticker_conventions['business_convention']
+            default_conventions['business_day_convention'] = ticker_conventions['business_convention']
+        if 'day_count' in ticker_conventions:
+            default_conventions['day_count'] = ticker_conventions['day_count']
+        if 'frequency' in ticker_conventions:
+            default_conventions['frequency'] = ticker_conventions['frequency']
+    
+    return parsed_data, isin, default_conventions, is_treasury
 
 def build_treasury_curve_from_yields(treasury_yields, settlement_date):
     """
@@ -895,7 +1355,7 @@ def build_treasury_curve_from_yields(treasury_yields, settlement_date):
         QuantLib YieldTermStructureHandle for z-spread calculation
     """
     try:
-        logger.info(f"📈 Building treasury curve from {len(treasury_yields)} yields")
+        logger.debug("📈 Building treasury curve from %s yields", len(treasury_yields))
         
         # Convert Python date to QuantLib Date if needed
         if hasattr(settlement_date, 'year') and not hasattr(settlement_date, 'dayOfMonth'):
@@ -905,10 +1365,17 @@ def build_treasury_curve_from_yields(treasury_yields, settlement_date):
             # Already a QuantLib Date
             ql_settlement_date = settlement_date
         
-        # Set evaluation date
-        ql.Settings.instance().evaluationDate = ql_settlement_date
-        logger.info(f"📅 Set evaluation date to: {ql_settlement_date}")
-        
+        # Rate helpers derive pillar dates from the evaluation date - hold it via the
+        # shared gate (re-entrant, so this is free inside the calculation engine)
+        with CalculationContext(ql_settlement_date).evaluation_scope():
+            return _bootstrap_treasury_curve(treasury_yields, ql_settlement_date)
+    except Exception as e:
+        logger.error(f"❌ Treasury curve building failed: {e}")
+        return None
+
+def _bootstrap_treasury_curve(treasury_yields, ql_settlement_date):
+    """Bootstrap the PiecewiseLogCubicDiscount curve (caller holds the evaluation date)."""
+    try:
         # Create calendar and day count
         calendar = ql.UnitedStates(ql.UnitedStates.GovernmentBond)
         day_count = ql.Actual365Fixed()
@@ -992,6 +1459,30 @@ def build_treasury_curve_from_yields(treasury_yields, settlement_date):
         return None
 
 
+def get_cached_treasury_yields(trade_date_str, db_path):
+    """Treasury yields for a settlement date via the process-wide curve cache."""
+    return get_treasury_curve_cache().get_yields(trade_date_str, db_path, fetch_treasury_yields)
+
+def get_cached_treasury_curve(settlement_date, db_path):
+    """
+    Treasury yields and bootstrapped curve for a settlement date via the curve cache.
+
+    Args:
+        settlement_date: Python date object
+        db_path: Database holding the tsys_enhanced table
+
+    Returns:
+        Tuple of (yield dict, YieldTermStructureHandle or None)
+    """
+    return get_treasury_curve_cache().get_curve(
+        settlement_date.strftime('%Y-%m-%d'),
+        db_path,
+        fetch_treasury_yields,
+        build_treasury_curve_from_yields,
+        settlement_date
+    )
+
+
 def create_treasury_curve(yield_dict, trade_date):
     """Create treasury curve from yield dictionary - RESTORED from backup"""
     logger.info("Creating treasury curve")
@@ -19,10 +19,14 @@ UNIVERSAL PARSER INTEGRATION:
 - Maintains all production features
 """
 
-from flask import Flask, request, jsonify, render_template_string
+from startup_pipeline import get_startup_pipeline
+from flask import Flask, Response, request, jsonify, render_template_string, stream_with_context
 import sys
 import os
+import json
+import time
 import logging
+import threading
 
 # Placeholder for enhanced cash flow extension - will be loaded after logger setup
 from datetime import datetime, timedelta
@@ -40,12 +44,27 @@ logger = logging.getLogger(__name__)
 sys.path.append('.')
 
 # Import our bond analytics engine (ENHANCED VERSION for all promised metrics)
-from bond_master_hierarchy_enhanced import calculate_bond_master
+from bond_master_hierarchy_enhanced import calculate_bond_master, iter_bond_master_batch
 # Import portfolio processing function
-from google_analysis10 import process_bond_portfolio
+from google_analysis10 import process_bond_portfolio, iter_bond_portfolio, default_settlement_date_str, get_cached_treasury_curve
 # Import GCS database manager
-from gcs_database_manager import ensure_databases_available
 from smart_input_detector import parse_flexible_request, detect_bond_inputs
+from treasury_curve_cache import get_treasury_curve_cache, invalidate_treasury_curves
+from calculation_context import get_evaluation_date_gate
+from core.database_manager import warm_readonly_pools, readonly_pool_stats
+from bond_reference_index import load_bond_reference_index, get_bond_reference_index
+from treasury_yield_history import get_treasury_yield_history, record_treasury_yields, treasury_yield_history_stats
+from treasury_yield_store import get_treasury_yield_store
+from bond_description_parser import get_parsed_description_cache
+from ticker_convention_index import load_ticker_convention_index, get_ticker_convention_index
+from bond_instrument_cache import get_bond_instrument_cache
+from bond_result_cache import get_bond_result_cache
+from z_spread_solver import get_z_spread_solver
+from profile_config import get_calculation_flags
+from metric_planner import plan_metrics
+from portfolio_streaming import stream_format, RunningPortfolioMetrics, ndjson_stream, csv_stream, NDJSON_MIMETYPE, CSV_MIMETYPE
+from portfolio_sessions import get_portfolio_session_store, SessionNotFound
+from cash_flow_ladder import get_instrument_schedule_cache
 # Note: get_prior_month_end is defined below in this file
 
 # 🔧 FIX: Database initialization handled per-request for gunicorn compatibility
@@ -53,42 +72,10 @@ from smart_input_detector import parse_flexible_request, detect_bond_inputs
 _databases_checked = False
 
 def ensure_databases_ready():
-    """Ensure databases are available before processing requests."""
-    global _databases_checked, universal_parser
-    
+    """Ensure databases are available before processing requests (re-runs warmup if startup failed)."""
     if _databases_checked:
         return True
-        
-    database_source = os.environ.get('DATABASE_SOURCE', 'gcs')
-    
-    if database_source == 'gcs':
-        logger.info("📥 GCS database source detected - fetching databases...")
-        if ensure_databases_available():
-            logger.info("✅ Databases successfully loaded from GCS")
-            _databases_checked = True
-            
-            # 🔧 FIX: Initialize Universal Parser after databases are loaded
-            if UNIVERSAL_PARSER_AVAILABLE and universal_parser is None:
-                logger.info("🎯 Initializing Universal Parser...")
-                if initialize_universal_parser():
-                    logger.info("✅ Universal Parser initialized successfully")
-                else:
-                    logger.warning("⚠️ Universal Parser initialization failed")
-            
-            return True
-        else:
-            logger.error("❌ Failed to load databases from GCS")
-            return False
-    else:
-        logger.info("📦 Using embedded databases - no GCS fetch needed")
-        _databases_checked = True
-        
-        # 🔧 FIX: Initialize Universal Parser for embedded databases too
-        if UNIVERSAL_PARSER_AVAILABLE and universal_parser is None:
-            if initialize_universal_parser():
-                logger.info("✅ Universal Parser initialized")
-        
-        return True
+    return warm_startup()
 
 def check_bond_maturity(result, settlement_date=None):
     """
@@ -785,48 +772,111 @@ BLOOMBERG_DB_PATH = SECONDARY_DATABASE_PATH
 PORT = int(os.environ.get('PORT', 8080))
 VERSION = '10.0.0'
 
+STARTUP_WARMUP_BOND = os.environ.get('STARTUP_WARMUP_BOND', 'T 3 15/08/52')
+# 0 defers the pipeline to the first request (benchmark_import_time.py measures imports alone)
+STARTUP_WARM_ON_IMPORT = os.environ.get('STARTUP_WARM_ON_IMPORT', '1') != '0'
+
 # Verify database exists on startup (conditional on database source)
 database_source_early = os.environ.get('DATABASE_SOURCE', 'gcs')
 
-if database_source_early == 'embedded':
-    # For embedded databases, check immediately
-    if not os.path.exists(DATABASE_PATH):
-        logger.error(f"❌ Bond database not found at: {DATABASE_PATH}")
-        logger.error("Production service requires bond reference database!")
-        sys.exit(1)
+if database_source_early == 'embedded' and not os.path.exists(DATABASE_PATH):
+    logger.error(f"❌ Bond database not found at: {DATABASE_PATH}")
+    logger.error("Production service requires bond reference database!")
+    sys.exit(1)
+
+
+def _startup_databases():
+    """Fetch (GCS) or verify (embedded) the databases."""
+    if database_source_early == 'gcs':
+        logger.info("📥 GCS database source detected - fetching databases...")
+        # google-cloud-storage is only imported when the databases come from GCS
+        from gcs_database_manager import ensure_databases_available
+        if not ensure_databases_available():
+            return False
     else:
-        logger.info(f"✅ Bond database loaded: {DATABASE_PATH}")
-        logger.info(f"📊 Database size: {os.path.getsize(DATABASE_PATH) / (1024*1024):.1f}MB")
-        
-        # Initialize Universal Parser after database verification
-        parser_initialized = initialize_universal_parser()
-        if parser_initialized:
-            logger.info("🎯 Universal Parser ready - parsing redundancy eliminated!")
-        else:
-            logger.warning("⚠️ Universal Parser initialization failed - using fallback parsing")
-else:
-    # For GCS databases, defer check until after download
-    logger.info("🔍 GCS database mode - deferring database verification until after download")
-    
-    # Still try to initialize parser if databases happen to exist
-    if os.path.exists(DATABASE_PATH):
-        logger.info(f"✅ Database already exists: {DATABASE_PATH}")
-        parser_initialized = initialize_universal_parser()
-        if parser_initialized:
-            logger.info("🎯 Universal Parser ready - parsing redundancy eliminated!")
-        else:
-            logger.warning("⚠️ Universal Parser initialization failed - using fallback parsing")
+        logger.info("📦 Using embedded databases - no GCS fetch needed")
+    logger.info(f"✅ Bond database: {DATABASE_PATH} ({os.path.getsize(DATABASE_PATH) / (1024*1024):.1f}MB)")
+    if os.path.exists(VALIDATED_DB_PATH):
+        logger.info(f"✅ Validated conventions database found: {VALIDATED_DB_PATH}")
     else:
-        logger.info("📥 Database will be downloaded from GCS during startup")
-        parser_initialized = False
+        logger.warning(f"⚠️  Validated conventions database not found: {VALIDATED_DB_PATH}")
+        logger.warning("   API will use standard bond conventions as fallback")
+    return True
+
+
+def _startup_parser():
+    """Universal Parser over the (now present) databases."""
+    if not UNIVERSAL_PARSER_AVAILABLE or universal_parser is not None:
+        return None
+    return initialize_universal_parser()
+
+
+def _startup_treasury_curve():
+    """Yields and bootstrapped curve for the default settlement date."""
+    settlement = datetime.strptime(default_settlement_date_str(), '%Y-%m-%d').date()
+    treasury_yields, curve = get_cached_treasury_curve(settlement, DATABASE_PATH)
+    return bool(treasury_yields) and curve is not None
+
+
+def _startup_engine():
+    """One full calculation, so QuantLib, the parser paths and the solver are exercised before traffic."""
+    if not STARTUP_WARMUP_BOND:
+        return None
+    result = calculate_bond_master(
+        description=STARTUP_WARMUP_BOND,
+        price=100.0,
+        db_path=DATABASE_PATH,
+        validated_db_path=VALIDATED_DB_PATH,
+        bloomberg_db_path=BLOOMBERG_DB_PATH
+    )
+    return bool(result.get('success'))
 
-# ENHANCED: Check for validated conventions database
-if os.path.exists(VALIDATED_DB_PATH):
-    logger.info(f"✅ Validated conventions database found: {VALIDATED_DB_PATH}")
-    logger.info(f"📊 Validated database size: {os.path.getsize(VALIDATED_DB_PATH) / (1024*1024):.1f}MB")
-else:
-    logger.warning(f"⚠️  Validated conventions database not found: {VALIDATED_DB_PATH}")
-    logger.warning("   API will use standard bond conventions as fallback")
+
+_startup_lock = threading.Lock()
+
+
+def warm_startup():
+    """
+    Run the startup pipeline: databases, pools, indexes, parser, curve and engine.
+
+    Runs at import, so under gunicorn --preload it happens once in the master
+    and workers fork warm. A failed database phase leaves /ready red and is
+    retried by ensure_databases_ready() on the next request.
+
+    Returns:
+        True when the databases are available (later phases may degrade)
+    """
+    with _startup_lock:
+        if _databases_checked:
+            return True
+        return _run_startup_pipeline()
+
+
+def _run_startup_pipeline():
+    global _databases_checked
+    pipeline = get_startup_pipeline()
+    pipeline.begin()
+    if not pipeline.run('databases', _startup_databases, required=True):
+        return False
+    _databases_checked = True
+
+    # Open read-only pools and load schema maps once, not per lookup
+    pipeline.run('readonly_pools', lambda: warm_readonly_pools(DATABASE_PATH, VALIDATED_DB_PATH, SECONDARY_DATABASE_PATH))
+    # ISIN → reference data in memory, so ISIN requests don't walk the databases
+    pipeline.run('bond_reference_index', lambda: load_bond_reference_index(DATABASE_PATH, VALIDATED_DB_PATH, SECONDARY_DATABASE_PATH))
+    # Whole tsys_enhanced history as a dates × tenors array, so settlement dates resolve without SQL
+    pipeline.run('treasury_yield_history', lambda: get_treasury_yield_history(DATABASE_PATH))
+    # Ticker → conventions maps, so description-route bonds resolve conventions without SQL
+    pipeline.run('ticker_convention_index', lambda: load_ticker_convention_index(VALIDATED_DB_PATH, SECONDARY_DATABASE_PATH))
+    pipeline.run('universal_parser', _startup_parser)
+    pipeline.run('treasury_curve', _startup_treasury_curve)
+    pipeline.run('engine', _startup_engine)
+    pipeline.mark_ready()
+    return True
+
+
+if STARTUP_WARM_ON_IMPORT:
+    warm_startup()
 
 
 # Admin endpoint for Treasury yield updates (App Engine Cron)
@@ -844,6 +894,11 @@ def update_treasury_yields():
             result = update_yields_for_app_engine()
             
             if result['status'] == 'success':
+                # The new day went to the GCS yield store; write it to this instance's
+                # local store and in-memory history too
+                get_treasury_yield_store(DATABASE_PATH).upsert(result['date'], result['yields'])
+                record_treasury_yields(DATABASE_PATH, result['date'], result['yields'])
+                invalidate_treasury_curves()
                 return jsonify(result), 200
             else:
                 return jsonify(result), 500
@@ -867,10 +922,12 @@ def update_treasury_yields():
             yields = fetcher.fetch_yield_curve_data(today)
             
             if yields:
-                # Update database
-                success = fetcher.update_database(yields, today)
+                # Upsert the day into the yield store of the database this process serves
+                success = fetcher.update_database(yields, today,
+                                                  store_path=get_treasury_yield_store(DATABASE_PATH).path)
                 
                 if success:
+                    record_treasury_yields(DATABASE_PATH, today, yields)
                     return jsonify({
                         'status': 'success',
                         'date': today.strftime('%Y-%m-%d'),
@@ -895,6 +952,16 @@ def update_treasury_yields():
             'message': str(e)
         }), 500
 
+@app.route('/ready', methods=['GET'])
+@app.route('/_ah/warmup', methods=['GET'])
+def readiness_check():
+    """Readiness: 200 once the startup pipeline has warmed this process, 503 until then."""
+    pipeline = get_startup_pipeline()
+    if not pipeline.ready:
+        ensure_databases_ready()
+    stats = pipeline.stats()
+    return jsonify({'status': 'ready' if stats['ready'] else 'warming', **stats}), 200 if stats['ready'] else 503
+
 @app.route('/health', methods=['GET'])
 @optional_api_key
 def health_check():
@@ -962,6 +1029,20 @@ def health_check():
             'size_mb': round(validated_db_size_mb, 1),
             'enhancement_level': 'validated_conventions' if validated_db_status == 'connected' else 'standard_fallback'
         },
+        'treasury_curve_cache': get_treasury_curve_cache().stats(),
+        'evaluation_date_gate': get_evaluation_date_gate().stats(),
+        'readonly_db_pools': readonly_pool_stats(),
+        'bond_reference_index': get_bond_reference_index().stats() if get_bond_reference_index() else None,
+        'bond_instrument_cache': get_bond_instrument_cache().stats(),
+        'bond_result_cache': get_bond_result_cache().stats(),
+        'treasury_yield_history': treasury_yield_history_stats(),
+        'treasury_yield_store': get_treasury_yield_store(DATABASE_PATH).stats(),
+        'parsed_description_cache': get_parsed_description_cache().stats(),
+        'ticker_convention_index': get_ticker_convention_index().stats() if get_ticker_convention_index() else None,
+        'z_spread_solver': get_z_spread_solver().stats(),
+        'portfolio_sessions': get_portfolio_session_store().stats(),
+        'cash_flow_schedule_cache': get_instrument_schedule_cache().stats(),
+        'startup': get_startup_pipeline().stats(),
         'capabilities': [
             'XTrillion Core - Professional bond calculation engine',
             'Universal Parser - Single parsing path for ALL bonds (ISIN + description)',
@@ -1054,6 +1135,133 @@ def bond_analyze_flexible():
             'message': 'Invalid request format'
         }), 400
 
+def build_bond_analysis_response(result, bond_input, context=None, response_time_ms=None, calc_flags=None,
+                                 cache_stats=True):
+    """
+    Build the bond analysis response payload from a calculate_bond_master result.
+    
+    Shared by the single-bond and batch endpoints so both return the same shape.
+    
+    Args:
+        result: Successful calculate_bond_master result
+        bond_input: Original bond input (description or ISIN)
+        context: Optional "portfolio" / "technical" formatting context
+        response_time_ms: Elapsed time reported in metadata
+        calc_flags: Optional profile flags; analytics are limited to the profile's metrics
+        cache_stats: Include the caches' hit rates in metadata (batches report them once instead)
+    """
+    # CONSISTENT FIELD NAMES: Same data, different detail levels
+    # Base analytics with FULL PRECISION + CONSISTENT YTM NAMING
+
+    logger.debug("🔍 SPREAD DEBUG: raw spread=%s z_spread=%s keys=%s",
+                 result.get('spread'), result.get('z_spread'), result.keys())
+
+    raw_analytics = {
+        # Core bond metrics - CONSISTENT YTM CONVENTION NAMING
+        'ytm': result.get('ytm', 0),  # ✅ FIXED: Use 'ytm' field (already in percentage)
+        'duration': result.get('duration', 0),  # Full QuantLib precision
+        'spread': result.get('spread'),
+        'accrued_interest': result.get('accrued_interest', 0),  # Full precision
+        'price': result.get('price'),
+        'settlement_date': result.get('settlement_date') or get_prior_month_end(),
+
+        # Enhanced metrics - FULL PRECISION + CONSISTENT NAMING
+        'macaulay_duration': result.get('mac_dur_semi', 0),
+        'clean_price': result.get('clean_price', 0),
+        'dirty_price': result.get('dirty_price', 0),  # Will be corrected below
+        'ytm_annual': result.get('ytm_annual', 0),  # Annual equivalent YTM
+        'annual_duration': result.get('mod_dur_annual', 0),
+        'annual_macaulay_duration': result.get('mac_dur_annual', 0),
+        'convexity': result.get('convexity', 0),  # Fixed: use 'convexity' not 'convexity_semi'
+        'pvbp': result.get('pvbp', 0),  # Critical for large trades - full precision
+        'z_spread': result.get('z_spread')
+    }
+
+    # 🚨 CRITICAL FIX: Correct dirty price calculation
+    # Known issue: QuantLib sometimes returns dirty_price = clean_price incorrectly
+    clean_price = raw_analytics.get('clean_price') or 0
+    accrued_interest = raw_analytics.get('accrued_interest') or 0
+    calculated_dirty_price = clean_price + accrued_interest
+
+    # Use calculated dirty price if the returned dirty price is wrong
+    returned_dirty_price = raw_analytics.get('dirty_price') or 0
+    if abs(returned_dirty_price - clean_price) < 0.001 and accrued_interest > 0:
+        # Dirty price appears to be wrong (same as clean price despite accrued > 0)
+        logger.warning(f"🚨 Dirty price bug detected! Returned: {returned_dirty_price}, Expected: {calculated_dirty_price}")
+        raw_analytics['dirty_price'] = calculated_dirty_price
+        logger.info(f"✅ Dirty price corrected: {calculated_dirty_price:.6f} = {clean_price:.6f} + {accrued_interest:.6f}")
+
+    analytics = raw_analytics
+
+    # Profile requests only return the metrics the engine was asked to compute
+    metric_plan = plan_metrics(calc_flags)
+    if not metric_plan.is_full:
+        analytics = {field: value for field, value in analytics.items()
+                     if field in ('price', 'settlement_date') or metric_plan.includes(field)}
+
+    logger.debug("🔍 FINAL DEBUG: spread=%s z_spread=%s", analytics.get('spread'), analytics.get('z_spread'))
+
+    # Common bond info
+    bond_info = {
+        'description': bond_input,
+        'isin': result.get('isin')
+    }
+
+    # Always return rich, self-documenting response
+    response = {
+        'status': 'success',
+        'bond': {
+            **bond_info,
+            'conventions': result.get('conventions'),
+            'route_used': result.get('route_used')
+        },
+        'analytics': analytics,
+        'field_descriptions': {
+            'ytm': 'Yield to maturity (bond native convention, %)',
+            'duration': 'Modified duration (years)',
+            'macaulay_duration': 'Macaulay duration (semi-annual)',
+            'ytm_annual': 'Yield to maturity (annual equivalent, %)',
+            'annual_duration': 'Modified duration (annual)',
+            'convexity': 'Price convexity (semi-annual)',
+            'pvbp': 'Price Value of Basis Point',
+            'z_spread': 'Z-spread over treasury curve (bps)'
+        },
+        'calculations': {
+            'basis': 'Semi-annual compounding',
+            'day_count': result.get('conventions', {}).get('day_count', 'ActualActual_Bond'),
+            'business_day_convention': result.get('conventions', {}).get('business_day_convention', 'Following')
+        },
+        'metadata': {
+            'api_version': 'v1.2',
+            'calculation_engine': 'xtrillion_core_quantlib_engine',
+            'route_used': result.get('route_used'),
+            'universal_parser_available': UNIVERSAL_PARSER_AVAILABLE,
+            'enhanced_metrics_count': 13,
+            'response_time_ms': response_time_ms,
+            'stage_timings_ms': result.get('stage_timings_ms'),
+            'stages_skipped': result.get('stages_skipped'),
+            'instrument_cache': {'hit': result.get('instrument_cached')},
+            'result_cache': {'status': result.get('result_cache')}
+        }
+    }
+    if cache_stats:
+        response['metadata']['instrument_cache']['hit_rate'] = get_bond_instrument_cache().stats()['hit_rate']
+        response['metadata']['result_cache']['hit_rate'] = get_bond_result_cache().stats()['hit_rate']
+
+    # Add override information if applicable
+    if result.get('overrides_applied'):
+        response['overrides_applied'] = result.get('overrides_applied')
+        response['override_note'] = result.get('override_note')
+
+    if not metric_plan.is_full:
+        response['metadata']['profile_metrics'] = sorted(metric_plan.metrics)
+
+    # Apply context-aware formatting if requested
+    if context:
+        response = apply_context_formatting(response, context)
+    
+    return response
+
 @app.route('/api/v1/bond/analysis', methods=['POST'])
 @require_api_key_soft
 def bond_analysis():
@@ -1108,6 +1316,10 @@ def bond_analysis():
         # Extract overrides if provided
         overrides = data.get('overrides', {})
         
+        # Optional profile (?profile=PRICING or "profile": "ytm,duration") - engine skips unneeded stages
+        profile = data.get('profile') or request.args.get('profile')
+        calc_flags = get_calculation_flags(profile) if profile else None
+        
         if not data or not bond_input:
             return jsonify({
                 'error': 'Missing bond input field (use "description", "bond_input", or "isin")',
@@ -1210,7 +1422,8 @@ def bond_analysis():
                 db_path=DATABASE_PATH,
                 validated_db_path=VALIDATED_DB_PATH,
                 bloomberg_db_path=BLOOMBERG_DB_PATH,
-                overrides=overrides
+                overrides=overrides,
+                calc_flags=calc_flags
             )
 
             # Handle ISIN lookup failure with intelligent fallback
@@ -1231,7 +1444,8 @@ def bond_analysis():
                         db_path=DATABASE_PATH,
                         validated_db_path=VALIDATED_DB_PATH,
                         bloomberg_db_path=BLOOMBERG_DB_PATH,
-                        overrides=overrides
+                        overrides=overrides,
+                        calc_flags=calc_flags
                     )
                     
                     if fallback_result.get('success'):
@@ -1266,7 +1480,8 @@ def bond_analysis():
                         settlement_date=data.get('settlement_date'),
                         db_path=DATABASE_PATH,
                         validated_db_path=VALIDATED_DB_PATH,
-                        bloomberg_db_path=BLOOMBERG_DB_PATH
+                        bloomberg_db_path=BLOOMBERG_DB_PATH,
+                        calc_flags=calc_flags
                     )
                     
                     if fallback_result.get('success'):
@@ -1321,113 +1536,15 @@ def bond_analysis():
             matured_response = create_matured_bond_response(bond_input, maturity_info, data.get('context'))
             return jsonify(matured_response)
         
-        # CONSISTENT FIELD NAMES: Same data, different detail levels
-        # Base analytics with FULL PRECISION + CONSISTENT YTM NAMING
-        
-        # 🔍 DEBUG: Log raw result spread values
-        logger.info(f"🔍 SPREAD DEBUG: Raw result.get('spread') = {result.get('spread')}")
-        logger.info(f"🔍 SPREAD DEBUG: Raw result.get('z_spread') = {result.get('z_spread')}")
-        logger.info(f"🔍 SPREAD DEBUG: Result keys = {list(result.keys()) if isinstance(result, dict) else 'Not dict'}")
-        
-        raw_analytics = {
-            # Core bond metrics - CONSISTENT YTM CONVENTION NAMING
-            'ytm': result.get('ytm', 0),  # ✅ FIXED: Use 'ytm' field (already in percentage)
-            'duration': result.get('duration', 0),  # Full QuantLib precision
-            'spread': result.get('spread'),
-            'accrued_interest': result.get('accrued_interest', 0),  # Full precision
-            'price': result.get('price'),
-            'settlement_date': result.get('settlement_date') or get_prior_month_end(),
-            
-            # Enhanced metrics - FULL PRECISION + CONSISTENT NAMING
-            'macaulay_duration': result.get('mac_dur_semi', 0),
-            'clean_price': result.get('clean_price', 0),
-            'dirty_price': result.get('dirty_price', 0),  # Will be corrected below
-            'ytm_annual': result.get('ytm_annual', 0),  # Annual equivalent YTM
-            'annual_duration': result.get('mod_dur_annual', 0),
-            'annual_macaulay_duration': result.get('mac_dur_annual', 0),
-            'convexity': result.get('convexity', 0),  # Fixed: use 'convexity' not 'convexity_semi'
-            'pvbp': result.get('pvbp', 0),  # Critical for large trades - full precision
-            'z_spread': result.get('z_spread')
-        }
-        
-        # 🔍 DEBUG: Log analytics spread values after building
-        logger.info(f"🔍 ANALYTICS DEBUG: raw_analytics['spread'] = {raw_analytics.get('spread')}")
-        logger.info(f"🔍 ANALYTICS DEBUG: raw_analytics['z_spread'] = {raw_analytics.get('z_spread')}")
-        
-        # 🚨 CRITICAL FIX: Correct dirty price calculation
-        # Known issue: QuantLib sometimes returns dirty_price = clean_price incorrectly
-        clean_price = raw_analytics.get('clean_price', 0)
-        accrued_interest = raw_analytics.get('accrued_interest', 0)
-        calculated_dirty_price = clean_price + accrued_interest
-        
-        # Use calculated dirty price if the returned dirty price is wrong
-        returned_dirty_price = raw_analytics.get('dirty_price', 0)
-        if abs(returned_dirty_price - clean_price) < 0.001 and accrued_interest > 0:
-            # Dirty price appears to be wrong (same as clean price despite accrued > 0)
-            logger.warning(f"🚨 Dirty price bug detected! Returned: {returned_dirty_price}, Expected: {calculated_dirty_price}")
-            raw_analytics['dirty_price'] = calculated_dirty_price
-            logger.info(f"✅ Dirty price corrected: {calculated_dirty_price:.6f} = {clean_price:.6f} + {accrued_interest:.6f}")
-        
-        analytics = raw_analytics
-        
-        # 🔍 DEBUG: Log final analytics spread values
-        logger.info(f"🔍 FINAL DEBUG: Final analytics['spread'] = {analytics.get('spread')}")
-        logger.info(f"🔍 FINAL DEBUG: Final analytics['z_spread'] = {analytics.get('z_spread')}")
-        
-        # Common bond info
-        bond_info = {
-            'description': bond_input,
-            'isin': result.get('isin')
-        }
-        
-        # Always return rich, self-documenting response
-        response = {
-            'status': 'success',
-            'bond': {
-                **bond_info,
-                'conventions': result.get('conventions'),
-                'route_used': result.get('route_used')
-            },
-            'analytics': analytics,
-            'field_descriptions': {
-                'ytm': 'Yield to maturity (bond native convention, %)',
-                'duration': 'Modified duration (years)',
-                'macaulay_duration': 'Macaulay duration (semi-annual)',
-                'ytm_annual': 'Yield to maturity (annual equivalent, %)',
-                'annual_duration': 'Modified duration (annual)',
-                'convexity': 'Price convexity (semi-annual)',
-                'pvbp': 'Price Value of Basis Point',
-                'z_spread': 'Z-spread over treasury curve (bps)'
-            },
-            'calculations': {
-                'basis': 'Semi-annual compounding',
-                'day_count': result.get('conventions', {}).get('day_count', 'ActualActual_Bond'),
-                'business_day_convention': result.get('conventions', {}).get('business_day_convention', 'Following')
-            },
-            'metadata': {
-                'api_version': 'v1.2',
-                'calculation_engine': 'xtrillion_core_quantlib_engine',
-                'route_used': result.get('route_used'),
-                'universal_parser_available': UNIVERSAL_PARSER_AVAILABLE,
-                'enhanced_metrics_count': 13,
-                'response_time_ms': int((time.time() - start_time) * 1000)
-            }
-        }
-        
-        # Add override information if applicable
-        if result.get('overrides_applied'):
-            response['overrides_applied'] = result.get('overrides_applied')
-            response['override_note'] = result.get('override_note')
-        
         # Extract context parameter for response formatting
         context = data.get('context')  # Can be "portfolio", "technical", or None
-        
-        # Apply context-aware formatting if requested
-        if context:
-            response = apply_context_formatting(response, context)
+        response = build_bond_analysis_response(
+            result, bond_input, context, response_time_ms=int((time.time() - start_time) * 1000),
+            calc_flags=calc_flags
+        )
         
         logger.info(f"✅ Successfully calculated using XTrillion Core: {bond_input} (route: {result.get('route_used')}, context: {context or 'default'})")
-        logger.info(f"📊 XTrillion Core Result: YTM={result.get('ytm'):.4f}%, Duration={result.get('duration'):.2f}, Route={result.get('route_used')}")
+        logger.info(f"📊 XTrillion Core Result: YTM={result.get('ytm') or 0:.4f}%, Duration={result.get('duration') or 0:.2f}, Route={result.get('route_used')}")
         return jsonify(response)
         
     except Exception as e:
@@ -1439,6 +1556,203 @@ def bond_analysis():
             'universal_parser_available': UNIVERSAL_PARSER_AVAILABLE
         }), 500
 
+# Batch analysis limits and published latency target (warm instance, single worker)
+BATCH_MAX_BONDS = int(os.environ.get('BATCH_MAX_BONDS', 5000))
+BATCH_TARGET_MS_PER_1000 = int(os.environ.get('BATCH_TARGET_MS_PER_1000', 2000))
+
+def _batch_item_error(index, bond_input, error, **details):
+    return {'index': index, 'status': 'error', 'error': error, 'bond_input': bond_input, **details}
+
+def iter_bond_analysis_batch(bonds, context=None, calc_flags=None):
+    """
+    Yield one bond analysis payload per batch item, tagged with its input index.
+    
+    Items are routed exactly like /api/v1/bond/analysis, priced together with
+    calculate_bond_master_batch (one Treasury curve per settlement date, shared
+    parsing and QuantLib instruments) and retried once via the description
+    fallback when the ISIN route fails. Payloads are yielded as they complete.
+    """
+    from isin_router_fix import fix_isin_routing, validate_inputs, get_routing_strategy
+    
+    routed = {}
+    first_pass = []
+    for index, item in enumerate(bonds):
+        if not isinstance(item, dict):
+            yield _batch_item_error(index, item, 'Batch item must be an object')
+            continue
+        bond_input = item.get('description') or item.get('bond_input') or item.get('isin')
+        if isinstance(bond_input, (int, float)):
+            bond_input = str(bond_input)
+        if not bond_input:
+            yield _batch_item_error(index, None, 'Missing bond input field (use "description", "bond_input", or "isin")')
+            continue
+        
+        parsed_isin, parsed_description = fix_isin_routing(bond_input, item.get('isin'))
+        is_valid, error_message = validate_inputs(parsed_isin, parsed_description)
+        if not is_valid:
+            yield _batch_item_error(index, bond_input, error_message)
+            continue
+        
+        routed[index] = (item, bond_input, parsed_isin, parsed_description,
+                         get_routing_strategy(parsed_isin, parsed_description))
+        first_pass.append(index)
+    
+    def master_items(indexes, fallback=False):
+        batch_items = []
+        for index in indexes:
+            item, bond_input, parsed_isin, parsed_description, routing_strategy = routed[index]
+            if not fallback:
+                batch_items.append({'isin': parsed_isin, 'description': parsed_description,
+                                    'overrides': item.get('overrides')})
+            elif routing_strategy == 'isin_primary':
+                # Same as the single-bond endpoint: try the ISIN as a description
+                batch_items.append({'isin': None, 'description': parsed_isin, 'overrides': item.get('overrides')})
+            else:
+                batch_items.append({'isin': None, 'description': parsed_description})
+            batch_items[-1]['price'] = item.get('price', 100.0)
+            batch_items[-1]['settlement_date'] = item.get('settlement_date')
+        return batch_items
+    
+    def finish(index, result):
+        item, bond_input, parsed_isin, parsed_description, routing_strategy = routed[index]
+        maturity_info = check_bond_maturity(result, item.get('settlement_date'))
+        if maturity_info['is_matured']:
+            return {'index': index, **create_matured_bond_response(bond_input, maturity_info, context)}
+        return {'index': index, **build_bond_analysis_response(result, bond_input, context, calc_flags=calc_flags,
+                                                              cache_stats=False)}
+    
+    # Pass 1: every routed item through the batch engine
+    retry = []
+    for position, result in iter_bond_master_batch(
+        master_items(first_pass), DATABASE_PATH, VALIDATED_DB_PATH, BLOOMBERG_DB_PATH, calc_flags
+    ):
+        index = first_pass[position]
+        item, bond_input, parsed_isin, parsed_description, routing_strategy = routed[index]
+        error_msg = result.get('error', 'Unknown calculation error')
+        if result.get('success'):
+            yield finish(index, result)
+        elif (routing_strategy == 'isin_primary' and not parsed_description) or \
+                (routing_strategy == 'isin_with_fallback' and parsed_description):
+            retry.append((index, error_msg))
+        else:
+            yield _batch_item_error(index, bond_input, f"Calculation failed: {error_msg}", route_used=routing_strategy)
+    
+    # Pass 2: description fallback for failed ISIN routes
+    retry_indexes = [index for index, _ in retry]
+    isin_errors = dict(retry)
+    for position, result in iter_bond_master_batch(
+        master_items(retry_indexes, fallback=True), DATABASE_PATH, VALIDATED_DB_PATH, BLOOMBERG_DB_PATH, calc_flags
+    ):
+        index = retry_indexes[position]
+        item, bond_input, parsed_isin, parsed_description, routing_strategy = routed[index]
+        if result.get('success'):
+            if routing_strategy == 'isin_with_fallback':
+                result['route_used'] = 'isin_hierarchy_with_description_fallback'
+            yield finish(index, result)
+        elif routing_strategy == 'isin_primary':
+            yield _batch_item_error(index, bond_input, f"ISIN not found in database and cannot be parsed: {parsed_isin}",
+                                    route_attempted='isin_database_lookup_with_parse_fallback')
+        else:
+            yield _batch_item_error(index, bond_input, 'Both ISIN lookup and description parsing failed',
+                                    isin_error=isin_errors[index], description_error=result.get('error'))
+
+def _batch_metadata(bond_count, successful, start_time):
+    elapsed_ms = (time.time() - start_time) * 1000
+    return {
+        'api_version': 'v1.2',
+        'calculation_engine': 'xtrillion_core_quantlib_engine',
+        'bond_count': bond_count,
+        'successful': successful,
+        'failed': bond_count - successful,
+        'response_time_ms': int(elapsed_ms),
+        'ms_per_1000_bonds': round(elapsed_ms * 1000 / bond_count, 1) if bond_count else 0,
+        'target_ms_per_1000_bonds': BATCH_TARGET_MS_PER_1000,
+        'instrument_cache': get_bond_instrument_cache().stats(),
+        'result_cache': get_bond_result_cache().stats()
+    }
+
+@app.route('/api/v1/bond/analysis/batch', methods=['POST'])
+@require_api_key_soft
+def bond_analysis_batch():
+    """
+    Analyse many bonds in one request.
+    
+    Request Body:
+    {
+        "bonds": [                                 // Up to BATCH_MAX_BONDS items
+            {"description": "T 3 15/08/52", "price": 71.66, "settlement_date": "2025-06-30"},
+            {"isin": "US912810TJ79", "price": 71.66, "overrides": {"coupon": 3.0}}
+        ],
+        "context": "portfolio",                    // Optional, applied to every item
+        "profile": "PRICING",                      // Optional metric profile, applied to every item
+        "stream": true                             // Optional: NDJSON instead of a JSON array
+    }
+    
+    Each item gets the same payload as /api/v1/bond/analysis plus its input
+    "index"; a failing item returns status "error" without failing the batch.
+    Streaming (stream=true or Accept: application/x-ndjson) writes one line
+    per bond as it completes and a final {"summary": ...} line.
+    """
+    start_time = time.time()
+    
+    if not ensure_databases_ready():
+        return jsonify({
+            'status': 'error',
+            'error': 'Database initialization failed. Please try again.',
+            'technical_details': 'GCS database download failed'
+        }), 503
+    
+    data = request.get_json(silent=True) or {}
+    bonds = data.get('bonds')
+    if not isinstance(bonds, list) or not bonds:
+        return jsonify({
+            'status': 'error',
+            'error': 'Request body must contain a non-empty "bonds" array',
+            'example': {
+                'bonds': [
+                    {'description': 'T 3 15/08/52', 'price': 71.66},
+                    {'isin': 'US912810TJ79', 'price': 71.66}
+                ]
+            }
+        }), 400
+    if len(bonds) > BATCH_MAX_BONDS:
+        return jsonify({
+            'status': 'error',
+            'error': f'Batch too large: {len(bonds)} bonds (maximum {BATCH_MAX_BONDS})'
+        }), 413
+    
+    context = data.get('context')
+    profile = data.get('profile') or request.args.get('profile')
+    calc_flags = get_calculation_flags(profile) if profile else None
+    stream = data.get('stream')
+    if stream is None:
+        stream = 'application/x-ndjson' in request.headers.get('Accept', '')
+    elif isinstance(stream, str):
+        stream = stream.strip().lower() in ('1', 'true', 'yes', 'ndjson')
+    else:
+        stream = bool(stream)
+    logger.info(f"📦 Batch analysis: {len(bonds)} bonds (stream={stream})")
+    
+    if stream:
+        def generate():
+            successful = 0
+            for payload in iter_bond_analysis_batch(bonds, context, calc_flags):
+                successful += payload.get('status') == 'success'
+                yield json.dumps(payload, default=str) + '\n'
+            yield json.dumps({'summary': _batch_metadata(len(bonds), successful, start_time)}) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    results = sorted(iter_bond_analysis_batch(bonds, context, calc_flags), key=lambda payload: payload['index'])
+    successful = sum(1 for payload in results if payload.get('status') == 'success')
+    metadata = _batch_metadata(len(bonds), successful, start_time)
+    logger.info(f"✅ Batch analysis: {successful}/{len(bonds)} bonds in {metadata['response_time_ms']}ms "
+                f"({metadata['ms_per_1000_bonds']}ms per 1,000)")
+    return jsonify({
+        'status': 'success',
+        'results': results,
+        'metadata': metadata
+    })
+
 @app.route('/api/v1/portfolio/analysis', methods=['POST'])
 @require_api_key_soft
 def portfolio_analysis():
@@ -1456,6 +1770,12 @@ def portfolio_analysis():
     
     Query Parameters:
     - settlement_days: Settlement days override (default: 0)
+    - workers: Process-pool workers for large portfolios (default: PORTFOLIO_WORKERS)
+    - chunk_size: Bonds per worker task (default: PORTFOLIO_CHUNK_SIZE, 0 = auto)
+    - stream: ndjson or csv to stream the response (same as Accept: application/x-ndjson / text/csv)
+
+    Streaming writes each formatted bond as soon as its block is priced and
+    the portfolio metrics as a trailer (see portfolio_streaming).
     """
     import time
     start_time = time.time()
@@ -1553,47 +1873,60 @@ def portfolio_analysis():
         settlement_days = int(request.args.get('settlement_days', 0))
         logger.info(f"Portfolio analysis requested with settlement_days = {settlement_days}")
 
+        # Optional process-pool overrides (defaults: PORTFOLIO_WORKERS / PORTFOLIO_CHUNK_SIZE)
+        max_workers = request.args.get('workers', type=int)
+        chunk_size = request.args.get('chunk_size', type=int)
+
+        streaming = stream_format(request.headers.get('Accept'), request.args.get('stream'))
+        if streaming:
+            logger.info(f"📡 Streaming portfolio of {portfolio_size} bonds as {streaming}")
+            results = iter_bond_portfolio(
+                data, DATABASE_PATH, VALIDATED_DB_PATH, BLOOMBERG_DB_PATH,
+                settlement_days=settlement_days, max_workers=max_workers, chunk_size=chunk_size
+            )
+
+            def trailer(metrics):
+                portfolio_metrics = metrics.as_metrics()
+                logger.info(f"✅ Portfolio streamed: {metrics.successful_bonds}/{metrics.total_bonds} bonds successful")
+                return {
+                    'portfolio_metrics': format_portfolio_metrics(portfolio_metrics, 'YAS'),
+                    'metadata': {
+                        'processing_type': f'yas_streaming_{streaming}',
+                        'api_version': 'v1.2',
+                        'total_bonds': metrics.total_bonds,
+                        'successful_bonds': metrics.successful_bonds,
+                        'enhancement_stats': enhancement_results if enhancement_results['treasuries_detected'] > 0 else None,
+                        'instrument_cache': get_bond_instrument_cache().stats(),
+                        'response_time_ms': int((time.time() - start_time) * 1000)
+                    }
+                }
+
+            format_yas = lambda bond: format_bond_response(bond, 'YAS')
+            if streaming == 'csv':
+                return Response(stream_with_context(csv_stream(results, format_yas, trailer)), mimetype=CSV_MIMETYPE)
+            return Response(stream_with_context(ndjson_stream(results, format_yas, trailer)), mimetype=NDJSON_MIMETYPE)
+
         results = process_bond_portfolio(
             data, 
             DATABASE_PATH, 
             VALIDATED_DB_PATH, 
             BLOOMBERG_DB_PATH, 
-            settlement_days=settlement_days
+            settlement_days=settlement_days,
+            max_workers=max_workers,
+            chunk_size=chunk_size
         )
         
         # The 'results' variable is now a list of dicts, not a DataFrame.
         # We will process it using standard list comprehensions.
         results_list = results
 
-        # Calculate portfolio-level metrics
-        # ✅ FIXED: Use correct field names from calculation engine with strict None handling
-        successful_bonds = [b for b in results_list if 
-                          'error' not in b and 
-                          b.get('ytm') is not None and 
-                          b.get('duration') is not None and
-                          b.get('weighting') is not None]
-        total_bonds = len(results_list)
-        success_count = len(successful_bonds)
-
-        portfolio_metrics = {}
-        if success_count > 0:
-            total_weight = sum(float(b['weighting']) for b in successful_bonds)
-            if total_weight > 0:
-                # Safe calculation with strict None checking
-                portfolio_yield = sum(float(b['ytm'] or 0) * float(b['weighting']) for b in successful_bonds) / total_weight
-                portfolio_duration = sum(float(b['duration'] or 0) * float(b['weighting']) for b in successful_bonds) / total_weight
-                portfolio_spread = sum(float(b.get('spread') or 0) * float(b['weighting']) for b in successful_bonds) / total_weight
-                
-                portfolio_metrics = {
-                    'portfolio_yield': float(portfolio_yield),
-                    'portfolio_duration': float(portfolio_duration),
-                    'portfolio_spread': float(portfolio_spread),
-                    'total_bonds': total_bonds,
-                    'successful_bonds': success_count,
-                    'failed_bonds': total_bonds - success_count,
-                    'success_rate': round(success_count / total_bonds * 100, 1),
-                    'total_weight': float(total_weight)
-                }
+        # Calculate portfolio-level metrics (same running sums as the streaming trailer)
+        running_metrics = RunningPortfolioMetrics()
+        for bond in results_list:
+            running_metrics.add(bond)
+        total_bonds = running_metrics.total_bonds
+        success_count = running_metrics.successful_bonds
+        portfolio_metrics = running_metrics.as_metrics()
 
         # Always return rich, self-documenting response
         formatted_bonds = [format_bond_response(bond, 'YAS') for bond in results_list]
@@ -1620,6 +1953,7 @@ def portfolio_analysis():
                     'initialized': universal_parser is not None,
                     'parsing_redundancy_eliminated': UNIVERSAL_PARSER_AVAILABLE
                 },
+                'instrument_cache': get_bond_instrument_cache().stats(),
                 'response_time_ms': int((time.time() - start_time) * 1000)
             }
         }
@@ -1635,6 +1969,127 @@ def portfolio_analysis():
             'error': error_msg
         }), 500
 
+def _session_compute(session_settlement_date, settlement_days):
+    """Prices a session's dirty lines with the portfolio engine."""
+    def compute(lines):
+        return process_bond_portfolio(
+            {'data': lines}, DATABASE_PATH, VALIDATED_DB_PATH, BLOOMBERG_DB_PATH,
+            settlement_days=settlement_days, settlement_date=session_settlement_date
+        )
+    return compute
+
+def _session_response(session, start_time, line_ids=None, extra_metadata=None):
+    """YAS lines (all, or line_ids) plus the session's running portfolio metrics."""
+    bonds = [dict(line=line_id, **format_bond_response(result, 'YAS')) for line_id, result in session.ordered_results(line_ids)]
+    metadata = {
+        'api_version': 'v1.2',
+        'lines': len(session.lines),
+        'lines_returned': len(bonds),
+        'lines_computed_total': session.computed,
+        'lines_reused_total': session.reused,
+        'response_time_ms': int((time.time() - start_time) * 1000)
+    }
+    metadata.update(extra_metadata or {})
+    return {
+        'status': 'success',
+        'session_id': session.session_id,
+        'settlement_date': session.settlement_date,
+        'format': 'YAS',
+        'bond_data': bonds,
+        'portfolio_metrics': format_portfolio_metrics(session.metrics.as_metrics(), 'YAS'),
+        'metadata': metadata
+    }
+
+@app.route('/api/v1/portfolio/session', methods=['POST'])
+@require_api_key_soft
+def portfolio_session_create():
+    """
+    Open a portfolio session: price the full portfolio once and keep its lines.
+    
+    Request Body:
+    {
+        "data": [{"description": "T 3 15/08/52", "price": 71.66, "weighting": 60.0, "line": "A1"}],
+        "settlement_date": "2025-06-30"            // Optional (default prior month end)
+    }
+    
+    "line" is an optional client id per line (default: position). The response
+    carries "session_id" for /api/v1/portfolio/session/<session_id> deltas.
+    Query Parameters: settlement_days (default 0)
+    """
+    start_time = time.time()
+    if not ensure_databases_ready():
+        return jsonify({
+            'status': 'error',
+            'error': 'Database initialization failed. Please try again.',
+            'technical_details': 'GCS database download failed'
+        }), 503
+    
+    data = request.get_json(silent=True) or {}
+    lines = data.get('data')
+    if not isinstance(lines, list) or not lines:
+        return jsonify({'status': 'error', 'error': 'Request body must contain a non-empty "data" array'}), 400
+    for i, bond in enumerate(lines):
+        if not bond.get('description') and not bond.get('BOND_CD'):
+            return jsonify({'status': 'error', 'error': f'Bond {i+1} missing description'}), 400
+    
+    settlement_date = data.get('settlement_date') or default_settlement_date_str()
+    settlement_days = int(request.args.get('settlement_days', 0))
+    try:
+        session = get_portfolio_session_store().create(
+            settlement_date, settlement_days, lines, _session_compute(settlement_date, settlement_days))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+    return jsonify(_session_response(session, start_time, extra_metadata={'lines_computed': session.computed}))
+
+@app.route('/api/v1/portfolio/session/<session_id>', methods=['GET', 'POST', 'PATCH', 'DELETE'])
+@require_api_key_soft
+def portfolio_session(session_id):
+    """
+    Read, update or close a portfolio session.
+    
+    GET returns every line; DELETE closes the session. POST/PATCH applies a delta:
+    {
+        "update": [{"line": "A1", "price": 71.9}],   // Changed fields per line
+        "add": [{"description": "T 4.125 15/11/32", "price": 99.5, "weighting": 10.0}],
+        "remove": ["B7"]
+    }
+    Only lines whose terms or price changed are re-priced; a weighting change
+    just re-weights. The response lists the changed lines (all with ?full=true)
+    and the updated portfolio metrics. 404 means the session expired or was
+    evicted: open a new one with the full portfolio.
+    """
+    start_time = time.time()
+    store = get_portfolio_session_store()
+    if request.method == 'DELETE':
+        if not store.delete(session_id):
+            return jsonify({'status': 'error', 'error': f'Unknown portfolio session {session_id}'}), 404
+        return jsonify({'status': 'success', 'session_id': session_id, 'closed': True})
+    
+    try:
+        if request.method == 'GET':
+            return jsonify(_session_response(store.get(session_id), start_time))
+        
+        delta = request.get_json(silent=True) or {}
+        session = store.get(session_id)
+        session, changed = store.apply(
+            session_id, _session_compute(session.settlement_date, session.settlement_days),
+            add=delta.get('add') or [], update=delta.get('update') or [], remove=delta.get('remove') or []
+        )
+    except SessionNotFound:
+        return jsonify({
+            'status': 'error',
+            'error': f'Unknown or expired portfolio session {session_id}',
+            'message': 'Open a new session with POST /api/v1/portfolio/session'
+        }), 404
+    except KeyError as e:
+        return jsonify({'status': 'error', 'error': f'Unknown line {e.args[0]!r} in session {session_id}'}), 400
+    except ValueError as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+    
+    full = request.args.get('full', 'false').lower() == 'true'
+    return jsonify(_session_response(session, start_time, line_ids=None if full else changed,
+                                     extra_metadata={'lines_changed': len(changed)}))
+
 # =============================================================================
 # BACKWARD COMPATIBILITY ALIASES (DEPRECATED)
 # =============================================================================
@@ -4,13 +4,16 @@ ISIN Lookup Module
 Provides database lookup functionality for ISINs across multiple bond databases
 """
 
-import sqlite3
 import logging
 import os
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+
+from core.database_manager import get_readonly_pool
+from bond_reference_index import find_isin_tables, get_bond_reference_index
 
 logger = logging.getLogger(__name__)
 
+
 def lookup_isin_in_database(isin: str, 
                           db_path: str, 
                           validated_db_path: Optional[str] = None,
@@ -39,49 +42,39 @@ def lookup_isin_in_database(isin: str,
         (bloomberg_db_path, "bloomberg_bonds", "Bloomberg")
     ]
     
+    # In-memory reference index first - no SQL when it covers every database
+    index = get_bond_reference_index()
+    if index is not None:
+        available = [db_file for db_file, _, _ in databases if db_file and os.path.exists(db_file)]
+        sources = [index.source_for_path(db_file) for db_file in available]
+        record = index.lookup(isin, sources=[source for source in sources if source])
+        if record:
+            logger.info(f"✅ Found ISIN in {record['source_db']} database (reference index), table: {record['table']}")
+            return _result_from_index_record(isin, record, index.source_row(isin, record['source_db']))
+        if all(sources):
+            logger.warning(f"❌ ISIN {isin} not found in any database")
+            return None
+    
     for db_file, table_hint, db_name in databases:
         if not db_file or not os.path.exists(db_file):
             logger.debug(f"Skipping {db_name} database - not available")
             continue
             
         try:
-            conn = sqlite3.connect(db_file)
-            cursor = conn.cursor()
+            pool = get_readonly_pool(db_file)
             
-            # First, try to find tables that might contain ISINs
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = cursor.fetchall()
-            
-            for (table_name,) in tables:
-                # Get column names for this table
-                cursor.execute(f"PRAGMA table_info({table_name})")
-                columns = cursor.fetchall()
-                column_names = [col[1].lower() for col in columns]
-                
-                # Look for ISIN column
-                isin_column = None
-                for col_name in ['isin', 'isin_code', 'bond_cd', 'bond_code', 'identifier']:
-                    if col_name in column_names:
-                        isin_column = col_name
-                        break
-                
-                if not isin_column:
-                    continue
-                
+            # Tables carrying an ISIN-like column come from the cached schema map
+            for table_name, isin_column in find_isin_tables(pool.schema()):
                 # Query for the ISIN
                 query = f"SELECT * FROM {table_name} WHERE {isin_column} = ?"
-                cursor.execute(query, (isin,))
-                result = cursor.fetchone()
+                result = pool.query_one(query, (isin,))
                 
                 if result:
                     # Found the ISIN - construct result dict
                     logger.info(f"✅ Found ISIN in {db_name} database, table: {table_name}")
                     
                     # Map column names to values
-                    bond_data = {}
-                    for i, (col_info) in enumerate(columns):
-                        col_name = col_info[1]
-                        bond_data[col_name.lower()] = result[i]
+                    bond_data = {col_name.lower(): value for col_name, value in zip(result.keys(), result)}
                     
                     # Extract key fields with various possible column names
                     description = (bond_data.get('description') or 
@@ -89,10 +82,9 @@ def lookup_isin_in_database(isin: str,
                                  bond_data.get('name') or 
                                  bond_data.get('bond_name'))
                     
-                    coupon = (bond_data.get('coupon') or 
-                             bond_data.get('coupon_rate') or 
-                             bond_data.get('cpn') or 
-                             bond_data.get('rate'))
+                    # A 0.0 coupon is a zero-coupon bond, not a missing one
+                    coupon = next((bond_data[key] for key in ('coupon', 'coupon_rate', 'cpn', 'rate')
+                                   if bond_data.get(key) is not None), None)
                     
                     maturity = (bond_data.get('maturity') or 
                                bond_data.get('maturity_date') or 
@@ -102,7 +94,7 @@ def lookup_isin_in_database(isin: str,
                     result_dict = {
                         'isin': isin,
                         'description': description,
-                        'coupon': float(coupon) if coupon else None,
+                        'coupon': float(coupon) if coupon is not None else None,
                         'maturity': maturity,
                         'issuer': bond_data.get('issuer'),
                         'currency': bond_data.get('currency', 'USD'),
@@ -117,20 +109,35 @@ def lookup_isin_in_database(isin: str,
                         'raw_data': bond_data
                     }
                     
-                    conn.close()
                     return result_dict
             
-            conn.close()
-            
         except Exception as e:
             logger.error(f"Error searching {db_name} database: {e}")
-            if 'conn' in locals():
-                conn.close()
     
     logger.warning(f"❌ ISIN {isin} not found in any database")
     return None
 
 
+def _result_from_index_record(isin: str, record: Dict[str, Any], raw_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Shape a BondReferenceIndex record like a database hit (same defaults as the SQL path)."""
+    return {
+        'isin': isin,
+        'description': record.get('description'),
+        'coupon': float(record['coupon']) if record.get('coupon') is not None else None,
+        'maturity': record.get('maturity'),
+        'issuer': record.get('issuer'),
+        'currency': record.get('currency') or 'USD',
+        'face_value': record['face_value'] if record.get('face_value') is not None else 1000000,
+        'day_count': record.get('day_count'),
+        'frequency': record.get('frequency'),
+        'business_convention': record.get('business_convention'),
+        'end_of_month': record['end_of_month'] if record.get('end_of_month') is not None else True,
+        'database': record.get('source_db'),
+        'table': record.get('table'),
+        'raw_data': raw_data
+    }
+
+
 def get_isin_error_response(isin: str, description: Optional[str] = None) -> Dict[str, Any]:
     """
     Generate a helpful error response when ISIN is not found.
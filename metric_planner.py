@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Metric Planner
+==============
+
+Turns a requested set of metrics into the calculation-engine stages that must
+run, so profiles such as PRICING or SETTLEMENT skip the work they don't need
+(convexity, the Treasury fetch, the z-spread bootstrap...).
+
+Requested metrics are expanded through METRIC_DEPENDENCIES, mapped to engine
+stages with METRIC_STAGES and closed over STAGE_DEPENDENCIES:
+
+    ytm only         -> yield
+    PRICING profile  -> yield, accrued                (no convexity, no curve)
+    SETTLEMENT       -> accrued                       (no yield solve, no Treasury fetch)
+    TRADING          -> yield, duration, treasury_fetch, z_spread
+
+A plan of None / 'all' is the full plan and runs every stage (the engine's
+historical behaviour). StageTimings records per-stage wall time so profile
+speedups show up in responses.
+"""
+
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, FrozenSet, Iterable, Optional, Set, Union
+
+logger = logging.getLogger(__name__)
+
+# Engine stages, in execution order
+ENGINE_STAGES = ('instrument', 'yield', 'duration', 'convexity', 'accrued', 'treasury_fetch', 'spread', 'z_spread')
+
+# Metric dependencies (what needs to be calculated first)
+METRIC_DEPENDENCIES = {
+    "duration": ["ytm"],
+    "duration_semi": ["ytm_semi"],
+    "duration_annual": ["ytm_annual"],
+    "macaulay_duration": ["ytm"],
+    "macaulay_duration_semi": ["ytm_semi"],
+    "macaulay_duration_annual": ["ytm_annual"],
+    "convexity": ["ytm"],
+    "pvbp": ["ytm"],
+    "spread": ["ytm"],
+    "z_spread": ["ytm"],
+    "dirty_price": ["clean_price", "accrued_interest"],
+}
+
+# Engine stages each metric needs directly
+METRIC_STAGES = {
+    "ytm": {"yield"},
+    "ytm_semi": {"yield"},
+    "ytm_annual": {"yield"},
+    "duration": {"duration"},
+    "duration_semi": {"duration"},
+    "duration_annual": {"duration"},
+    "macaulay_duration": {"duration"},
+    "macaulay_duration_semi": {"duration"},
+    "macaulay_duration_annual": {"duration"},
+    "convexity": {"convexity"},
+    "pvbp": {"duration"},
+    "spread": {"spread"},
+    "z_spread": {"z_spread"},
+    "clean_price": set(),
+    "dirty_price": set(),
+    "accrued_interest": {"accrued"},
+    "accrued_per_million": {"accrued"},
+    "settlement_date": set(),
+}
+
+STAGE_DEPENDENCIES = {
+    "duration": ("yield",),
+    "convexity": ("yield",),
+    "spread": ("yield", "treasury_fetch"),
+    "z_spread": ("treasury_fetch",),
+}
+
+# Profile (profile_config) and response field names -> planner metric names
+METRIC_ALIASES = {
+    "yield": "ytm",
+    "annual_yield": "ytm_annual",
+    "annual_duration": "duration_annual",
+    "annual_macaulay_duration": "macaulay_duration_annual",
+    "mod_dur_semi": "duration_semi",
+    "mod_dur_annual": "duration_annual",
+    "mac_dur_semi": "macaulay_duration_semi",
+    "mac_dur_annual": "macaulay_duration_annual",
+    "convexity_semi": "convexity",
+    "accrued": "accrued_interest",
+    "oas": "z_spread",
+    "tsy_spread": "spread",
+}
+
+
+def get_required_calculations(requested_metrics: Iterable[str]) -> Set[str]:
+    """
+    Determine all metrics that need to be calculated based on dependencies
+    """
+    required = set(requested_metrics)
+
+    # Add dependencies recursively
+    added = True
+    while added:
+        added = False
+        for metric in list(required):
+            if metric in METRIC_DEPENDENCIES:
+                for dep in METRIC_DEPENDENCIES[metric]:
+                    if dep not in required:
+                        required.add(dep)
+                        added = True
+
+    return required
+
+
+def normalize_metric(name: str) -> str:
+    return METRIC_ALIASES.get(name, name)
+
+
+class MetricPlan:
+    """Engine stages to run for a requested metric set (metrics=None means everything)."""
+
+    __slots__ = ('metrics', 'stages')
+
+    def __init__(self, metrics: Optional[FrozenSet[str]] = None, stages: Optional[FrozenSet[str]] = None):
+        self.metrics = metrics
+        self.stages = frozenset(ENGINE_STAGES) if stages is None else stages
+
+    @property
+    def is_full(self) -> bool:
+        return self.metrics is None
+
+    def needs(self, stage: str) -> bool:
+        return stage in self.stages
+
+    def includes(self, metric: str) -> bool:
+        """True when metric (or its alias) was requested or is required by a requested metric."""
+        return self.metrics is None or normalize_metric(metric) in self.metrics
+
+    def skipped_stages(self):
+        return [stage for stage in ENGINE_STAGES if stage not in self.stages]
+
+    def __repr__(self):
+        return f"MetricPlan(stages={[s for s in ENGINE_STAGES if s in self.stages]})"
+
+
+FULL_PLAN = MetricPlan()
+
+
+def plan_metrics(requested: Union[None, str, Iterable[str], Dict[str, bool]] = None) -> MetricPlan:
+    """
+    Build the stage plan for a requested metric set.
+
+    Args:
+        requested: None / 'all' for every metric, or metric names (a list, a
+            comma-separated string, or profile_config calculation flags)
+
+    Returns:
+        MetricPlan; unknown metrics are ignored, and a request with no known
+        metrics falls back to the full plan.
+    """
+    if requested is None or requested == 'all':
+        return FULL_PLAN
+    if isinstance(requested, str):
+        requested = [name.strip() for name in requested.split(',') if name.strip()]
+    elif isinstance(requested, dict):
+        requested = [name for name, enabled in requested.items() if enabled]
+
+    metrics = set()
+    for name in requested:
+        metric = normalize_metric(name)
+        if metric in METRIC_STAGES:
+            metrics.add(metric)
+        else:
+            logger.warning(f"⚠️ Unknown metric '{name}' ignored by planner")
+    if not metrics:
+        return FULL_PLAN
+
+    metrics = get_required_calculations(metrics)
+    stages = {'instrument'}
+    pending = [stage for metric in metrics for stage in METRIC_STAGES.get(metric, ())]
+    while pending:
+        stage = pending.pop()
+        if stage not in stages:
+            stages.add(stage)
+            pending.extend(STAGE_DEPENDENCIES.get(stage, ()))
+    return MetricPlan(frozenset(metrics), frozenset(stages))
+
+
+class StageTimings:
+    """Accumulates wall time per engine stage, in milliseconds."""
+
+    __slots__ = ('timings',)
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed_ms
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(ms, 3) for name, ms in self.timings.items()}
@@ -13,6 +13,8 @@ import logging
 from datetime import datetime
 from typing import Dict, Optional
 
+from z_spread_solver import get_z_spread_solver
+
 logger = logging.getLogger(__name__)
 
 class SimpleOASCalculator:
@@ -50,7 +52,7 @@ class SimpleOASCalculator:
             # This is a simplified approach suitable for most corporate bonds
             
             # Calculate Z-spread (spread to treasury curve)
-            z_spread = self._calculate_z_spread(bond, clean_price, treasury_curve)
+            z_spread = self._calculate_z_spread(bond, clean_price, treasury_curve, spread_guess)
             
             # For bonds without embedded options, OAS ≈ Z-spread
             oas = z_spread
@@ -104,50 +106,22 @@ class SimpleOASCalculator:
                 'option_adjusted_convexity': None
             }
     
-    def _calculate_z_spread(self, bond, clean_price, treasury_curve, max_iterations=100, tolerance=1e-6):
+    def _calculate_z_spread(self, bond, clean_price, treasury_curve, spread_guess=0.01):
         """
-        Calculate Z-spread using Newton-Raphson method
+        Calculate Z-spread with the shared solver (continuous spread over the curve,
+        analytic-derivative Newton on cached discount factors)
         """
         logger.debug("Calculating Z-spread")
         
-        # Initial guess
-        spread = 0.01  # 100bp initial guess
-        
-        for iteration in range(max_iterations):
-            # Create spread curve
-            spread_curve = self._create_spread_curve(treasury_curve, spread)
-            
-            # Price bond with spread curve
-            engine = ql.DiscountingBondEngine(spread_curve)
-            bond.setPricingEngine(engine)
-            calculated_price = bond.cleanPrice()
-            
-            # Check convergence
-            price_diff = calculated_price - clean_price
-            if abs(price_diff) < tolerance:
-                logger.debug(f"Z-spread converged in {iteration+1} iterations: {spread*10000:.1f}bp")
-                return spread
-            
-            # Calculate derivative for Newton-Raphson
-            delta_spread = 0.0001  # 1bp
-            spread_curve_up = self._create_spread_curve(treasury_curve, spread + delta_spread)
-            engine_up = ql.DiscountingBondEngine(spread_curve_up)
-            bond.setPricingEngine(engine_up)
-            price_up = bond.cleanPrice()
-            
-            # Derivative of price with respect to spread
-            dprice_dspread = (price_up - calculated_price) / delta_spread
-            
-            if abs(dprice_dspread) < 1e-10:
-                break
-                
-            # Newton-Raphson update
-            spread = spread - price_diff / dprice_dspread
-            
-            # Keep spread reasonable
-            spread = max(-0.05, min(0.10, spread))  # Between -500bp and +1000bp
-        
-        logger.warning(f"Z-spread did not converge after {max_iterations} iterations")
+        # Same settlement the DiscountingBondEngine prices to
+        solver = get_z_spread_solver()
+        problem = solver.prepare(bond, clean_price, treasury_curve, bond.settlementDate(), spread_guess)
+        if problem is None:
+            raise ValueError("Bond has no cash flows after settlement")
+        spread = solver.solve(problem)
+        if spread is None:
+            raise ValueError("Z-spread did not converge")
+        logger.debug(f"Z-spread solved: {spread*10000:.1f}bp")
         return spread
     
     def _create_spread_curve(self, base_curve, spread):
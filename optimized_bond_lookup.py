@@ -10,6 +10,8 @@ from pathlib import Path
 from typing import Dict, Optional, Tuple, Any
 import logging
 
+from bond_reference_index import get_bond_reference_index, SOURCE_PRIMARY, SOURCE_BLOOMBERG
+
 class OptimizedBondLookup:
     """
     Optimized bond lookup following priority hierarchy:
@@ -108,6 +110,12 @@ class OptimizedBondLookup:
         Returns complete bond data with validated conventions
         """
         try:
+            # Reference index rules out ISINs the validated database doesn't hold
+            index = get_bond_reference_index()
+            validated_source = index.source_for_path(str(self.databases['validated'])) if index else None
+            if validated_source and validated_source not in index.sources_for(isin):
+                return None
+            
             conn = self.get_connection('validated')
             if not conn:
                 return None
@@ -177,6 +185,20 @@ class OptimizedBondLookup:
         if isin in self._description_cache:
             return self._description_cache[isin]
         
+        # Reference index answers without SQL when it covers both databases
+        index = get_bond_reference_index()
+        if index is not None:
+            primary = index.source_for_path(str(self.databases['primary']))
+            secondary = index.source_for_path(str(self.databases['secondary']))
+            if primary and secondary:
+                for source, label in ((SOURCE_PRIMARY, 'bonds_data'), (SOURCE_BLOOMBERG, 'bloomberg_index')):
+                    record = index.lookup(isin, sources=(source,))
+                    if record and record.get('description'):
+                        result = {'description': record['description'], 'source': label}
+                        self._description_cache[isin] = result
+                        return result
+                return None
+        
         # Try primary database first (bonds_data.db)
         description = self._lookup_description_in_db('primary', isin)
         if description:
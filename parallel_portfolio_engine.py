@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Parallel Portfolio Engine
+=========================
+
+Process-pool execution mode for process_bond_portfolio.
+
+QuantLib's ql.Settings.instance().evaluationDate is process-global and the
+pricing loop is CPU-bound under the GIL, so threads don't buy portfolio
+throughput. Instead each worker is a separate process with its own QuantLib
+Settings singleton:
+
+- Workers are pre-warmed once (SmartBondParser, Treasury detector, DB handles
+  and the Treasury curve for the first settlement date) and reused across
+  requests. One pool per database set; a request for a different size
+  replaces it.
+- Workers start from a forkserver, not by forking the (threaded) gunicorn
+  worker: a lock held by another request thread at fork time would be
+  inherited locked and deadlock the child. The forkserver preloads the
+  engine modules once, so workers still start with them imported.
+- Bonds are sent in chunks of (index, bond_data) pairs to amortise IPC cost.
+- Results come back in input order; a failing bond (or a crashed chunk) only
+  produces an error entry for the affected lines.
+
+Configuration (environment, overridable per call):
+- PORTFOLIO_WORKERS:            worker processes (0/1 = serial, default 0)
+- PORTFOLIO_MAX_WORKERS:        upper bound for any call, e.g. ?workers=
+                                (default: PORTFOLIO_WORKERS or the CPU count,
+                                whichever is larger)
+- PORTFOLIO_CHUNK_SIZE:         bonds per task (0 = auto, default 0)
+- PORTFOLIO_PARALLEL_MIN_BONDS: smallest portfolio sent to the pool (default 50)
+"""
+
+import os
+import atexit
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PORTFOLIO_WORKERS = int(os.environ.get('PORTFOLIO_WORKERS', 0))
+PORTFOLIO_CHUNK_SIZE = int(os.environ.get('PORTFOLIO_CHUNK_SIZE', 0))
+PORTFOLIO_PARALLEL_MIN_BONDS = int(os.environ.get('PORTFOLIO_PARALLEL_MIN_BONDS', 50))
+PORTFOLIO_MAX_WORKERS = int(os.environ.get('PORTFOLIO_MAX_WORKERS', 0)) or max(PORTFOLIO_WORKERS, os.cpu_count() or 1)
+
+MAX_AUTO_CHUNK_SIZE = 64
+
+# Pools are reused across requests, keyed by db paths -> (worker count, pool)
+_pools: Dict[tuple, Tuple[int, ProcessPoolExecutor]] = {}
+_pools_lock = threading.Lock()
+
+# Per-worker-process state populated by _init_worker
+_worker_state: Dict[str, Any] = {}
+
+
+def resolve_worker_count(max_workers: Optional[int] = None) -> int:
+    """Worker count from the call, falling back to PORTFOLIO_WORKERS, capped at PORTFOLIO_MAX_WORKERS."""
+    workers = PORTFOLIO_WORKERS if max_workers is None else max_workers
+    return min(max(0, int(workers)), PORTFOLIO_MAX_WORKERS)
+
+
+def resolve_chunk_size(bond_count: int, workers: int, chunk_size: Optional[int] = None) -> int:
+    """
+    Chunk size from the call or PORTFOLIO_CHUNK_SIZE; 0 means auto.
+
+    Auto sizing aims for ~4 chunks per worker so slow bonds (long-dated,
+    spread solves) don't leave other workers idle at the end.
+    """
+    size = PORTFOLIO_CHUNK_SIZE if chunk_size is None else chunk_size
+    if size and size > 0:
+        return int(size)
+    per_worker = -(-bond_count // max(1, workers * 4))  # ceil division
+    return max(1, min(MAX_AUTO_CHUNK_SIZE, per_worker))
+
+
+def should_use_process_pool(bond_count: int, max_workers: Optional[int] = None) -> bool:
+    """True when the portfolio is large enough and more than one worker is configured."""
+    if _worker_state:
+        # Already inside a pool worker - never nest pools
+        return False
+    return resolve_worker_count(max_workers) > 1 and bond_count >= PORTFOLIO_PARALLEL_MIN_BONDS
+
+
+def _init_worker(db_path: str, validated_db_path: str, bloomberg_db_path: str, warm_settlement_date: str):
+    """Pool initializer: build parser/detector once and warm the Treasury curve."""
+    import google_analysis10 as ga10
+
+    _worker_state['db_path'] = db_path
+    _worker_state['validated_db_path'] = validated_db_path
+    # CRITICAL FIX (mirrors process_bond_portfolio): parser's primary db is bloomberg_db_path
+    _worker_state['parser'] = ga10.get_smart_bond_parser(bloomberg_db_path, validated_db_path, bloomberg_db_path)
+    _worker_state['detector'] = ga10.WorkingTreasuryDetector(db_path, validated_db_path)
+
+    try:
+        settlement = datetime.strptime(warm_settlement_date, '%Y-%m-%d').date()
+        ga10.get_cached_treasury_curve(settlement, db_path)
+    except Exception as e:
+        logger.warning(f"⚠️ Worker {os.getpid()} curve warmup failed: {e}")
+
+    logger.info(f"🔥 Portfolio worker {os.getpid()} warmed for {warm_settlement_date}")
+
+
+def _process_chunk(chunk: List[tuple], settlement_date_str: str, settlement_days: int, metric_plan=None) -> List[tuple]:
+    """Worker task: price a chunk of (index, bond_data) pairs in this process."""
+    import QuantLib as ql
+    import google_analysis10 as ga10
+    from z_spread_solver import batched_z_spreads
+
+    settlement_date_obj = datetime.strptime(settlement_date_str, '%Y-%m-%d').date()
+    treasury_handle = ql.YieldTermStructureHandle(ql.FlatForward(
+        ql.Date(settlement_date_obj.day, settlement_date_obj.month, settlement_date_obj.year),
+        0.03, ql.Actual365Fixed()
+    ))
+
+    results = []
+    with ga10.CalculationContext(settlement_date_obj).evaluation_scope(), batched_z_spreads():
+        for index, bond_data in chunk:
+            metrics = ga10.process_portfolio_bond_safely(
+                bond_data,
+                _worker_state['parser'],
+                _worker_state['detector'],
+                settlement_date_obj,
+                treasury_handle,
+                settlement_days,
+                _worker_state['db_path'],
+                _worker_state['validated_db_path'],
+                metric_plan=metric_plan
+            )
+            results.append((index, metrics))
+    return results
+
+
+def _mp_context():
+    """Forkserver (single-threaded parent, engine modules preloaded); spawn where unavailable."""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['google_analysis10'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def _get_pool(db_path: str, validated_db_path: str, bloomberg_db_path: str,
+              workers: int, warm_settlement_date: str) -> tuple:
+    key = (os.path.abspath(db_path), os.path.abspath(validated_db_path), os.path.abspath(bloomberg_db_path))
+    with _pools_lock:
+        size, pool = _pools.get(key, (None, None))
+        if pool is not None and size != workers:
+            # In-flight requests on the old pool finish; its workers exit afterwards
+            logger.info(f"♻️ Resizing portfolio process pool: {size} -> {workers} workers")
+            pool.shutdown(wait=False)
+            pool = None
+        if pool is None:
+            logger.info(f"🚀 Starting portfolio process pool: {workers} workers")
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=_mp_context(),
+                initializer=_init_worker,
+                initargs=(db_path, validated_db_path, bloomberg_db_path, warm_settlement_date)
+            )
+            _pools[key] = (workers, pool)
+        return key, pool
+
+
+def _discard_pool(key: tuple, pool: ProcessPoolExecutor):
+    with _pools_lock:
+        if _pools.get(key, (None, None))[1] is pool:
+            del _pools[key]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_portfolio_pools():
+    """Stop every worker pool (registered with atexit)."""
+    with _pools_lock:
+        pools = [pool for _, pool in _pools.values()]
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_portfolio_pools)
+
+
+def _chunk_error_result(bond_data: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+    return {
+        'isin': bond_data.get('isin'),
+        'description': bond_data.get('description') or bond_data.get('BOND_CD'),
+        'input_price': bond_data.get('price') or bond_data.get('CLOSING PRICE') or bond_data.get('closing_price'),
+        'weighting': bond_data.get('weighting') or bond_data.get('WEIGHTING'),
+        'successful': False,
+        'error': f"Portfolio worker failed: {error}"
+    }
+
+
+def process_portfolio_in_pool(bond_data_list: List[Dict[str, Any]], db_path: str,
+                              validated_db_path: str, bloomberg_db_path: str,
+                              settlement_days: int = 0, settlement_date_str: Optional[str] = None,
+                              max_workers: Optional[int] = None,
+                              chunk_size: Optional[int] = None,
+                              metric_plan=None) -> List[Dict[str, Any]]:
+    """
+    Price a portfolio across worker processes, preserving process_bond_portfolio's output.
+
+    Args:
+        bond_data_list: portfolio_data['data'] lines
+        db_path: Primary database (tsys_enhanced)
+        validated_db_path: Validated conventions database
+        bloomberg_db_path: Bloomberg reference database
+        settlement_days: Settlement days passed to the calculation engine
+        settlement_date_str: Settlement date 'YYYY-MM-DD' (default prior month end)
+        max_workers: Worker processes (default PORTFOLIO_WORKERS)
+        chunk_size: Bonds per task (default PORTFOLIO_CHUNK_SIZE / auto)
+        metric_plan: Optional metric_planner.MetricPlan (default: every metric)
+
+    Returns:
+        List of per-bond metric dicts in input order
+    """
+    if settlement_date_str is None:
+        first_day_current_month = datetime.now().replace(day=1)
+        settlement_date_str = (first_day_current_month - timedelta(days=1)).strftime('%Y-%m-%d')
+
+    bond_count = len(bond_data_list)
+    workers = max(1, resolve_worker_count(max_workers))
+    size = resolve_chunk_size(bond_count, workers, chunk_size)
+
+    indexed = list(enumerate(bond_data_list))
+    chunks = [indexed[i:i + size] for i in range(0, bond_count, size)]
+    logger.info(f"⚙️ Parallel portfolio: {bond_count} bonds, {workers} workers, {len(chunks)} chunks of ≤{size}")
+
+    key, pool = _get_pool(db_path, validated_db_path, bloomberg_db_path, workers, settlement_date_str)
+    results: List[Optional[Dict[str, Any]]] = [None] * bond_count
+
+    try:
+        futures = {
+            pool.submit(_process_chunk, chunk, settlement_date_str, settlement_days, metric_plan): chunk
+            for chunk in chunks
+        }
+    except (BrokenProcessPool, RuntimeError) as e:
+        # RuntimeError: the pool was shut down by a concurrent resize
+        _discard_pool(key, pool)
+        return [_chunk_error_result(bond_data, e) for bond_data in bond_data_list]
+
+    pool_broken = False
+    for future in as_completed(futures):
+        chunk = futures[future]
+        try:
+            for index, metrics in future.result():
+                results[index] = metrics
+        except Exception as e:
+            logger.error(f"❌ Portfolio chunk of {len(chunk)} bonds failed: {e}")
+            pool_broken = pool_broken or isinstance(e, BrokenProcessPool)
+            for index, bond_data in chunk:
+                results[index] = _chunk_error_result(bond_data, e)
+
+    if pool_broken:
+        # A worker died (e.g. native crash) - start fresh on the next request
+        _discard_pool(key, pool)
+
+    return results
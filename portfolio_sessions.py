@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Portfolio Sessions
+==================
+
+Server-side portfolio handles for clients that re-post nearly the same
+portfolio every few minutes (risk screens, the XT_SMART sheet functions).
+
+Without sessions every submission re-prices every line, even when only a
+handful of prices moved. A session keeps each line's bond_data and result:
+
+- the client creates a session with the full portfolio and gets an id
+- later submissions send deltas: changed fields per line (usually price),
+  added lines, removed line ids
+- a line is re-priced only when its key changes: every bond_data field
+  except the weighting (instrument terms + price), plus the session's
+  settlement date and settlement days. A weighting change re-weights the
+  stored result without pricing
+- portfolio yield / duration / spread are RunningPortfolioMetrics sums,
+  updated by removing a line's old result and adding its new one
+
+Sessions expire after PORTFOLIO_SESSION_TTL_SECONDS without use (default
+1800) and are evicted least-recently-used once their estimated size passes
+PORTFOLIO_SESSION_MAX_MB (default 256).
+
+Pricing is passed in (compute(list of bond_data) -> results in order, e.g.
+process_bond_portfolio for the session's settlement date), so this module
+doesn't import the engine.
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from portfolio_streaming import RunningPortfolioMetrics
+
+logger = logging.getLogger(__name__)
+
+PORTFOLIO_SESSION_TTL_SECONDS = float(os.environ.get('PORTFOLIO_SESSION_TTL_SECONDS', 1800))
+PORTFOLIO_SESSION_MAX_MB = float(os.environ.get('PORTFOLIO_SESSION_MAX_MB', 256))
+
+WEIGHT_FIELDS = ('weighting', 'WEIGHTING', 'weight')
+LINE_ID_FIELD = 'line'
+
+Compute = Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]
+
+
+class SessionNotFound(KeyError):
+    """Unknown or expired session id."""
+
+
+def _weighting(bond_data: Dict[str, Any]) -> Any:
+    return bond_data.get('weighting') or bond_data.get('WEIGHTING') or bond_data.get('weight')
+
+
+def _estimate_bytes(bond_data: Dict[str, Any], result: Dict[str, Any]) -> int:
+    """Rough resident size of one line (its JSON size is a stable proxy)."""
+    return len(json.dumps(bond_data, default=str)) + len(json.dumps(result, default=str))
+
+
+class PortfolioSession:
+    """One client portfolio: lines, their last results and the running aggregates."""
+
+    def __init__(self, settlement_date: str, settlement_days: int = 0, session_id: Optional[str] = None):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.settlement_date = settlement_date
+        self.settlement_days = settlement_days
+        self.lines: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._keys: Dict[str, tuple] = {}
+        self._sizes: Dict[str, int] = {}
+        self.metrics = RunningPortfolioMetrics()
+        self.size_bytes = 0
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+        self._next_line = 0
+        self.computed = 0
+        self.reused = 0
+
+    def line_key(self, bond_data: Dict[str, Any]) -> tuple:
+        """What a result depends on: every field but the weighting, and the session's settlement."""
+        fields = tuple(sorted((name, repr(value)) for name, value in bond_data.items()
+                              if name not in WEIGHT_FIELDS and name != LINE_ID_FIELD))
+        return fields, self.settlement_date, self.settlement_days
+
+    def _new_line_id(self, lines: Dict[str, Dict[str, Any]], bond_data: Dict[str, Any]) -> str:
+        # Default ids count every line added, so they match positions at creation
+        position, self._next_line = self._next_line, self._next_line + 1
+        line_id = bond_data.get(LINE_ID_FIELD)
+        if line_id is None:
+            while str(position) in lines:
+                position = self._next_line
+                self._next_line += 1
+            line_id = position
+        line_id = str(line_id)
+        if line_id in lines:
+            raise ValueError(f"Duplicate line id {line_id!r}")
+        return line_id
+
+    def apply(self, compute: Compute, add: Iterable[Dict[str, Any]] = (),
+              update: Iterable[Dict[str, Any]] = (), remove: Iterable[Any] = ()) -> List[str]:
+        """
+        Apply a delta and re-price only the lines whose key changed.
+
+        The session is left unchanged if the delta is invalid or compute raises.
+
+        Args:
+            compute: Prices a list of bond_data, returning results in order
+            add: New lines (bond_data; an optional 'line' field sets the id)
+            update: {'line': id, <fields to change>} per changed line
+            remove: Line ids to drop
+
+        Returns:
+            Ids of the lines whose result changed (priced or re-weighted)
+
+        Raises:
+            KeyError: update/remove names an unknown line
+            ValueError: add repeats an existing line id
+        """
+        lines = OrderedDict(self.lines)
+        removed = [str(line_id) for line_id in remove]
+        for line_id in removed:
+            del lines[line_id]
+
+        touched: List[str] = []
+        for change in update:
+            change = dict(change)
+            line_id = str(change.pop(LINE_ID_FIELD, None))
+            bond_data = dict(lines[line_id])
+            bond_data.update(change)
+            lines[line_id] = bond_data
+            touched.append(line_id)
+        for bond_data in add:
+            bond_data = dict(bond_data)
+            line_id = self._new_line_id(lines, bond_data)
+            bond_data.pop(LINE_ID_FIELD, None)
+            lines[line_id] = bond_data
+            touched.append(line_id)
+        touched = list(dict.fromkeys(touched))
+
+        # A removed id added back in the same delta is priced afresh
+        previous_keys = {line_id: self._keys.get(line_id) for line_id in touched if line_id not in removed}
+        dirty = [line_id for line_id in touched if previous_keys.get(line_id) != self.line_key(lines[line_id])]
+        results = compute([lines[line_id] for line_id in dirty]) if dirty else []
+
+        self.lines = lines
+        for line_id in removed:
+            self._forget(line_id)
+        for line_id, result in zip(dirty, results):
+            self._store(line_id, result)
+        self.computed += len(dirty)
+        dirty_ids = set(dirty)
+        reweighted = [line_id for line_id in touched if line_id not in dirty_ids]
+        for line_id in reweighted:
+            result = dict(self.results[line_id])
+            result['weighting'] = _weighting(lines[line_id])
+            self._store(line_id, result)
+        self.reused += len(reweighted)
+
+        self.last_used = time.monotonic()
+        return dirty + reweighted
+
+    def _store(self, line_id: str, result: Dict[str, Any]):
+        previous = self.results.get(line_id)
+        if previous is not None:
+            self.metrics.remove(previous)
+        self.results[line_id] = result
+        self.metrics.add(result)
+        self._keys[line_id] = self.line_key(self.lines[line_id])
+        size = _estimate_bytes(self.lines[line_id], result)
+        self.size_bytes += size - self._sizes.get(line_id, 0)
+        self._sizes[line_id] = size
+
+    def _forget(self, line_id: str):
+        result = self.results.pop(line_id, None)
+        if result is not None:
+            self.metrics.remove(result)
+        self._keys.pop(line_id, None)
+        self.size_bytes -= self._sizes.pop(line_id, 0)
+
+    def ordered_results(self, line_ids: Optional[Iterable[str]] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """(line id, result) pairs in portfolio order, optionally only for line_ids."""
+        wanted = None if line_ids is None else set(line_ids)
+        return [(line_id, self.results[line_id]) for line_id in self.lines
+                if (wanted is None or line_id in wanted) and line_id in self.results]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'session_id': self.session_id,
+            'settlement_date': self.settlement_date,
+            'lines': len(self.lines),
+            'computed': self.computed,
+            'reused': self.reused,
+            'size_bytes': self.size_bytes
+        }
+
+
+class PortfolioSessionStore:
+    """Sessions by id with idle expiry and an LRU memory budget."""
+
+    def __init__(self, ttl_seconds: float = PORTFOLIO_SESSION_TTL_SECONDS,
+                 max_bytes: int = int(PORTFOLIO_SESSION_MAX_MB * 1024 * 1024)):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._sessions: 'OrderedDict[str, PortfolioSession]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def create(self, settlement_date: str, settlement_days: int, lines: Iterable[Dict[str, Any]],
+               compute: Compute) -> PortfolioSession:
+        """Price a full portfolio into a new session and register it."""
+        session = PortfolioSession(settlement_date, settlement_days)
+        session.apply(compute, add=lines)
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self.created += 1
+            self._expire_locked()
+            self._evict_locked(keep=session.session_id)
+        logger.info(f"🗂️ Portfolio session {session.session_id}: {len(session.lines)} lines, "
+                    f"{session.size_bytes / 1024:.0f}KB")
+        return session
+
+    def get(self, session_id: str) -> PortfolioSession:
+        """Live session by id (marks it recently used)."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or self._is_expired(session):
+                if session is not None:
+                    del self._sessions[session_id]
+                    self.expired += 1
+                raise SessionNotFound(session_id)
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def apply(self, session_id: str, compute: Compute, **delta) -> Tuple[PortfolioSession, List[str]]:
+        """Apply a delta to a session (see PortfolioSession.apply), then re-check the budget."""
+        session = self.get(session_id)
+        with session.lock:
+            changed = session.apply(compute, **delta)
+        with self._lock:
+            self._evict_locked(keep=session_id)
+        return session, changed
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _is_expired(self, session: PortfolioSession) -> bool:
+        return time.monotonic() - session.last_used > self.ttl_seconds
+
+    def _expire_locked(self):
+        for session_id in [sid for sid, session in self._sessions.items() if self._is_expired(session)]:
+            del self._sessions[session_id]
+            self.expired += 1
+
+    def _evict_locked(self, keep: Optional[str] = None):
+        total = sum(session.size_bytes for session in self._sessions.values())
+        for session_id in list(self._sessions):
+            if total <= self.max_bytes:
+                break
+            if session_id == keep:
+                continue
+            total -= self._sessions.pop(session_id).size_bytes
+            self.evicted += 1
+            logger.info(f"🗂️ Evicted portfolio session {session_id} (memory budget)")
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for /health."""
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'lines': sum(len(session.lines) for session in self._sessions.values()),
+                'size_mb': round(sum(session.size_bytes for session in self._sessions.values()) / (1024 * 1024), 2),
+                'max_mb': round(self.max_bytes / (1024 * 1024), 2),
+                'ttl_seconds': self.ttl_seconds,
+                'created': self.created,
+                'expired': self.expired,
+                'evicted': self.evicted
+            }
+
+
+_store = PortfolioSessionStore()
+
+
+def get_portfolio_session_store() -> PortfolioSessionStore:
+    """Return the process-wide session store."""
+    return _store
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Portfolio Streaming
+===================
+
+Streaming bodies for /api/v1/portfolio/analysis.
+
+The buffered response keeps every bond's result, formats them all and
+serializes one document at the end, so memory and time-to-first-byte grow
+with the portfolio. In streaming mode (Accept: application/x-ndjson or
+text/csv, or ?stream=ndjson|csv) each formatted bond is written as soon as
+its block is priced, and the portfolio aggregates follow as a trailer:
+
+- NDJSON: one {"index": i, ...YAS fields} object per line, then a final
+  {"portfolio_metrics": {...}, "metadata": {...}} line
+- CSV: a header and one row per bond, a blank line, then the portfolio
+  metrics as a second header/row pair
+
+Aggregates are running weighted sums (RunningPortfolioMetrics), so nothing
+but the current block is held; the buffered response uses the same class.
+"""
+
+import csv
+import io
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+CSV_MIMETYPE = 'text/csv'
+
+# YAS bond fields, in format_bond_response order
+CSV_BOND_FIELDS = ['index', 'isin', 'name', 'yield', 'duration', 'spread', 'accrued_interest', 'price', 'country', 'status']
+# format_portfolio_metrics fields
+CSV_METRIC_FIELDS = ['portfolio_yield', 'portfolio_duration', 'portfolio_spread', 'total_bonds', 'success_rate']
+
+
+def stream_format(accept: Optional[str], requested: Optional[str] = None) -> Optional[str]:
+    """
+    'ndjson', 'csv' or None (buffered JSON) from ?stream= or the Accept header.
+
+    An explicit ?stream= wins; application/json in Accept alone never streams.
+    """
+    if requested:
+        requested = requested.lower()
+        return requested if requested in ('ndjson', 'csv') else None
+    accept = (accept or '').lower()
+    if NDJSON_MIMETYPE in accept:
+        return 'ndjson'
+    if CSV_MIMETYPE in accept:
+        return 'csv'
+    return None
+
+
+class RunningPortfolioMetrics:
+    """Weighted portfolio yield / duration / spread maintained one bond at a time."""
+
+    __slots__ = ('total_bonds', 'successful_bonds', 'total_weight', 'weighted_yield',
+                 'weighted_duration', 'weighted_spread')
+
+    def __init__(self):
+        self.total_bonds = 0
+        self.successful_bonds = 0
+        self.total_weight = 0.0
+        self.weighted_yield = 0.0
+        self.weighted_duration = 0.0
+        self.weighted_spread = 0.0
+
+    def add(self, result: Dict[str, Any]):
+        """Count a process_bond_portfolio result; successful weighted bonds enter the sums."""
+        self._apply(result, 1)
+
+    def remove(self, result: Dict[str, Any]):
+        """Take back a result previously added (portfolio sessions replace dirty lines)."""
+        self._apply(result, -1)
+
+    def _apply(self, result: Dict[str, Any], sign: int):
+        self.total_bonds += sign
+        if ('error' in result or result.get('ytm') is None or result.get('duration') is None
+                or result.get('weighting') is None):
+            return
+        weight = float(result['weighting'])
+        self.successful_bonds += sign
+        self.total_weight += sign * weight
+        self.weighted_yield += sign * float(result['ytm'] or 0) * weight
+        self.weighted_duration += sign * float(result['duration'] or 0) * weight
+        self.weighted_spread += sign * float(result.get('spread') or 0) * weight
+
+    def as_metrics(self) -> Dict[str, Any]:
+        """portfolio_metrics as the buffered response reports them ({} without weight)."""
+        if not self.successful_bonds or self.total_weight <= 0:
+            return {}
+        return {
+            'portfolio_yield': self.weighted_yield / self.total_weight,
+            'portfolio_duration': self.weighted_duration / self.total_weight,
+            'portfolio_spread': self.weighted_spread / self.total_weight,
+            'total_bonds': self.total_bonds,
+            'successful_bonds': self.successful_bonds,
+            'failed_bonds': self.total_bonds - self.successful_bonds,
+            'success_rate': round(self.successful_bonds / self.total_bonds * 100, 1),
+            'total_weight': self.total_weight
+        }
+
+
+def ndjson_stream(results: Iterable[Dict[str, Any]], format_bond: Callable[[Dict[str, Any]], Dict[str, Any]],
+                  trailer: Callable[[RunningPortfolioMetrics], Dict[str, Any]]) -> Iterator[str]:
+    """
+    One JSON line per bond, then the trailer.
+
+    Args:
+        results: process_bond_portfolio results in input order (any iterable)
+        format_bond: Result -> response record (e.g. YAS formatting)
+        trailer: Final metrics -> trailer record
+
+    A failure while pricing ends the stream with an {"status": "error"} line.
+    """
+    metrics = RunningPortfolioMetrics()
+    try:
+        for index, result in enumerate(results):
+            metrics.add(result)
+            yield json.dumps(dict(index=index, **format_bond(result)), default=str) + '\n'
+    except Exception as e:
+        yield json.dumps({'status': 'error', 'error': f"Portfolio processing error: {e}"}) + '\n'
+        return
+    yield json.dumps(trailer(metrics), default=str) + '\n'
+
+
+def csv_stream(results: Iterable[Dict[str, Any]], format_bond: Callable[[Dict[str, Any]], Dict[str, Any]],
+               trailer: Callable[[RunningPortfolioMetrics], Dict[str, Any]]) -> Iterator[str]:
+    """
+    CSV rows per bond, then a blank line and the portfolio metrics row.
+
+    trailer()'s 'portfolio_metrics' entry fills the metrics row. A failure
+    while pricing ends the stream with an "error,<message>" row.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_BOND_FIELDS, extrasaction='ignore', lineterminator='\n')
+
+    def flush() -> str:
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    metrics = RunningPortfolioMetrics()
+    writer.writeheader()
+    yield flush()
+    try:
+        for index, result in enumerate(results):
+            metrics.add(result)
+            writer.writerow(dict(index=index, **format_bond(result)))
+            yield flush()
+    except Exception as e:
+        csv.writer(buffer, lineterminator='\n').writerow(['error', f"Portfolio processing error: {e}"])
+        yield flush()
+        return
+
+    summary = trailer(metrics).get('portfolio_metrics') or {}
+    buffer.write('\n')
+    metric_writer = csv.DictWriter(buffer, fieldnames=CSV_METRIC_FIELDS, extrasaction='ignore', lineterminator='\n')
+    metric_writer.writeheader()
+    metric_writer.writerow(summary)
+    yield flush()
@@ -7,6 +7,7 @@ Optimized calculation engine that only computes requested metrics
 import logging
 from typing import Dict, Any, List, Optional, Set
 from bond_master_hierarchy_enhanced import calculate_bond_master
+from metric_planner import METRIC_DEPENDENCIES, get_required_calculations
 
 logger = logging.getLogger(__name__)
 
@@ -47,40 +48,6 @@ AVAILABLE_METRICS = {
     "settlement_date",          # Settlement date used
 }
 
-# Metric dependencies (what needs to be calculated first)
-METRIC_DEPENDENCIES = {
-    "duration": ["ytm"],
-    "duration_semi": ["ytm_semi"],
-    "duration_annual": ["ytm_annual"],
-    "macaulay_duration": ["ytm"],
-    "macaulay_duration_semi": ["ytm_semi"],
-    "macaulay_duration_annual": ["ytm_annual"],
-    "convexity": ["ytm"],
-    "pvbp": ["ytm"],
-    "spread": ["ytm"],
-    "z_spread": ["ytm"],
-    "dirty_price": ["clean_price", "accrued_interest"],
-}
-
-def get_required_calculations(requested_metrics: List[str]) -> Set[str]:
-    """
-    Determine all metrics that need to be calculated based on dependencies
-    """
-    required = set(requested_metrics)
-    
-    # Add dependencies recursively
-    added = True
-    while added:
-        added = False
-        for metric in list(required):
-            if metric in METRIC_DEPENDENCIES:
-                for dep in METRIC_DEPENDENCIES[metric]:
-                    if dep not in required:
-                        required.add(dep)
-                        added = True
-    
-    return required
-
 def calculate_selective_metrics(
     isin: Optional[str] = None,
     description: Optional[str] = None,
@@ -127,14 +94,14 @@ def calculate_selective_metrics(
     logger.info(f"Requested metrics: {requested_metrics}")
     logger.info(f"Required calculations (with dependencies): {required_calculations}")
     
-    # For now, we'll calculate all and filter
-    # TODO: Implement actual selective calculation in the underlying engine
+    # The engine's metric planner skips stages none of the requested metrics need
     full_result = calculate_bond_master(
         isin=isin,
         description=description,
         price=price,
         settlement_date=settlement_date,
-        overrides=overrides
+        overrides=overrides,
+        requested_metrics=requested_metrics
     )
     
     # Handle error cases
@@ -197,7 +164,9 @@ def calculate_selective_metrics(
     # Build minimal response
     response = {
         'status': 'success',
-        'analytics': filtered_analytics
+        'analytics': filtered_analytics,
+        'stage_timings_ms': full_result.get('stage_timings_ms'),
+        'stages_skipped': full_result.get('stages_skipped')
     }
     
     # Add bond info if it's in the full result (for context)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Startup Pipeline
+================
+
+Ordered, timed warmup phases for the API process.
+
+The API runs its pipeline at import: database fetch/validation, read-only
+pools, reference and ticker indexes, Treasury history, Universal Parser,
+the default settlement date's curve and one engine calculation. Under
+gunicorn --preload (gunicorn.conf.py) that import happens once in the
+master, so workers fork with every index, parser and curve already built and
+share them copy-on-write instead of each paying the cold start.
+
+Each phase records its duration in milliseconds and whether it succeeded.
+A failing phase is logged and the pipeline moves on (the API degrades the
+same way it did before warmup existed), except for required phases, which
+stop the run; the readiness flag only turns on when a run completes.
+
+/ready reports stats() and answers 503 until then.
+"""
+
+import os
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Imported before the heavy modules, so begin() can time the import phase
+_IMPORTS_STARTED = time.perf_counter()
+
+
+class StartupPipeline:
+    """Per-phase timings and readiness for one process (inherited by forked workers)."""
+
+    def __init__(self):
+        self.phases: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self.ready = False
+        self.runs = 0
+        self.pid = os.getpid()
+        self.ready_ms: Optional[float] = None
+
+    def begin(self):
+        """Start a run; the first run also records how long imports took."""
+        if not self.runs:
+            self._record('imports', (time.perf_counter() - _IMPORTS_STARTED) * 1000, 'ok')
+        self.runs += 1
+
+    def run(self, name: str, step: Callable[[], Any], required: bool = False) -> Any:
+        """
+        Run one phase and record its timing.
+
+        Args:
+            name: Phase name reported by stats()
+            step: Callable doing the work; a False return counts as failure
+            required: Failure stops the run (the caller returns not-ready)
+
+        Returns:
+            The step's result, or None if it raised
+        """
+        started = time.perf_counter()
+        try:
+            result = step()
+            status = 'failed' if result is False else 'ok'
+            error = None
+        except Exception as e:
+            result, status, error = None, 'failed', str(e)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._record(name, elapsed_ms, status, error)
+
+        if status == 'ok':
+            logger.info(f"⏱️ Startup phase {name}: {elapsed_ms:.0f}ms")
+        elif required:
+            logger.error(f"❌ Startup phase {name} failed after {elapsed_ms:.0f}ms: {error or 'not available'}")
+        else:
+            logger.warning(f"⚠️ Startup phase {name} failed after {elapsed_ms:.0f}ms: {error or 'not available'}")
+        return result
+
+    def _record(self, name: str, elapsed_ms: float, status: str, error: Optional[str] = None):
+        self.phases[name] = {'ms': round(elapsed_ms, 1), 'status': status}
+        if error:
+            self.phases[name]['error'] = error
+
+    def mark_ready(self):
+        """Finish the run and turn readiness on."""
+        self.ready_ms = round((time.perf_counter() - _IMPORTS_STARTED) * 1000, 1)
+        self.ready = True
+        timings = ', '.join(f"{name} {phase['ms']:.0f}ms" for name, phase in self.phases.items())
+        logger.info(f"🟢 Warm and ready in {self.ready_ms:.0f}ms ({timings})")
+
+    def stats(self) -> Dict[str, Any]:
+        """Readiness and per-phase timings for /ready and /health."""
+        return {
+            'ready': self.ready,
+            'ready_ms': self.ready_ms,
+            'runs': self.runs,
+            'warmed_in_pid': self.pid,
+            'serving_pid': os.getpid(),
+            'failed_phases': [name for name, phase in self.phases.items() if phase['status'] != 'ok'],
+            'phases': self.phases
+        }
+
+
+_pipeline = StartupPipeline()
+
+
+def get_startup_pipeline() -> StartupPipeline:
+    """Return the process-wide startup pipeline."""
+    return _pipeline
@@ -7,19 +7,24 @@ Synchronizes local SQLite databases with GCS, handling:
 - Treasury yield updates (daily changes)
 - Bond data additions
 - Conflict resolution
+
+Tables listed in database_changesets.SYNC_TABLES sync row by row: local
+changes since the last sync are published as a small changeset object and
+other publishers' changesets are applied locally, so a sync moves the rows
+that changed rather than the database. Other databases are compared by
+checksum against the object metadata and uploaded whole only when they
+differ. --compact uploads a fresh base and folds the changesets into it.
 """
 
-import os
 import sqlite3
 import hashlib
-import json
-import tempfile
-import shutil
 from datetime import datetime
 from pathlib import Path
 from google.cloud import storage
 import logging
-import subprocess
+
+from database_changesets import SYNC_TABLES, GCSChangesetStore, fold_changesets, pull_changes, sync_changes
+from gcs_database_fetcher import file_checksums
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -33,6 +38,7 @@ class DatabaseSync:
         self.project_id = project_id
         self.storage_client = storage.Client(project=project_id)
         self.bucket = self.storage_client.bucket(bucket_name)
+        self.changesets = GCSChangesetStore(self.bucket)
         
         # Databases to sync
         self.databases = [
@@ -41,12 +47,8 @@ class DatabaseSync:
             'bloomberg_index.db'
         ]
         
-        # Tables that get updated frequently
-        self.update_tables = {
-            'bonds_data.db': ['tsys_enhanced', 'treasury_securities'],
-            'validated_quantlib_bonds.db': [],
-            'bloomberg_index.db': []
-        }
+        # Tables that get updated frequently (table -> key column), synced row by row
+        self.update_tables = SYNC_TABLES
     
     def get_file_hash(self, file_path: str) -> str:
         """Calculate SHA256 hash of a file."""
@@ -108,132 +110,67 @@ class DatabaseSync:
         blob.upload_from_filename(db_path)
         logger.info(f"Uploaded {db_name} to GCS")
     
-    def merge_treasury_updates(self, local_db: str, cloud_db: str) -> str:
-        """Merge Treasury yield updates from cloud into local."""
-        merged_db = local_db + '.merged'
-        shutil.copy2(local_db, merged_db)
-        
-        try:
-            # Attach cloud database
-            with sqlite3.connect(merged_db) as conn:
-                conn.execute(f"ATTACH DATABASE '{cloud_db}' AS cloud")
-                
-                # Merge tsys_enhanced table - take the most recent data
-                conn.execute("""
-                    INSERT OR REPLACE INTO tsys_enhanced
-                    SELECT * FROM cloud.tsys_enhanced
-                    WHERE Date NOT IN (SELECT Date FROM tsys_enhanced)
-                    OR Date IN (
-                        SELECT c.Date 
-                        FROM cloud.tsys_enhanced c
-                        JOIN tsys_enhanced l ON c.Date = l.Date
-                        WHERE c.updated_at > l.updated_at
-                        OR (c.updated_at IS NULL AND l.updated_at IS NULL)
-                    )
-                """)
-                
-                # Merge treasury_securities if it exists
-                try:
-                    conn.execute("""
-                        INSERT OR REPLACE INTO treasury_securities
-                        SELECT * FROM cloud.treasury_securities
-                        WHERE cusip NOT IN (SELECT cusip FROM treasury_securities)
-                        OR updated_at > (SELECT updated_at FROM treasury_securities WHERE cusip = cloud.treasury_securities.cusip)
-                    """)
-                except:
-                    pass
-                
-                conn.commit()
-                logger.info("Merged Treasury updates from cloud")
-            
-            return merged_db
-            
-        except Exception as e:
-            logger.error(f"Merge failed: {e}")
-            os.remove(merged_db)
-            raise
-    
-    def vacuum_database(self, db_path: str):
-        """Run VACUUM on database to ensure all changes are flushed."""
+    def checkpoint_database(self, db_path: str):
+        """Fold the WAL into the main file so its checksum reflects every change."""
         try:
             with sqlite3.connect(db_path) as conn:
-                # Checkpoint WAL file to ensure all changes are in main database
-                conn.execute("PRAGMA wal_checkpoint(FULL)")
-                # Vacuum to rebuild database and remove unused space
-                conn.execute("VACUUM")
-                logger.info(f"Vacuumed {db_path}")
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
         except Exception as e:
-            logger.warning(f"Could not vacuum {db_path}: {e}")
+            logger.warning(f"Could not checkpoint {db_path}: {e}")
     
     def sync_database(self, db_name: str):
         """Sync a single database with GCS."""
         local_path = Path(db_name)
+        tables = self.update_tables.get(db_name)
         
         if not local_path.exists():
             # Local doesn't exist, download from cloud
             logger.info(f"Local {db_name} not found, downloading from GCS")
             self.download_from_gcs(db_name, str(local_path))
+            if tables:
+                pull_changes(self.changesets, str(local_path), db_name)
             return
         
-        # Vacuum local database before syncing to ensure consistency
-        logger.info(f"Preparing {db_name} for sync...")
-        self.vacuum_database(str(local_path))
-        
-        # Download cloud version to temp file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.db') as tmp:
-            cloud_path = tmp.name
+        if tables:
+            # Row-level: publish local changes, apply everyone else's
+            for table in tables:
+                try:
+                    meta = self.get_table_metadata(str(local_path), table)
+                    logger.info(f"  {table}: {meta['row_count']} rows, last update: {meta['last_update']}")
+                except Exception as e:
+                    logger.warning(f"    Could not read {table}: {e}")
+            report = sync_changes(self.changesets, str(local_path), db_name, tables)
+            pushed = f"changeset {report['pushed']}" if report['pushed'] else "nothing"
+            logger.info(f"{db_name}: pushed {pushed}, pulled {report['pulled']} changeset(s) "
+                        f"({report['rows_pulled']} rows)")
+            return
         
-        try:
-            # Try to download from GCS
-            self.download_from_gcs(db_name, cloud_path)
-            
-            # Compare hashes
-            local_hash = self.get_file_hash(str(local_path))
-            cloud_hash = self.get_file_hash(cloud_path)
-            
-            if local_hash == cloud_hash:
-                logger.info(f"{db_name} is already in sync")
-                return
-            
-            # Check if this database has updateable tables
-            if db_name in self.update_tables and self.update_tables[db_name]:
-                logger.info(f"{db_name} has differences, merging updates...")
-                
-                # Show what's different
-                for table in self.update_tables[db_name]:
-                    try:
-                        local_meta = self.get_table_metadata(str(local_path), table)
-                        cloud_meta = self.get_table_metadata(cloud_path, table)
-                        
-                        logger.info(f"  {table}:")
-                        logger.info(f"    Local: {local_meta['row_count']} rows, last update: {local_meta['last_update']}")
-                        logger.info(f"    Cloud: {cloud_meta['row_count']} rows, last update: {cloud_meta['last_update']}")
-                    except Exception as e:
-                        logger.warning(f"    Could not compare {table}: {e}")
-                
-                # Merge updates
-                merged_path = self.merge_treasury_updates(str(local_path), cloud_path)
-                
-                # Replace local with merged
-                shutil.move(merged_path, str(local_path))
-                logger.info(f"Merged {db_name} successfully")
-                
-                # Upload merged version back to cloud
-                self.upload_to_gcs(str(local_path), db_name)
-            else:
-                # No updateable tables, ask user what to do
-                logger.warning(f"{db_name} has differences but no merge strategy")
-                logger.info(f"  Local hash: {local_hash[:8]}...")
-                logger.info(f"  Cloud hash: {cloud_hash[:8]}...")
-                
-                # For now, prefer local (assuming local has latest bond additions)
-                logger.info(f"  Uploading local version to cloud")
-                self.upload_to_gcs(str(local_path), db_name)
+        # No row-level tables: compare checksums with the object's metadata, no download
+        self.checkpoint_database(str(local_path))
+        blob = self.bucket.get_blob(db_name)
+        local_md5 = file_checksums(str(local_path), want_crc32c=False)['md5']
+        if blob is not None and blob.md5_hash == local_md5:
+            logger.info(f"{db_name} is already in sync")
+            return
         
-        finally:
-            # Clean up temp file
-            if os.path.exists(cloud_path):
-                os.remove(cloud_path)
+        # For now, prefer local (assuming local has latest bond additions)
+        logger.warning(f"{db_name} differs from GCS and has no row-level sync")
+        logger.info(f"  Uploading local version to cloud")
+        self.upload_to_gcs(str(local_path), db_name)
+    
+    def compact(self, db_name: str):
+        """
+        Upload the whole local database as the new GCS base and drop the
+        changesets it already contains.
+        """
+        local_path = str(Path(db_name))
+        tables = self.update_tables.get(db_name)
+        if tables:
+            sync_changes(self.changesets, local_path, db_name, tables)
+        self.checkpoint_database(local_path)
+        self.upload_to_gcs(local_path, db_name)
+        folded = fold_changesets(self.changesets, local_path, db_name) if tables else 0
+        logger.info(f"Compacted {db_name}: {folded} changeset(s) folded into the base")
     
     def sync_all(self):
         """Sync all databases."""
@@ -260,12 +197,17 @@ def main():
     parser.add_argument('--bucket', default='xtrillion-db-prod', help='GCS bucket name')
     parser.add_argument('--project', default='future-footing-414610', help='GCP project ID')
     parser.add_argument('--database', help='Sync only specific database')
+    parser.add_argument('--compact', action='store_true',
+                        help='Upload the whole database as the new base and drop its changesets')
     
     args = parser.parse_args()
     
     syncer = DatabaseSync(bucket_name=args.bucket, project_id=args.project)
     
-    if args.database:
+    if args.compact:
+        for db_name in ([args.database] if args.database else syncer.databases):
+            syncer.compact(db_name)
+    elif args.database:
         syncer.sync_database(args.database)
     else:
         syncer.sync_all()
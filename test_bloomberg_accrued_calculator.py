@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test the columnar Bloomberg differential job against a small all_bonds table
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bloomberg_accrued_calculator import BloombergAccruedCalculator, BENCHMARK_TABLE, BENCHMARK_COLUMNS
+
+# Positional layout of all_bonds, including the duplicate par columns
+ALL_BONDS_COLUMNS = ['isin', 'description', 'cpn', 'price', 'ytw', 'oad', 'par val', 'mv (usd)', 'weight',
+                     'oas', 'index rating (string)', 'country', 'par_val', 'ticker', 'sector', 'maturity']
+
+ROWS = [
+    ('US1', 'SATS 10 ¾ 11/30/29', None, 101.5, 9.1, 3.2, 1000.0, 1050.0, 0.1, 450.0, '(BB)', 'US', 1000.0, 'SATS', 'Tech', '2029-11-30'),
+    ('US2', 'MEDIND 3 ⅜ 04/01/29', None, 95.0, None, 3.0, 2000.0, 1900.0, None, None, None, 'US', 2000.0, 'MEDIND', 'Health', '2029-04-01'),
+    ('MX1', 'PEMEX 6 ½ 06/13/27', None, 98.0, 7.0, 1.9, 0.0, 500.0, 0.2, 300.0, 'BBB', 'MX', 0.0, 'PEMEX', 'Energy', '2027-06-13'),
+    ('MX2', 'PEMEX 6 ½ 06/13/27', None, 98.0, 7.0, 1.9, 500.0, None, 0.2, 300.0, 'BBB', 'MX', 500.0, 'PEMEX', 'Energy', '2027-06-13'),
+    ('MX3', 'PEMEX 6 ½ 06/13/27', None, 99.0, 7.1, 1.9, 400.0, 404.0, 0.3, 310.0, 'BBB', 'MX', 400.0, 'PEMEX', 'Energy', '2027-06-13'),
+]
+
+
+def _source_db(directory, rows):
+    path = os.path.join(directory, 'bloomberg_index.db')
+    conn = sqlite3.connect(path)
+    columns = ', '.join(f'"{name}"' for name in ALL_BONDS_COLUMNS)
+    conn.execute(f"CREATE TABLE all_bonds ({columns})")
+    conn.executemany(f"INSERT INTO all_bonds VALUES ({', '.join('?' * len(ALL_BONDS_COLUMNS))})", rows)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_columnar_benchmarks():
+    """Differentials, coupons and skipped rows match the per-row formula; one timestamp per run"""
+    print("🧪 Testing columnar benchmark calculation")
+    with tempfile.TemporaryDirectory() as directory:
+        calculator = BloombergAccruedCalculator(_source_db(directory, ROWS))
+        results = calculator.process_all_bonds(chunk_size=2)
+        assert len(results) == 3 and results.columns['isin'] == ['US1', 'US2', 'MX3']
+        assert calculator.stats['calculation_errors'] == 2 and calculator.stats['total_bonds'] == 5
+        assert results.columns['bloomberg_differential_per_million'] == [
+            calculator.calculate_bloomberg_differential(mv, par) for mv, par in ((1050.0, 1000.0), (1900.0, 2000.0), (404.0, 400.0))]
+        assert results.columns['coupon'] == [10.75, 3.375, 6.5]
+        assert results.columns['rating'] == ['BB', '', 'BBB'] and results.columns['ytw'][1] is None
+        assert len(set(results.columns['calculation_timestamp'])) == 1
+
+        calculator.create_validation_table(results)
+        conn = sqlite3.connect(calculator.source_db_path)
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({BENCHMARK_TABLE})")]
+        stored = conn.execute(f"SELECT isin, coupon, bloomberg_differential_per_million FROM {BENCHMARK_TABLE}").fetchall()
+        conn.close()
+        assert columns == [name for name, _ in BENCHMARK_COLUMNS]
+        assert stored == [('US1', 10.75, 50000.0), ('US2', 3.375, -50000.0), ('MX3', 6.5, 10000.0)]
+
+        summary = calculator.generate_validation_summary(results)
+        assert summary['total_benchmarks'] == 3 and summary['countries'] == {'US': 2, 'MX': 1}
+    print(f"   ✅ {len(results)} benchmarks, {calculator.stats['calculation_errors']} skipped")
+
+
+def test_full_index_throughput():
+    """A 100k-row index processed and written back in a few seconds"""
+    print("🧪 Testing full-index throughput")
+    rows = [(f'ID{i}',) + ROWS[i % len(ROWS)][1:] for i in range(100000)]
+    with tempfile.TemporaryDirectory() as directory:
+        calculator = BloombergAccruedCalculator(_source_db(directory, rows))
+        started = time.time()
+        results = calculator.process_all_bonds()
+        calculator.create_validation_table(results)
+        elapsed = time.time() - started
+        assert len(results) == 60000 and calculator.stats['bonds_per_second'] > 0
+        assert elapsed < 10.0, f"{elapsed:.1f}s"
+    print(f"   ✅ 100,000 rows in {elapsed:.2f}s ({calculator.stats['bonds_per_second']:,.0f} bonds/s processing)")
+
+
+if __name__ == "__main__":
+    test_columnar_benchmarks()
+    test_full_index_throughput()
+    print("\n✅ Bloomberg accrued calculator tests complete")
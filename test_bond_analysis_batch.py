@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test the /api/v1/bond/analysis/batch endpoint
+"""
+
+import os
+import sys
+import json
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from google_analysis10_api import app, BATCH_TARGET_MS_PER_1000
+    API_AVAILABLE = True
+except ImportError as e:
+    print(f"⏭️ API dependencies not available: {e}")
+    API_AVAILABLE = False
+
+HEADERS = {'X-API-Key': 'gax10_test_9r4t7w2k5m8p1z6x3v'}
+
+
+def test_batch_endpoint_per_item_errors():
+    """A bad item returns its own error without failing the batch"""
+    print("🧪 Testing batch per-item errors")
+    if not API_AVAILABLE:
+        print("   ⏭️ Skipped")
+        return
+
+    client = app.test_client()
+    response = client.post('/api/v1/bond/analysis/batch', json={'bonds': [
+        {'description': 'T 3 15/08/52', 'price': 71.66, 'settlement_date': '2025-06-30'},
+        {'price': 99.0},
+        {'description': 'T 3 15/08/52', 'price': 72.0, 'settlement_date': '2025-06-30'},
+    ]}, headers=HEADERS)
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert [item['index'] for item in payload['results']] == [0, 1, 2]
+    assert payload['results'][1]['status'] == 'error'
+    assert payload['metadata']['bond_count'] == 3
+    assert payload['metadata']['target_ms_per_1000_bonds'] == BATCH_TARGET_MS_PER_1000
+    assert 'hit_rate' not in payload['results'][0]['metadata']['instrument_cache']
+    assert 'hit_rate' in payload['metadata']['instrument_cache']
+    print(f"   ✅ {payload['metadata']['successful']}/3 priced, bad item isolated")
+
+
+def test_batch_endpoint_streams_ndjson():
+    """stream=true returns one NDJSON line per bond plus a summary line"""
+    print("🧪 Testing batch NDJSON streaming")
+    if not API_AVAILABLE:
+        print("   ⏭️ Skipped")
+        return
+
+    client = app.test_client()
+    bonds = [{'description': 'T 3 15/08/52', 'price': 71.0 + i * 0.01, 'settlement_date': '2025-06-30'}
+             for i in range(20)]
+    start = time.time()
+    response = client.post('/api/v1/bond/analysis/batch', json={'bonds': bonds, 'stream': True},
+                           headers=HEADERS)
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+    elapsed_ms = (time.time() - start) * 1000
+
+    assert response.mimetype == 'application/x-ndjson'
+    assert sorted(line['index'] for line in lines[:-1]) == list(range(20))
+    assert lines[-1]['summary']['bond_count'] == 20
+    print(f"   ✅ 20 bonds streamed in {elapsed_ms:.0f}ms "
+          f"({lines[-1]['summary']['ms_per_1000_bonds']}ms per 1,000)")
+
+    response = client.post('/api/v1/bond/analysis/batch', json={'bonds': bonds[:2], 'stream': 'false'},
+                           headers=HEADERS)
+    assert response.mimetype == 'application/json' and len(response.get_json()['results']) == 2
+
+
+if __name__ == "__main__":
+    test_batch_endpoint_per_item_errors()
+    test_batch_endpoint_streams_ndjson()
+    print("\n✅ Batch analysis tests complete")
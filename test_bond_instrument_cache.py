@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the process-wide QuantLib instrument cache used by the calculation engine
+"""
+
+import os
+import sys
+from datetime import date
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bond_instrument_cache import BondInstrumentCache
+
+try:
+    import QuantLib as ql
+    import google_analysis10 as ga10
+    QUANTLIB_AVAILABLE = True
+except ImportError as e:
+    print(f"⏭️ QuantLib not available: {e}")
+    QUANTLIB_AVAILABLE = False
+
+
+class _Start:
+    """Stand-in for a ql.Date schedule start"""
+    def __init__(self, serial):
+        self.serial = serial
+
+    def serialNumber(self):
+        return self.serial
+
+
+KEY = (0.03, 55000, 2, '30/360', 'Following', False, 0)
+
+
+def test_reuse_respects_schedule_start():
+    """Cached instruments are reused only when their schedule starts early enough"""
+    print("🧪 Testing schedule-start reuse rule")
+    cache = BondInstrumentCache(max_size=8)
+
+    assert cache.get(KEY, _Start(40000)) is None
+    cache.put(KEY, _Start(40000), 'instrument')
+    assert cache.get(KEY, _Start(40000)) == 'instrument'
+    assert cache.get(KEY, _Start(40200)) == 'instrument'   # later settlement
+    assert cache.get(KEY, _Start(39800)) is None           # earlier settlement needs a rebuild
+    cache.put(KEY, _Start(39800), 'rebuilt')
+    assert cache.get(KEY, _Start(40200)) == 'rebuilt'      # rebuilt entry covers both
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (3, 2, 0.6)
+    print("   ✅ Reuse limited to covered schedule starts")
+
+
+def test_lru_eviction():
+    """The least recently used instrument is evicted at max_size"""
+    print("🧪 Testing LRU eviction")
+    cache = BondInstrumentCache(max_size=2)
+    keys = [KEY[:1] + (55000 + i,) + KEY[2:] for i in range(3)]
+
+    cache.put(keys[0], _Start(40000), 'a')
+    cache.put(keys[1], _Start(40000), 'b')
+    cache.get(keys[0], _Start(40000))          # touch a → b becomes LRU
+    cache.put(keys[2], _Start(40000), 'c')
+
+    assert cache.get(keys[1], _Start(40000)) is None
+    assert cache.get(keys[0], _Start(40000)) == 'a'
+    assert len(cache) == 2 and cache.stats()['evictions'] == 1
+
+    disabled = BondInstrumentCache(max_size=0)
+    disabled.put(KEY, _Start(40000), 'x')
+    assert len(disabled) == 0
+    print("   ✅ Bounded LRU with disable switch")
+
+
+def test_repricing_reuses_instrument_with_identical_results():
+    """Pricing the same bond twice hits the cache and matches a cold build"""
+    print("🧪 Testing engine reuse parity")
+    if not QUANTLIB_AVAILABLE:
+        print("   ⏭️ Skipped")
+        return
+
+    conventions = {'frequency': 'Semiannual', 'day_count': 'ActualActual.Bond',
+                   'business_day_convention': 'Following', 'end_of_month': False}
+    handle = ql.YieldTermStructureHandle(ql.FlatForward(ql.Date(30, 6, 2025), 0.03, ql.Actual365Fixed()))
+
+    def price(cache, settlement, clean_price):
+        return ga10.calculate_bond_metrics_with_conventions_using_shared_engine(
+            isin=None, coupon=3.0, maturity_date='2052-08-15', price=clean_price,
+            trade_date=settlement, treasury_handle=handle, default_conventions=conventions,
+            instrument_cache=cache
+        )
+
+    cache = BondInstrumentCache()
+    first = price(cache, date(2025, 6, 30), 71.66)
+    repriced = price(cache, date(2025, 7, 31), 72.10)
+    cold = price(BondInstrumentCache(), date(2025, 7, 31), 72.10)
+
+    assert not first['instrument_cached'] and repriced['instrument_cached']
+    for field in ('ytm', 'duration', 'convexity', 'accrued_interest'):
+        assert abs(repriced[field] - cold[field]) < 1e-12, field
+    print(f"   ✅ Cached reprice matches cold build (hit rate {cache.stats()['hit_rate']})")
+
+
+if __name__ == "__main__":
+    test_reuse_respects_schedule_start()
+    test_lru_eviction()
+    test_repricing_reuses_instrument_with_identical_results()
+    print("\n✅ Bond instrument cache tests complete")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test the in-memory bond reference index and the lookup paths that consult it
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bond_reference_index as bri
+import isin_lookup
+from bond_reference_index import BondReferenceIndex
+
+
+def _make_dbs(tmpdir):
+    primary = os.path.join(tmpdir, 'bonds_data.db')
+    validated = os.path.join(tmpdir, 'validated_quantlib_bonds.db')
+    bloomberg = os.path.join(tmpdir, 'bloomberg_index.db')
+    with sqlite3.connect(primary) as conn:
+        conn.execute("CREATE TABLE static (isin TEXT, coupon REAL, maturity TEXT, name TEXT, country TEXT)")
+        conn.execute("INSERT INTO static VALUES ('US71654QDF63', 6.95, '2060-01-28', 'PEMEX 6.95 01/28/60', 'MX')")
+        conn.execute("CREATE TABLE tsys_enhanced (Date TEXT, M1Y REAL)")
+    with sqlite3.connect(validated) as conn:
+        conn.execute("""CREATE TABLE validated_quantlib_bonds (isin TEXT, description TEXT, coupon REAL,
+                        maturity TEXT, day_count TEXT, business_convention TEXT, frequency TEXT)""")
+        conn.execute("""INSERT INTO validated_quantlib_bonds VALUES
+                        ('US71654QDF63', 'PEMEX 6.95 01/28/60', 6.95, '2060-01-28', 'Thirty360_BondBasis', 'Following', 'Semiannual'),
+                        ('US279158AL39', 'ECOPET 5 7/8 05/28/45', 5.875, '2045-05-28', 'Thirty360_BondBasis', 'Unadjusted', 'Semiannual')""")
+    with sqlite3.connect(bloomberg) as conn:
+        conn.execute("CREATE TABLE all_bonds (isin TEXT, description TEXT, coupon REAL, maturity TEXT, country TEXT)")
+        conn.execute("INSERT INTO all_bonds VALUES ('XS2249741674', 'GALAXY PIPELINE 3.25 09/30/40', 3.25, '2040-09-30', 'AE')")
+    return primary, validated, bloomberg
+
+
+def test_merged_record_across_sources():
+    """Fields merge in source order; conventions come from the validated DB"""
+    print("🧪 Testing merged reference records")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = _make_dbs(tmpdir)
+        index = BondReferenceIndex.build(*paths)
+
+        record = index.lookup('US71654QDF63')
+        assert record['source_db'] == 'Primary' and record['table'] == 'static'
+        assert record['coupon'] == 6.95 and record['maturity'] == '2060-01-28'
+        assert record['day_count'] == 'Thirty360_BondBasis' and record['frequency'] == 'Semiannual'
+        assert record['country'] == 'MX'
+        assert record['sources'] == ['Primary', 'Validated']
+        assert index.lookup('XS2249741674')['source_db'] == 'Bloomberg'
+        assert index.lookup('XS0000000000') is None
+        assert len(index) == 3
+        print(f"   ✅ {record}")
+
+
+def test_coupon_maturity_index():
+    """Secondary (coupon, maturity) index matches across date formats"""
+    print("🧪 Testing (coupon, maturity) → ISIN index")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index = BondReferenceIndex.build(*_make_dbs(tmpdir))
+        assert index.find_by_coupon_maturity(5.875, '2045-05-28') == ['US279158AL39']
+        assert index.find_by_coupon_maturity('5.875', '05/28/2045') == ['US279158AL39']
+        assert index.find_by_coupon_maturity(6.95, '2060-01-28', sources=('Bloomberg',)) == []
+        print("   ✅ Reverse lookups resolved")
+
+
+def test_isin_lookup_does_no_sql_when_covered():
+    """isin_lookup answers hits and misses from memory once the index is loaded"""
+    print("🧪 Testing isin_lookup uses the index first")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = _make_dbs(tmpdir)
+        original_index, original_pool = bri._index, isin_lookup.get_readonly_pool
+        try:
+            bri.load_bond_reference_index(*paths)
+
+            def no_sql(*args, **kwargs):
+                raise AssertionError("SQL used despite reference index")
+            isin_lookup.get_readonly_pool = no_sql
+
+            result = isin_lookup.lookup_isin_in_database('US279158AL39', *paths)
+            assert result['database'] == 'Validated' and result['coupon'] == 5.875
+            assert result['business_convention'] == 'Unadjusted'
+            assert isin_lookup.lookup_isin_in_database('XS0000000000', *paths) is None
+        finally:
+            bri._index, isin_lookup.get_readonly_pool = original_index, original_pool
+        print("   ✅ Zero SQL for ISIN requests")
+
+
+def test_isin_lookup_same_result_with_or_without_index():
+    """face_value, end_of_month, zero coupons and raw_data don't depend on the index being loaded"""
+    print("🧪 Testing index and SQL lookups agree")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        primary, validated, bloomberg = _make_dbs(tmpdir)
+        with sqlite3.connect(primary) as conn:
+            conn.execute("""CREATE TABLE bonds (isin TEXT, description TEXT, coupon REAL, maturity TEXT,
+                            face_value REAL, end_of_month INTEGER)""")
+            conn.execute("INSERT INTO bonds VALUES ('US912803AA10', 'T 0 11/15/30', 0.0, '2030-11-15', 100.0, 0)")
+        original_index = bri._index
+        try:
+            bri._index = None
+            via_sql = isin_lookup.lookup_isin_in_database('US912803AA10', primary, validated, bloomberg)
+            bri.load_bond_reference_index(primary, validated, bloomberg)
+            via_index = isin_lookup.lookup_isin_in_database('US912803AA10', primary, validated, bloomberg)
+            defaults = isin_lookup.lookup_isin_in_database('US279158AL39', primary, validated, bloomberg)
+        finally:
+            bri._index = original_index
+        assert via_sql['coupon'] == via_index['coupon'] == 0.0
+        assert via_sql['face_value'] == via_index['face_value'] == 100.0
+        assert via_sql['end_of_month'] == via_index['end_of_month'] == 0
+        assert via_index['raw_data'] == via_sql['raw_data']
+        assert defaults['face_value'] == 1000000 and defaults['end_of_month'] is True
+        print(f"   ✅ {via_index['raw_data']}")
+
+
+def test_replaced_database_falls_back():
+    """A replaced database file is no longer answered from the stale index"""
+    print("🧪 Testing stale source detection")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        primary, validated, bloomberg = _make_dbs(tmpdir)
+        index = BondReferenceIndex.build(primary, validated, bloomberg)
+        assert index.covers(bloomberg)
+
+        replacement = bloomberg + '.new'
+        with sqlite3.connect(replacement) as conn:
+            conn.execute("CREATE TABLE all_bonds (isin TEXT, description TEXT)")
+        os.replace(replacement, bloomberg)
+
+        assert not index.covers(bloomberg)
+        assert index.lookup('XS2249741674') is None
+        print("   ✅ Replaced source ignored until reload")
+
+
+def test_compact_for_large_universe():
+    """100k bonds fit in a few tens of MB"""
+    print("🧪 Testing memory footprint for 100k bonds")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'validated_quantlib_bonds.db')
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("""CREATE TABLE validated_quantlib_bonds (isin TEXT, description TEXT, coupon REAL,
+                            maturity TEXT, day_count TEXT, business_convention TEXT, frequency TEXT)""")
+            conn.executemany(
+                "INSERT INTO validated_quantlib_bonds VALUES (?, ?, ?, ?, 'Thirty360_BondBasis', 'Following', 'Semiannual')",
+                ((f"XS{i:010d}", f"ISSUER{i % 5000} {i % 800 / 100:.2f} 01/15/{30 + i % 40}",
+                  i % 800 / 100, f"20{30 + i % 40}-01-15") for i in range(100000))
+            )
+        index = BondReferenceIndex.build(validated_db_path=db_path)
+        stats = index.stats()
+        assert stats['bonds'] == 100000
+        assert stats['sources']['Validated']['approx_mb'] < 50
+        print(f"   ✅ {stats['sources']['Validated']['approx_mb']} MB, built in {stats['build_seconds']}s")
+
+
+if __name__ == "__main__":
+    test_merged_record_across_sources()
+    test_coupon_maturity_index()
+    test_isin_lookup_does_no_sql_when_covered()
+    test_isin_lookup_same_result_with_or_without_index()
+    test_replaced_database_falls_back()
+    test_compact_for_large_universe()
+    print("\n✅ Bond reference index tests passed")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test the calculate_bond_master result cache: canonical keys, invalidation and both tiers
+"""
+
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bond_result_cache import BondResultCache, result_cache_key, MEMORY_HIT, DISK_HIT, MISS, DISABLED
+from treasury_curve_cache import invalidate_treasury_curves
+
+RESULT = {'success': True, 'description': 'T 3 15/08/52', 'ytm': 4.898837, 'duration': 16.350751,
+          'conventions': {'day_count': 'ActualActual_Bond'}}
+
+
+def _key(db_dir, **changes):
+    args = dict(isin=None, description='T 3 15/08/52', price=71.66, settlement_date='2025-06-30',
+                overrides=None, calc_flags=None, requested_metrics=None,
+                db_path=os.path.join(db_dir, 'bonds_data.db'),
+                validated_db_path=os.path.join(db_dir, 'validated_quantlib_bonds.db'),
+                bloomberg_db_path=os.path.join(db_dir, 'bloomberg_index.db'))
+    args.update(changes)
+    return result_cache_key(**args)
+
+
+def test_key_canonicalization():
+    """Equivalent inputs share a key; anything the result depends on changes it"""
+    print("🧪 Testing result cache keys")
+    with tempfile.TemporaryDirectory() as db_dir:
+        base = _key(db_dir)
+        assert _key(db_dir, description='  T 3   15/08/52 ') == base
+        assert _key(db_dir, price=71.660) == base
+        assert _key(db_dir, overrides={}) == base
+        assert _key(db_dir, requested_metrics=['ytm', 'duration']) == _key(db_dir, requested_metrics=['duration', 'ytm'])
+        assert _key(db_dir, isin=' us912810tj79') == _key(db_dir, isin='US912810TJ79')
+        changed = [_key(db_dir, price=71.67), _key(db_dir, settlement_date='2025-07-31'),
+                   _key(db_dir, overrides={'coupon': 3.1}), _key(db_dir, calc_flags='portfolio'),
+                   _key(db_dir, requested_metrics=['ytm'])]
+        assert base not in changed and len(set(changed)) == len(changed)
+
+        invalidate_treasury_curves()
+        assert _key(db_dir) == base, "keys must not depend on per-process state"
+        with open(os.path.join(db_dir, 'treasury_yields.db'), 'w') as f:
+            f.write('new day')
+        assert _key(db_dir) != base, "a yield store write must change the key"
+        base = _key(db_dir)
+        with open(os.path.join(db_dir, 'validated_quantlib_bonds.db'), 'w') as f:
+            f.write('refreshed')
+        assert _key(db_dir) != base, "database refresh must change the key"
+    print("   ✅ Keys canonical and versioned")
+
+
+def test_memory_tier_lru_and_copies():
+    """Hits return copies; only successes are stored; oldest entry evicted"""
+    print("🧪 Testing memory tier")
+    cache = BondResultCache(max_size=2, disk_path='')
+    assert cache.get('a') == (None, MISS)
+    cache.put('a', RESULT)
+    cache.put('failed', {'success': False, 'error': 'boom'})
+    hit, status = cache.get('a')
+    assert status == MEMORY_HIT and hit == RESULT
+    hit['conventions']['day_count'] = 'mutated'
+    assert cache.get('a')[0]['conventions']['day_count'] == 'ActualActual_Bond'
+    assert cache.get('failed') == (None, MISS)
+
+    cache.put('b', RESULT)
+    cache.get('a')
+    cache.put('c', RESULT)
+    assert cache.get('b')[1] == MISS and cache.get('a')[1] == MEMORY_HIT
+    assert cache.stats()['evictions'] == 1
+    assert BondResultCache(max_size=0).get('a') == (None, DISABLED)
+
+    invalidate_treasury_curves()
+    assert cache.get('a')[1] == MISS and len(cache) == 0
+    print(f"   ✅ hit rate {cache.stats()['hit_rate']}")
+
+
+def test_disk_tier_shared_between_workers():
+    """A result stored by one worker's cache is a disk hit for another"""
+    print("🧪 Testing disk tier")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        path = os.path.join(cache_dir, 'results.db')
+        worker_a = BondResultCache(max_size=16, disk_path=path)
+        worker_b = BondResultCache(max_size=16, disk_path=path)
+        worker_a.put('key', RESULT)
+        hit, status = worker_b.get('key')
+        assert status == DISK_HIT and hit == RESULT
+        assert worker_b.get('key')[1] == MEMORY_HIT
+        assert worker_b.stats()['disk']['entries'] == 1
+
+        worker_a.clear(include_disk=True)
+        assert worker_a.get('key')[1] == MISS
+    print("   ✅ Disk results shared")
+
+
+if __name__ == "__main__":
+    test_key_canonicalization()
+    test_memory_tier_lru_and_copies()
+    test_disk_tier_shared_between_workers()
+    print("\n✅ Bond result cache tests complete")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test the columnar cash-flow engine: schedules, filters, netting and portfolio speed
+"""
+
+import os
+import sys
+import time
+from datetime import date, datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from cash_flow_engine import project_cash_flows, bond_records, portfolio_records, net_cash_flows
+from bullet_bond_kernel import ACT_ACT_ISDA, THIRTY_360, get_government_bond_calendar
+
+try:
+    import QuantLib as ql
+    QUANTLIB_AVAILABLE = True
+except ImportError as e:
+    print(f"⏭️ QuantLib not available: {e}")
+    QUANTLIB_AVAILABLE = False
+
+SETTLEMENT = date(2025, 6, 30)
+
+
+def _random_portfolio(count, seed=3):
+    rng = np.random.default_rng(seed)
+    maturities = [date(2025 + int(rng.integers(1, 31)), int(rng.integers(1, 13)), int(rng.integers(1, 29)))
+                  for _ in range(count)]
+    codes = np.where(rng.random(count) < 0.5, ACT_ACT_ISDA, THIRTY_360)
+    return rng.uniform(0, 8, count), maturities, rng.integers(1, 100, count) * 10000.0, codes
+
+
+def _dict_netting(records):
+    """The calculator's previous merge: per-flow cents summed under string date keys"""
+    totals = {}
+    for flows in records:
+        for flow in flows:
+            totals[flow['date']] = totals.get(flow['date'], 0.0) + flow['amount']
+    return [{"date": d, "amount": round(totals[d], 2),
+             "days_from_settlement": (datetime.strptime(d, "%Y-%m-%d").date() - SETTLEMENT).days}
+            for d in sorted(totals)]
+
+
+def test_schedule_treasury_and_corporate():
+    """Stub first coupon from settlement, holiday/weekend payments rolled Following, redemption last"""
+    print("🧪 Testing projected schedules")
+    flows = project_cash_flows([2.5, 5.0], [date(2027, 7, 31), date(2026, 3, 15)], [500000, 1000000],
+                               [ACT_ACT_ISDA, THIRTY_360], SETTLEMENT)
+    treasury, corporate = bond_records(flows)
+    assert [f['date'] for f in treasury] == ['2025-07-31', '2026-02-02', '2026-07-31', '2027-02-01',
+                                            '2027-08-02', '2027-08-02']
+    assert treasury[0]['amount'] == 1061.64                      # 31/365 of 2.5% on 500k
+    assert [f['type'] for f in treasury[-2:]] == ['coupon', 'maturity'] and treasury[-1]['amount'] == 500000.0
+    assert [f['date'] for f in corporate] == ['2025-09-15', '2026-03-16', '2026-03-16']
+    assert corporate[0]['amount'] == 10416.67 and corporate[1]['amount'] == 25138.89    # 75 and 181 days 30/360
+    assert corporate[0]['days_from_settlement'] == 77
+
+    matured = project_cash_flows([4.0], [date(2025, 6, 30)], [100000], [THIRTY_360], SETTLEMENT)
+    assert len(matured) == 0 and bond_records(matured) == [[]]
+    print(f"   ✅ {len(flows)} flows, matured bond has none")
+
+
+def test_filters_and_netting_match_dict_merge():
+    """Masks and grouped sum give what per-bond lists merged by string date gave"""
+    print("🧪 Testing filters and netting")
+    flows = project_cash_flows(*_random_portfolio(400), SETTLEMENT)
+    records = bond_records(flows)
+
+    assert portfolio_records(flows) == _dict_netting(records)
+    nexts = bond_records(flows.filter('next'))
+    assert all(len(n) == 1 and n[0] == r[0] for n, r in zip(nexts, records))
+    assert portfolio_records(flows.filter('next')) == _dict_netting(nexts)
+    within = bond_records(flows.filter('period', 180))
+    assert within == [[f for f in r if f['days_from_settlement'] <= 180] for r in records]
+    assert portfolio_records(flows.filter('period', 180)) == _dict_netting(within)
+    assert len(flows.filter('period', None)) == len(flows)
+
+    included = np.arange(400) % 3 != 0
+    subset = flows.for_bonds(included)
+    assert portfolio_records(subset) == _dict_netting([r for r, keep in zip(records, included) if keep])
+    print(f"   ✅ {len(portfolio_records(flows))} netted dates from {len(flows)} flows")
+
+
+def test_portfolio_speed():
+    """10k bonds x ~60 flows projected, filtered and netted well under a second"""
+    print("🧪 Testing 10k x 60 portfolio")
+    rng = np.random.default_rng(7)
+    count = 10000
+    maturities = [date(2055, int(rng.integers(1, 13)), int(rng.integers(1, 29))) for _ in range(count)]
+    args = (rng.uniform(0, 8, count), maturities, np.full(count, 1e6),
+            np.where(rng.random(count) < 0.5, ACT_ACT_ISDA, THIRTY_360), SETTLEMENT)
+    project_cash_flows(*args)            # calendar tables
+    started = time.perf_counter()
+    flows = project_cash_flows(*args)
+    dates, totals = net_cash_flows(flows.filter('period', 3650))
+    records = portfolio_records(flows)
+    elapsed = time.perf_counter() - started
+    assert len(flows) >= count * 60 and len(dates) and records
+    assert abs(totals.sum() - np.round(flows.filter('period', 3650).amounts, 2).sum()) < 1.0
+    assert elapsed < 1.0, f"{elapsed:.2f}s"
+    print(f"   ✅ {len(flows)} flows in {elapsed * 1000:.0f}ms")
+
+
+def test_matches_quantlib_bonds():
+    """Same dates and amounts as the calculator's former per-line FixedRateBond"""
+    print("🧪 Testing against QuantLib")
+    if not QUANTLIB_AVAILABLE:
+        print("   ⏭️ Skipped (QuantLib not installed)")
+        return
+    assert get_government_bond_calendar().source == 'quantlib'     # schedules adjusted on QuantLib's holidays
+    coupons, maturities, nominals, codes = _random_portfolio(200, seed=11)
+    records = bond_records(project_cash_flows(coupons, maturities, nominals, codes, SETTLEMENT))
+    settle = ql.Date(SETTLEMENT.day, SETTLEMENT.month, SETTLEMENT.year)
+    for coupon, maturity, nominal, code, flows in zip(coupons, maturities, nominals, codes, records):
+        schedule = ql.Schedule(settle, ql.Date(maturity.day, maturity.month, maturity.year),
+                               ql.Period(ql.Semiannual), ql.UnitedStates(ql.UnitedStates.GovernmentBond),
+                               ql.Following, ql.Following, ql.DateGeneration.Backward, False)
+        day_count = ql.ActualActual(ql.ActualActual.ISDA) if code == ACT_ACT_ISDA else ql.Thirty360(ql.Thirty360.BondBasis)
+        bond = ql.FixedRateBond(2, float(nominal), schedule, [coupon / 100.0], day_count)
+        expected = [(cf.date().ISO(), round(cf.amount(), 2)) for cf in bond.cashflows() if cf.date() > settle]
+        assert [(f['date'], f['amount']) for f in flows] == expected, (coupon, maturity)
+    print(f"   ✅ {len(records)} bonds match")
+
+
+if __name__ == "__main__":
+    test_schedule_treasury_and_corporate()
+    test_filters_and_netting_match_dict_merge()
+    test_portfolio_speed()
+    test_matches_quantlib_bonds()
+    print("\n✅ Cash flow engine tests complete")
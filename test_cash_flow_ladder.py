@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test the cash flow ladder: bucket edges, coupon/principal split, schedule cache and streaming
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+from datetime import date
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from cash_flow_engine import project_cash_flows, bond_records
+from cash_flow_ladder import (CashFlowLadder, InstrumentScheduleCache, bucket_edges, ladder_ndjson, ladder_csv,
+                              LADDER_FIELDS)
+from bullet_bond_kernel import ACT_ACT_ISDA, THIRTY_360
+
+SETTLEMENT = date(2025, 6, 30)
+
+
+def _instruments(count, seed=5):
+    rng = np.random.default_rng(seed)
+    return [(float(round(rng.uniform(0, 8), 3)),
+             date(2025 + int(rng.integers(1, 36)), int(rng.integers(1, 13)), int(rng.integers(1, 29))),
+             ACT_ACT_ISDA if rng.random() < 0.5 else THIRTY_360) for _ in range(count)]
+
+
+def test_bucket_edges():
+    """Calendar months / quarters to the horizon, custom day and date edges"""
+    print("🧪 Testing bucket edges")
+    ordinals, labels = bucket_edges(date(2025, 6, 15), 'month', horizon_years=1)
+    assert labels[:2] == ['2025-06', '2025-07'] and labels[-1] == '2026-06' and len(labels) == 13
+    assert date.fromordinal(int(ordinals[0])) == date(2025, 6, 16) and date.fromordinal(int(ordinals[1])) == date(2025, 7, 1)
+    assert date.fromordinal(int(ordinals[-1])) == date(2026, 6, 16)
+
+    ordinals, labels = bucket_edges(SETTLEMENT, 'quarter', horizon_years=30)
+    assert labels[0] == '2025-Q3' and labels[-1] == '2055-Q2' and len(labels) == 120
+
+    ordinals, labels = bucket_edges(SETTLEMENT, 'custom', [30, 90, '2026-06-30'])
+    assert labels == ['1-30d', '31-90d', '91-365d']
+    assert [date.fromordinal(int(o)) for o in ordinals] == [date(2025, 7, 1), date(2025, 7, 31),
+                                                            date(2025, 9, 29), date(2026, 7, 1)]
+    for bucketing, edges, horizon in (('weekly', None, 30), ('custom', None, 30), ('custom', [90, 30], 30),
+                                      ('custom', ['2025-01-01'], 30), ('month', None, 0)):
+        try:
+            bucket_edges(SETTLEMENT, bucketing, edges, horizon)
+            assert False, f"{bucketing} {edges} {horizon} should fail"
+        except ValueError:
+            pass
+    print("   ✅ Month, quarter and custom edges")
+
+
+def test_ladder_matches_line_flows():
+    """Bucket sums, coupon/principal split and cumulative totals agree with per-line flows"""
+    print("🧪 Testing ladder sums")
+    instruments = _instruments(60)
+    nominals = np.arange(1, 61) * 25000.0
+    ladder = CashFlowLadder(SETTLEMENT, 'quarter', horizon_years=5)
+    ladder.add_lines(instruments, nominals, cache=InstrumentScheduleCache(), chunk_size=7)
+
+    coupons, maturities, codes = zip(*instruments)
+    flows = project_cash_flows(coupons, maturities, nominals, codes, SETTLEMENT)
+    horizon = ladder.edges[-1]
+    within = flows.dates < horizon
+    expected_coupon = flows.amounts[within & ~flows.principal].sum()
+    expected_principal = flows.amounts[within & flows.principal].sum()
+
+    rows = list(ladder.rows())
+    summary = ladder.summary()
+    assert len(rows) == 20 and rows[0]['label'] == '2025-Q3' and rows[0]['start'] == '2025-07-01'
+    assert abs(sum(r['coupon'] for r in rows) - expected_coupon) < 0.01 * len(rows)
+    assert abs(rows[-1]['cumulative_principal'] - expected_principal) < 0.01
+    assert abs(summary['beyond_horizon_total'] - flows.amounts[~within].sum()) < 0.01
+    assert summary['total_flows'] + summary['beyond_horizon_flows'] == len(flows)
+    assert all(abs(r['total'] - r['coupon'] - r['principal']) < 0.011 for r in rows)
+
+    # A bucket against the flows paid inside it
+    records = [f for line in bond_records(flows) for f in line if rows[3]['start'] <= f['date'] <= rows[3]['end']]
+    assert rows[3]['flows'] == len(records)
+    assert abs(rows[3]['coupon'] - sum(f['amount'] for f in records if f['type'] == 'coupon')) < 0.01 * len(records) + 0.01
+    print(f"   ✅ {summary['total_flows']} flows in {len(rows)} buckets, {summary['beyond_horizon_flows']} beyond horizon")
+
+
+def test_schedule_cache_reused():
+    """Repeated instruments are projected once; a second ladder only hits the cache"""
+    print("🧪 Testing instrument schedule cache")
+    cache = InstrumentScheduleCache(max_size=100)
+    instruments = _instruments(20) * 5
+    first = CashFlowLadder(SETTLEMENT)
+    first.add_lines(instruments, [1e6] * len(instruments), cache=cache, chunk_size=30)
+    assert cache.stats()['misses'] == 20 and len(cache) == 20
+
+    second = CashFlowLadder(SETTLEMENT)
+    second.add_lines(instruments, [1e6] * len(instruments), cache=cache)
+    assert cache.stats()['misses'] == 20 and cache.stats()['hits'] > 0
+    assert list(first.rows()) == list(second.rows())
+    assert first.summary()['instruments'] == 20 and first.summary()['bonds'] == 100
+
+    CashFlowLadder(date(2025, 7, 31)).add_lines(instruments[:20], [1e6] * 20, cache=cache)
+    assert cache.stats()['misses'] == 40 and len(cache) == 40
+    print(f"   ✅ {cache.stats()}")
+
+
+def test_streaming_and_large_portfolio():
+    """20k lines over 30 years of months, streamed as NDJSON and CSV"""
+    print("🧪 Testing 20k-line ladder")
+    instruments = _instruments(20000, seed=9)
+    nominals = np.full(len(instruments), 1e6)
+    cache = InstrumentScheduleCache()
+    started = time.perf_counter()
+    ladder = CashFlowLadder(SETTLEMENT, 'month', horizon_years=30)
+    ladder.add_lines(instruments, nominals, cache=cache)
+    ndjson = list(ladder_ndjson(ladder, lambda summary: {'summary': summary}))
+    elapsed = time.perf_counter() - started
+    assert len(ndjson) == 361 and json.loads(ndjson[-1])['summary']['bonds'] == 20000
+    assert elapsed < 2.0, f"{elapsed:.2f}s"
+
+    lines = ''.join(ladder_csv(ladder)).split('\n')
+    assert lines[0].split(',') == LADDER_FIELDS and lines[361] == ''
+    parsed = list(csv.DictReader(lines[:361]))
+    assert float(parsed[-1]['cumulative_total']) == json.loads(ndjson[-2])['cumulative_total']
+    print(f"   ✅ {len(instruments)} lines laddered and streamed in {elapsed * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    test_bucket_edges()
+    test_ladder_matches_line_flows()
+    test_schedule_cache_reused()
+    test_streaming_and_large_portfolio()
+    print("\n✅ Cash flow ladder tests complete")
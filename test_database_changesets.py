@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Test row-level database sync: high-water marks, changeset extraction and indexed apply
+"""
+
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database_changesets import (LocalChangesetStore, extract_changeset, encode_changeset, decode_changeset,
+                                 apply_changeset, mark_published, push_changes, pull_changes, sync_changes,
+                                 fold_changesets)
+
+TABLES = {'tsys_enhanced': 'Date', 'treasury_securities': 'cusip'}
+
+
+def _make_db(directory, name='bonds_data.db', days=5):
+    path = os.path.join(directory, name)
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE tsys_enhanced (Date TEXT, M2Y REAL, M10Y REAL, source TEXT, updated_at TEXT)")
+        conn.execute("CREATE TABLE treasury_securities (cusip TEXT, description TEXT)")
+        conn.executemany("INSERT INTO tsys_enhanced VALUES (?, ?, ?, 'seed', '2025-01-01 00:00:00')",
+                         [(f'{2000 + i // 365:04d}-{i % 12 + 1:02d}-{i % 28 + 1:02d}#{i}', 3.0, 4.0)
+                          for i in range(days)])
+        conn.execute("INSERT INTO treasury_securities VALUES ('912828XX1', 'T 2 08/15/25')")
+    return path
+
+
+def _copies(directory, days=5):
+    base = _make_db(directory, 'base.db', days)
+    mark_published(base, TABLES)
+    paths = []
+    for name in ('local.db', 'cloud.db'):
+        paths.append(os.path.join(directory, name))
+        shutil.copy(base, paths[-1])
+    return paths
+
+
+def _rows(path, sql):
+    with sqlite3.connect(path) as conn:
+        return conn.execute(sql).fetchall()
+
+
+def test_changes_round_trip():
+    """Updates and inserts travel as a changeset; re-pulls and echoes are no-ops"""
+    print("🧪 Testing changeset round trip")
+    with tempfile.TemporaryDirectory() as directory:
+        local, cloud = _copies(directory)
+        store = LocalChangesetStore(os.path.join(directory, 'bucket'))
+        assert extract_changeset(local, TABLES)['rows'] == 0
+
+        with sqlite3.connect(local) as conn:
+            conn.execute("UPDATE tsys_enhanced SET M10Y = 4.5, updated_at = '2025-07-01 20:00:00' WHERE rowid = 2")
+            conn.execute("INSERT INTO tsys_enhanced (Date, M10Y) VALUES ('2025-07-02', 4.4)")   # no updated_at
+            conn.execute("INSERT INTO treasury_securities VALUES ('912828YY2', 'T 3 02/15/27')")
+        report = sync_changes(store, local, 'bonds_data.db', TABLES)
+        assert report == {'pushed': 1, 'pulled': 0, 'rows_pulled': 0} and store.sequences('bonds_data.db') == [1]
+
+        assert pull_changes(store, cloud, 'bonds_data.db') == (1, 3)
+        assert pull_changes(store, cloud, 'bonds_data.db') == (0, 0)
+        query = "SELECT Date, M10Y, updated_at FROM tsys_enhanced ORDER BY Date"
+        assert _rows(cloud, query) == _rows(local, query)
+        assert _rows(cloud, "SELECT COUNT(*) FROM tsys_enhanced") == [(6,)]
+        assert _rows(cloud, "SELECT COUNT(*) FROM treasury_securities") == [(2,)]
+
+        # Pulled rows aren't published back; a copy that applied seq 1 skips it
+        assert extract_changeset(cloud, TABLES)['rows'] == 0
+        assert sync_changes(store, cloud, 'bonds_data.db', TABLES)['pushed'] is None
+        compacted = os.path.join(directory, 'compacted.db')
+        shutil.copy(cloud, compacted)
+        assert pull_changes(store, compacted, 'bonds_data.db') == (0, 0)
+    print("   ✅ 3 rows synced, no echo, no double apply")
+
+
+def test_pull_keeps_unpublished_rows():
+    """A local write made before a pull is still published, exactly once"""
+    print("🧪 Testing marks across a pull")
+    with tempfile.TemporaryDirectory() as directory:
+        local, cloud = _copies(directory)
+        store = LocalChangesetStore(os.path.join(directory, 'bucket'))
+        with sqlite3.connect(cloud) as conn:
+            conn.execute("INSERT INTO tsys_enhanced (Date, M10Y, updated_at) VALUES ('2025-07-02', 4.4, "
+                         "'2025-07-02 20:00:00')")
+        push_changes(store, cloud, 'bonds_data.db', TABLES)
+
+        with sqlite3.connect(local) as conn:
+            conn.execute("UPDATE tsys_enhanced SET M10Y = 4.5, updated_at = '2025-07-01 20:00:00' WHERE rowid = 2")
+            conn.execute("INSERT INTO treasury_securities VALUES ('912828YY2', 'T 3 02/15/27')")
+        assert pull_changes(store, local, 'bonds_data.db') == (1, 1)
+        # tsys_enhanced had an unpublished update, so its marks stay put and the
+        # pulled row rides along (as an equal updated_at, it never wins anywhere)
+        changeset = extract_changeset(local, TABLES)
+        assert changeset['rows'] == 3 and len(changeset['tables']['treasury_securities']['rows']) == 1
+        assert {row[0] for row in changeset['tables']['tsys_enhanced']['rows']} >= {'2025-07-02'}
+
+        assert sync_changes(store, local, 'bonds_data.db', TABLES)['pushed'] == 2
+        assert extract_changeset(local, TABLES)['rows'] == 0
+        assert pull_changes(store, cloud, 'bonds_data.db') == (1, 2)
+        assert extract_changeset(cloud, TABLES)['rows'] == 0
+    print("   ✅ Local rows written before a pull are still published")
+
+
+def test_sequences_survive_compaction():
+    """After a compaction deletes changesets, new ones never reuse their numbers"""
+    print("🧪 Testing compact, push, pull")
+    with tempfile.TemporaryDirectory() as directory:
+        local, cloud = _copies(directory)
+        store = LocalChangesetStore(os.path.join(directory, 'bucket'))
+        for i in range(3):
+            with sqlite3.connect(local) as conn:
+                conn.execute("INSERT INTO tsys_enhanced (Date, M10Y, updated_at) VALUES (?, 4.0, ?)",
+                             (f'2025-07-0{i + 1}', f'2025-07-0{i + 1}20:00:00'))
+            push_changes(store, local, 'bonds_data.db', TABLES)
+        assert pull_changes(store, cloud, 'bonds_data.db') == (3, 3)
+
+        # local is uploaded as the new base; a fresh copy of it starts from there
+        base = os.path.join(directory, 'base_copy.db')
+        shutil.copy(local, base)
+        assert fold_changesets(store, local, 'bonds_data.db') == 3
+        assert store.sequences('bonds_data.db') == [] and store.folded('bonds_data.db') == 3
+
+        with sqlite3.connect(base) as conn:
+            conn.execute("INSERT INTO treasury_securities VALUES ('912828YY2', 'T 3 02/15/27')")
+        assert push_changes(store, base, 'bonds_data.db', TABLES) == 4
+        assert pull_changes(store, cloud, 'bonds_data.db') == (1, 1)
+        assert pull_changes(store, local, 'bonds_data.db') == (1, 1)
+        assert _rows(cloud, "SELECT COUNT(*) FROM treasury_securities") == [(2,)]
+
+        fresh = os.path.join(directory, 'fresh.db')
+        shutil.copy(base, fresh)
+        os.remove(os.path.join(directory, 'bucket', 'changesets', 'bonds_data.db', 'folded'))
+        with sqlite3.connect(fresh) as conn:
+            conn.execute("INSERT INTO treasury_securities VALUES ('912828ZZ3', 'T 4 02/15/30')")
+        assert push_changes(store, fresh, 'bonds_data.db', TABLES) == 5     # applied seqs still count
+        assert pull_changes(store, cloud, 'bonds_data.db') == (1, 1)
+    print("   ✅ Sequences keep increasing across a compaction")
+
+
+def test_newer_row_wins():
+    """An older updated_at never overwrites a newer one; the batch is all-or-nothing"""
+    print("🧪 Testing conflict resolution")
+    with tempfile.TemporaryDirectory() as directory:
+        local, cloud = _copies(directory)
+        with sqlite3.connect(local) as conn:
+            conn.execute("UPDATE tsys_enhanced SET M10Y = 4.1, updated_at = '2025-07-01 10:00:00' WHERE rowid IN (1, 2)")
+        with sqlite3.connect(cloud) as conn:
+            conn.execute("UPDATE tsys_enhanced SET M10Y = 4.9, updated_at = '2025-07-01 12:00:00' WHERE rowid = 1")
+        changeset = decode_changeset(encode_changeset(extract_changeset(local, TABLES)))
+        assert changeset['rows'] == 2
+        assert apply_changeset(cloud, changeset, seq=7) == 1
+        assert _rows(cloud, "SELECT M10Y FROM tsys_enhanced ORDER BY Date")[:2] == [(4.9,), (4.1,)]
+        assert apply_changeset(cloud, changeset, seq=7) == 0
+
+        broken = dict(changeset, tables={
+            'treasury_securities': {'key': 'cusip', 'columns': ['cusip', 'description'], 'rows': [['9128', 'T']]},
+            'tsys_enhanced': dict(changeset['tables']['tsys_enhanced'], rows=[['2025-07-03', 4.0]])   # short row
+        })
+        before = _rows(cloud, "SELECT * FROM tsys_enhanced ORDER BY rowid")
+        try:
+            apply_changeset(cloud, broken, seq=8)
+            assert False, "a malformed changeset should fail"
+        except (sqlite3.Error, IndexError, ValueError):
+            pass
+        assert _rows(cloud, "SELECT * FROM tsys_enhanced ORDER BY rowid") == before
+        assert _rows(cloud, "SELECT COUNT(*) FROM treasury_securities") == [(1,)]
+    print("   ✅ Newer rows kept, changesets applied once and atomically")
+
+
+def test_cost_follows_rows_changed():
+    """A 200k-row table with 20 changed rows ships and applies 20 rows"""
+    print("🧪 Testing sync cost on a large table")
+    with tempfile.TemporaryDirectory() as directory:
+        local, cloud = _copies(directory, days=200000)
+        store = LocalChangesetStore(os.path.join(directory, 'bucket'))
+        with sqlite3.connect(local) as conn:
+            conn.execute("UPDATE tsys_enhanced SET M2Y = 3.5, updated_at = '2025-07-01 20:00:00' "
+                         "WHERE rowid % 10000 = 0")
+        push_changes(store, local, 'bonds_data.db', TABLES)         # builds the updated_at index once
+
+        with sqlite3.connect(local) as conn:
+            conn.execute("UPDATE tsys_enhanced SET M2Y = 3.6, updated_at = '2025-07-02 20:00:00' "
+                         "WHERE rowid % 10000 = 5")
+        started = time.perf_counter()
+        seq = push_changes(store, local, 'bonds_data.db', TABLES)
+        pushed = time.perf_counter() - started
+        size = len(store.get('bonds_data.db', seq))
+
+        started = time.perf_counter()
+        assert pull_changes(store, cloud, 'bonds_data.db') == (2, 40)
+        pulled = time.perf_counter() - started
+        assert _rows(cloud, "SELECT COUNT(*) FROM tsys_enhanced WHERE M2Y > 3.0") == [(40,)]
+        assert _rows(cloud, "SELECT COUNT(*) FROM tsys_enhanced") == [(200000,)]
+        assert size < 2048 and pushed < 0.5, (size, pushed)
+    print(f"   ✅ 20 rows: {size}B changeset, pushed in {pushed * 1000:.0f}ms, "
+          f"2 changesets applied in {pulled * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    test_changes_round_trip()
+    test_pull_keeps_unpublished_rows()
+    test_sequences_survive_compaction()
+    test_newer_row_wins()
+    test_cost_follows_rows_changed()
+    print("\n✅ Database changeset tests complete")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test the precompiled single-pass description parser and its shared result cache
+"""
+
+import os
+import sys
+import logging
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bond_description_parser import SmartBondParser, ParsedDescriptionCache, get_smart_bond_parser
+from benchmark_description_parser import load_corpus, legacy_parse
+
+DESCRIPTIONS = [
+    "T 3 15/08/52", "T 4 1/4 11/15/34", "UST 2.5 05/31/24", "PEMEX 6.95 01/28/60",
+    "ECOPET 5 7/8 05/28/45", "GALAXY PIPELINE, 3.25%, 30-Sep-2040", "REP OF PANAMA, 6.4%, 14-Feb-2035",
+    "US TREASURY N/B, 3%, 15-Aug-2052", "Apple Inc 3.25% 02/23/26", "STRIPS 0 05/15/30",
+    "COMPANY, 3.25%, 30/09/2040", "  t 3 15/08/52 ", "junk", "", 12345,
+]
+
+
+def test_single_pass_matches_pattern_loop():
+    """The combined alternation picks the same pattern as the ordered re.match loop"""
+    print("🧪 Testing single-pass parity")
+    logging.disable(logging.WARNING)
+    try:
+        parser = SmartBondParser(None, None, None)
+        corpus = DESCRIPTIONS[:-2] + load_corpus('missing.db', 2000)
+        for description in corpus:
+            assert parser._parse_normalized_description(description.strip().upper()) == \
+                legacy_parse(parser, description), description
+    finally:
+        logging.disable(logging.NOTSET)
+    print(f"   ✅ {len(corpus)} descriptions parse identically")
+
+
+def test_memoized_results_are_copies():
+    """Recurring descriptions hit the cache and callers can't corrupt it"""
+    print("🧪 Testing memoized parse results")
+    parser = get_smart_bond_parser('a.db', 'b.db', 'c.db')
+    assert parser is get_smart_bond_parser('a.db', 'b.db', 'c.db')
+
+    first = parser.parse_bond_description("PEMEX 6.95 01/28/60")
+    first['coupon'] = 0
+    again = parser.parse_bond_description("  pemex 6.95 01/28/60")
+    assert again['coupon'] == 6.95 and again is not first
+    assert parser.parse_bond_description("junk") is None
+    assert parser.parse_bond_description(None) is None
+    print("   ✅ Normalized keys, defensive copies, cached misses")
+
+
+def test_lru_bounds():
+    """The cache evicts least recently used descriptions"""
+    print("🧪 Testing parse cache LRU")
+    cache = ParsedDescriptionCache(max_size=2)
+    cache.put('A', {'coupon': 1.0})
+    cache.put('B', None)
+    cache.get('A')
+    cache.put('C', {'coupon': 3.0})
+    stats = cache.stats()
+    assert len(cache) == 2 and stats['evictions'] == 1 and cache.get('A') == {'coupon': 1.0}
+    assert ParsedDescriptionCache(max_size=0).put('A', {}) is None
+    print("   ✅ Bounded LRU")
+
+
+if __name__ == "__main__":
+    test_single_pass_matches_pattern_loop()
+    test_memoized_results_are_copies()
+    test_lru_bounds()
+    print("\n✅ Description parser cache tests complete")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test the quiet engine logging mode: sampled per-bond summaries and request summaries
+"""
+
+import os
+import sys
+import json
+import random
+import logging
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import engine_logging
+from engine_logging import (SummarySampler, log_bond_summary, log_request_summary,
+                            set_summary_sample_rate, SUMMARY_LOGGER_NAME)
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _capture_summaries(level=logging.INFO):
+    handler = _Capture()
+    log = logging.getLogger(SUMMARY_LOGGER_NAME)
+    log.handlers = [handler]
+    log.setLevel(level)
+    return handler
+
+
+RESULT = {'isin': 'US912810TL26', 'successful': True, 'instrument_cached': True,
+          'stage_timings_ms': {'instrument': 0.01, 'yield': 0.3}, 'stages_skipped': ['z_spread']}
+
+
+def test_sampler_rates():
+    """Rate 1 keeps everything, 0 nothing, fractions roughly their share"""
+    print("🧪 Testing summary sampler")
+    assert all(SummarySampler(1.0).sample() for _ in range(100))
+    assert not any(SummarySampler(0.0).sample() for _ in range(100))
+    sampler = SummarySampler(0.25, random.Random(7))
+    sampled = sum(sampler.sample() for _ in range(4000))
+    assert 800 < sampled < 1200, sampled
+    print(f"   ✅ 0.25 sampled {sampled}/4000")
+
+
+def test_bond_summary_record():
+    """One structured INFO record carries timings and cache state"""
+    print("🧪 Testing bond summary record")
+    handler = _capture_summaries()
+    set_summary_sample_rate(1.0)
+    log_bond_summary(RESULT, 1.23456, 'T 3 15/08/52')
+
+    record = handler.records[0]
+    assert record.levelno == logging.INFO and record.summary['total_ms'] == 1.235
+    payload = json.loads(record.getMessage().split('bond_summary ', 1)[1])
+    assert payload['instrument_cached'] is True and payload['stage_timings_ms']['yield'] == 0.3
+
+    set_summary_sample_rate(0.0)
+    log_bond_summary(RESULT, 1.0)
+    log_request_summary('portfolio', bond_count=2, elapsed_ms=5.55555)
+    set_summary_sample_rate(1.0)
+    assert len(handler.records) == 2                  # bond sampled out, request always kept
+    assert handler.records[1].summary['elapsed_ms'] == 5.556
+    print("   ✅ Bond summaries sampled, request summaries always emitted")
+
+
+def test_quiet_level_skips_payload():
+    """Above INFO nothing is built or serialised"""
+    print("🧪 Testing disabled summaries")
+    handler = _capture_summaries(logging.WARNING)
+    original = engine_logging._JsonPayload.__str__
+    engine_logging._JsonPayload.__str__ = lambda self: (_ for _ in ()).throw(AssertionError('serialised'))
+    try:
+        log_bond_summary(RESULT, 1.0)
+        log_request_summary('portfolio', bond_count=1)
+    finally:
+        engine_logging._JsonPayload.__str__ = original
+    assert handler.records == []
+    print("   ✅ No records at WARNING")
+
+
+if __name__ == "__main__":
+    test_sampler_rates()
+    test_bond_summary_record()
+    test_quiet_level_skips_payload()
+    print("\n✅ Engine logging tests complete")
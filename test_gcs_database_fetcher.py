@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test the database fetcher against a local object store: verify, resume, delta, atomic swap
+"""
+
+import os
+import sys
+import json
+import tempfile
+import threading
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gcs_database_fetcher import (DatabaseFetcher, LocalObjectStore, file_checksums, fetch_succeeded,
+                                  CURRENT, DOWNLOADED, RESUMED, FAILED, MISSING, PART_SUFFIX)
+
+DATABASES = {
+    'bonds_data.db': os.urandom(300_000),
+    'validated_quantlib_bonds.db': os.urandom(120_000),
+    'bloomberg_index.db': os.urandom(75_001),
+}
+
+
+class RecordingStore(LocalObjectStore):
+    """Counts bytes read and the threads reading them; can corrupt one object."""
+
+    def __init__(self, directory, corrupt=None):
+        super().__init__(directory)
+        self.bytes_read = {}
+        self.threads = set()
+        self.corrupt = corrupt
+        self._lock = threading.Lock()
+
+    def read_range(self, name, generation, start, end):
+        data = super().read_range(name, generation, start, end)
+        with self._lock:
+            self.bytes_read[name] = self.bytes_read.get(name, 0) + len(data)
+            self.threads.add(threading.get_ident())
+        if name == self.corrupt:
+            data = bytes([data[0] ^ 0xFF]) + data[1:]
+        return data
+
+
+def _bucket(directory):
+    for name, content in DATABASES.items():
+        with open(os.path.join(directory, name), 'wb') as f:
+            f.write(content)
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_concurrent_verified_fetch_and_delta():
+    """All databases fetched in parallel chunks; a second run reads nothing; a new generation re-fetches one"""
+    print("🧪 Testing concurrent fetch and delta mode")
+    with tempfile.TemporaryDirectory() as bucket, tempfile.TemporaryDirectory() as target:
+        _bucket(bucket)
+        store = RecordingStore(bucket)
+        report = DatabaseFetcher(store, target, chunk_size=16_384).fetch_all(DATABASES)
+        assert fetch_succeeded(report) and {entry['status'] for entry in report.values()} == {DOWNLOADED}
+        assert all(_read(os.path.join(target, name)) == content for name, content in DATABASES.items())
+        assert len(store.threads) > 1, "databases should download concurrently"
+
+        store.bytes_read.clear()
+        report = DatabaseFetcher(store, target).fetch_all(DATABASES)
+        assert {entry['status'] for entry in report.values()} == {CURRENT} and not store.bytes_read
+
+        with open(os.path.join(bucket, 'validated_quantlib_bonds.db'), 'wb') as f:
+            f.write(b'new generation' * 100)
+        report = DatabaseFetcher(store, target).fetch_all(DATABASES)
+        assert report['validated_quantlib_bonds.db']['status'] == DOWNLOADED
+        assert list(store.bytes_read) == ['validated_quantlib_bonds.db']
+        assert _read(os.path.join(target, 'validated_quantlib_bonds.db')) == b'new generation' * 100
+    print("   ✅ Parallel fetch, delta skipped unchanged generations")
+
+
+def test_truncated_local_copy_not_trusted():
+    """An existing file without a manifest entry is kept only if its checksum matches"""
+    print("🧪 Testing truncated local copy")
+    with tempfile.TemporaryDirectory() as bucket, tempfile.TemporaryDirectory() as target:
+        _bucket(bucket)
+        with open(os.path.join(target, 'bonds_data.db'), 'wb') as f:
+            f.write(DATABASES['bonds_data.db'][:1000])
+        with open(os.path.join(target, 'bloomberg_index.db'), 'wb') as f:
+            f.write(DATABASES['bloomberg_index.db'])
+        store = RecordingStore(bucket)
+        report = DatabaseFetcher(store, target).fetch_all(DATABASES)
+        assert report['bonds_data.db']['status'] == DOWNLOADED
+        assert report['bloomberg_index.db']['status'] == CURRENT and 'bloomberg_index.db' not in store.bytes_read
+        assert _read(os.path.join(target, 'bonds_data.db')) == DATABASES['bonds_data.db']
+    print("   ✅ Truncated copy replaced, intact copy adopted")
+
+
+def test_local_path_override():
+    """An object mapped in local_paths lands (and is delta-checked) at that path, not in target_dir"""
+    print("🧪 Testing local path override")
+    with tempfile.TemporaryDirectory() as bucket, tempfile.TemporaryDirectory() as target:
+        _bucket(bucket)
+        elsewhere = os.path.join(target, 'sidecar', 'store.db')
+        store = RecordingStore(bucket)
+        fetcher = DatabaseFetcher(store, target, local_paths={'bloomberg_index.db': elsewhere})
+        assert fetcher.fetch_all(['bloomberg_index.db'])['bloomberg_index.db']['status'] == DOWNLOADED
+        assert _read(elsewhere) == DATABASES['bloomberg_index.db']
+        assert not os.path.exists(os.path.join(target, 'bloomberg_index.db'))
+        assert fetcher.fetch_all(['bloomberg_index.db'])['bloomberg_index.db']['status'] == CURRENT
+    print("   ✅ Fetched to the mapped path")
+
+
+def test_resume_partial_download():
+    """A .part of the same generation continues from its length"""
+    print("🧪 Testing resume")
+    with tempfile.TemporaryDirectory() as bucket, tempfile.TemporaryDirectory() as target:
+        _bucket(bucket)
+        store = RecordingStore(bucket)
+        name = 'bonds_data.db'
+        generation = store.stat(name).generation
+        part = os.path.join(target, name + PART_SUFFIX)
+        with open(part, 'wb') as f:
+            f.write(DATABASES[name][:200_000])
+        with open(part + '.json', 'w') as f:
+            json.dump({'generation': generation}, f)
+
+        report = DatabaseFetcher(store, target, chunk_size=32_768).fetch_all([name])
+        assert report[name]['status'] == RESUMED and store.bytes_read[name] == 100_000
+        assert _read(os.path.join(target, name)) == DATABASES[name]
+        assert not os.path.exists(part) and not os.path.exists(part + '.json')
+
+        # A partial file from an older generation starts over
+        with open(part, 'wb') as f:
+            f.write(b'stale')
+        with open(part + '.json', 'w') as f:
+            json.dump({'generation': 'older'}, f)
+        store.bytes_read.clear()
+        report = DatabaseFetcher(store, target).fetch_all([name], force=True)
+        assert report[name]['status'] == DOWNLOADED and store.bytes_read[name] == len(DATABASES[name])
+    print("   ✅ Resumed from 200000 bytes, stale partial discarded")
+
+
+def test_checksum_mismatch_keeps_old_file():
+    """Corrupted bytes never replace the local file"""
+    print("🧪 Testing checksum mismatch")
+    with tempfile.TemporaryDirectory() as bucket, tempfile.TemporaryDirectory() as target:
+        _bucket(bucket)
+        old = b'previous good copy'
+        with open(os.path.join(target, 'bonds_data.db'), 'wb') as f:
+            f.write(old)
+        store = RecordingStore(bucket, corrupt='bonds_data.db')
+        report = DatabaseFetcher(store, target).fetch_all(list(DATABASES) + ['not_in_bucket.db'])
+        assert report['bonds_data.db']['status'] == FAILED and 'md5' in report['bonds_data.db']['error']
+        assert report['not_in_bucket.db']['status'] == MISSING
+        assert _read(os.path.join(target, 'bonds_data.db')) == old
+        assert not os.path.exists(os.path.join(target, 'bonds_data.db' + PART_SUFFIX))
+        assert not fetch_succeeded(report, ['bonds_data.db'])
+        assert fetch_succeeded(report, ['validated_quantlib_bonds.db', 'bloomberg_index.db'])
+    print("   ✅ Mismatch rejected, previous file untouched")
+
+
+def test_crc32c_matches_gcs_encoding():
+    """CRC32C of the standard check string, base64 big-endian as GCS reports it"""
+    print("🧪 Testing CRC32C encoding")
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(b'123456789')
+    try:
+        assert file_checksums(f.name)['crc32c'] == '4waSgw=='   # 0xE3069283
+    finally:
+        os.remove(f.name)
+    print("   ✅ CRC32C correct")
+
+
+if __name__ == "__main__":
+    test_concurrent_verified_fetch_and_delta()
+    test_truncated_local_copy_not_trusted()
+    test_local_path_override()
+    test_resume_partial_download()
+    test_checksum_mismatch_keeps_old_file()
+    test_crc32c_matches_gcs_encoding()
+    print("\n✅ Database fetcher tests complete")
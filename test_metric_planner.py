@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test the metric planner that lets the engine compute only requested metrics
+"""
+
+import os
+import sys
+from datetime import date
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from metric_planner import plan_metrics, FULL_PLAN, ENGINE_STAGES, StageTimings
+from profile_config import FIELD_PROFILES
+
+try:
+    import QuantLib as ql
+    import google_analysis10 as ga10
+    QUANTLIB_AVAILABLE = True
+except ImportError as e:
+    print(f"⏭️ QuantLib not available: {e}")
+    QUANTLIB_AVAILABLE = False
+
+
+def test_profile_plans_skip_unneeded_stages():
+    """Profiles expand through dependencies and skip the stages they don't need"""
+    print("🧪 Testing profile stage plans")
+    ytm_only = plan_metrics(['ytm'])
+    assert ytm_only.stages == {'instrument', 'yield'}
+
+    pricing = plan_metrics(FIELD_PROFILES['PRICING'])
+    assert pricing.stages == {'instrument', 'yield', 'accrued'}
+    assert not pricing.needs('convexity') and not pricing.needs('z_spread')
+
+    settlement = plan_metrics(FIELD_PROFILES['SETTLEMENT'])
+    assert settlement.stages == {'instrument', 'accrued'}
+    assert not settlement.needs('treasury_fetch')
+
+    trading = plan_metrics(FIELD_PROFILES['TRADING'])
+    assert trading.needs('z_spread') and trading.needs('treasury_fetch') and not trading.needs('spread')
+
+    default = plan_metrics(FIELD_PROFILES['DEFAULT'])
+    assert default.includes('yield') and default.includes('ytm') and not default.includes('convexity')
+    print("   ✅ ytm / PRICING / SETTLEMENT / TRADING plans are minimal")
+
+
+def test_full_plan_fallbacks():
+    """None, 'all' and requests with no known metrics run every stage"""
+    print("🧪 Testing full-plan fallbacks")
+    assert plan_metrics(None) is FULL_PLAN
+    assert plan_metrics('all') is FULL_PLAN
+    assert plan_metrics(['not_a_metric']) is FULL_PLAN
+    assert FULL_PLAN.stages == set(ENGINE_STAGES) and FULL_PLAN.skipped_stages() == []
+    assert plan_metrics('ytm, convexity').stages == {'instrument', 'yield', 'convexity'}
+    print("   ✅ Full plan used when nothing narrower is known")
+
+
+def test_stage_timings_accumulate():
+    """Repeated stages accumulate into one timing"""
+    print("🧪 Testing stage timings")
+    timings = StageTimings()
+    for _ in range(3):
+        with timings.stage('yield'):
+            sum(range(1000))
+    result = timings.as_dict()
+    assert list(result) == ['yield'] and result['yield'] >= 0
+    print(f"   ✅ yield: {result['yield']}ms")
+
+
+def test_engine_skips_unrequested_stages():
+    """The engine returns None for skipped metrics and times only the stages it ran"""
+    print("🧪 Testing engine stage skipping")
+    if not QUANTLIB_AVAILABLE:
+        print("   ⏭️ Skipped")
+        return
+
+    conventions = {'frequency': 'Semiannual', 'day_count': 'ActualActual.Bond',
+                   'business_day_convention': 'Following', 'end_of_month': False}
+    handle = ql.YieldTermStructureHandle(ql.FlatForward(ql.Date(30, 6, 2025), 0.03, ql.Actual365Fixed()))
+
+    def run(plan):
+        return ga10.calculate_bond_metrics_with_conventions_using_shared_engine(
+            isin=None, coupon=3.0, maturity_date='2052-08-15', price=71.66,
+            trade_date=date(2025, 6, 30), treasury_handle=handle, default_conventions=conventions,
+            metric_plan=plan
+        )
+
+    full = run(None)
+    settlement = run(plan_metrics(FIELD_PROFILES['SETTLEMENT']))
+
+    assert settlement['ytm'] is None and settlement['convexity'] is None and settlement['z_spread'] is None
+    assert abs(settlement['accrued_interest'] - full['accrued_interest']) < 1e-12
+    assert 'yield' not in settlement['stage_timings_ms'] and 'treasury_fetch' not in settlement['stage_timings_ms']
+    assert 'treasury_fetch' in settlement['stages_skipped']
+    print(f"   ✅ SETTLEMENT ran {sorted(settlement['stage_timings_ms'])}")
+
+
+if __name__ == "__main__":
+    test_profile_plans_skip_unneeded_stages()
+    test_full_plan_fallbacks()
+    test_stage_timings_accumulate()
+    test_engine_skips_unrequested_stages()
+    print("\n✅ Metric planner tests complete")
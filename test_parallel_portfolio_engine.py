@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test the process-pool portfolio engine: chunking, ordering and serial parity
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import parallel_portfolio_engine as ppe
+
+
+def test_chunk_sizing():
+    """Explicit chunk size wins; auto sizing gives ~4 chunks per worker"""
+    print("🧪 Testing chunk sizing")
+    assert ppe.resolve_chunk_size(500, 4, chunk_size=25) == 25
+    assert ppe.resolve_chunk_size(500, 4, chunk_size=0) == 32
+    assert ppe.resolve_chunk_size(10, 4, chunk_size=0) == 1
+    assert ppe.resolve_chunk_size(100000, 2, chunk_size=0) == ppe.MAX_AUTO_CHUNK_SIZE
+    print("   ✅ Chunk sizes resolved")
+
+
+def test_pool_selection():
+    """Small portfolios and single-worker configs stay serial"""
+    print("🧪 Testing pool selection")
+    assert not ppe.should_use_process_pool(1000, max_workers=1)
+    assert not ppe.should_use_process_pool(ppe.PORTFOLIO_PARALLEL_MIN_BONDS - 1, max_workers=4)
+    assert ppe.should_use_process_pool(ppe.PORTFOLIO_PARALLEL_MIN_BONDS, max_workers=4) == (ppe.PORTFOLIO_MAX_WORKERS > 1)
+    print("   ✅ Pool only used for large portfolios with >1 worker")
+
+
+def test_worker_count_capped():
+    """?workers= can't exceed PORTFOLIO_MAX_WORKERS; one pool per database set"""
+    print("🧪 Testing worker cap")
+    assert ppe.resolve_worker_count(10 ** 6) == ppe.PORTFOLIO_MAX_WORKERS
+    assert ppe.resolve_worker_count(-3) == 0
+    if ppe.PORTFOLIO_MAX_WORKERS < 2:
+        print("   ⏭️ Pool resize skipped (single CPU)")
+        return
+    args = ('a.db', 'b.db', 'c.db')
+    key, first = ppe._get_pool(*args, 2, '2025-06-30')
+    try:
+        assert ppe._get_pool(*args, 2, '2025-06-30')[1] is first
+        second = ppe._get_pool(*args, 3, '2025-06-30')[1]
+        assert second is not first and list(ppe._pools) == [key] and first._shutdown_thread
+    finally:
+        ppe.shutdown_portfolio_pools()
+    print(f"   ✅ Capped at {ppe.PORTFOLIO_MAX_WORKERS}, resized pool replaced")
+
+
+def test_parallel_matches_serial():
+    """Parallel results equal serial results, in input order, with errors isolated"""
+    print("🧪 Testing parallel vs serial parity")
+    try:
+        import QuantLib  # noqa: F401
+        from google_analysis10 import process_bond_portfolio
+    except ImportError as e:
+        print(f"   ⏭️ Skipped - calculation engine not available: {e}")
+        return
+
+    bonds = [
+        {"description": "T 3 15/08/52", "CLOSING PRICE": 71.66, "WEIGHTING": 1.0},
+        {"description": "PEMEX 6.95 01/28/60", "CLOSING PRICE": 77.88, "WEIGHTING": 1.0},
+        {"description": "NOT A BOND", "CLOSING PRICE": 100.0, "WEIGHTING": 1.0},
+        {"description": "T 4.1 02/15/28", "CLOSING PRICE": 99.5, "WEIGHTING": 1.0},
+    ] * 15
+    portfolio = {"data": bonds}
+    args = ('./bonds_data.db', './validated_quantlib_bonds.db', './bloomberg_index.db')
+
+    serial = process_bond_portfolio(portfolio, *args, settlement_date="2025-06-30", max_workers=0)
+    parallel = process_bond_portfolio(portfolio, *args, settlement_date="2025-06-30", max_workers=4, chunk_size=7)
+
+    assert len(serial) == len(parallel) == len(bonds)
+    for s, p in zip(serial, parallel):
+        assert s.get('description') == p.get('description')
+        assert s.get('ytm') == p.get('ytm')
+        assert s.get('duration') == p.get('duration')
+    print(f"   ✅ {len(parallel)} bonds identical in input order")
+
+
+if __name__ == "__main__":
+    test_chunk_sizing()
+    test_pool_selection()
+    test_worker_count_capped()
+    test_parallel_matches_serial()
+    print("\n✅ Parallel portfolio engine tests complete")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test portfolio sessions: dirty-line re-pricing, incremental aggregates, expiry and eviction
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from portfolio_sessions import PortfolioSession, PortfolioSessionStore, SessionNotFound
+from portfolio_streaming import RunningPortfolioMetrics
+
+PORTFOLIO = [
+    {'description': 'T 3 15/08/52', 'price': 71.66, 'weighting': 40.0},
+    {'description': 'PANAMA 3.87 23/07/60', 'price': 56.6, 'weighting': 30.0},
+    {'description': 'PEMEX 6.5 13/06/27', 'price': 95.75, 'weighting': 20.0, 'line': 'pemex'},
+    {'description': 'T 4.125 15/11/32', 'price': 99.5, 'weighting': 10.0},
+]
+
+
+class FakeEngine:
+    """Deterministic stand-in for process_bond_portfolio that counts priced lines."""
+
+    def __init__(self):
+        self.priced = []
+
+    def __call__(self, lines):
+        self.priced.extend(line['description'] for line in lines)
+        return [{
+            'description': line['description'],
+            'ytm': 200.0 / float(line['price']),
+            'duration': float(line['price']) / 10.0,
+            'spread': float(line['price']) - 50.0,
+            'weighting': line.get('weighting'),
+            'successful': True
+        } for line in lines]
+
+
+def _full_metrics(session):
+    metrics = RunningPortfolioMetrics()
+    for _, result in session.ordered_results():
+        metrics.add(result)
+    return metrics.as_metrics()
+
+
+def _assert_close(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key in expected:
+        assert abs(actual[key] - expected[key]) < 1e-9, (key, actual[key], expected[key])
+
+
+def test_only_dirty_lines_are_priced():
+    """A price delta re-prices one line; aggregates match a full recompute"""
+    print("🧪 Testing dirty-line re-pricing")
+    engine = FakeEngine()
+    session = PortfolioSession('2025-06-30')
+    session.apply(engine, add=PORTFOLIO)
+    assert list(session.lines) == ['0', '1', 'pemex', '3'] and len(engine.priced) == 4
+
+    engine.priced.clear()
+    changed = session.apply(engine, update=[{'line': '1', 'price': 57.1}, {'line': 'pemex', 'price': 95.75}])
+    assert engine.priced == ['PANAMA 3.87 23/07/60'] and changed == ['1', 'pemex']
+    assert session.results['1']['ytm'] == 200.0 / 57.1
+    _assert_close(session.metrics.as_metrics(), _full_metrics(session))
+    print(f"   ✅ 1 of {len(session.lines)} lines re-priced, aggregates exact")
+
+
+def test_weighting_change_is_not_repriced():
+    """Re-weighting reuses the stored result"""
+    print("🧪 Testing weighting-only deltas")
+    engine = FakeEngine()
+    session = PortfolioSession('2025-06-30')
+    session.apply(engine, add=PORTFOLIO)
+    engine.priced.clear()
+    session.apply(engine, update=[{'line': '0', 'weighting': 55.0}])
+    assert engine.priced == [] and session.results['0']['weighting'] == 55.0 and session.reused == 1
+    _assert_close(session.metrics.as_metrics(), _full_metrics(session))
+    print("   ✅ No pricing, portfolio re-weighted")
+
+
+def test_add_remove_and_invalid_delta():
+    """Added lines are priced, removed ones leave the sums; a bad delta changes nothing"""
+    print("🧪 Testing add / remove / invalid deltas")
+    engine = FakeEngine()
+    session = PortfolioSession('2025-06-30')
+    session.apply(engine, add=PORTFOLIO)
+    engine.priced.clear()
+    session.apply(engine, add=[{'description': 'T 2.875 15/05/32', 'price': 89.25, 'weighting': 5.0}], remove=['0'])
+    assert engine.priced == ['T 2.875 15/05/32'] and list(session.lines) == ['1', 'pemex', '3', '4']
+    _assert_close(session.metrics.as_metrics(), _full_metrics(session))
+
+    before = (dict(session.lines), session.metrics.as_metrics())
+    for delta in ({'update': [{'line': 'missing', 'price': 1.0}]}, {'remove': ['1', 'nope']},
+                  {'add': [{'description': 'X', 'price': 1.0, 'line': 'pemex'}]}):
+        try:
+            session.apply(engine, **delta)
+            raise AssertionError(f"accepted {delta}")
+        except (KeyError, ValueError):
+            pass
+    assert (dict(session.lines), session.metrics.as_metrics()) == before
+    print("   ✅ Deltas applied atomically")
+
+
+def test_expiry_and_memory_eviction():
+    """Idle sessions expire; the LRU session goes first when over budget"""
+    print("🧪 Testing session expiry and eviction")
+    engine = FakeEngine()
+    store = PortfolioSessionStore(ttl_seconds=60, max_bytes=10 ** 9)
+    first = store.create('2025-06-30', 0, PORTFOLIO, engine)
+    first.last_used -= 120
+    try:
+        store.get(first.session_id)
+        raise AssertionError("expired session returned")
+    except SessionNotFound:
+        pass
+
+    oldest = store.create('2025-06-30', 0, PORTFOLIO, engine)
+    store.max_bytes = int(oldest.size_bytes * 2.5)
+    middle = store.create('2025-06-30', 0, PORTFOLIO, engine)
+    store.get(oldest.session_id)                     # touch: middle is now least recently used
+    store.create('2025-06-30', 0, PORTFOLIO, engine)
+    assert store.get(oldest.session_id) is oldest
+    try:
+        store.get(middle.session_id)
+        raise AssertionError("evicted session returned")
+    except SessionNotFound:
+        pass
+    stats = store.stats()
+    assert stats['sessions'] == 2 and stats['expired'] == 1 and stats['evicted'] == 1
+    print(f"   ✅ {stats['expired']} expired, {stats['evicted']} evicted, {stats['sessions']} live")
+
+
+if __name__ == "__main__":
+    test_only_dirty_lines_are_priced()
+    test_weighting_change_is_not_repriced()
+    test_add_remove_and_invalid_delta()
+    test_expiry_and_memory_eviction()
+    print("\n✅ Portfolio session tests complete")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test streamed portfolio responses: NDJSON / CSV bodies and running aggregates
+"""
+
+import os
+import sys
+import csv
+import io
+import json
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from portfolio_streaming import stream_format, RunningPortfolioMetrics, ndjson_stream, csv_stream
+
+RESULTS = [
+    {'description': 'T 3 15/08/52', 'ytm': 4.898837, 'duration': 16.350751, 'spread': -1.5, 'weighting': 60.0},
+    {'description': 'PANAMA 3.87 23/07/60', 'ytm': 7.2, 'duration': 13.1, 'spread': 290.0, 'weighting': 25.5},
+    {'description': 'BAD BOND', 'successful': False, 'error': 'could not parse', 'weighting': 10.0},
+    {'description': 'PEMEX 6.5 13/06/27', 'ytm': 8.1, 'duration': 1.8, 'spread': None, 'weighting': 14.5},
+    {'description': 'UNWEIGHTED', 'ytm': 5.0, 'duration': 3.0, 'spread': 50.0, 'weighting': None},
+]
+
+
+def _format(result):
+    return {'name': result['description'], 'yield': result.get('ytm'), 'duration': result.get('duration'),
+            'status': 'error' if 'error' in result else 'success'}
+
+
+def _trailer(metrics):
+    return {'portfolio_metrics': metrics.as_metrics(), 'metadata': {'total_bonds': metrics.total_bonds}}
+
+
+def _buffered_metrics(results):
+    """The list-based aggregation portfolio_analysis used before streaming."""
+    ok = [b for b in results if 'error' not in b and b.get('ytm') is not None
+          and b.get('duration') is not None and b.get('weighting') is not None]
+    total_weight = sum(float(b['weighting']) for b in ok)
+    return {
+        'portfolio_yield': sum(float(b['ytm'] or 0) * float(b['weighting']) for b in ok) / total_weight,
+        'portfolio_duration': sum(float(b['duration'] or 0) * float(b['weighting']) for b in ok) / total_weight,
+        'portfolio_spread': sum(float(b.get('spread') or 0) * float(b['weighting']) for b in ok) / total_weight,
+        'total_bonds': len(results),
+        'successful_bonds': len(ok),
+        'failed_bonds': len(results) - len(ok),
+        'success_rate': round(len(ok) / len(results) * 100, 1),
+        'total_weight': total_weight
+    }
+
+
+def test_running_metrics_match_buffered():
+    """Running weighted sums equal the all-at-once aggregation exactly"""
+    print("🧪 Testing running portfolio metrics")
+    metrics = RunningPortfolioMetrics()
+    for result in RESULTS:
+        metrics.add(result)
+    assert metrics.as_metrics() == _buffered_metrics(RESULTS)
+    assert RunningPortfolioMetrics().as_metrics() == {}
+    print(f"   ✅ Identical ({metrics.successful_bonds}/{metrics.total_bonds} bonds weighted)")
+
+
+def test_stream_format_selection():
+    """?stream= wins over Accept; plain JSON requests stay buffered"""
+    print("🧪 Testing stream format selection")
+    assert stream_format('application/x-ndjson') == 'ndjson'
+    assert stream_format('text/csv, */*;q=0.1') == 'csv'
+    assert stream_format('application/json') is None and stream_format(None) is None
+    assert stream_format('application/x-ndjson', 'csv') == 'csv'
+    assert stream_format('text/csv', 'json') is None
+    print("   ✅ Formats selected as expected")
+
+
+def test_ndjson_lines_and_trailer():
+    """One line per bond as it arrives, then the aggregate trailer"""
+    print("🧪 Testing NDJSON stream")
+    consumed = []
+
+    def results():
+        for result in RESULTS:
+            consumed.append(result)
+            yield result
+
+    stream = ndjson_stream(results(), _format, _trailer)
+    first = json.loads(next(stream))
+    assert first['index'] == 0 and first['name'] == 'T 3 15/08/52' and len(consumed) == 1
+    lines = [first] + [json.loads(line) for line in stream]
+    assert [line.get('index') for line in lines[:-1]] == list(range(len(RESULTS)))
+    assert lines[-1]['portfolio_metrics'] == _buffered_metrics(RESULTS)
+    print(f"   ✅ {len(lines)} lines, first written after one result")
+
+
+def test_csv_rows_and_trailer():
+    """Header, one row per bond, blank line, metrics header and row"""
+    print("🧪 Testing CSV stream")
+    body = ''.join(csv_stream(iter(RESULTS), _format, _trailer))
+    bonds, trailer = body.split('\n\n')
+    rows = list(csv.DictReader(io.StringIO(bonds)))
+    assert [row['name'] for row in rows] == [r['description'] for r in RESULTS]
+    assert rows[2]['status'] == 'error' and rows[0]['yield'] == '4.898837'
+    summary = next(csv.DictReader(io.StringIO(trailer)))
+    assert float(summary['portfolio_yield']) == _buffered_metrics(RESULTS)['portfolio_yield']
+    print(f"   ✅ {len(rows)} bond rows plus metrics trailer")
+
+
+def test_failure_mid_stream():
+    """A pricing failure ends the stream with an error record, after the rows already sent"""
+    print("🧪 Testing failure mid-stream")
+
+    def results():
+        yield RESULTS[0]
+        raise RuntimeError('worker pool broken')
+
+    lines = [json.loads(line) for line in ndjson_stream(results(), _format, _trailer)]
+    assert lines[0]['index'] == 0 and lines[-1]['status'] == 'error' and 'worker pool broken' in lines[-1]['error']
+    rows = ''.join(csv_stream(results(), _format, _trailer)).splitlines()
+    assert rows[-1].startswith('error,')
+    print("   ✅ Error record terminates both formats")
+
+
+if __name__ == "__main__":
+    test_running_metrics_match_buffered()
+    test_stream_format_selection()
+    test_ndjson_lines_and_trailer()
+    test_csv_rows_and_trailer()
+    test_failure_mid_stream()
+    print("\n✅ Portfolio streaming tests complete")
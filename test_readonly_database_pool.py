@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test the pooled read-only SQLite layer used by hot-path lookups
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import threading
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.database_manager import ReadOnlyConnectionPool
+from isin_lookup import lookup_isin_in_database
+
+
+def _make_db(path, description="PEMEX 6.95 01/28/60"):
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE validated_quantlib_bonds (isin TEXT, description TEXT, coupon REAL, maturity TEXT)")
+        conn.execute("INSERT INTO validated_quantlib_bonds VALUES ('US71654QDF63', ?, 6.95, '2060-01-28')", (description,))
+
+
+def test_connections_are_reused_and_read_only():
+    """Repeated lookups reuse one connection, and writes are rejected"""
+    print("🧪 Testing connection reuse and read-only mode")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'validated.db')
+        _make_db(db_path)
+        pool = ReadOnlyConnectionPool(db_path, pool_size=2)
+
+        for _ in range(100):
+            row = pool.query_one("SELECT * FROM validated_quantlib_bonds WHERE isin = ?", ('US71654QDF63',))
+        assert row['coupon'] == 6.95
+        assert pool.stats()['connects'] == 1
+
+        try:
+            with pool.connection() as conn:
+                conn.execute("DELETE FROM validated_quantlib_bonds")
+            assert False, "write should fail on a read-only connection"
+        except sqlite3.OperationalError:
+            pass
+        print(f"   ✅ {pool.stats()}")
+
+
+def test_pool_bounded_across_threads():
+    """Concurrent lookups never open more than pool_size connections"""
+    print("🧪 Testing pool bound under threads")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'validated.db')
+        _make_db(db_path)
+        pool = ReadOnlyConnectionPool(db_path, pool_size=3)
+        errors = []
+
+        def work():
+            try:
+                for _ in range(50):
+                    assert pool.query_one("SELECT COUNT(*) FROM validated_quantlib_bonds")[0] == 1
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert not errors
+        assert pool.stats()['connects'] <= 3
+        print(f"   ✅ {pool.stats()['connects']} connections for 400 lookups")
+
+
+def test_schema_map_cached_until_file_replaced():
+    """Schema is read once, and reloaded when the database file is swapped"""
+    print("🧪 Testing schema map caching")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'validated.db')
+        _make_db(db_path)
+        pool = ReadOnlyConnectionPool(db_path)
+
+        schema = pool.schema()
+        assert schema == {'validated_quantlib_bonds': ['isin', 'description', 'coupon', 'maturity']}
+        assert pool.schema() is schema
+
+        # New download lands via rename - pool must see the new file
+        new_path = os.path.join(tmpdir, 'validated.db.new')
+        _make_db(new_path, description="PEMEX 7 01/28/60")
+        os.replace(new_path, db_path)
+
+        assert pool.schema() is not schema
+        row = pool.query_one("SELECT description FROM validated_quantlib_bonds")
+        assert row[0] == "PEMEX 7 01/28/60"
+        assert pool.stats()['reloads'] == 1
+        print("   ✅ Schema and connections refreshed after file replacement")
+
+
+def test_isin_lookup_uses_schema_map():
+    """lookup_isin_in_database finds the ISIN through the pooled layer"""
+    print("🧪 Testing ISIN lookup via read-only pool")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'validated.db')
+        _make_db(db_path)
+
+        result = lookup_isin_in_database('US71654QDF63', os.path.join(tmpdir, 'missing.db'), db_path)
+        assert result['coupon'] == 6.95
+        assert result['database'] == 'Validated'
+        assert result['table'] == 'validated_quantlib_bonds'
+        assert lookup_isin_in_database('XS0000000000', db_path) is None
+        print("   ✅ ISIN found without per-lookup introspection")
+
+
+if __name__ == "__main__":
+    test_connections_are_reused_and_read_only()
+    test_pool_bounded_across_threads()
+    test_schema_map_cached_until_file_replaced()
+    test_isin_lookup_uses_schema_map()
+    print("\n✅ Read-only database pool tests passed")
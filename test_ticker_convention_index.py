@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test the preloaded ticker → conventions index against the SQL lookups it replaces
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ticker_convention_index as tci
+from ticker_convention_index import TickerConventionIndex, load_ticker_convention_index
+from bond_description_parser import SmartBondParser
+from core.database_manager import get_readonly_pool
+
+VALIDATED_ROWS = [
+    ('PEMEX 6.95 01/28/60', '30/360', 'Following', 'Semiannual', 'PASS'),
+    ('PEMEX 5.95 01/28/31', '30/360', 'Following', 'Semiannual', 'PASS'),
+    ('Pemex 7.69 01/23/50', 'ACT/ACT', 'Following', 'Semiannual', 'FAIL'),
+    ('PEMEXCO 4 01/01/30', 'ACT/ACT', 'Unadjusted', 'Annual', 'PASS'),
+    ('T 3 08/15/52', 'ActualActual.Bond', 'Following', 'Semiannual', 'PASS'),
+    ('TEVA 4.1 10/01/46', '30/360', 'Following', 'Semiannual', 'PASS'),
+    ('TSMC 2.5 10/25/31', 'ACT/360', 'Following', 'Annual', 'PASS'),
+    ('ECOPETROL SA, 5.875%, 28-May-2045', '30/360', 'Following', 'Semiannual', 'PASS'),
+    ('GALAXY PIPELINE, 2.16%, 31-Mar-2034', 'ACT/360', None, 'Semiannual', 'PASS'),
+    ('GALAXY PIPELINE, 3.25%, 30-Sep-2040', '30/360', 'Following', 'Semiannual', 'PASS'),
+    (None, '30/360', 'Following', 'Semiannual', 'PASS'),
+]
+
+PREFERENCE_ROWS = [
+    ('PEMEX', '30/360', 'Following', 'Semiannual', 12),
+    ('CORP', '30/360', 'Following', 'Semiannual', 900),
+]
+
+
+def _make_dbs():
+    directory = tempfile.mkdtemp()
+    validated = os.path.join(directory, 'validated_quantlib_bonds.db')
+    bloomberg = os.path.join(directory, 'bloomberg_index.db')
+    with sqlite3.connect(validated) as conn:
+        conn.execute("CREATE TABLE validated_quantlib_bonds (description TEXT, day_count TEXT, "
+                     "business_convention TEXT, frequency TEXT, pass_status TEXT)")
+        conn.executemany("INSERT INTO validated_quantlib_bonds VALUES (?, ?, ?, ?, ?)", VALIDATED_ROWS)
+    with sqlite3.connect(bloomberg) as conn:
+        conn.execute("CREATE TABLE ticker_convention_preferences (ticker TEXT, day_count_convention TEXT, "
+                     "business_convention TEXT, payment_frequency TEXT, frequency_count INTEGER)")
+        conn.executemany("INSERT INTO ticker_convention_preferences VALUES (?, ?, ?, ?, ?)", PREFERENCE_ROWS)
+    return validated, bloomberg
+
+
+def _sql_validated(ticker, validated_db_path):
+    row = get_readonly_pool(validated_db_path).query_one("""
+        SELECT day_count, business_convention, frequency, COUNT(*) as count
+        FROM validated_quantlib_bonds
+        WHERE description LIKE ? || '%'
+        GROUP BY day_count, business_convention, frequency
+        ORDER BY count DESC
+        LIMIT 1
+    """, (ticker,))
+    return tuple(row) if row else None
+
+
+def test_validated_aggregates_match_sql():
+    """Prefix aggregates equal the LIKE/GROUP BY query, including unknown tickers"""
+    print("🧪 Testing validated aggregates vs SQL")
+    validated, bloomberg = _make_dbs()
+    index = TickerConventionIndex.build(validated, bloomberg)
+
+    for ticker in ('PEMEX', 'pemex', 'PEMEXCO', 'T', 'TE', 'ECOPETROL', 'GALAXY', 'ZZZ', 'TSMC'):
+        assert index.validated_conventions(ticker) == _sql_validated(ticker, validated), ticker
+
+    assert index.validated_conventions('ZZZ') is None and index.negative_hits >= 1
+    assert index.pass_best == ('30/360', 'Following', 'Semiannual', 6)
+    print(f"   ✅ Identical to SQL ({index.stats()['validated_tickers']} tickers precomputed)")
+
+
+def test_parser_uses_index_without_io():
+    """Preference lookups and their CORP fallback come from memory"""
+    print("🧪 Testing parser preference lookups")
+    validated, bloomberg = _make_dbs()
+    load_ticker_convention_index(validated, bloomberg)
+    parser = SmartBondParser(None, validated, bloomberg)
+    try:
+        os.rename(bloomberg, bloomberg + '.moved')     # any SQL would now fail
+        os.link(bloomberg + '.moved', bloomberg)        # same inode, so the index still covers it
+        assert parser.lookup_ticker_conventions('PEMEX')['ticker_frequency_count'] == 12
+        fallback = parser.lookup_ticker_conventions('UNKNOWN')
+        assert fallback['source'] == 'fallback_from_UNKNOWN_to_CORP' and fallback['prediction_confidence'] == 'medium'
+    finally:
+        tci._index = None
+    print("   ✅ Exact and fallback tickers resolved from the index")
+
+
+def test_replaced_database_is_not_covered():
+    """A database replaced on disk (GCS refresh) falls back until the index is rebuilt"""
+    print("🧪 Testing replaced database coverage")
+    validated, bloomberg = _make_dbs()
+    index = TickerConventionIndex.build(validated, bloomberg)
+    assert index.covers_validated(validated) and index.covers_preferences(bloomberg)
+
+    shutil.copy(validated, validated + '.new')
+    os.replace(validated + '.new', validated)
+    assert not index.covers_validated(validated) and index.covers_preferences(bloomberg)
+
+    rebuilt = TickerConventionIndex.build(validated, bloomberg)
+    assert rebuilt.covers_validated(validated)
+    print("   ✅ Stale source ignored, rebuild covers it again")
+
+
+if __name__ == "__main__":
+    test_validated_aggregates_match_sql()
+    test_parser_uses_index_without_io()
+    test_replaced_database_is_not_covered()
+    print("\n✅ Ticker convention index tests complete")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test the process-wide Treasury curve cache (no QuantLib or database needed)
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from treasury_curve_cache import TreasuryCurveCache
+
+
+class FakeLoaders:
+    """Counts fetch/build calls so we can check each happens once per date."""
+
+    def __init__(self):
+        self.fetches = 0
+        self.builds = 0
+
+    def fetch(self, trade_date, db_path):
+        self.fetches += 1
+        return {'1Y': 0.045, '10Y': 0.043, '30Y': 0.047}
+
+    def build(self, yields, settlement_date):
+        self.builds += 1
+        return ('curve', settlement_date, len(yields))
+
+
+def _make_db(path):
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE tsys_enhanced (Date TEXT, M1Y REAL)")
+        conn.execute("INSERT INTO tsys_enhanced VALUES ('2025-06-30', 4.5)")
+
+
+def test_portfolio_shares_one_curve():
+    """500 bonds on one settlement date → one fetch, one bootstrap"""
+    print("🧪 Testing shared curve across a portfolio")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'bonds_data.db')
+        _make_db(db_path)
+        cache = TreasuryCurveCache(max_size=4)
+        loaders = FakeLoaders()
+
+        for _ in range(500):
+            yields, curve = cache.get_curve('2025-06-30', db_path, loaders.fetch, loaders.build, '2025-06-30')
+
+        assert loaders.fetches == 1
+        assert loaders.builds == 1
+        assert curve == ('curve', '2025-06-30', 3)
+        stats = cache.stats()
+        assert stats['hits'] == 499 and stats['misses'] == 1
+        print(f"   ✅ {stats}")
+
+
+def test_lru_eviction():
+    """Oldest settlement date is evicted once max_size is exceeded"""
+    print("🧪 Testing LRU eviction")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'bonds_data.db')
+        _make_db(db_path)
+        cache = TreasuryCurveCache(max_size=2)
+        loaders = FakeLoaders()
+
+        for trade_date in ('2025-06-27', '2025-06-30', '2025-07-01'):
+            cache.get_yields(trade_date, db_path, loaders.fetch)
+        cache.get_yields('2025-06-27', db_path, loaders.fetch)
+
+        assert loaders.fetches == 4
+        assert cache.stats()['evictions'] == 2
+        print("   ✅ Evicted least recently used dates")
+
+
+def test_invalidation_on_update():
+    """Explicit invalidate and a new tsys row both force a re-fetch"""
+    print("🧪 Testing invalidation")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, 'bonds_data.db')
+        _make_db(db_path)
+        cache = TreasuryCurveCache()
+        loaders = FakeLoaders()
+
+        cache.get_curve('2025-06-30', db_path, loaders.fetch, loaders.build, None)
+        cache.invalidate()
+        cache.get_curve('2025-06-30', db_path, loaders.fetch, loaders.build, None)
+        assert loaders.fetches == 2 and loaders.builds == 2
+
+        # Updater writes a new row from another process → file version changes
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("INSERT INTO tsys_enhanced VALUES ('2025-07-01', 4.6)")
+        cache.get_curve('2025-06-30', db_path, loaders.fetch, loaders.build, None)
+        assert loaders.fetches == 3
+        print("   ✅ Stale curves are not served after an update")
+
+
+def test_empty_yields_not_cached():
+    """A date with no yields is retried rather than pinned as empty"""
+    print("🧪 Testing empty results are not cached")
+    cache = TreasuryCurveCache()
+    calls = []
+
+    def fetch(trade_date, db_path):
+        calls.append(trade_date)
+        return {}
+
+    yields, curve = cache.get_curve('2025-06-30', 'missing.db', fetch, lambda y, d: 'never', None)
+    cache.get_yields('2025-06-30', 'missing.db', fetch)
+    assert yields == {} and curve is None
+    assert len(calls) == 2
+    print("   ✅ Empty yield sets are re-fetched")
+
+
+if __name__ == "__main__":
+    test_portfolio_shares_one_curve()
+    test_lru_eviction()
+    test_invalidation_on_update()
+    test_empty_yields_not_cached()
+    print("\n✅ All Treasury curve cache tests passed")
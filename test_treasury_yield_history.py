@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test the in-memory Treasury yield history (dates × tenors array)
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+from datetime import date
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from treasury_yield_history import TreasuryYieldHistory
+
+try:
+    import QuantLib as ql
+    import google_analysis10 as ga10
+    QUANTLIB_AVAILABLE = True
+except ImportError as e:
+    print(f"⏭️ QuantLib not available: {e}")
+    QUANTLIB_AVAILABLE = False
+
+TENORS = ['M1M', 'M3M', 'M1Y', 'M2Y', 'M10Y', 'M30Y']
+ROWS = [
+    ('2025-06-26', 4.30, 4.35, 4.05, 3.80, 4.29, 4.84),
+    ('2025-06-27', 4.31, 4.36, 4.06, 3.75, 4.28, 4.83),
+    ('2025-06-30', 4.32, 4.37, 4.07, 3.72, 4.24, 4.78),
+    ('2025-07-01', 4.33, 4.38, 4.08, None, 4.26, 4.80),
+]
+
+
+def _make_db():
+    path = os.path.join(tempfile.mkdtemp(), 'bonds_data.db')
+    with sqlite3.connect(path) as conn:
+        conn.execute(f"CREATE TABLE tsys_enhanced (Date TEXT, {', '.join(c + ' REAL' for c in TENORS)}, source TEXT)")
+        conn.executemany(f"INSERT INTO tsys_enhanced VALUES ({', '.join('?' * (len(TENORS) + 2))})",
+                         [row + ('test',) for row in reversed(ROWS)])
+    return path
+
+
+def test_on_or_before_lookup():
+    """Exact dates, weekend fallback and dates before the history"""
+    print("🧪 Testing on-or-before lookup")
+    history = TreasuryYieldHistory(_make_db()).load()
+    assert len(history) == 4 and history.tenors == ['1', '3', '1Y', '2Y', '10Y', '30Y']
+
+    matched, yields = history.lookup('2025-06-30')
+    assert matched == '2025-06-30' and abs(yields['10Y'] - 0.0424) < 1e-12
+    assert history.lookup(date(2025, 6, 29))[0] == '2025-06-27'     # Sunday -> Friday
+    assert history.lookup('2025-12-31')[0] == '2025-07-01'
+    assert '2Y' not in history.lookup('2025-07-01')[1]               # NULL tenor dropped
+    assert history.lookup('2025-01-01') == (None, {})
+
+    start = time.perf_counter()
+    for _ in range(10000):
+        history.lookup('2025-06-29')
+    per_lookup_us = (time.perf_counter() - start) / 10000 * 1e6
+    print(f"   ✅ Lookups resolve in {per_lookup_us:.1f}µs")
+
+
+def test_incremental_append_and_reload():
+    """Updater appends in place; external writes trigger a reload"""
+    print("🧪 Testing append and reload")
+    path = _make_db()
+    history = TreasuryYieldHistory(path).load()
+
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO tsys_enhanced (Date, M10Y, M30Y) VALUES ('2025-07-02', 4.30, 4.85)")
+    history.append('2025-07-02', {'M10Y': 4.30, 'M30Y': 4.85})
+    assert history.loads == 1 and history.latest_date() == '2025-07-02'
+    assert history.lookup('2025-07-03')[1] == {'10Y': 4.30 / 100.0, '30Y': 4.85 / 100.0}
+
+    history.append('2025-06-28', {'M10Y': 4.27})                     # out-of-order insert
+    assert history.lookup('2025-06-29') == ('2025-06-28', {'10Y': 4.27 / 100.0})
+    history.append('2025-06-30', {'M10Y': 4.25})                     # update keeps other tenors
+    assert abs(history.lookup('2025-06-30')[1]['30Y'] - 0.0478) < 1e-12
+
+    time.sleep(0.01)
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO tsys_enhanced (Date, M10Y) VALUES ('2025-07-03', 4.31)")
+    assert history.lookup('2025-07-03')[0] == '2025-07-03' and history.loads == 2
+    print("   ✅ Appends avoid reloads, external changes reload")
+
+
+def test_matches_sql_lookup():
+    """fetch_treasury_yields returns what the SQL path returned"""
+    print("🧪 Testing parity with SQL lookup")
+    if not QUANTLIB_AVAILABLE:
+        print("   ⏭️ Skipped")
+        return
+    path = _make_db()
+    for trade_date in ('2025-06-27', '2025-06-29', '2025-07-05', '2025-01-01'):
+        assert ga10.fetch_treasury_yields(trade_date, path) == ga10._fetch_treasury_yields_sql(trade_date, path)
+    print("   ✅ Identical yield maps")
+
+
+if __name__ == "__main__":
+    test_on_or_before_lookup()
+    test_incremental_append_and_reload()
+    test_matches_sql_lookup()
+    print("\n✅ Treasury yield history tests complete")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test the sidecar Treasury yield store: upserts, overlay on tsys_enhanced and hot reload
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+from datetime import date, timedelta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from treasury_yield_store import TreasuryYieldStore, yield_store_path, STORE_FILENAME
+from treasury_yield_history import TreasuryYieldHistory
+from treasury_curve_cache import TreasuryCurveCache
+
+try:
+    import requests
+    from us_treasury_yield_fetcher import USTreasuryYieldFetcher
+    FETCHER_AVAILABLE = True
+except ImportError as e:
+    print(f"⏭️ Fetcher dependencies not available: {e}")
+    FETCHER_AVAILABLE = False
+
+TENORS = ['M1M', 'M3M', 'M1Y', 'M2Y', 'M10Y', 'M30Y']
+ROWS = [
+    ('2025-06-26', 4.30, 4.35, 4.05, 3.80, 4.29, 4.84),
+    ('2025-06-27', 4.31, 4.36, 4.06, 3.75, 4.28, 4.83),
+    ('2025-06-30', 4.32, 4.37, 4.07, 3.72, 4.24, 4.78),
+]
+
+
+def _make_db():
+    path = os.path.join(tempfile.mkdtemp(), 'bonds_data.db')
+    with sqlite3.connect(path) as conn:
+        conn.execute(f"CREATE TABLE tsys_enhanced (Date TEXT, {', '.join(c + ' REAL' for c in TENORS)}, source TEXT)")
+        conn.executemany(f"INSERT INTO tsys_enhanced VALUES ({', '.join('?' * (len(TENORS) + 2))})",
+                         [row + ('test',) for row in ROWS])
+    return path
+
+
+def test_upserts_and_revisions():
+    """One-row upserts keep untouched tenors; each write bumps the revision"""
+    print("🧪 Testing store upserts")
+    store = TreasuryYieldStore(os.path.join(tempfile.mkdtemp(), STORE_FILENAME))
+    assert store.revision() == 0 and store.lookup('2025-07-01') == (None, {}) and store.rows() == []
+
+    assert store.upsert('2025-07-01', {'M10Y': 4.26, 'M30Y': 4.80, 'bogus': 1.0}) == 1
+    assert store.upsert(date(2025, 7, 1), {'M10Y': 4.27, 'M2Y': 3.70}) == 2
+    assert store.lookup('2025-07-04') == ('2025-07-01', {'M2Y': 3.70, 'M10Y': 4.27, 'M30Y': 4.80})
+    assert store.lookup('2025-06-30') == (None, {})
+    stats = store.stats()
+    assert stats['dates'] == 1 and stats['revision'] == 2 and stats['last_date'] == '2025-07-01'
+    assert yield_store_path('/data/bonds_data.db') == os.path.join('/data', STORE_FILENAME)
+    print(f"   ✅ {stats}")
+
+
+def test_overlay_and_hot_reload():
+    """The store overlays tsys_enhanced; a store write re-applies it without re-reading the main table"""
+    print("🧪 Testing overlay and hot reload")
+    path = _make_db()
+    store = TreasuryYieldStore(yield_store_path(path))
+    store.upsert('2025-06-30', {'M10Y': 4.25})                       # correction of a main-table day
+    history = TreasuryYieldHistory(path).load()
+    assert len(history) == 3 and history.store_dates == 1
+    matched, yields = history.lookup('2025-06-30')
+    assert abs(yields['10Y'] - 0.0425) < 1e-12 and abs(yields['30Y'] - 0.0478) < 1e-12
+
+    curves = TreasuryCurveCache()
+    version = curves.data_version(path)
+    main_stamp = os.stat(path).st_mtime_ns
+    time.sleep(0.01)
+    store.upsert('2025-07-01', {'M10Y': 4.26, 'M30Y': 4.80, 'M7Y': 4.0})    # written by another process
+    assert history.lookup('2025-07-02') == ('2025-07-01', {'10Y': 0.0426, '30Y': 0.048})
+    assert history.loads == 1 and history.store_reloads == 1 and history.latest_date() == '2025-07-01'
+    assert os.stat(path).st_mtime_ns == main_stamp and curves.data_version(path) != version
+
+    store.upsert('2025-07-02', {'M10Y': 4.30})                        # this process's own write
+    history.append('2025-07-02', {'M10Y': 4.30})
+    assert history.is_current() and history.lookup('2025-07-03')[0] == '2025-07-02'
+    print(f"   ✅ {history.stats()['dates']} dates, {history.store_reloads} store reload(s), 1 table load")
+
+
+def test_remote_refresh_in_background():
+    """A registered refresher runs at most once per interval, off the lookup path"""
+    print("🧪 Testing remote refresh")
+    path = _make_db()
+    store = TreasuryYieldStore(yield_store_path(path))
+    history = TreasuryYieldHistory(path).load()
+    history.store = store
+    remote = TreasuryYieldStore(os.path.join(tempfile.mkdtemp(), STORE_FILENAME))
+    remote.upsert('2025-07-01', {'M10Y': 4.26})
+    calls = []
+
+    def refresher():                        # stands in for the GCS generation check + download
+        calls.append(time.monotonic())
+        os.replace(remote.path, store.path)
+        return True
+
+    store.set_refresher(refresher, interval=0.05)
+    history.lookup('2025-07-02')
+    assert not calls                        # not due yet
+    time.sleep(0.06)
+    history.lookup('2025-07-02')
+    history.lookup('2025-07-02')
+    store._refresh_thread.join(5)
+    assert len(calls) == 1 and store.refreshes == 1
+    assert history.lookup('2025-07-02')[0] == '2025-07-01' and history.store_reloads == 1
+    assert store.stats()['refresh_checks'] == 1
+    print(f"   ✅ {store.refreshes} refresh, overlay re-applied")
+
+
+def test_backfill_one_transaction():
+    """Ten years of days in one bulk write"""
+    print("🧪 Testing backfill")
+    store = TreasuryYieldStore(os.path.join(tempfile.mkdtemp(), STORE_FILENAME))
+    days = [date(2015, 1, 2) + timedelta(days=i) for i in range(3650)]
+    rows = [(d, {'M3M': 1.0 + i / 10000, 'M10Y': 2.0 + i / 10000}) for i, d in enumerate(days) if d.weekday() < 5]
+    started = time.perf_counter()
+    revision = store.bulk_upsert(rows)
+    elapsed = time.perf_counter() - started
+    assert revision == 1 and store.stats()['dates'] == len(rows)
+    assert elapsed < 2.0, f"{elapsed:.2f}s"
+    print(f"   ✅ {len(rows)} days in {elapsed * 1000:.0f}ms, {store.stats()['size_kb']}KB")
+
+
+def test_fetcher_writes_store_only():
+    """update_database upserts the given store and leaves the main database alone"""
+    print("🧪 Testing fetcher target")
+    if not FETCHER_AVAILABLE:
+        print("   ⏭️ Skipped (requests not installed)")
+        return
+    path = _make_db()
+    main_stamp = os.stat(path).st_mtime_ns
+    store_path = yield_store_path(path)
+    assert USTreasuryYieldFetcher().update_database({'M10Y': 4.26}, date(2025, 7, 1), store_path=store_path)
+    assert TreasuryYieldStore(store_path).lookup('2025-07-01') == ('2025-07-01', {'M10Y': 4.26})
+    assert os.stat(path).st_mtime_ns == main_stamp
+    print("   ✅ Store written, bonds_data.db untouched")
+
+
+if __name__ == "__main__":
+    test_upserts_and_revisions()
+    test_overlay_and_hot_reload()
+    test_remote_refresh_in_background()
+    test_backfill_one_transaction()
+    test_fetcher_writes_store_only()
+    print("\n✅ Treasury yield store tests complete")
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Ticker Convention Index
+=======================
+
+In-memory ticker → conventions maps for description-route bonds, built once
+per process so convention resolution needs no I/O.
+
+Two sources were queried per bond:
+- bloomberg_index.db ticker_convention_preferences (exact ticker match),
+  via SmartBondParser.lookup_ticker_conventions, re-queried for each of the
+  'CORP' / 'GOVERNMENT' / 'MUNICIPAL' fallbacks on a miss
+- validated_quantlib_bonds (most common day count / business convention /
+  frequency among descriptions starting with the ticker), via
+  get_validated_conventions_by_ticker's `LIKE ? || '%'` GROUP BY
+
+Here the preferences table is a dict, and the validated descriptions are
+held upper-cased and sorted with their conventions, so a ticker's prefix
+range is two bisects. Aggregates for every ticker seen in the validated
+descriptions are precomputed at build; any other prefix is aggregated on
+first use and memoized. Unknown tickers are memoized as misses (negative
+cache). The most common PASS combination (predict_most_likely_conventions'
+fallback) is precomputed as well.
+
+Like the bond reference index, a source is ignored once its database file is
+replaced; load_ticker_convention_index() builds a new index and swaps it in
+atomically after a GCS refresh.
+"""
+
+import os
+import time
+import logging
+import threading
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.database_manager import get_readonly_pool
+
+logger = logging.getLogger(__name__)
+
+TICKER_CONVENTION_INDEX_ENABLED = os.environ.get('TICKER_CONVENTION_INDEX', '1') not in ('0', 'false', 'False')
+
+# (day_count, business_convention, frequency, count)
+ConventionRow = Tuple[Any, Any, Any, int]
+
+
+def _file_identity(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+        return stat.st_dev, stat.st_ino
+    except OSError:
+        return None
+
+
+def _group_order(combo: tuple) -> tuple:
+    """GROUP BY output order (NULLs first), used to break count ties like SQLite."""
+    return tuple((value is not None, value) for value in combo)
+
+
+def description_ticker(description: Optional[str]) -> Optional[str]:
+    """First token of a description, as google_analysis10.get_ticker_from_description extracts it."""
+    parts = description.strip().split() if description else None
+    if not parts:
+        return None
+    return parts[0].upper().replace(',', '').replace('.', '')
+
+
+class TickerConventionIndex:
+    """Ticker → conventions from the preferences table and validated descriptions."""
+
+    def __init__(self):
+        self.bloomberg_db_path: Optional[str] = None
+        self.validated_db_path: Optional[str] = None
+        self._bloomberg_identity = None
+        self._validated_identity = None
+        self.preferences: Dict[str, ConventionRow] = {}
+        self._descriptions: List[str] = []
+        self._conventions: List[tuple] = []
+        self._validated: Dict[str, Optional[ConventionRow]] = {}
+        self._validated_lock = threading.Lock()
+        self.pass_best: Optional[ConventionRow] = None
+        self.build_seconds = 0.0
+        self.hits = 0
+        self.negative_hits = 0
+        self.computed = 0
+
+    @classmethod
+    def build(cls, validated_db_path: Optional[str], bloomberg_db_path: Optional[str]) -> 'TickerConventionIndex':
+        """Load whichever of the two sources exist (a failing source is left out)."""
+        index = cls()
+        start = time.perf_counter()
+        if bloomberg_db_path and os.path.exists(bloomberg_db_path):
+            try:
+                index._load_preferences(bloomberg_db_path)
+            except Exception as e:
+                logger.warning(f"⚠️ Ticker convention index skipped preferences in {bloomberg_db_path}: {e}")
+        if validated_db_path and os.path.exists(validated_db_path):
+            try:
+                index._load_validated(validated_db_path)
+            except Exception as e:
+                logger.warning(f"⚠️ Ticker convention index skipped {validated_db_path}: {e}")
+        index.build_seconds = time.perf_counter() - start
+        return index
+
+    def _load_preferences(self, db_path: str):
+        db_path = os.path.abspath(db_path)
+        identity = _file_identity(db_path)
+        rows = get_readonly_pool(db_path).query_all("""
+            SELECT ticker, day_count_convention, business_convention, payment_frequency, frequency_count
+            FROM ticker_convention_preferences
+            ORDER BY rowid
+        """)
+        preferences = {}
+        for ticker, day_count, business_conv, frequency, count in rows:
+            # First row wins, as the per-ticker query returned
+            preferences.setdefault(ticker, (day_count, business_conv, frequency, count))
+        self.preferences = preferences
+        self.bloomberg_db_path, self._bloomberg_identity = db_path, identity
+
+    def _load_validated(self, db_path: str):
+        db_path = os.path.abspath(db_path)
+        identity = _file_identity(db_path)
+        rows = get_readonly_pool(db_path).query_all("""
+            SELECT description, day_count, business_convention, frequency, pass_status
+            FROM validated_quantlib_bonds
+        """)
+        # LIKE is case-insensitive: match on upper-cased descriptions (NULL never matches)
+        entries = sorted((str(row[0]).upper(), (row[1], row[2], row[3])) for row in rows if row[0] is not None)
+        self._descriptions = [description for description, _ in entries]
+        self._conventions = [combo for _, combo in entries]
+
+        pass_counts = Counter((row[1], row[2], row[3]) for row in rows if row[4] == 'PASS')
+        self.pass_best = self._most_common(pass_counts)
+
+        self._validated = {}
+        for ticker in {description_ticker(description) for description in self._descriptions}:
+            if ticker:
+                self._validated[ticker] = self._aggregate_prefix(ticker)
+        self.validated_db_path, self._validated_identity = db_path, identity
+
+    @staticmethod
+    def _most_common(counts: Counter) -> Optional[ConventionRow]:
+        if not counts:
+            return None
+        combo = min(counts, key=lambda c: (-counts[c], _group_order(c)))
+        return combo + (counts[combo],)
+
+    def _aggregate_prefix(self, prefix: str) -> Optional[ConventionRow]:
+        """Most common conventions among descriptions starting with prefix."""
+        low = bisect_left(self._descriptions, prefix)
+        # Every string with the prefix sorts before prefix + U+10FFFF
+        high = bisect_left(self._descriptions, prefix + '\U0010ffff', low)
+        return self._most_common(Counter(self._conventions[low:high]))
+
+    def covers_preferences(self, db_path: Optional[str]) -> bool:
+        """True if db_path's preferences table was loaded and the file hasn't been replaced."""
+        return (self._bloomberg_identity is not None and bool(db_path)
+                and os.path.abspath(db_path) == self.bloomberg_db_path
+                and _file_identity(self.bloomberg_db_path) == self._bloomberg_identity)
+
+    def covers_validated(self, db_path: Optional[str]) -> bool:
+        """True if db_path's validated bonds were loaded and the file hasn't been replaced."""
+        return (self._validated_identity is not None and bool(db_path)
+                and os.path.abspath(db_path) == self.validated_db_path
+                and _file_identity(self.validated_db_path) == self._validated_identity)
+
+    def preference(self, ticker: str) -> Optional[ConventionRow]:
+        """ticker_convention_preferences row for ticker (exact match)."""
+        return self.preferences.get(ticker)
+
+    def validated_conventions(self, ticker: str) -> Optional[ConventionRow]:
+        """Most common validated conventions for descriptions starting with ticker."""
+        if not ticker:
+            return None
+        key = ticker.upper()
+        try:
+            result = self._validated[key]
+        except KeyError:
+            result = self._aggregate_prefix(key)
+            with self._validated_lock:
+                self._validated[key] = result
+                self.computed += 1
+            return result
+        if result is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Sizes for /health."""
+        return {
+            'preference_tickers': len(self.preferences),
+            'validated_descriptions': len(self._descriptions),
+            'validated_tickers': sum(1 for row in self._validated.values() if row is not None),
+            'negative_tickers': sum(1 for row in self._validated.values() if row is None),
+            'hits': self.hits,
+            'negative_hits': self.negative_hits,
+            'computed_on_demand': self.computed,
+            'build_seconds': round(self.build_seconds, 3),
+            'preferences_current': self.covers_preferences(self.bloomberg_db_path),
+            'validated_current': self.covers_validated(self.validated_db_path)
+        }
+
+
+_index: Optional[TickerConventionIndex] = None
+_index_lock = threading.Lock()
+
+
+def load_ticker_convention_index(validated_db_path: Optional[str],
+                                 bloomberg_db_path: Optional[str]) -> Optional[TickerConventionIndex]:
+    """
+    Build the process-wide index (at startup, and again after a database refresh).
+
+    The new index is built completely before it replaces the old one, so
+    concurrent lookups see either the old or the new maps, never a mix.
+
+    Returns:
+        The new index, or None when disabled via TICKER_CONVENTION_INDEX=0
+    """
+    global _index
+    if not TICKER_CONVENTION_INDEX_ENABLED:
+        logger.info("Ticker convention index disabled (TICKER_CONVENTION_INDEX=0)")
+        return None
+    index = TickerConventionIndex.build(validated_db_path, bloomberg_db_path)
+    with _index_lock:
+        _index = index
+    logger.info(f"🏷️ Ticker convention index: {len(index.preferences)} preference tickers, "
+                f"{len(index._validated)} validated tickers in {index.build_seconds:.2f}s")
+    return index
+
+
+def get_ticker_convention_index() -> Optional[TickerConventionIndex]:
+    """Return the loaded index, or None if none has been built in this process."""
+    return _index
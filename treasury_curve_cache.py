@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Treasury Curve Cache
+====================
+
+Process-wide store for Treasury yield curves, shared by every bond in a
+portfolio request (and across requests handled by the same worker).
+
+Without this cache every bond calls fetch_treasury_yields() (SQL read on
+tsys_enhanced) and build_treasury_curve_from_yields() (PiecewiseLogCubicDiscount
+bootstrap) for its z-spread, so a 500-line portfolio on one settlement date
+does 500 identical reads and 500 identical bootstraps.
+
+Entries are keyed by (settlement date, curve source, tsys row version):
+- settlement date: 'YYYY-MM-DD' string the yields were requested for
+- curve source:    table + absolute database path
+- tsys version:    (mtime_ns, size) of the database file, its WAL file and
+                   the sidecar yield store, plus an in-process generation
+                   bumped by the updater
+
+Each entry holds the tenor → yield map and the bootstrapped curve handle.
+Eviction is a bounded LRU (TREASURY_CURVE_CACHE_SIZE, default 64 entries).
+"""
+
+import os
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from treasury_yield_store import yield_store_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = int(os.environ.get('TREASURY_CURVE_CACHE_SIZE', 64))
+CURVE_SOURCE_TABLE = 'tsys_enhanced'
+
+
+def _file_version(path: str) -> Tuple[int, int]:
+    """Cheap version stamp for a file: (mtime_ns, size), or (0, 0) if missing."""
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return 0, 0
+
+
+def _ensure_bootstrapped(curve_handle: Any):
+    """
+    Force the lazy bootstrap while the cache lock is held.
+
+    Piecewise curves bootstrap on first use; threads sharing a cached curve
+    must not trigger that calculation concurrently.
+    """
+    if curve_handle is None:
+        return
+    try:
+        curve_handle.currentLink().discount(1.0)
+    except Exception as e:
+        logger.debug(f"Curve bootstrap check failed: {e}")
+
+
+class TreasuryCurveEntry:
+    """Yields and (lazily) bootstrapped curve for one settlement date."""
+
+    __slots__ = ('treasury_yields', 'curve_handle', 'curve_built')
+
+    def __init__(self, treasury_yields: Dict[str, float]):
+        self.treasury_yields = treasury_yields
+        self.curve_handle = None
+        self.curve_built = False
+
+
+class TreasuryCurveCache:
+    """Bounded LRU of Treasury yield maps and bootstrapped curves."""
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        self.max_size = max(1, max_size)
+        self._entries: 'OrderedDict[tuple, TreasuryCurveEntry]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.curve_builds = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def generation(self) -> int:
+        """In-process counter bumped by invalidate()."""
+        return self._generation
+
+    def file_version(self, db_path: str) -> tuple:
+        """
+        File stamps of db_path's Treasury data (database, WAL, yield store).
+
+        Unlike data_version this is the same in every process on the host,
+        so it can key state shared between workers.
+        """
+        abs_path = os.path.abspath(db_path)
+        return (
+            _file_version(abs_path),
+            _file_version(abs_path + '-wal'),
+            _file_version(yield_store_path(abs_path))
+        )
+
+    def data_version(self, db_path: str) -> tuple:
+        """
+        Current tsys version for db_path (file stamps incl. the yield store + updater generation).
+
+        Per-process state derived from the curve can key on this to be
+        invalidated together with the curve entries.
+        """
+        return self.file_version(db_path) + (self._generation,)
+
+    def _make_key(self, trade_date: str, db_path: str) -> tuple:
+        abs_path = os.path.abspath(db_path)
+        return (trade_date, (CURVE_SOURCE_TABLE, abs_path), self.data_version(abs_path))
+
+    def _get_entry(self, trade_date: str, db_path: str,
+                   fetch_yields: Callable[[str, str], Dict[str, float]]) -> TreasuryCurveEntry:
+        key = self._make_key(trade_date, db_path)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        entry = TreasuryCurveEntry(fetch_yields(trade_date, db_path) or {})
+        # Don't pin empty results - the updater may be about to write this date
+        if entry.treasury_yields:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def get_yields(self, trade_date: str, db_path: str,
+                   fetch_yields: Callable[[str, str], Dict[str, float]]) -> Dict[str, float]:
+        """
+        Return the tenor → yield map for trade_date, fetching it once per version.
+
+        Args:
+            trade_date: Settlement date as 'YYYY-MM-DD'
+            db_path: Database holding the tsys_enhanced table
+            fetch_yields: Loader called on a miss, e.g. fetch_treasury_yields
+
+        Returns:
+            Dict like {'1Y': 0.045, '10Y': 0.043, ...} (empty if unavailable)
+        """
+        with self._lock:
+            return self._get_entry(trade_date, db_path, fetch_yields).treasury_yields
+
+    def get_curve(self, trade_date: str, db_path: str,
+                  fetch_yields: Callable[[str, str], Dict[str, float]],
+                  build_curve: Callable[[Dict[str, float], Any], Any],
+                  settlement_date: Any) -> Tuple[Dict[str, float], Optional[Any]]:
+        """
+        Return (treasury_yields, curve_handle) for trade_date.
+
+        The curve is bootstrapped at most once per cache entry; a failed build
+        is remembered as None so it is not retried for every bond.
+
+        Args:
+            trade_date: Settlement date as 'YYYY-MM-DD'
+            db_path: Database holding the tsys_enhanced table
+            fetch_yields: Loader called on a miss, e.g. fetch_treasury_yields
+            build_curve: Curve builder, e.g. build_treasury_curve_from_yields
+            settlement_date: Date passed through to build_curve
+
+        Returns:
+            Tuple of (yield dict, YieldTermStructureHandle or None)
+        """
+        with self._lock:
+            entry = self._get_entry(trade_date, db_path, fetch_yields)
+            if not entry.treasury_yields:
+                return entry.treasury_yields, None
+            if not entry.curve_built:
+                entry.curve_handle = build_curve(entry.treasury_yields, settlement_date)
+                entry.curve_built = True
+                self.curve_builds += 1
+            _ensure_bootstrapped(entry.curve_handle)
+            return entry.treasury_yields, entry.curve_handle
+
+    def invalidate(self):
+        """Drop every entry - called when the updater writes a new tsys row."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self.invalidations += 1
+        logger.info("🧹 Treasury curve cache invalidated")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for /health."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'curve_builds': self.curve_builds,
+                'entries': len(self._entries),
+                'max_entries': self.max_size,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+_curve_cache = TreasuryCurveCache()
+
+
+def get_treasury_curve_cache() -> TreasuryCurveCache:
+    """Return the process-wide Treasury curve cache."""
+    return _curve_cache
+
+
+def invalidate_treasury_curves():
+    """Invalidate cached curves after a new tsys_enhanced row is written."""
+    _curve_cache.invalidate()
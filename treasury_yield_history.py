@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Treasury Yield History
+======================
+
+The whole tsys_enhanced table held in memory as a dense NumPy array, so any
+historical settlement date resolves without SQL or row unpivoting.
+
+fetch_treasury_yields used to run `SELECT * FROM tsys_enhanced WHERE Date = ?`
+per call, unpivot the wide row column by column, and issue a second
+`Date <= ? ORDER BY Date DESC` query when the date was missing (weekends,
+holidays, today before the 3:30pm publish).
+
+Layout, per database file:
+- dates:  int64 array of date ordinals, sorted ascending
+- yields: float64 array, dates × tenors, in decimal (NaN = no quote)
+- tenors: tenor labels in tsys_enhanced column order ('1', '3', '1Y', '10Y'...)
+
+Rows from the sidecar yield store (treasury_yield_store, where the updater
+now writes) are overlaid on tsys_enhanced at load, tenor by tenor.
+
+"Most recent on or before" is one np.searchsorted. When the updater writes a
+new day (USTreasuryYieldFetcher.update_database, the cron endpoint) the row
+is appended in place instead of reloading the table. A main database changed
+by anything else (GCS re-download, external writer) is reloaded on next use;
+a changed sidecar only re-applies the overlay to the tsys_enhanced arrays.
+Lookups also give the store the chance to refresh itself from GCS (see
+TreasuryYieldStore.maybe_refresh), so other instances' uploads arrive too.
+
+TREASURY_YIELD_HISTORY=0 disables the array and falls back to SQL lookups.
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.database_manager import get_readonly_pool
+from treasury_yield_store import TENOR_COLUMNS as STORE_COLUMNS, get_treasury_yield_store
+
+logger = logging.getLogger(__name__)
+
+TREASURY_YIELD_HISTORY_ENABLED = os.environ.get('TREASURY_YIELD_HISTORY', '1') not in ('0', 'false', 'False')
+
+HISTORY_TABLE = 'tsys_enhanced'
+
+# Enhanced table has M1M, M2M, M3M, M6M, M1Y, M2Y, M3Y, M5Y, M7Y, M10Y, M20Y, M30Y
+TENOR_COLUMN = re.compile(r'^M\d+[MY]$')
+
+
+def tenor_label(column: str) -> str:
+    """Tenor key used by fetch_treasury_yields ('M10Y' -> '10Y', 'M1M' -> '1')."""
+    return column.replace('M', '')
+
+
+def date_ordinal(value: Any) -> int:
+    """Ordinal of a 'YYYY-MM-DD' string, date/datetime (incl. pandas Timestamp) or QuantLib Date."""
+    if isinstance(value, (date, datetime)):
+        return value.toordinal()
+    if hasattr(value, 'dayOfMonth'):
+        return date(value.year(), value.month(), value.dayOfMonth()).toordinal()
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+
+def _file_version(path: str) -> Tuple[int, int, int, int]:
+    """(mtime_ns, size) of the database and its WAL file."""
+    version = []
+    for candidate in (path, path + '-wal'):
+        try:
+            stat = os.stat(candidate)
+            version.extend((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            version.extend((0, 0))
+    return tuple(version)
+
+
+def _overlay(dates: np.ndarray, table: np.ndarray, extra_dates: np.ndarray,
+             extra: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Union of two dated tables; extra's non-NaN values win on shared dates."""
+    if not len(extra_dates):
+        return dates, table
+    merged = np.union1d(dates, extra_dates)
+    out = np.full((len(merged), table.shape[1]), np.nan)
+    out[np.searchsorted(merged, dates)] = table
+    positions = np.searchsorted(merged, extra_dates)
+    out[positions] = np.where(np.isnan(extra), out[positions], extra)
+    return merged, out
+
+
+class TreasuryYieldHistory:
+    """Dense dates × tenors yield array for one database's tsys_enhanced table."""
+
+    def __init__(self, db_path: str):
+        self.db_path = os.path.abspath(db_path)
+        self.columns: List[str] = []
+        self.tenors: List[str] = []
+        self._column_index: Dict[str, int] = {}
+        # (dates, yields) swapped as one tuple so lookups never see a half-applied append
+        self._arrays = (np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float64))
+        self._base = self._arrays           # tsys_enhanced alone, before the store overlay
+        self._version = None
+        self._lock = threading.Lock()
+        self.store = get_treasury_yield_store(self.db_path)
+        self.store_dates = 0
+        self.load_seconds = 0.0
+        self.loads = 0
+        self.store_reloads = 0
+        self.appends = 0
+        self.lookups = 0
+
+    def _current_version(self) -> tuple:
+        return _file_version(self.db_path), self.store.version()
+
+    def load(self) -> 'TreasuryYieldHistory':
+        """(Re)load the whole table with one query, then overlay the yield store."""
+        start = time.time()
+        with self._lock:
+            version = self._current_version()
+            pool = get_readonly_pool(self.db_path)
+            columns = [c for c in pool.schema().get(HISTORY_TABLE, []) if TENOR_COLUMN.match(c)]
+            if not columns:
+                raise ValueError(f"{HISTORY_TABLE} has no tenor columns in {self.db_path}")
+            rows = pool.query_all(
+                f"SELECT Date, {', '.join(columns)} FROM {HISTORY_TABLE} WHERE Date IS NOT NULL ORDER BY Date"
+            )
+
+            by_date: Dict[int, tuple] = {}
+            for row in rows:
+                try:
+                    by_date[date_ordinal(row[0])] = tuple(row)[1:]
+                except ValueError:
+                    continue
+            dates = np.fromiter(sorted(by_date), dtype=np.int64, count=len(by_date))
+            yields = np.array(
+                [[np.nan if v is None else v for v in by_date[d]] for d in dates.tolist()],
+                dtype=np.float64
+            ).reshape(len(dates), len(columns)) / 100.0   # table stores percent (4.5 = 4.5%)
+
+            self.columns = columns
+            self.tenors = [tenor_label(c) for c in columns]
+            self._column_index = {c: i for i, c in enumerate(columns)}
+            self._base = (dates, yields)
+            self._apply_store()
+            self._version = version
+            self.loads += 1
+        self.load_seconds = time.time() - start
+        logger.info(f"📈 Treasury yield history: {len(self)} dates × {len(columns)} tenors "
+                    f"from {self.db_path} (+{self.store_dates} from the yield store) "
+                    f"in {self.load_seconds * 1000:.0f}ms")
+        return self
+
+    def _apply_store(self):
+        """Overlay the yield store's rows on the tsys_enhanced arrays (lock held)."""
+        by_date: Dict[int, tuple] = {}
+        for row in self.store.rows():
+            try:
+                by_date[date_ordinal(row[0])] = row[1:]
+            except ValueError:
+                continue
+        indices = [STORE_COLUMNS.index(c) if c in STORE_COLUMNS else None for c in self.columns]
+        store_dates = np.fromiter(sorted(by_date), dtype=np.int64, count=len(by_date))
+        store_yields = np.array(
+            [[np.nan if i is None or by_date[d][i] is None else by_date[d][i] for i in indices]
+             for d in store_dates.tolist()],
+            dtype=np.float64
+        ).reshape(len(store_dates), len(self.columns)) / 100.0
+        self._arrays = _overlay(*self._base, store_dates, store_yields)
+        self.store_dates = len(store_dates)
+
+    def reload_store(self):
+        """Re-apply the yield store after it changed on disk; tsys_enhanced is not re-read."""
+        with self._lock:
+            version = self._current_version()
+            self._apply_store()
+            self._version = version
+            self.store_reloads += 1
+        logger.info(f"🔄 Treasury yield store {self.store.path} changed - "
+                    f"{self.store_dates} stored dates re-applied")
+
+    def is_current(self) -> bool:
+        return self._version == self._current_version()
+
+    def _ensure_current(self):
+        self.store.maybe_refresh()
+        if self.is_current():
+            return
+        if self._version is not None and self._version[0] == _file_version(self.db_path):
+            self.reload_store()
+        else:
+            logger.info(f"🔄 {self.db_path} changed on disk - reloading Treasury yield history")
+            self.load()
+
+    def lookup(self, trade_date: Any) -> Tuple[Optional[str], Dict[str, float]]:
+        """
+        Yields for the most recent date on or before trade_date.
+
+        Returns:
+            ('YYYY-MM-DD' of the row used, {'1Y': 0.045, '10Y': 0.043, ...}),
+            or (None, {}) when the history starts after trade_date
+        """
+        self._ensure_current()
+        dates, yields = self._arrays
+        self.lookups += 1
+        position = int(np.searchsorted(dates, date_ordinal(trade_date), side='right')) - 1
+        if position < 0:
+            return None, {}
+        row = yields[position].tolist()
+        matched = date.fromordinal(int(dates[position])).isoformat()
+        return matched, {tenor: value for tenor, value in zip(self.tenors, row) if value == value}
+
+    def latest_date(self) -> Optional[str]:
+        self._ensure_current()
+        dates = self._arrays[0]
+        return date.fromordinal(int(dates[-1])).isoformat() if len(dates) else None
+
+    def append(self, trade_date: Any, yields: Dict[str, float]):
+        """
+        Insert or overwrite one day in place after the updater wrote it
+        (to the yield store, or directly to tsys_enhanced).
+
+        Args:
+            trade_date: Date of the new row
+            yields: tsys_enhanced column → yield in percent, e.g. {'M10Y': 4.35}
+        """
+        ordinal = date_ordinal(trade_date)
+        with self._lock:
+            dates, table = self._arrays
+            row = np.full(len(self.columns), np.nan)
+            for column, value in yields.items():
+                index = self._column_index.get(column)
+                if index is not None and value is not None:
+                    row[index] = float(value) / 100.0
+
+            position = int(np.searchsorted(dates, ordinal))
+            if position < len(dates) and dates[position] == ordinal:
+                table = table.copy()
+                # UPDATE only sets the tenors it was given
+                table[position] = np.where(np.isnan(row), table[position], row)
+            else:
+                dates = np.insert(dates, position, ordinal)
+                table = np.insert(table, position, row, axis=0)
+            self._arrays = (dates, table)
+            self._version = self._current_version()
+            self.appends += 1
+
+    def __len__(self) -> int:
+        return len(self._arrays[0])
+
+    def stats(self) -> Dict[str, Any]:
+        """Sizes for /health."""
+        dates, yields = self._arrays
+        return {
+            'db_path': self.db_path,
+            'dates': len(dates),
+            'tenors': len(self.tenors),
+            'first_date': date.fromordinal(int(dates[0])).isoformat() if len(dates) else None,
+            'last_date': date.fromordinal(int(dates[-1])).isoformat() if len(dates) else None,
+            'load_ms': round(self.load_seconds * 1000, 1),
+            'loads': self.loads,
+            'store_path': self.store.path,
+            'store_dates': self.store_dates,
+            'store_reloads': self.store_reloads,
+            'appends': self.appends,
+            'lookups': self.lookups,
+            'approx_kb': round((dates.nbytes + yields.nbytes) / 1024, 1)
+        }
+
+
+_histories: Dict[str, TreasuryYieldHistory] = {}
+_failed_versions: Dict[str, tuple] = {}
+_histories_lock = threading.Lock()
+
+
+def get_treasury_yield_history(db_path: str) -> Optional[TreasuryYieldHistory]:
+    """
+    Process-wide history for db_path, loaded on first use.
+
+    Returns:
+        The history, or None when disabled or the table can't be loaded
+        (callers fall back to SQL; the load is retried once the file changes)
+    """
+    if not TREASURY_YIELD_HISTORY_ENABLED or not db_path:
+        return None
+    key = os.path.abspath(db_path)
+    history = _histories.get(key)
+    if history is not None:
+        return history
+    if _failed_versions.get(key) == _file_version(key):
+        return None
+    with _histories_lock:
+        if key not in _histories:
+            try:
+                _histories[key] = TreasuryYieldHistory(key).load()
+                _failed_versions.pop(key, None)
+            except Exception as e:
+                logger.warning(f"⚠️ Treasury yield history unavailable for {key}: {e}")
+                _failed_versions[key] = _file_version(key)
+                return None
+        return _histories[key]
+
+
+def record_treasury_yields(db_path: str, trade_date: Any, yields: Dict[str, float]):
+    """Append a day the updater just wrote to db_path (no-op if the history isn't loaded)."""
+    history = _histories.get(os.path.abspath(db_path)) if db_path else None
+    if history is not None:
+        history.append(trade_date, yields)
+
+
+def treasury_yield_history_stats() -> List[Dict[str, Any]]:
+    """Stats of every loaded history, for /health."""
+    return [history.stats() for history in list(_histories.values()) if history is not None]
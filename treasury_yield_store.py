@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Treasury Yield Store
+====================
+
+Daily Treasury yields in a small sidecar SQLite file next to bonds_data.db,
+so ingesting a day is a one-row upsert rather than a write to the full bond
+database (and, on App Engine, a download / VACUUM / upload of it).
+
+    treasury_yields(Date PRIMARY KEY, M1M ... M30Y, source, updated_at)
+
+Same wide layout and percent units as tsys_enhanced. TreasuryYieldHistory
+overlays these rows on tsys_enhanced when it loads: a row here wins over the
+main table for its date, tenor by tenor (a NULL tenor keeps the main value).
+
+The file is versioned on its own:
+- revision:  PRAGMA user_version, bumped once per write transaction
+- in GCS:    a separate object (STORE_FILENAME), uploaded with a generation
+             precondition so concurrent updaters can't overwrite each other
+- in memory: its (mtime_ns, size) stamp; a serving process that sees it
+             change re-applies the overlay without reloading tsys_enhanced
+
+A serving instance picks up the updater's uploads through a refresher the
+GCS database manager registers: at most every
+TREASURY_YIELD_STORE_REFRESH_SECONDS (default 300; 0 disables) a background
+thread compares the object's generation with the local copy's and downloads
+it only when it changed.
+
+TREASURY_YIELD_STORE overrides the file location (default: treasury_yields.db
+in the main database's directory).
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.database_manager import get_readonly_pool
+
+logger = logging.getLogger(__name__)
+
+STORE_TABLE = 'treasury_yields'
+STORE_FILENAME = 'treasury_yields.db'
+DEFAULT_SOURCE = 'US Treasury Direct'
+REFRESH_SECONDS = float(os.environ.get('TREASURY_YIELD_STORE_REFRESH_SECONDS', 300))
+
+# tsys_enhanced tenor columns, in table order
+TENOR_COLUMNS = ['M1M', 'M2M', 'M3M', 'M6M', 'M1Y', 'M2Y', 'M3Y', 'M5Y', 'M7Y', 'M10Y', 'M20Y', 'M30Y']
+
+
+def yield_store_path(db_path: str) -> str:
+    """Sidecar store for the main database at db_path."""
+    configured = os.environ.get('TREASURY_YIELD_STORE')
+    if configured:
+        return os.path.abspath(configured)
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), STORE_FILENAME)
+
+
+def _file_version(path: str) -> Tuple[int, int]:
+    """(mtime_ns, size) of the store file, or (0, 0) if it doesn't exist yet."""
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return 0, 0
+
+
+def _iso_date(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return date.fromisoformat(str(value)[:10]).isoformat()
+
+
+class TreasuryYieldStore:
+    """Append-only (upsert-by-date) yield rows in one sidecar file."""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.rows_written = 0
+        self._refresher: Optional[Callable[[], bool]] = None
+        self._refresh_interval = REFRESH_SECONDS
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._refresh_due = 0.0
+        self.refresh_checks = 0
+        self.refreshes = 0
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def version(self) -> Tuple[int, int]:
+        return _file_version(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        columns = ', '.join(f'{column} REAL' for column in TENOR_COLUMNS)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {STORE_TABLE} "
+                     f"(Date TEXT PRIMARY KEY, {columns}, source TEXT, updated_at TEXT)")
+        return conn
+
+    def _read(self, query: str, params: tuple = ()) -> List[tuple]:
+        if not self.exists():
+            return []
+        try:
+            return [tuple(row) for row in get_readonly_pool(self.path).query_all(query, params)]
+        except sqlite3.OperationalError as e:
+            logger.warning(f"⚠️ Treasury yield store {self.path} unreadable: {e}")
+            return []
+
+    def set_refresher(self, refresher: Optional[Callable[[], bool]], interval: float = REFRESH_SECONDS):
+        """
+        Register refresher() to bring the local file up to date with its remote
+        copy (True when it downloaded a new one); maybe_refresh() runs it.
+        """
+        self._refresher = refresher if interval > 0 else None
+        self._refresh_interval = interval
+        self._refresh_due = time.monotonic() + interval
+
+    def maybe_refresh(self):
+        """Start a background refresh when one is due; never blocks the caller."""
+        if self._refresher is None or time.monotonic() < self._refresh_due:
+            return
+        with self._lock:
+            if time.monotonic() < self._refresh_due or (self._refresh_thread and self._refresh_thread.is_alive()):
+                return
+            self._refresh_due = time.monotonic() + self._refresh_interval
+            self._refresh_thread = threading.Thread(target=self._refresh, name='treasury-yield-store-refresh',
+                                                    daemon=True)
+            self._refresh_thread.start()
+
+    def _refresh(self):
+        self.refresh_checks += 1
+        try:
+            if self._refresher():
+                self.refreshes += 1
+                logger.info(f"📥 Treasury yield store {self.path} refreshed from GCS (revision {self.revision()})")
+        except Exception as e:
+            logger.warning(f"⚠️ Treasury yield store refresh failed: {e}")
+
+    def upsert(self, trade_date: Any, yields: Dict[str, float], source: str = DEFAULT_SOURCE) -> int:
+        """
+        Write one day (percent yields by tsys column, e.g. {'M10Y': 4.35}).
+
+        Returns:
+            The store revision after the write
+        """
+        return self.bulk_upsert([(trade_date, yields)], source)
+
+    def bulk_upsert(self, rows: Iterable[Tuple[Any, Dict[str, float]]], source: str = DEFAULT_SOURCE) -> int:
+        """
+        Write many days in one transaction (backfill).
+
+        Tenors missing from a day's dict keep any value already stored;
+        keys that aren't tsys tenor columns are ignored.
+
+        Returns:
+            The store revision after the write
+        """
+        updated_at = datetime.utcnow().isoformat(timespec='seconds')
+        params = [
+            (_iso_date(trade_date),) + tuple(yields.get(column) for column in TENOR_COLUMNS) + (source, updated_at)
+            for trade_date, yields in rows
+        ]
+        assignments = ', '.join(f'{column} = COALESCE(excluded.{column}, {column})' for column in TENOR_COLUMNS)
+        sql = (f"INSERT INTO {STORE_TABLE} (Date, {', '.join(TENOR_COLUMNS)}, source, updated_at) "
+               f"VALUES ({', '.join('?' * (len(TENOR_COLUMNS) + 3))}) "
+               f"ON CONFLICT(Date) DO UPDATE SET {assignments}, "
+               f"source = excluded.source, updated_at = excluded.updated_at")
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany(sql, params)
+                    revision = conn.execute('PRAGMA user_version').fetchone()[0] + 1
+                    conn.execute(f'PRAGMA user_version = {int(revision)}')
+            finally:
+                conn.close()
+            self.writes += 1
+            self.rows_written += len(params)
+        logger.info(f"📈 Treasury yield store: {len(params)} day(s) written to {self.path} (revision {revision})")
+        return revision
+
+    def revision(self) -> int:
+        rows = self._read('PRAGMA user_version')
+        return rows[0][0] if rows else 0
+
+    def rows(self) -> List[tuple]:
+        """Every stored day as (Date, M1M, ..., M30Y) in TENOR_COLUMNS order, oldest first."""
+        return self._read(f"SELECT Date, {', '.join(TENOR_COLUMNS)} FROM {STORE_TABLE} ORDER BY Date")
+
+    def lookup(self, trade_date: Any) -> Tuple[Optional[str], Dict[str, float]]:
+        """
+        Stored day on or before trade_date.
+
+        Returns:
+            ('YYYY-MM-DD', {tsys column: percent yield}) or (None, {})
+        """
+        rows = self._read(f"SELECT Date, {', '.join(TENOR_COLUMNS)} FROM {STORE_TABLE} "
+                          f"WHERE Date <= ? ORDER BY Date DESC LIMIT 1", (_iso_date(trade_date),))
+        if not rows:
+            return None, {}
+        row = rows[0]
+        return row[0], {column: value for column, value in zip(TENOR_COLUMNS, row[1:]) if value is not None}
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and revision for /health."""
+        span = self._read(f"SELECT COUNT(*), MIN(Date), MAX(Date) FROM {STORE_TABLE}")
+        count, first, last = span[0] if span else (0, None, None)
+        return {
+            'path': self.path,
+            'exists': self.exists(),
+            'revision': self.revision(),
+            'dates': count,
+            'first_date': first,
+            'last_date': last,
+            'size_kb': round(self.version()[1] / 1024, 1),
+            'writes': self.writes,
+            'rows_written': self.rows_written,
+            'refresh_checks': self.refresh_checks,
+            'refreshes': self.refreshes
+        }
+
+
+_stores: Dict[str, TreasuryYieldStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_treasury_yield_store(db_path: str) -> TreasuryYieldStore:
+    """Process-wide store for the main database at db_path."""
+    path = yield_store_path(db_path)
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(path, TreasuryYieldStore(path))
+    return store
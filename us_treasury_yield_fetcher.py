@@ -10,16 +10,24 @@ Treasury Yield Curve Methodology:
 - Uses most recently auctioned "on-the-run" securities
 - Monotone convex spline interpolation
 - Based on bid-side market price quotations at ~3:30 PM ET
+
+Fetched days go to the sidecar Treasury yield store (treasury_yield_store),
+one upserted row per day; bonds_data.db itself is never written.
+
+Backfill years of history in one pass:
+    python us_treasury_yield_fetcher.py --backfill 2015:2024
 """
 
+import argparse
 import requests
-import pandas as pd
 from datetime import datetime, timedelta
-import sqlite3
 import logging
 import xml.etree.ElementTree as ET
 from typing import Dict, Optional
 from database_config import BONDS_DATA_DB
+from treasury_curve_cache import invalidate_treasury_curves
+from treasury_yield_history import record_treasury_yields
+from treasury_yield_store import TreasuryYieldStore, yield_store_path
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -69,43 +77,50 @@ class USTreasuryYieldFetcher:
         if date is None:
             date = datetime.now()
         
-        year = date.year
-        
         try:
-            # Fetch data from Treasury website
-            url = self.yield_curve_url.format(year=year)
-            logger.info(f"Fetching Treasury yields from: {url}")
-            
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            
-            # Parse the response (could be XML or HTML table)
-            # Treasury typically provides data in XML format
-            if 'xml' in response.headers.get('Content-Type', ''):
-                return self._parse_xml_response(response.text, date)
-            else:
-                return self._parse_html_response(response.text, date)
-                
+            return self.fetch_year(date.year).get(date.strftime('%Y-%m-%d'), {})
         except Exception as e:
             logger.error(f"Failed to fetch Treasury yields: {e}")
             # Try alternative parsing method
             return self._fetch_alternative_format(date)
     
+    def fetch_year(self, year: int) -> Dict[str, Dict[str, float]]:
+        """
+        Every published day of one year (the Treasury page is per year).
+        
+        Returns:
+            {'YYYY-MM-DD': {tenor code: yield in percent}}
+        """
+        # Fetch data from Treasury website
+        url = self.yield_curve_url.format(year=year)
+        logger.info(f"Fetching Treasury yields from: {url}")
+        
+        response = requests.get(url, timeout=30)
+        response.raise_for_status()
+        
+        # Parse the response (could be XML or HTML table)
+        # Treasury typically provides data in XML format
+        if 'xml' in response.headers.get('Content-Type', ''):
+            return self._parse_xml_entries(response.text)
+        return self._parse_html_rows(response.text)
+    
     def _parse_xml_response(self, xml_data: str, target_date: datetime) -> Dict[str, float]:
         """Parse XML response from Treasury."""
+        return self._parse_xml_entries(xml_data).get(target_date.strftime('%Y-%m-%d'), {})
+    
+    def _parse_xml_entries(self, xml_data: str) -> Dict[str, Dict[str, float]]:
+        """Yields of every <entry> in an XML response, by ISO date."""
         try:
             root = ET.fromstring(xml_data)
-            
-            # Find data for target date
-            date_str = target_date.strftime('%Y-%m-%d')
-            yields = {}
+            by_date = {}
             
             # Treasury XML structure varies, but typically:
             # <entry><date>2025-07-31</date><bc_1month>5.25</bc_1month>...</entry>
             for entry in root.findall('.//entry'):
                 entry_date = entry.find('date')
-                if entry_date is not None and entry_date.text == date_str:
+                if entry_date is not None and entry_date.text:
                     # Extract yields
+                    yields = by_date.setdefault(entry_date.text.strip()[:10], {})
                     for tenor_us, tenor_db in self.tenor_mapping.items():
                         # XML tags might be like 'bc_1month', 'bc_2year', etc.
                         tag_variations = [
@@ -123,7 +138,7 @@ class USTreasuryYieldFetcher:
                                 except ValueError:
                                     continue
             
-            return yields
+            return {day: yields for day, yields in by_date.items() if yields}
             
         except Exception as e:
             logger.error(f"XML parsing failed: {e}")
@@ -131,8 +146,13 @@ class USTreasuryYieldFetcher:
     
     def _parse_html_response(self, html_data: str, target_date: datetime) -> Dict[str, float]:
         """Parse HTML table response from Treasury."""
+        return self._parse_html_rows(html_data).get(target_date.strftime('%Y-%m-%d'), {})
+    
+    def _parse_html_rows(self, html_data: str) -> Dict[str, Dict[str, float]]:
+        """Yields of every row of the HTML table, by ISO date."""
         try:
-            # Use pandas to parse HTML tables
+            # Use pandas to parse HTML tables (only needed for this format)
+            import pandas as pd
             tables = pd.read_html(html_data)
             
             if not tables:
@@ -140,36 +160,31 @@ class USTreasuryYieldFetcher:
             
             # Usually the first table contains the yield curve data
             df = tables[0]
-            
-            # Find row for target date
-            date_str = target_date.strftime('%m/%d/%Y')
             date_col = df.columns[0]  # Usually 'Date' is first column
+            # Map columns to our tenor codes (clean names, skip the date column)
+            tenor_cols = [(col, self.tenor_mapping[col.strip()]) for col in df.columns[1:]
+                          if col.strip() in self.tenor_mapping]
             
-            target_row = df[df[date_col] == date_str]
-            if target_row.empty:
-                # Try alternative date format
-                date_str = target_date.strftime('%Y-%m-%d')
-                target_row = df[df[date_col] == date_str]
-            
-            if not target_row.empty:
-                yields = {}
-                row = target_row.iloc[0]
-                
-                # Map columns to our tenor codes
-                for col in df.columns[1:]:  # Skip date column
-                    # Clean column name (remove extra spaces)
-                    col_clean = col.strip()
-                    
-                    # Only process columns we have mappings for
-                    if col_clean in self.tenor_mapping:
-                        try:
-                            value = float(row[col])
-                            if not pd.isna(value):
-                                yields[self.tenor_mapping[col_clean]] = value
-                        except:
-                            continue
+            by_date = {}
+            for _, row in df.iterrows():
+                # Dates are MM/DD/YYYY, occasionally already ISO
+                raw_date = str(row[date_col]).strip()
+                try:
+                    day = datetime.strptime(raw_date, '%m/%d/%Y').strftime('%Y-%m-%d')
+                except ValueError:
+                    day = raw_date[:10]
                 
-                return yields
+                yields = {}
+                for col, tenor in tenor_cols:
+                    try:
+                        value = float(row[col])
+                        if not pd.isna(value):
+                            yields[tenor] = value
+                    except (TypeError, ValueError):
+                        continue
+                if yields:
+                    by_date[day] = yields
+            return by_date
             
         except Exception as e:
             logger.error(f"HTML parsing failed: {e}")
@@ -222,58 +237,78 @@ class USTreasuryYieldFetcher:
         
         return {}
     
-    def update_database(self, yields: Dict[str, float], date: datetime) -> bool:
-        """Update the tsys_enhanced table with fetched yields."""
+    def update_database(self, yields: Dict[str, float], date: datetime,
+                        store_path: Optional[str] = None) -> bool:
+        """
+        Upsert one day into the Treasury yield store.
+        
+        Args:
+            yields: Tenor code → yield in percent
+            date: Trade date of the yields
+            store_path: Store file to write (default: the sidecar of BONDS_DATA_DB,
+                        which the serving process merges and hot-reloads)
+        """
         if not yields:
             logger.warning("No yields to update")
             return False
         
+        date_str = date.strftime('%Y-%m-%d')
         try:
-            with sqlite3.connect(BONDS_DATA_DB) as conn:
-                cursor = conn.cursor()
-                date_str = date.strftime('%Y-%m-%d')
-                
-                # Check if date exists
-                cursor.execute("SELECT COUNT(*) FROM tsys_enhanced WHERE Date = ?", (date_str,))
-                exists = cursor.fetchone()[0] > 0
-                
-                if exists:
-                    # Update existing
-                    set_parts = [f"{tenor} = ?" for tenor in yields.keys()]
-                    values = list(yields.values()) + [date_str]
-                    
-                    query = f"""
-                        UPDATE tsys_enhanced 
-                        SET {', '.join(set_parts)}, 
-                            updated_at = CURRENT_TIMESTAMP,
-                            source = 'US Treasury Direct'
-                        WHERE Date = ?
-                    """
-                    cursor.execute(query, values)
-                else:
-                    # Insert new
-                    columns = ['Date'] + list(yields.keys()) + ['source']
-                    values = [date_str] + list(yields.values()) + ['US Treasury Direct']
-                    
-                    placeholders = ', '.join(['?' for _ in values])
-                    columns_str = ', '.join(columns)
-                    
-                    query = f"INSERT INTO tsys_enhanced ({columns_str}) VALUES ({placeholders})"
-                    cursor.execute(query, values)
-                
-                conn.commit()
-                logger.info(f"Updated yields for {date_str}: {yields}")
-                return True
-                
+            TreasuryYieldStore(store_path or yield_store_path(str(BONDS_DATA_DB))).upsert(date_str, yields)
+            logger.info(f"Updated yields for {date_str}: {yields}")
         except Exception as e:
             logger.error(f"Database update failed: {e}")
             return False
+        
+        if store_path is None:
+            # New day for the local database - append it to the in-memory history
+            record_treasury_yields(str(BONDS_DATA_DB), date_str, yields)
+        # Cached curves are now stale
+        invalidate_treasury_curves()
+        return True
+    
+    def backfill(self, start_year: int, end_year: int, store_path: Optional[str] = None) -> int:
+        """
+        Fetch whole years and write them to the yield store in one transaction.
+        
+        Returns:
+            Number of days written
+        """
+        rows = {}
+        for year in range(start_year, end_year + 1):
+            try:
+                year_rows = self.fetch_year(year)
+            except Exception as e:
+                logger.error(f"Failed to fetch Treasury yields for {year}: {e}")
+                continue
+            logger.info(f"📅 {year}: {len(year_rows)} days")
+            rows.update(year_rows)
+        
+        if not rows:
+            logger.warning("No yields to backfill")
+            return 0
+        TreasuryYieldStore(store_path or yield_store_path(str(BONDS_DATA_DB))).bulk_upsert(sorted(rows.items()))
+        # The serving process picks the store change up on its next lookup
+        invalidate_treasury_curves()
+        return len(rows)
 
 
 def main():
     """Main function to fetch and update Treasury yields."""
+    parser = argparse.ArgumentParser(description='Fetch US Treasury par yields into the yield store')
+    parser.add_argument('--backfill', metavar='START[:END]',
+                        help='Ingest whole years of history in one pass, e.g. 2015:2024')
+    parser.add_argument('--store', help='Yield store file (default: next to bonds_data.db)')
+    args = parser.parse_args()
+    
     fetcher = USTreasuryYieldFetcher()
     
+    if args.backfill:
+        start_year, _, end_year = args.backfill.partition(':')
+        days = fetcher.backfill(int(start_year), int(end_year or start_year), args.store)
+        print(f"\n✅ Backfilled {days} days" if days else "\n❌ No yield data retrieved")
+        return
+    
     # Fetch today's yields (or most recent business day)
     today = datetime.now()
     
@@ -295,7 +330,7 @@ def main():
             print(f"  {tenor}: {rate:.2f}%")
         
         # Update database
-        if fetcher.update_database(yields, today):
+        if fetcher.update_database(yields, today, args.store):
             print("\n✅ Database updated successfully!")
         else:
             print("\n❌ Failed to update database")
@@ -14,19 +14,113 @@ ENHANCED FEATURES:
 - filter_days: Number of days from settlement
 - days_from_settlement in response data
 - Enhanced metadata and error handling
+
+Flows for the whole request are projected in one pass by cash_flow_engine
+(columnar arrays, masks for the filters, grouped sum for the portfolio);
+descriptions are parsed once per distinct string. cash_flow_ladder() buckets
+the same flows by month, quarter or custom edges (see cash_flow_ladder).
 """
 
 import QuantLib as ql
-from datetime import datetime, timedelta
-import pandas as pd
-import numpy as np
-from typing import List, Dict, Any, Optional
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 import re
-import json
+
+from cash_flow_engine import (CashFlowColumns, project_cash_flows, bond_records, portfolio_records,
+                              day_count_for)
+from cash_flow_ladder import CashFlowLadder, DEFAULT_HORIZON_YEARS
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MATURITY = date(2030, 12, 31)
+
+FRACTION_MAP = {
+    '⅛': 0.125, '¼': 0.25, '⅜': 0.375, '½': 0.5,
+    '⅝': 0.625, '¾': 0.75, '⅞': 0.875,
+    '1/8': 0.125, '1/4': 0.25, '3/8': 0.375, '1/2': 0.5,
+    '5/8': 0.625, '3/4': 0.75, '7/8': 0.875
+}
+
+COUPON_PATTERNS = [re.compile(pattern) for pattern in (
+    r'(\d+)\s*([⅛¼⅜½⅝¾⅞]|\d/\d)',
+    r'(\d+\.\d+)%?',
+    r'(\d+)%',
+    r'\b(\d+\.?\d*)\s*(?=%|$)',
+)]
+
+# (pattern, year first)
+MATURITY_PATTERNS = [(re.compile(pattern), year_first) for pattern, year_first in (
+    (r'(\d{1,2})/(\d{1,2})/(\d{2,4})', False),
+    (r'(\d{1,2})-(\d{1,2})-(\d{2,4})', False),
+    (r'(\d{2})(\d{2})(\d{2})', False),
+    (r'(\d{4})-(\d{1,2})-(\d{1,2})', True),
+)]
+
+
+def _extract_coupon_rate(description: str) -> float:
+    """Extract coupon rate (percent) from description"""
+    if not description:
+        return 0.0
+    
+    for pattern in COUPON_PATTERNS:
+        match = pattern.search(description)
+        if match:
+            if len(match.groups()) == 2:
+                return float(match.group(1)) + FRACTION_MAP.get(match.group(2), 0)
+            return float(match.group(1))
+    
+    return 0.0
+
+
+def _extract_maturity_date(description: str) -> date:
+    """Extract maturity date from description (MM/DD/YY first); 2030-12-31 when none parses"""
+    try:
+        for pattern, year_first in MATURITY_PATTERNS:
+            match = pattern.search(description)
+            if match:
+                if year_first:
+                    year, month, day = (int(part) for part in match.groups())
+                else:
+                    month, day, year = (int(part) for part in match.groups())
+                
+                if year < 50:
+                    year += 2000
+                elif year < 100:
+                    year += 1900
+                
+                return date(year, month, day)
+        
+        return DEFAULT_MATURITY
+        
+    except Exception as e:
+        logger.error(f"Error extracting maturity date: {e}")
+        return DEFAULT_MATURITY
+
+
+@lru_cache(maxsize=8192)
+def _description_terms(description: str) -> Tuple[float, date, bool]:
+    """(coupon %, maturity, is_treasury) of a description, cached across requests"""
+    is_treasury = "TREASURY" in description.upper() or description.upper().startswith("T ")
+    return _extract_coupon_rate(description), _extract_maturity_date(description), is_treasury
+
+
+def _bond_terms(description, nominal) -> Optional[Tuple[float, date, float, bool]]:
+    """(coupon %, maturity, nominal, is_treasury), or None when the line can't be projected"""
+    try:
+        coupon, maturity, is_treasury = _description_terms(description)
+        return coupon, maturity, float(nominal), is_treasury
+    except Exception as e:
+        logger.error(f"Error parsing bond parameters: {e}")
+        return None
+
+
+def _aggregated_bonds(bonds: List[Dict[str, Any]]) -> List[bool]:
+    """Bonds that count towards portfolio totals: those with a description and a nominal"""
+    return [bool(bond.get('description', '')) and bool(bond.get('nominal', 0)) for bond in bonds]
+
+
 class XTrillionCashFlowCalculator:
     """
     Enhanced cash flow calculator with advanced filtering capabilities
@@ -69,246 +163,60 @@ class XTrillionCashFlowCalculator:
         """Convert QuantLib date to Python datetime"""
         return datetime(ql_date.year(), ql_date.month(), ql_date.dayOfMonth())
     
-    def parse_bond_parameters(self, description: str, nominal: float) -> Dict[str, Any]:
-        """Parse bond description to extract key parameters"""
-        try:
-            coupon_rate = self._extract_coupon_rate(description)
-            maturity_date = self._extract_maturity_date(description)
-            
-            is_treasury = "TREASURY" in description.upper() or description.upper().startswith("T ")
-            
-            if is_treasury:
-                payment_frequency = 2
-                day_count = ql.ActualActual(ql.ActualActual.ISDA)
-            else:
-                payment_frequency = 2
-                day_count = ql.Thirty360(ql.Thirty360.BondBasis)
-            
-            return {
-                'coupon_rate': coupon_rate / 100.0,
-                'maturity_date': maturity_date,
-                'nominal_amount': nominal,
-                'payment_frequency': payment_frequency,
-                'day_count': day_count,
-                'is_treasury': is_treasury
-            }
-            
-        except Exception as e:
-            logger.error(f"Error parsing bond parameters: {e}")
-            return None
-    
-    def _extract_coupon_rate(self, description: str) -> float:
-        """Extract coupon rate from description"""
-        if not description:
-            return 0.0
-        
-        fraction_map = {
-            '⅛': 0.125, '¼': 0.25, '⅜': 0.375, '½': 0.5,
-            '⅝': 0.625, '¾': 0.75, '⅞': 0.875,
-            '1/8': 0.125, '1/4': 0.25, '3/8': 0.375, '1/2': 0.5,
-            '5/8': 0.625, '3/4': 0.75, '7/8': 0.875
-        }
-        
-        patterns = [
-            r'(\d+)\s*([⅛¼⅜½⅝¾⅞]|\d/\d)',
-            r'(\d+\.\d+)%?',
-            r'(\d+)%',
-            r'\b(\d+\.?\d*)\s*(?=%|$)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, description)
-            if match:
-                if len(match.groups()) == 2:
-                    integer_part = float(match.group(1))
-                    fraction_part = match.group(2)
-                    fraction_value = fraction_map.get(fraction_part, 0)
-                    return integer_part + fraction_value
-                else:
-                    return float(match.group(1))
-        
-        return 0.0
-    
-    def _extract_maturity_date(self, description: str) -> Optional[ql.Date]:
-        """Extract maturity date from description"""
-        try:
-            patterns = [
-                r'(\d{1,2})/(\d{1,2})/(\d{2,4})',
-                r'(\d{1,2})-(\d{1,2})-(\d{2,4})',
-                r'(\d{2})(\d{2})(\d{2})',
-                r'(\d{4})-(\d{1,2})-(\d{1,2})',
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, description)
-                if match:
-                    if len(match.groups()) == 3:
-                        if pattern.startswith(r'(\d{4})'):
-                            year, month, day = match.groups()
-                        else:
-                            month, day, year = match.groups()
-                        
-                        month = int(month)
-                        day = int(day)
-                        year = int(year)
-                        
-                        if year < 50:
-                            year += 2000
-                        elif year < 100:
-                            year += 1900
-                        
-                        return ql.Date(day, month, year)
-            
-            return ql.Date(31, 12, 2030)
-            
-        except Exception as e:
-            logger.error(f"Error extracting maturity date: {e}")
-            return ql.Date(31, 12, 2030)
-    
-    def create_quantlib_bond(self, params: Dict[str, Any]) -> Optional[ql.Bond]:
-        """Create QuantLib bond object"""
-        try:
-            if not params or not params.get('maturity_date'):
-                return None
-            
-            schedule = ql.Schedule(
-                self.settlement_date,
-                params['maturity_date'],
-                ql.Period(ql.Semiannual),
-                ql.UnitedStates(ql.UnitedStates.GovernmentBond),
-                ql.Following,
-                ql.Following,
-                ql.DateGeneration.Backward,
-                False
-            )
-            
-            bond = ql.FixedRateBond(
-                2,
-                params['nominal_amount'],
-                schedule,
-                [params['coupon_rate']],
-                params['day_count']
-            )
-            
-            return bond
-            
-        except Exception as e:
-            logger.error(f"Error creating QuantLib bond: {e}")
-            return None
-    
+    def _project(self, bonds: List[Dict[str, Any]]) -> CashFlowColumns:
+        """Columnar flows of every bond in the request (unfiltered)"""
+        coupons, maturities, nominals, codes = [], [], [], []
+        for bond in bonds:
+            terms = _bond_terms(bond.get('description', ''), bond.get('nominal', 0))
+            coupon, maturity, nominal, is_treasury = terms if terms else (0.0, None, 0.0, False)
+            coupons.append(coupon)
+            maturities.append(maturity)
+            nominals.append(nominal)
+            codes.append(day_count_for(is_treasury))
+        return project_cash_flows(coupons, maturities, nominals, codes, self.settlement_date_py.date())
+
     def calculate_individual_cash_flows(self, description: str, nominal: float, 
                                        filter_type: str = "all", 
                                        filter_days: int = None) -> List[Dict[str, Any]]:
         """Calculate cash flow schedule with ENHANCED FILTERING"""
         try:
-            params = self.parse_bond_parameters(description, nominal)
-            if not params:
-                return []
-            
-            bond = self.create_quantlib_bond(params)
-            if not bond:
-                return []
-            
-            cash_flows = []
-            bond_schedule = bond.cashflows()
-            
-            for i, cf in enumerate(bond_schedule):
-                cf_date = cf.date()
-                cf_amount = cf.amount()
-                
-                if cf_date <= self.settlement_date:
-                    continue
-                
-                py_date = datetime(cf_date.year(), cf_date.month(), cf_date.dayOfMonth())
-                
-                if i == len(bond_schedule) - 1:
-                    cf_type = "maturity"
-                else:
-                    cf_type = "coupon"
-                
-                cash_flows.append({
-                    "date": py_date.strftime("%Y-%m-%d"),
-                    "amount": round(cf_amount, 2),
-                    "type": cf_type,
-                    "days_from_settlement": (py_date - self.settlement_date_py).days
-                })
-            
-            return self._apply_cash_flow_filters(cash_flows, filter_type, filter_days)
+            flows = self._project([{'description': description, 'nominal': nominal}])
+            return bond_records(flows.filter(filter_type, filter_days))[0]
             
         except Exception as e:
             logger.error(f"Error calculating cash flows: {e}")
             return []
     
-    def _apply_cash_flow_filters(self, cash_flows: List[Dict[str, Any]], 
-                                filter_type: str, filter_days: int) -> List[Dict[str, Any]]:
-        """Apply ADVANCED filtering logic to cash flows"""
-        try:
-            if not cash_flows:
-                return []
-            
-            cash_flows.sort(key=lambda x: x['date'])
-            
-            if filter_type == "next":
-                return [cash_flows[0]] if cash_flows else []
-            
-            elif filter_type == "period" and filter_days is not None:
-                filtered_flows = []
-                for cf in cash_flows:
-                    if cf['days_from_settlement'] <= filter_days:
-                        filtered_flows.append(cf)
-                return filtered_flows
-            
-            else:
-                return cash_flows
-                
-        except Exception as e:
-            logger.error(f"Error applying cash flow filters: {e}")
-            return cash_flows
-    
     def aggregate_portfolio_cash_flows(self, bonds: List[Dict[str, Any]], 
                                      filter_type: str = "all", 
                                      filter_days: int = None) -> List[Dict[str, Any]]:
         """Aggregate cash flows across portfolio with ENHANCED filtering"""
         try:
-            all_cash_flows = {}
-            
-            for bond in bonds:
-                description = bond.get('description', '')
-                nominal = bond.get('nominal', 0)
-                
-                if not description or not nominal:
-                    continue
-                
-                individual_flows = self.calculate_individual_cash_flows(
-                    description, nominal, filter_type, filter_days
-                )
-                
-                for flow in individual_flows:
-                    date = flow['date']
-                    amount = flow['amount']
-                    
-                    if date not in all_cash_flows:
-                        all_cash_flows[date] = 0.0
-                    
-                    all_cash_flows[date] += amount
-            
-            portfolio_flows = []
-            for date in sorted(all_cash_flows.keys()):
-                cf_date = datetime.strptime(date, "%Y-%m-%d")
-                days_from_settlement = (cf_date - self.settlement_date_py).days
-                
-                portfolio_flows.append({
-                    "date": date,
-                    "amount": round(all_cash_flows[date], 2),
-                    "days_from_settlement": days_from_settlement
-                })
-            
-            return portfolio_flows
+            flows = self._project(bonds).filter(filter_type, filter_days)
+            return portfolio_records(flows.for_bonds(_aggregated_bonds(bonds)))
             
         except Exception as e:
             logger.error(f"Error aggregating portfolio cash flows: {e}")
             return []
     
+    def cash_flow_ladder(self, bonds: List[Dict[str, Any]], bucketing: str = "month",
+                         edges: Optional[List[Any]] = None,
+                         horizon_years: int = DEFAULT_HORIZON_YEARS) -> CashFlowLadder:
+        """Bucketed coupon / principal ladder of the bonds that count towards portfolio totals
+        (raises ValueError for bad bucketing parameters)"""
+        ladder = CashFlowLadder(self.settlement_date_py.date(), bucketing, edges, horizon_years)
+        instruments, nominals = [], []
+        for bond, included in zip(bonds, _aggregated_bonds(bonds)):
+            terms = _bond_terms(bond.get('description', ''), bond.get('nominal', 0)) if included else None
+            if terms is None:
+                ladder.skipped_bonds += 1
+                continue
+            coupon, maturity, nominal, is_treasury = terms
+            instruments.append((coupon, maturity, day_count_for(is_treasury)))
+            nominals.append(nominal)
+        ladder.add_lines(instruments, nominals)
+        return ladder
+    
     def format_api_response(self, bonds: List[Dict[str, Any]], 
                            context: str = "portfolio",
                            filter_type: str = "all",
@@ -321,8 +229,10 @@ class XTrillionCashFlowCalculator:
                 "filter_description": self._get_filter_description(filter_type, filter_days)
             }
             
+            flows = self._project(bonds).filter(filter_type, filter_days)
+            
             if context == "portfolio":
-                portfolio_flows = self.aggregate_portfolio_cash_flows(bonds, filter_type, filter_days)
+                portfolio_flows = portfolio_records(flows.for_bonds(_aggregated_bonds(bonds)))
                 return {
                     "portfolio_cash_flows": portfolio_flows,
                     "filter_applied": filter_info,
@@ -338,21 +248,7 @@ class XTrillionCashFlowCalculator:
                 }
             
             elif context == "individual":
-                individual_results = {}
-                for i, bond in enumerate(bonds):
-                    bond_key = f"bond_{i+1}"
-                    description = bond.get('description', '')
-                    nominal = bond.get('nominal', 0)
-                    
-                    cash_flows = self.calculate_individual_cash_flows(
-                        description, nominal, filter_type, filter_days
-                    )
-                    
-                    individual_results[bond_key] = {
-                        "description": description,
-                        "nominal": nominal,
-                        "cash_flows": cash_flows
-                    }
+                individual_results = self._individual_results(bonds, flows)
                 
                 return {
                     "individual_cash_flows": individual_results,
@@ -367,23 +263,8 @@ class XTrillionCashFlowCalculator:
                 }
             
             else:  # combined
-                portfolio_flows = self.aggregate_portfolio_cash_flows(bonds, filter_type, filter_days)
-                individual_results = {}
-                
-                for i, bond in enumerate(bonds):
-                    bond_key = f"bond_{i+1}"
-                    description = bond.get('description', '')
-                    nominal = bond.get('nominal', 0)
-                    
-                    cash_flows = self.calculate_individual_cash_flows(
-                        description, nominal, filter_type, filter_days
-                    )
-                    
-                    individual_results[bond_key] = {
-                        "description": description,
-                        "nominal": nominal,
-                        "cash_flows": cash_flows
-                    }
+                portfolio_flows = portfolio_records(flows.for_bonds(_aggregated_bonds(bonds)))
+                individual_results = self._individual_results(bonds, flows)
                 
                 return {
                     "portfolio_cash_flows": portfolio_flows,
@@ -412,6 +293,17 @@ class XTrillionCashFlowCalculator:
                 }
             }
     
+    def _individual_results(self, bonds: List[Dict[str, Any]], flows: CashFlowColumns) -> Dict[str, Any]:
+        """individual_cash_flows section: bond_N -> description, nominal, cash_flows"""
+        return {
+            f"bond_{i+1}": {
+                "description": bond.get('description', ''),
+                "nominal": bond.get('nominal', 0),
+                "cash_flows": cash_flows
+            }
+            for i, (bond, cash_flows) in enumerate(zip(bonds, bond_records(flows)))
+        }
+    
     def _get_filter_description(self, filter_type: str, filter_days: int) -> str:
         """Generate human-readable filter description"""
         if filter_type == "next":